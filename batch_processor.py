@@ -0,0 +1,292 @@
+"""
+batch_processor.py
+
+複数の (フォント, 設定) の組（ジョブ）を1つのプロセスでまとめて処理するバッチ実行。
+ジョブごとにPythonを起動し直すとfontToolsなどのインポートの時間が毎回かかるため、
+マニフェスト（YAML / JSONL）またはglobで指定した入力フォントのジョブを、起動済みのワーカープールで順に処理する。
+
+- 同じ入力フォント・同じvariationのジョブはまとめて同じワーカーで処理し、読み込みとインスタンス化を1度だけ行う。
+- ワーカーに同時に渡すグループはワーカー数までに抑え、--max-tasks-per-child でワーカーを定期的に作り直し、
+  --max-memory-mb でワーカーごとのメモリ上限を設けられる（上限を超えたグループは失敗として報告する）。
+- ジョブごとの結果（成功・失敗）は終わった順にJSONLで1行ずつ出力する。失敗したジョブがあれば終了コードは1になる。
+
+マニフェストの形式:
+  YAML: {defaults: {...共通の設定...}, jobs: [{input_font: ..., output_font: ..., ...}, ...]} またはジョブのリスト
+  JSONL: 1行に1ジョブの設定（JSONオブジェクト）
+各ジョブはconfig.yamlと同じ項目を持ち、config: <パス> を指定するとその設定ファイルを読み込んだうえで上書きする。
+id を指定すると結果の行に含まれる。
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+import yaml
+
+from effects.run_config import resolve_workers
+from font_processor import FontProcessor
+
+logger = logging.getLogger(__name__)
+
+# ワーカープロセスが異常終了した（メモリ上限を超えたなど）グループのエラーメッセージ
+WORKER_CRASHED = "ワーカープロセスが異常終了しました（メモリ不足など）"
+
+
+def load_manifest(path):
+    """マニフェスト（YAMLまたはJSONL）からジョブの設定（辞書）のリストを読み込む"""
+    defaults = {}
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = yaml.safe_load(f)
+            if isinstance(data, dict):
+                defaults = data.get("defaults") or {}
+                jobs = data.get("jobs") or []
+            elif isinstance(data, list):
+                jobs = data
+            else:
+                raise ValueError(f"マニフェストはジョブのリストか、defaults / jobs を持つマッピングで指定してください: {path}")
+    return [job_config(job, defaults) for job in jobs]
+
+
+def job_config(job, defaults=None):
+    """ジョブの設定を、共通の設定 → config: で指定した設定ファイル → ジョブ自身の項目 の順に重ねて作る"""
+    if not isinstance(job, dict):
+        raise ValueError(f"ジョブは設定のマッピングで指定してください: {job!r}")
+    config = dict(defaults or {})
+    if job.get("config"):
+        with open(job["config"], "r", encoding="utf-8") as f:
+            config.update(yaml.safe_load(f) or {})
+    config.update({key: value for key, value in job.items() if key != "config"})
+    return config
+
+
+def expand_inputs(patterns, base_config, output_dir):
+    """
+    globパターンに一致する入力フォントごとに、base_configのinput_font / output_fontを差し替えたジョブを作る。
+    出力先はoutput_dir/<入力フォントのファイル名>。複数のパターンに一致したフォントは1度だけ処理する。
+    """
+    jobs = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            logger.warning("入力フォントが見つかりません: %s", pattern)
+        for path in matches:
+            key = os.path.abspath(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            jobs.append(dict(base_config, input_font=path, output_font=os.path.join(output_dir, os.path.basename(path))))
+    return jobs
+
+
+def group_jobs(jobs):
+    """
+    同じ入力フォント・同じvariationのジョブを、読み込みを共有するグループにまとめる。
+    (ジョブ番号, 設定) のリストのリストを、各グループの最初のジョブの順に返す。
+    """
+    groups = {}
+    for index, config in enumerate(jobs):
+        variation = json.dumps(config.get("variation"), sort_keys=True, default=str)
+        key = (os.path.abspath(str(config.get("input_font"))), variation)
+        groups.setdefault(key, []).append((index, config))
+    return list(groups.values())
+
+
+def _result(index, config, **fields):
+    return {"job": index, "id": config.get("id"), "input_font": config.get("input_font"),
+            "output_font": config.get("output_font"), **fields}
+
+
+def iter_group(group, options=None):
+    """
+    グループのジョブを順に処理し、ジョブごとの結果（辞書）を終わるたびに返す。
+    入力フォントの読み込み（とインスタンス化）はグループで1度だけ行う（失敗した場合は次のジョブでやり直す）。
+    """
+    font_data = None
+    for index, config in group:
+        started = time.perf_counter()
+        try:
+            processor = FontProcessor(config_dict=config, **(options or {}))
+            if font_data is None:
+                font_data = processor.load_font_data()
+            report = processor.run(font_data=font_data)
+        except Exception as e:
+            logger.exception("ジョブ %d が失敗しました: %s", index, e)
+            yield _result(index, config, status="failed", error=f"{type(e).__name__}: {e}",
+                          seconds=round(time.perf_counter() - started, 6))
+            continue
+        # エフェクトの読み込み・適用の失敗はrun()の中で数えられるだけなので、エラーがあればジョブの失敗とする
+        errors = report["counters"].get("errors", 0)
+        if errors:
+            logger.error("ジョブ %d でエラーが %d 件発生しました", index, errors)
+            result = _result(index, config, status="failed", error=f"エフェクトの処理でエラーが{errors}件発生しました",
+                             counters=report["counters"], seconds=round(time.perf_counter() - started, 6))
+        else:
+            result = _result(index, config, status="ok", counters=report["counters"],
+                             seconds=round(time.perf_counter() - started, 6))
+        if "sweep" in report:
+            result["sweep"] = report["sweep"]
+        yield result
+
+
+def run_group(group, options=None):
+    """ワーカープロセスでグループを処理し、ジョブごとの結果のリストを返す"""
+    return list(iter_group(group, options))
+
+
+def _init_batch_worker(log_level, max_memory_mb):
+    """ワーカープロセスの初期化（ログの設定と、指定があればメモリ上限）"""
+    logging.basicConfig(level=log_level, format="%(levelname)s %(name)s: %(message)s")
+    if max_memory_mb:
+        import resource
+
+        limit = int(float(max_memory_mb) * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_batch(jobs, emit, jobs_in_parallel=1, options=None, max_tasks_per_child=None, max_memory_mb=None,
+              log_level="WARNING"):
+    """
+    ジョブを処理し、ジョブごとの結果をemit(結果の辞書)に渡す。失敗したジョブの数を返す。
+    jobs_in_parallelが1ならこのプロセスで順に処理し（結果はジョブごとに渡す）、2以上ならワーカープールで
+    グループごとに処理する（結果はグループが終わるたびに渡す）。
+    ワーカーが異常終了したときに処理中だったグループは、新しいプールで1度だけやり直す。
+    """
+    failed = 0
+
+    def report(result):
+        nonlocal failed
+        if result["status"] != "ok":
+            failed += 1
+        emit(result)
+
+    groups = group_jobs(jobs)
+    if jobs_in_parallel <= 1:
+        for group in groups:
+            for result in iter_group(group, options):
+                report(result)
+        return failed
+
+    import multiprocessing
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    def executor():
+        # ワーカーを作り直す設定はforkでは使えないので、その場合はspawnで起動する
+        context = multiprocessing.get_context("spawn") if max_tasks_per_child else None
+        return ProcessPoolExecutor(max_workers=jobs_in_parallel, mp_context=context,
+                                   initializer=_init_batch_worker, initargs=(log_level, max_memory_mb),
+                                   max_tasks_per_child=max_tasks_per_child)
+
+    queue = [(group, False) for group in reversed(groups)]
+    pool = executor()
+    pending = {}
+    try:
+        while queue or pending:
+            # 処理中のグループをワーカー数までに抑える（読み込んだフォントを抱えるワーカーが増えすぎないように）。
+            # やり直すグループは、どのグループがワーカーを落としたのか分かるように1つずつ処理する
+            while queue and len(pending) < jobs_in_parallel:
+                if pending and (queue[-1][1] or any(retried for _, retried in pending.values())):
+                    break
+                group, retried = queue.pop()
+                pending[pool.submit(run_group, group, options)] = (group, retried)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                group, retried = pending.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    if not retried:
+                        queue.append((group, True))
+                        continue
+                    results = [_result(index, config, status="failed", error=WORKER_CRASHED) for index, config in group]
+                except Exception as e:
+                    results = [_result(index, config, status="failed", error=f"{type(e).__name__}: {e}")
+                               for index, config in group]
+                for result in results:
+                    report(result)
+            if broken:
+                # 壊れたプールで処理中だった他のグループも同じ例外になるので、まとめてやり直す
+                for future, (group, retried) in pending.items():
+                    queue.append((group, retried))
+                pending = {}
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = executor()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="複数のフォント・設定にまとめてエフェクトを適用する")
+    parser.add_argument("manifests", nargs="*", help="マニフェスト（.yaml / .yml / .jsonl）のパス")
+    parser.add_argument("--inputs", nargs="+", default=[], metavar="GLOB",
+                        help="入力フォントのglobパターン（--configの設定を各フォントに適用し、--output-dirに出力する）")
+    parser.add_argument("--config", default=None, help="--inputsのジョブに使う設定ファイル（config.yaml）")
+    parser.add_argument("--output-dir", default=None, help="--inputsのジョブの出力先ディレクトリ")
+    parser.add_argument("--jobs", default="1",
+                        help="同時に処理するジョブのグループ数（ワーカープロセス数、0またはautoでCPUコア数）")
+    parser.add_argument("--max-tasks-per-child", type=int, default=None, metavar="N",
+                        help="ワーカーがN個のグループを処理するたびに作り直す（メモリの増加を抑える）")
+    parser.add_argument("--max-memory-mb", type=float, default=None, metavar="MB",
+                        help="ワーカーごとのメモリ上限（超えたグループは失敗として報告する）")
+    parser.add_argument("--results", default=None, metavar="PATH",
+                        help="ジョブごとの結果を書き出すJSONLファイル（省略時は標準出力）")
+    parser.add_argument("--glyph-cache", nargs="?", const=True, default=None, metavar="PATH",
+                        help="全ジョブでグリフキャッシュを使う")
+    parser.add_argument("--instance-cache", nargs="?", const=True, default=None, metavar="DIR",
+                        help="全ジョブでVariable Fontのインスタンスキャッシュを使う")
+    parser.add_argument("--corner-catalog", nargs="?", const=True, default=None, metavar="PATH",
+                        help="全ジョブでコーナーカタログを使う")
+    parser.add_argument("--pipeline", default=None, choices=FontProcessor.PIPELINE_MODES,
+                        help="全ジョブのエフェクトの適用方式")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="ログの出力レベル（ログは標準エラー出力に出る）")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+
+    jobs = []
+    for manifest in args.manifests:
+        jobs.extend(load_manifest(manifest))
+    if args.inputs:
+        if not args.output_dir:
+            parser.error("--inputs を使う場合は --output-dir を指定してください")
+        base = {}
+        if args.config:
+            with open(args.config, "r", encoding="utf-8") as f:
+                base = yaml.safe_load(f) or {}
+        jobs.extend(expand_inputs(args.inputs, base, args.output_dir))
+    if not jobs:
+        parser.error("ジョブがありません（マニフェストまたは --inputs を指定してください）")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {"glyph_cache": args.glyph_cache, "instance_cache": args.instance_cache,
+               "corner_catalog": args.corner_catalog, "pipeline": args.pipeline}
+    out = open(args.results, "w", encoding="utf-8") if args.results else sys.stdout
+
+    def emit(result):
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+    try:
+        failed = run_batch(jobs, emit, resolve_workers(args.jobs), options, args.max_tasks_per_child,
+                           args.max_memory_mb, args.log_level)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    logger.info("%d件のジョブのうち%d件が失敗しました", len(jobs), failed)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
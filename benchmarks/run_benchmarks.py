@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py
+
+合成フォント（synthetic_fonts.py）を使ったRoundCornersEffectのベンチマーク。
+TrueType / CFF の両方の経路について、グリフ数・輪郭の複雑さを変えたケースごとに
+処理速度（glyphs/sec）・ピークメモリ（RSS）・出力サイズを計測し、
+結果をJSONL（既定: benchmarks/results.jsonl）に追記して前回の結果と比較する。
+
+各ケースは別プロセス（spawn）で実行するので、ピークRSSはケースごとの値になる。
+
+使い方:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --glyphs 2000 --profiles cjk --workers 4 --repeat 3
+    python benchmarks/run_benchmarks.py --no-save        # 結果を記録しない
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, "results.jsonl")
+
+# 輪郭の複雑さのプロファイル（complexity: 漢字風グリフ1つあたりの画数）
+PROFILES = {
+    "latin": {"complexity": 2, "cjk_ratio": 0.0},
+    "cjk": {"complexity": 10, "cjk_ratio": 1.0},
+    "cjk_dense": {"complexity": 24, "cjk_ratio": 1.0},
+}
+
+
+def _peak_rss_mb():
+    """このプロセスのピークRSS（MB）。取得できない環境では None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxはキロバイト、macOSはバイト単位
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def run_case(case):
+    """
+    1ケース分のベンチマーク（別プロセスで実行される）。
+    フォント生成 → (読み込み → 角丸処理 → 保存) をrepeat回繰り返し、中央値を記録する。
+    """
+    import logging
+    from fontTools.ttLib import TTFont
+
+    from effects.round_corners_effect import RoundCornersEffect
+    from synthetic_fonts import build_font_bytes, outline_stats
+
+    logging.basicConfig(level=logging.ERROR)
+
+    source = build_font_bytes(
+        glyph_count=case["glyphs"], complexity=case["complexity"],
+        cff=case["format"] == "cff", cjk_ratio=case["cjk_ratio"], seed=case["seed"],
+    )
+    stats = outline_stats(TTFont(io.BytesIO(source)))
+    baseline_rss = _peak_rss_mb()
+
+    params = {"radius": case["radius"], "quality_level": case["quality"], "workers": case["workers"],
+              "union": case.get("union", "auto"), "engine": case.get("engine", "kernel"),
+              "overlap_screen": {"on": True, "off": False}.get(case.get("overlap_screen"), "auto")}
+    apply_seconds = []
+    save_seconds = []
+    output = b""
+    effect = None
+    for _ in range(case["repeat"]):
+        font = TTFont(io.BytesIO(source))
+        effect = RoundCornersEffect(dict(params))
+        started = time.perf_counter()
+        font = effect.apply(font)
+        apply_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        buf = io.BytesIO()
+        font.save(buf)
+        save_seconds.append(time.perf_counter() - started)
+        output = buf.getvalue()
+
+    seconds = statistics.median(apply_seconds)
+    glyph_count = case["glyphs"] + 1  # .notdefを含む
+    return {
+        "seconds": round(seconds, 6),
+        "seconds_min": round(min(apply_seconds), 6),
+        "save_seconds": round(statistics.median(save_seconds), 6),
+        "glyphs_per_sec": round(glyph_count / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+        "input_bytes": len(source),
+        "output_bytes": len(output),
+        "contours": stats["contours"],
+        "points": stats["points"],
+        "counters": dict(effect.counters),
+        "stages": effect.timings.as_dict(),
+    }
+
+
+def case_id(case):
+    """結果を比較するためのケース識別子（union・overlap_screen・engineは既定値なら省略する）"""
+    cid = (f"{case['format']}/{case['profile']}/g{case['glyphs']}/c{case['complexity']}"
+           f"/r{case['radius']}/{case['quality']}/w{case['workers']}")
+    if case.get("union", "auto") != "auto":
+        cid += f"/u{case['union']}"
+    if case.get("overlap_screen", "auto") != "auto":
+        cid += f"/screen-{case['overlap_screen']}"
+    if case.get("engine", "kernel") != "kernel":
+        cid += f"/e{case['engine']}"
+    return cid
+
+
+def build_cases(args):
+    cases = []
+    for fmt in args.formats:
+        for profile in args.profiles:
+            settings = dict(PROFILES[profile])
+            if args.complexity is not None:
+                settings["complexity"] = args.complexity
+            cases.append({
+                "format": fmt,
+                "profile": profile,
+                "glyphs": args.glyphs,
+                "radius": args.radius,
+                "quality": args.quality,
+                "workers": args.workers,
+                "union": args.union,
+                "overlap_screen": args.overlap_screen,
+                "engine": args.engine,
+                "repeat": args.repeat,
+                "seed": args.seed,
+                **settings,
+            })
+    return cases
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    """保存済みの結果（JSONL）を読み込む"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_result(history, cid):
+    """同じケースの直近の結果"""
+    for record in reversed(history):
+        if record.get("case_id") == cid:
+            return record
+    return None
+
+
+def _change(new, old):
+    if new is None or not old:
+        return ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def run_benchmarks(cases, results_path=None, label=None):
+    """
+    全ケースを順に実行し、結果のレコードのリストを返す。
+    results_pathを指定すると、前回の結果と比較してからJSONLに追記する。
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    history = load_results(results_path) if results_path else []
+    meta = {
+        "timestamp": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+        "label": label,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+    records = []
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        cid = case_id(case)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_case, case).result()
+        record = {**meta, "case_id": cid, "case": case, **result}
+        records.append(record)
+
+        previous = previous_result(history, cid)
+        line = (f"{cid:<42} {result['glyphs_per_sec']:>10} glyphs/s  "
+                f"peak RSS {result['peak_rss_mb']} MB  output {result['output_bytes']} bytes")
+        if previous:
+            line += (f"  (前回比: 速度 {_change(result['glyphs_per_sec'], previous['glyphs_per_sec'])}, "
+                     f"RSS {_change(result['peak_rss_mb'], previous['peak_rss_mb'])}, "
+                     f"サイズ {_change(result['output_bytes'], previous['output_bytes'])})")
+        print(line)
+
+    if results_path:
+        with open(results_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合成フォントによるRoundCornersEffectのベンチマーク")
+    parser.add_argument("--formats", nargs="+", default=["truetype", "cff"], choices=["truetype", "cff"])
+    parser.add_argument("--profiles", nargs="+", default=["latin", "cjk"], choices=sorted(PROFILES))
+    parser.add_argument("--glyphs", type=int, default=300, help="グリフ数（.notdefを除く）")
+    parser.add_argument("--complexity", type=int, default=None, help="漢字風グリフの画数（プロファイルの値を上書き）")
+    parser.add_argument("--radius", type=float, default=40)
+    parser.add_argument("--quality", default="medium", choices=["low", "medium", "high"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--union", default="auto", choices=["auto", "pathops", "booleanoperations", "none"],
+                        help="パス統合（Union）のバックエンド")
+    parser.add_argument("--overlap-screen", default="auto", choices=["auto", "on", "off"],
+                        help="Unionの前に輪郭の重なりを調べ、重なりのないグリフの統合を省略するか")
+    parser.add_argument("--engine", default="kernel", choices=["kernel", "clipper"], help="角丸処理のエンジン")
+    parser.add_argument("--repeat", type=int, default=3, help="各ケースの繰り返し回数（中央値を記録）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None, help="結果に付けるラベル（ブランチ名など）")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="結果を追記するJSONLファイル")
+    parser.add_argument("--no-save", action="store_true", help="結果を記録しない（前回との比較も行わない）")
+    args = parser.parse_args(argv)
+
+    run_benchmarks(build_cases(args), None if args.no_save else args.results, label=args.label)
+
+
+if __name__ == "__main__":
+    main()
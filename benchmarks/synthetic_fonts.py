@@ -0,0 +1,157 @@
+"""
+synthetic_fonts.py
+
+ベンチマーク用の合成フォントをfontTools.fontBuilderで生成する。
+実フォントに依存せず、グリフ数・輪郭の複雑さを指定してTrueType/CFFの両方を作れる。
+
+グリフは次の2種類を混ぜて作る:
+- 欧文風: 矩形・L字・三角形（二次曲線を含む）など数個の輪郭
+- 漢字風: 横画・縦画・払いを模した多角形を多数重ねたもの（輪郭数 = complexity）
+"""
+
+import io
+import random
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+UNITS_PER_EM = 1000
+ADVANCE_WIDTH = 1000
+
+
+def _draw_polygon(pen, points):
+    pen.moveTo(points[0])
+    for point in points[1:]:
+        pen.lineTo(point)
+    pen.closePath()
+
+
+def _draw_latin_glyph(pen, rng):
+    """欧文風のグリフ（矩形・L字・曲線付きの三角形）"""
+    shape = rng.randrange(3)
+    x = rng.randint(60, 160)
+    w = rng.randint(250, 450)
+    if shape == 0:
+        _draw_polygon(pen, [(x, 0), (x, 700), (x + w, 700), (x + w, 0)])
+        # 内側の穴（逆回り）
+        _draw_polygon(pen, [(x + 80, 120), (x + w - 80, 120), (x + w - 80, 580), (x + 80, 580)])
+    elif shape == 1:
+        stem = rng.randint(80, 140)
+        _draw_polygon(pen, [(x, 0), (x, 700), (x + stem, 700), (x + stem, stem), (x + w, stem), (x + w, 0)])
+    else:
+        top = rng.randint(600, 720)
+        _draw_polygon(pen, [(x, 0), (x + w // 2, top), (x + w, 0)])
+        pen.moveTo((x + 60, 80))
+        pen.lineTo((x + w - 60, 80))
+        pen.qCurveTo((x + w // 2, top // 2), (x + 60, 80))
+        pen.closePath()
+
+
+def _draw_cjk_glyph(pen, rng, complexity):
+    """漢字風のグリフ。complexity本の画（重なりを含む）を描く"""
+    for _ in range(complexity):
+        kind = rng.random()
+        thickness = rng.randint(40, 80)
+        if kind < 0.4:
+            # 横画（右端に打ち込みの角を付ける）
+            x0 = rng.randint(60, 400)
+            x1 = rng.randint(x0 + 200, 940)
+            y = rng.randint(60, 860)
+            _draw_polygon(pen, [
+                (x0, y), (x0, y + thickness), (x1 - 30, y + thickness),
+                (x1, y + thickness + 25), (x1 + 20, y), (x1 - 10, y - 10),
+            ])
+        elif kind < 0.8:
+            # 縦画（下端を斜めに切る）
+            x = rng.randint(80, 880)
+            y0 = rng.randint(40, 400)
+            y1 = rng.randint(y0 + 250, 940)
+            _draw_polygon(pen, [
+                (x, y0 + 20), (x, y1), (x + thickness, y1 + 15),
+                (x + thickness, y0), (x + thickness // 2, y0 - 20),
+            ])
+        else:
+            # 払い（二次曲線で曲げた細長い形）
+            x0 = rng.randint(100, 600)
+            y0 = rng.randint(500, 900)
+            x1 = x0 + rng.randint(-300, 300)
+            y1 = rng.randint(40, max(41, y0 - 250))
+            cx = (x0 + x1) / 2 + rng.randint(-120, 120)
+            cy = (y0 + y1) / 2
+            pen.moveTo((x0, y0))
+            pen.qCurveTo((cx, cy), (x1, y1))
+            pen.lineTo((x1 + thickness, y1 + 10))
+            pen.qCurveTo((cx + thickness, cy), (x0 + thickness, y0))
+            pen.closePath()
+
+
+def glyph_names(glyph_count):
+    return [".notdef"] + [f"uni{0x4E00 + i:04X}" for i in range(glyph_count)]
+
+
+def build_font(glyph_count=200, complexity=8, cff=False, cjk_ratio=0.8, seed=0):
+    """
+    合成フォントを生成してTTFontとして返す。
+    glyph_count: グリフ数（.notdefを除く）
+    complexity: 漢字風グリフ1つあたりの画（輪郭）数
+    cff: TrueでCFF（.otf）、FalseでTrueType（glyf）
+    cjk_ratio: 漢字風グリフの割合（残りは欧文風）
+    seed: 乱数シード（同じ引数なら同じフォントになる）
+    """
+    rng = random.Random(seed)
+    names = glyph_names(glyph_count)
+
+    fb = FontBuilder(UNITS_PER_EM, isTTF=not cff)
+    fb.setupGlyphOrder(names)
+    fb.setupCharacterMap({0x4E00 + i: name for i, name in enumerate(names[1:])})
+
+    glyphs = {}
+    for name in names:
+        pen = T2CharStringPen(ADVANCE_WIDTH, None) if cff else TTGlyphPen(None)
+        if name != ".notdef":
+            if rng.random() < cjk_ratio:
+                _draw_cjk_glyph(pen, rng, complexity)
+            else:
+                _draw_latin_glyph(pen, rng)
+        glyphs[name] = pen.getCharString() if cff else pen.glyph()
+
+    if cff:
+        fb.setupCFF("SyntheticBench", {"FullName": "Synthetic Bench"}, glyphs, {})
+    else:
+        fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({name: (ADVANCE_WIDTH, 0) for name in names})
+    fb.setupHorizontalHeader(ascent=880, descent=-120)
+    fb.setupNameTable({"familyName": "Synthetic Bench", "styleName": "Regular"})
+    fb.setupOS2(sTypoAscender=880, sTypoDescender=-120, usWinAscent=880, usWinDescent=120)
+    fb.setupPost()
+
+    buf = io.BytesIO()
+    fb.save(buf)
+    buf.seek(0)
+    return TTFont(buf)
+
+
+def build_font_bytes(**kwargs):
+    """build_fontの結果をフォントファイルのバイト列として返す"""
+    buf = io.BytesIO()
+    build_font(**kwargs).save(buf)
+    return buf.getvalue()
+
+
+def outline_stats(font):
+    """フォント全体の輪郭数・点数（ベンチマーク結果の記録用）"""
+    from fontTools.pens.recordingPen import RecordingPen
+
+    contours = 0
+    points = 0
+    glyph_set = font.getGlyphSet()
+    for name in font.getGlyphOrder():
+        pen = RecordingPen()
+        glyph_set[name].draw(pen)
+        for op, args in pen.value:
+            if op == "moveTo":
+                contours += 1
+            points += len(args)
+    return {"contours": contours, "points": points}
@@ -11,6 +11,7 @@ from fontTools.ttLib import TTFont
 # プロジェクトのルートディレクトリをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from effects.glyph_outline import GlyphOutline
 from effects.round_corners_effect import RoundCornersEffect
 
 def debug_straight_line_detection():
@@ -80,22 +81,23 @@ def debug_straight_line_detection():
             print(f"座標数: {len(original_coords)}, 輪郭数: {len(original_endPts)}")
             
             # 輪郭を抽出
-            contours = effect._extract_contours_from_coordinates(
+            outline = effect._extract_contours_from_coordinates(
                 original_coords, original_endPts, original_flags
             )
             
             # 各輪郭で直線判定をテスト
-            for contour_idx, contour in enumerate(contours):
+            for contour_idx, (points, flags) in enumerate(outline.contours()):
                 print(f"\n  輪郭 {contour_idx + 1}:")
-                print(f"  点数: {len(contour['coords'])}")
+                print(f"  点数: {len(points)}")
                 
-                if len(contour['coords']) >= 3:
+                if len(points) >= 3:
                     # 角丸処理を実行（デバッグ出力付き）
+                    contour = GlyphOutline(points, flags, [len(points) - 1])
                     rounded_contour = effect._round_corners_direct(
                         contour, effect.params['radius'], effect.params['angle_threshold']
                     )
                     
-                    print(f"  処理後の点数: {len(rounded_contour['coords'])}")
+                    print(f"  処理後の点数: {rounded_contour.num_points}")
         
         print("\n=== デバッグ完了 ===")
         
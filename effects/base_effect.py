@@ -5,17 +5,50 @@ base_effect.py
 """
 
 from abc import ABC, abstractmethod
+from collections import Counter
+
+from .metrics import StageTimer
 
 class BaseEffect(ABC):
     def __init__(self, params=None):
         """
         エフェクトの基底クラス。パラメータを受け取って初期化する。
+        countersには処理結果の集計（処理グリフ数・エラー数など）を、
+        timingsには処理段階ごとの所要時間を記録する。
         """
         self.params = params if params is not None else {}
-    
+        self.counters = Counter()
+        self.timings = StageTimer()
+
     @abstractmethod
     def apply(self, font, **kwargs):
         """
         フォントオブジェクトにエフェクトを適用し、変更後のフォントオブジェクトを返す。
         """
-        pass
\ No newline at end of file
+        pass
+
+    # --- グリフ単位のパイプライン（effects/glyph_pipeline.py）用のフック ---
+    # apply_outlineをオーバーライドしたエフェクトは、連続する他の対応エフェクトとまとめて
+    # グリフごとに1回のデコード・エンコードで適用できる。対応しないエフェクトは従来どおりapplyで処理される。
+
+    @classmethod
+    def supports_outline(cls):
+        """apply_outline（グリフ単位の処理）に対応しているか"""
+        return cls.apply_outline is not BaseEffect.apply_outline
+
+    def begin_outlines(self, font, **kwargs):
+        """
+        グリフ単位の処理を始める前に1度だけ呼ばれる。
+        kwargsにはapplyと同じ引数（workers・glyph_cacheとparams）が渡される。
+        """
+
+    def apply_outline(self, outline, params, cubic=False, glyph_name=None):
+        """
+        1グリフの輪郭（GlyphOutline）にエフェクトを適用し、新しいGlyphOutlineを返す。変更しない場合は None。
+        paramsは設定ファイルでこのエフェクトに指定したパラメータ。
+        cubic=TrueならCFF（オフカーブ点2つ続きは三次ベジェ）、FalseならTrueType（二次スプライン）の輪郭。
+        """
+        raise NotImplementedError
+
+    def end_outlines(self, font):
+        """全グリフの処理が終わった後に1度だけ呼ばれる"""
@@ -0,0 +1,69 @@
+"""
+cff_passthrough.py
+
+CFFフォントで、変更していないグリフとサブルーチンを元のバイトコードのまま残すための補助関数。
+
+fontToolsのT2CharStringは描画（draw）するとバイトコードをプログラムに展開し、
+保存時に再コンパイルする。呼び出したサブルーチンも同様に展開される。
+ここではグリフをバイトコードのコピーから描画し、処理後にサブルーチンのバイトコードを戻す。
+処理したグリフのCharStringへのエンコード（encode_outline）も、エフェクト単位・グリフ単位の両方の処理でここを使う。
+"""
+
+from fontTools.misc.psCharStrings import T2CharString
+
+
+def snapshot_subr_bytecodes(cff, topDict):
+    """グローバル/ローカルSubrsの (サブルーチン, 元のバイトコード) の一覧"""
+    subr_indexes = [cff.GlobalSubrs]
+    privates = [fd.Private for fd in getattr(topDict, 'FDArray', None) or ()]
+    if hasattr(topDict, 'Private'):
+        privates.append(topDict.Private)
+    for private in privates:
+        if hasattr(private, 'Subrs'):
+            subr_indexes.append(private.Subrs)
+
+    snapshot = []
+    for subrs in subr_indexes:
+        for i in range(len(subrs)):
+            subr = subrs[i]
+            if subr.bytecode is not None:
+                snapshot.append((subr, subr.bytecode))
+    return snapshot
+
+
+def restore_subr_bytecodes(snapshot):
+    """描画でプログラムに展開されたサブルーチンを元のバイトコードに戻す"""
+    for subr, bytecode in snapshot:
+        if subr.bytecode is None:
+            subr.setBytecode(bytecode)
+
+
+def decodable_copy(charString):
+    """
+    描画用のCharStringを返す。
+    コンパイル済みのものは、元のバイトコードを残せるようにコピーを返す。
+    """
+    if charString.bytecode is None:
+        return charString
+    return T2CharString(
+        bytecode=charString.bytecode,
+        private=getattr(charString, 'private', None),
+        globalSubrs=getattr(charString, 'globalSubrs', None),
+    )
+
+
+def encode_outline(outline, private, width):
+    """
+    GlyphOutlineを新しいT2CharString（未コンパイル）にエンコードする。
+    2つ続きのオフカーブ点は三次ベジェの制御点として描く（GlyphOutline.draw(cubic=True)）。
+    幅（widthは実際の送り幅）はprivateのdefaultWidthXなら省略し、それ以外はnominalWidthXからの差で書く。
+    """
+    from fontTools.pens.t2CharStringPen import T2CharStringPen
+
+    if width == getattr(private, 'defaultWidthX', None):
+        width = None
+    else:
+        width -= getattr(private, 'nominalWidthX', 0)
+    pen = T2CharStringPen(width=width, glyphSet=None)
+    outline.draw(pen, cubic=True)
+    return pen.getCharString()
@@ -0,0 +1,421 @@
+"""
+clipper_engine.py
+
+pyclipper（Clipperの整数座標C++実装）によるモルフォロジー演算での角丸処理（engine: clipper）。
+
+1. 輪郭を折れ線にし、重なりを統合（Union）する。
+2. 半径rで内側にオフセットしてから外側に戻す（オープニング）と凸の角が半径rの円弧になり、
+   外側にオフセットしてから内側に戻す（クロージング）と凹の角が円弧になる。
+   オフセットは丸め結合（JT_ROUND）で行う。
+3. 結果の折れ線に、長い辺は直線、それ以外は三次ベジェ（TrueTypeでは二次スプラインに変換）を当てはめる。
+
+幾何計算はClipperの中で行い、曲線の当てはめもグリフ全体をまとめたNumPy配列で行うので、
+点ごとのPythonの幾何処理（corner_kernel）を通らず、処理時間は輪郭の長さにほぼ比例する。
+半径に対して細すぎる画や狭すぎる隙間は消えたり埋まったりするので、
+輪郭数が変わった場合は半径を半分にしてやり直す。
+"""
+
+import math
+
+import numpy as np
+from fontTools.cu2qu import curve_to_quadratic
+
+from .glyph_outline import GlyphOutline
+from .overlap_screen import glyph_polylines
+
+try:
+    import pyclipper
+except ImportError:
+    pyclipper = None
+
+# Clipperの整数座標に変換するときの倍率
+SCALE = 64
+# 曲線を折れ線にするときと、丸め結合の円弧を折れ線で近似するときの許容誤差（フォント単位）
+FLATTEN_TOLERANCE = 0.25
+# 折れ線に曲線を当てはめるときの許容誤差（フォント単位）
+FIT_TOLERANCE = 1.0
+# これより大きく向きが変わる頂点は角として残す（度）
+CORNER_TURN = 30.0
+# 輪郭数が変わったときに半径を半分にしてやり直す回数
+MAX_RETRIES = 3
+# 面積の変化がこの割合を超えたら、形が崩れたとみなしてやり直す
+MAX_AREA_CHANGE = 0.25
+# 1つの三次ベジェで当てはめる曲線の向きの変化の上限（度）
+MAX_CURVE_TURN = 90.0
+# 曲線の分割点の接線を求めるときに見る前後の頂点の数
+TANGENT_REACH = 4
+# 曲線の当てはめで区間を分割する回数の上限
+MAX_SPLIT_ROUNDS = 16
+
+_COS_CORNER = math.cos(math.radians(CORNER_TURN))
+
+
+def available():
+    return pyclipper is not None
+
+
+def _arc_tolerance(radius):
+    """丸め結合の円弧の近似誤差。小さい半径でも円弧の1辺の向きの変化がCORNER_TURNより十分小さくなるようにする"""
+    return min(FLATTEN_TOLERANCE, 0.02 * radius)
+
+
+def _line_length(radius):
+    """
+    これ以上の長さの辺を直線とみなす長さ。丸め結合の円弧の1辺の4倍にする。
+    曲線はこの半分以下の線分に分けて折れ線にするので、曲線から来た辺が直線になることはない。
+    """
+    arc_step = 2 * math.sqrt(2 * radius * _arc_tolerance(radius))
+    return max(4 * arc_step, 2.0)
+
+
+def _to_clipper(outline, cubic, line_length):
+    """輪郭を折れ線にしてClipperの整数座標のパスにする"""
+    vertices, offsets = glyph_polylines(outline, cubic, FLATTEN_TOLERANCE, line_length / 2)
+    scaled = np.round(vertices * SCALE).astype(np.int64)
+    return [scaled[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:]) if end - start >= 3]
+
+
+def _offset(paths, delta, arc_tolerance):
+    offset = pyclipper.PyclipperOffset(2.0, arc_tolerance * SCALE)
+    offset.AddPaths(paths, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+    return offset.Execute(delta * SCALE)
+
+
+def _union(paths):
+    clipper = pyclipper.Pyclipper()
+    clipper.AddPaths(paths, pyclipper.PT_SUBJECT, True)
+    return clipper.Execute(pyclipper.CT_UNION, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+
+
+def morphological_round(paths, radius):
+    """
+    整数座標のパス（統合済み）の凸の角と凹の角を半径radius（フォント単位）の円弧にする。
+    外側の輪郭は正の向き（反時計回り）、穴は負の向きで返る。
+    """
+    tolerance = _arc_tolerance(radius)
+    opened = _offset(_offset(paths, -radius, tolerance), radius, tolerance)
+    return _offset(_offset(opened, radius, tolerance), -radius, tolerance)
+
+
+def _rings(paths, min_length=0.0, reverse=False):
+    """
+    Clipperのパスをフォント単位の頂点配列 (N,2) と輪郭ごとの開始位置 (n+1,) にする。
+    長さmin_length以下の辺はその始点を除いて次の辺に含め、3頂点未満になった輪郭は捨てる。
+    reverseなら各輪郭の向きを逆にする。
+    """
+    if not paths:
+        return np.zeros((0, 2)), np.zeros(1, dtype=np.intp)
+    counts = np.array([len(path) for path in paths], dtype=np.intp)
+    points = np.concatenate([np.asarray(path, dtype=np.float64).reshape(-1, 2) for path in paths]) / SCALE
+    ring = np.repeat(np.arange(len(paths)), counts)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    if reverse:
+        points = points[offsets[ring] + offsets[ring + 1] - 1 - np.arange(len(points))]
+    following = np.arange(1, len(points) + 1)
+    following[offsets[1:] - 1] = offsets[:-1]
+    edges = points[following] - points
+    keep = np.hypot(edges[:, 0], edges[:, 1]) > min_length
+    keep &= np.repeat(np.bincount(ring[keep], minlength=len(paths)) >= 3, counts)
+    points, ring = points[keep], ring[keep]
+    counts = np.bincount(ring, minlength=len(paths))
+    counts = counts[counts > 0]
+    return points, np.concatenate([[0], np.cumsum(counts)])
+
+
+class _RingGeometry:
+    """折れ線の輪郭の各頂点の前後の頂点・辺の向きと長さ・向きの変化"""
+
+    def __init__(self, points, offsets):
+        count = len(points)
+        self.counts = np.diff(offsets)
+        self.ring = np.repeat(np.arange(len(self.counts)), self.counts)
+        self.following = np.arange(1, count + 1)
+        self.following[offsets[1:] - 1] = offsets[:-1]
+        self.preceding = np.arange(-1, count - 1)
+        self.preceding[offsets[:-1]] = offsets[1:] - 1
+        edges = points[self.following] - points
+        self.lengths = np.hypot(edges[:, 0], edges[:, 1])
+        self.directions = edges / self.lengths[:, None]
+        # 頂点に入る辺と出る辺の向きのなす角のcos
+        self.cos_turn = (self.directions[self.preceding] * self.directions).sum(axis=1)
+
+
+def _count_corners(paths, min_length):
+    """折れ線の頂点のうち、CORNER_TURNより大きく向きが変わる（丸めの対象になる）頂点の数"""
+    points, offsets = _rings(paths, min_length)
+    return int(np.count_nonzero(_RingGeometry(points, offsets).cos_turn < _COS_CORNER))
+
+
+def _unit(vectors):
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(lengths[:, None] > 0, vectors / lengths[:, None], 0.0)
+
+
+def _ranges(starts, counts):
+    """starts[k] から counts[k] 個ずつの連番をつなげた配列、各要素が属する区間の番号、各区間の先頭の位置"""
+    run = np.repeat(np.arange(len(starts)), counts)
+    first = np.cumsum(counts) - counts
+    return starts[run] + np.arange(len(run)) - first[run], run, first
+
+
+def _fit_pass(points, u, run, first, last, tangent_start, tangent_end):
+    """
+    区間ごとに、端点と端の接線を固定して制御点の距離を最小二乗で決めた三次ベジェを当てはめる。
+    (制御点1, 制御点2, 各点の誤差) を返す。
+    """
+    s = 1 - u
+    b0, b1, b2, b3 = s ** 3, 3 * s * s * u, 3 * s * u * u, u ** 3
+    p0 = points[first]
+    p3 = points[last]
+    a1 = tangent_start[run] * b1[:, None]
+    a2 = tangent_end[run] * b2[:, None]
+    rest = points - (b0 + b1)[:, None] * p0[run] - (b2 + b3)[:, None] * p3[run]
+    c00 = np.add.reduceat((a1 * a1).sum(axis=1), first)
+    c01 = np.add.reduceat((a1 * a2).sum(axis=1), first)
+    c11 = np.add.reduceat((a2 * a2).sum(axis=1), first)
+    x0 = np.add.reduceat((a1 * rest).sum(axis=1), first)
+    x1 = np.add.reduceat((a2 * rest).sum(axis=1), first)
+    det = c00 * c11 - c01 * c01
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha1 = (x0 * c11 - x1 * c01) / det
+        alpha2 = (c00 * x1 - c01 * x0) / det
+    chord = np.hypot(*(p3 - p0).T)
+    # 解けない・制御点が逆向きになる場合は弦の1/3の長さにする
+    fallback = ~((np.abs(det) > 1e-12) & (alpha1 > 1e-6 * chord) & (alpha2 > 1e-6 * chord))
+    alpha1 = np.where(fallback, chord / 3, alpha1)
+    alpha2 = np.where(fallback, chord / 3, alpha2)
+    c1 = p0 + tangent_start * alpha1[:, None]
+    c2 = p3 + tangent_end * alpha2[:, None]
+    curve = b0[:, None] * p0[run] + b1[:, None] * c1[run] + b2[:, None] * c2[run] + b3[:, None] * p3[run]
+    return c1, c2, np.hypot(*(curve - points).T)
+
+
+def _reparameterize(points, u, run, first, last, c1, c2):
+    """ニュートン法で各点のパラメータを曲線上の最も近い点に近づける"""
+    p0, p3 = points[first][run], points[last][run]
+    q1, q2 = c1[run], c2[run]
+    t = u[:, None]
+    s = 1 - t
+    curve = s ** 3 * p0 + 3 * s * s * t * q1 + 3 * s * t * t * q2 + t ** 3 * p3
+    d1 = 3 * (s * s * (q1 - p0) + 2 * s * t * (q2 - q1) + t * t * (p3 - q2))
+    d2 = 6 * (s * (q2 - 2 * q1 + p0) + t * (p3 - 2 * q2 + q1))
+    diff = curve - points
+    numerator = (diff * d1).sum(axis=1)
+    denominator = (d1 * d1).sum(axis=1) + (diff * d2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = np.where(denominator != 0, numerator / denominator, 0.0)
+    u = np.clip(u - step, 0.0, 1.0)
+    u[first] = 0.0
+    u[last] = 1.0
+    return u
+
+
+def _split_middle(points, starts, ends, tangent_start, tangent_end, split):
+    """splitの区間を中央の点で2つに分け、(始点, 終点, 始点の接線, 終点の接線) を返す"""
+    starts, ends = starts[split], ends[split]
+    middle = (starts + ends) // 2
+    # 分割点の接線は、折れ線の誤差の影響を抑えるため前後数点離れた点から求める
+    reach = np.minimum(np.minimum(middle - starts, ends - middle), TANGENT_REACH)
+    tangent = _unit(points[middle - reach] - points[middle + reach])
+    return (np.concatenate([starts, middle]), np.concatenate([middle, ends]),
+            np.concatenate([tangent_start[split], -tangent]), np.concatenate([tangent, tangent_end[split]]))
+
+
+def fit_cubics(points, starts, ends, tangent_start, tangent_end, tolerance=FIT_TOLERANCE):
+    """
+    points[starts[k]:ends[k]+1] の折れ線ごとに、端の接線を保ったまま誤差tolerance以内の三次ベジェ列を当てはめる
+    （Schneiderの方法を全区間まとめて行う）。誤差が大きい区間は中央で分割して当てはめ直す。
+    (始点の位置, 終点の位置, 制御点1, 制御点2) の配列を返す（区間の並びは順不同）。
+    """
+    # 1つの三次ベジェでは表せないほど向きが変わる区間は、当てはめる前に分割しておく
+    for _ in range(MAX_SPLIT_ROUNDS):
+        counts = ends - starts + 1
+        index, run, first = _ranges(starts, counts)
+        # 区間の内側の頂点での向きの変化の合計
+        edges = np.diff(points[index], axis=0)
+        turn = np.zeros(len(index))
+        turn[1:-1] = np.abs(np.arctan2(edges[:-1, 0] * edges[1:, 1] - edges[:-1, 1] * edges[1:, 0],
+                                       (edges[:-1] * edges[1:]).sum(axis=1)))
+        turn[first] = 0.0
+        turn[first + counts - 1] = 0.0
+        turning = np.add.reduceat(turn, first)
+        curled = (turning > math.radians(MAX_CURVE_TURN)) & (counts > 4)
+        if not curled.any():
+            break
+        keep = ~curled
+        split = _split_middle(points, starts, ends, tangent_start, tangent_end, curled)
+        starts, ends, tangent_start, tangent_end = (np.concatenate([column[keep], extra])
+                                                    for column, extra in zip((starts, ends, tangent_start, tangent_end), split))
+
+    done = []
+    for split_round in range(MAX_SPLIT_ROUNDS + 1):
+        if not len(starts):
+            break
+        counts = ends - starts + 1
+        index, run, first = _ranges(starts, counts)
+        last = first + counts - 1
+        run_points = points[index]
+        steps = np.zeros(len(index))
+        steps[1:] = np.hypot(*np.diff(run_points, axis=0).T)
+        steps[first] = 0.0
+        cumulative = np.cumsum(steps)
+        u = cumulative - cumulative[first][run]
+        u /= u[last][run]
+
+        c1, c2, errors = _fit_pass(run_points, u, run, first, last, tangent_start, tangent_end)
+        # パラメータを曲線上の最も近い点に合わせて当てはめ直す
+        u = _reparameterize(run_points, u, run, first, last, c1, c2)
+        c1, c2, errors = _fit_pass(run_points, u, run, first, last, tangent_start, tangent_end)
+        worst = np.maximum.reduceat(errors, first)
+
+        accept = (worst <= tolerance) | (counts <= 2) | (split_round == MAX_SPLIT_ROUNDS)
+        done.append((starts[accept], ends[accept], c1[accept], c2[accept]))
+        starts, ends, tangent_start, tangent_end = _split_middle(
+            points, starts, ends, tangent_start, tangent_end, ~accept)
+    return tuple(np.concatenate(column) for column in zip(*done))
+
+
+def fit_outline(points, offsets, line_length, cubic):
+    """
+    折れ線の輪郭を、直線と曲線の輪郭（GlyphOutline）にする。
+    長さline_length以上の辺は直線に、向きがCORNER_TURNより大きく変わる頂点は角にし、
+    それ以外の連続した短い辺に三次ベジェを当てはめる（cubic=Falseなら二次スプラインに変換する）。
+    """
+    geom = _RingGeometry(points, offsets)
+    counts, ring = geom.counts, geom.ring
+    following, preceding, directions = geom.following, geom.preceding, geom.directions
+    corner = geom.cos_turn < _COS_CORNER
+    straight = geom.lengths >= line_length
+    # 曲線の区切り: 角、または直線の辺の端の頂点
+    boundary = corner | straight | straight[preceding]
+    # 区切りのない（全体が1本の滑らかな曲線の）輪郭は、最も向きの変わる頂点で区切る
+    smooth = np.flatnonzero(~np.logical_or.reduceat(boundary, offsets[:-1]))
+    if len(smooth):
+        sharpest = np.lexsort((geom.cos_turn, ring))[offsets[:-1]]
+        boundary[sharpest[smooth]] = True
+
+    # 区切りの頂点から、同じ輪郭の次の区切りの頂点までが1つの区間
+    marks = np.flatnonzero(boundary)
+    mark_ring = ring[marks]
+    ring_first_mark = marks[np.searchsorted(mark_ring, np.arange(len(counts)))]
+    next_mark = np.append(marks[1:], 0)
+    wrap = np.append(mark_ring[1:] != mark_ring[:-1], True)
+    next_mark[wrap] = ring_first_mark[mark_ring[wrap]]
+    span = (next_mark - marks) % counts[mark_ring]
+    span[span == 0] = counts[mark_ring[span == 0]]
+
+    # 曲線を当てはめる区間の頂点（輪郭の終わりをまたぐ区間は先頭に戻る）を1列に並べる
+    line = straight[marks]
+    curve_marks, curve_span, end_marks = marks[~line], span[~line], next_mark[~line]
+    curve_ring = ring[curve_marks]
+    local, run, first = _ranges(curve_marks - offsets[curve_ring], curve_span + 1)
+    vertex = offsets[curve_ring][run] + local % counts[curve_ring][run]
+
+    # 端の接線: 角なら隣の辺の向き、直線とつながるなら直線の向き、曲線どうしなら前後の辺の平均の向き
+    incoming = directions[preceding[curve_marks]]
+    tangent_start = np.where(corner[curve_marks, None], directions[curve_marks],
+                             np.where(straight[preceding[curve_marks], None], incoming,
+                                      _unit(directions[curve_marks] + incoming)))
+    last_edge = directions[preceding[end_marks]]
+    tangent_end = np.where(corner[end_marks, None], -last_edge,
+                           np.where(straight[end_marks, None], -directions[end_marks],
+                                    -_unit(last_edge + directions[end_marks])))
+
+    fit_starts, fit_ends, c1, c2 = fit_cubics(points[vertex], first, first + curve_span, tangent_start, tangent_end)
+    fit_starts, fit_ends = vertex[fit_starts], vertex[fit_ends]
+    # 制御点が弦から許容誤差以内で、弦の範囲に収まる曲線は直線にする
+    p0 = points[fit_starts]
+    chord = points[fit_ends] - p0
+    length = np.hypot(*chord.T)
+    flat = np.ones(len(length), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for control in (c1, c2):
+            offset = control - p0
+            along = (chord * offset).sum(axis=1) / length
+            distance = np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0]) / length
+            flat &= (distance <= FIT_TOLERANCE) & (along >= 0) & (along <= length)
+    flat |= length == 0
+
+    # 直線の辺と曲線を、輪郭ごとに区切りの先頭の頂点から順に並べる
+    line_marks = marks[line]
+    segment_start = np.concatenate([line_marks, fit_starts])
+    segment_end = np.concatenate([following[line_marks], fit_ends])
+    is_curve = np.concatenate([np.zeros(len(line_marks), dtype=bool), ~flat])
+    controls = np.concatenate([np.zeros((len(line_marks), 2, 2)), np.stack([c1, c2], axis=1)])
+    segment_ring = ring[segment_start]
+    rank = (segment_start - ring_first_mark[segment_ring]) % counts[segment_ring]
+    order = np.lexsort((rank, segment_ring))
+    segment_start, segment_end = segment_start[order], segment_end[order]
+    is_curve, controls, segment_ring = is_curve[order], controls[order], segment_ring[order]
+
+    # 区間ごとの点（直線: 終点、曲線: 制御点と終点）
+    sizes = np.where(is_curve, 3, 1)
+    quadratic = {}
+    if not cubic:
+        # 二次スプラインの点の数は曲線ごとに異なる
+        for k in np.flatnonzero(is_curve).tolist():
+            spline = curve_to_quadratic(
+                [tuple(points[segment_start[k]]), tuple(controls[k, 0]), tuple(controls[k, 1]),
+                 tuple(points[segment_end[k]])],
+                FIT_TOLERANCE / 2,
+            )
+            quadratic[k] = spline[1:-1]
+            sizes[k] = len(spline) - 1
+    total = int(sizes.sum())
+    new_points = np.empty((total, 2))
+    new_flags = np.zeros(total, dtype=np.uint8)
+    segment_last = np.cumsum(sizes) - 1
+    new_points[segment_last] = points[segment_end]
+    new_flags[segment_last] = 1
+    curve_last = segment_last[is_curve]
+    if cubic:
+        new_points[curve_last - 2] = controls[is_curve, 0]
+        new_points[curve_last - 1] = controls[is_curve, 1]
+    else:
+        for k, off_curve in quadratic.items():
+            new_points[segment_last[k] - len(off_curve):segment_last[k]] = off_curve
+
+    # 各輪郭の最後の点（輪郭の始点に戻るオンカーブ点）を先頭に移す
+    ring_ends = np.cumsum(np.bincount(segment_ring, weights=sizes, minlength=len(counts)).astype(np.intp)) - 1
+    ring_starts = np.concatenate([[0], ring_ends[:-1] + 1])
+    point_ring = np.repeat(np.arange(len(counts)), ring_ends - ring_starts + 1)
+    index = np.arange(total)
+    rotated = np.where(index == ring_starts[point_ring], ring_ends[point_ring], index - 1)
+    return GlyphOutline(new_points[rotated], new_flags[rotated], ring_ends)
+
+
+def round_outline(outline, radius, cubic=False):
+    """
+    GlyphOutlineの角をモルフォロジー演算で半径radiusに丸める（重なりも統合される）。
+    cubic=Trueなら三次ベジェ（CFF、外側の輪郭は反時計回り）、Falseなら二次スプライン（TrueType、時計回り）で返す。
+    (新しいGlyphOutline, 丸めた角の数) を返す。半径を下げても形が保てない場合は None。
+    """
+    # やり直しで半径が小さくなっても円弧の辺は短くなるだけなので、直線の長さは最初の半径で決める
+    line_length = _line_length(radius)
+    paths = _to_clipper(outline, cubic, line_length)
+    if paths:
+        paths = _union(paths)
+    if not paths:
+        # 面積のある輪郭がない（点や線分だけの）グリフはそのまま
+        return outline, 0
+    areas = [pyclipper.Area(path) for path in paths]
+    for _ in range(MAX_RETRIES + 1):
+        rounded = morphological_round(paths, radius)
+        # 半径の円より小さい輪郭（細かな穴など）は消えてよい
+        expected = sum(1 for area in areas if abs(area) >= math.pi * (radius * SCALE) ** 2)
+        change = abs(sum(pyclipper.Area(path) for path in rounded) - sum(areas))
+        if len(rounded) == expected and change <= MAX_AREA_CHANGE * abs(sum(areas)):
+            break
+        radius /= 2
+    else:
+        return None
+
+    # オフセットで凹の頂点にできる小さな切れ込みや整数化でできる極端に短い辺は、向きが乱れて角に見えるので除く。
+    # やり直した後の半径での円弧の1辺（_line_lengthの1/4）より十分短くする
+    min_length = min(2 * FLATTEN_TOLERANCE, _line_length(radius) / 8)
+    # TrueTypeの外側の輪郭は時計回りなので、Clipperの結果の向きを逆にする
+    points, offsets = _rings(rounded, min_length, reverse=not cubic)
+    if not len(points):
+        return GlyphOutline(), 0
+    return fit_outline(points, offsets, line_length, cubic), _count_corners(paths, min_length)
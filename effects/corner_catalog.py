@@ -0,0 +1,203 @@
+"""
+corner_catalog.py
+
+角丸処理の半径・閾値によらない解析結果をフォントごとにまとめて保存するコーナーカタログ。
+パラメータを変えながら何度も角丸処理する場合、グリフのデコード・パス自動連結・統合・角の検出は毎回同じ結果になるため、
+1度目にこれを作って入力フォントの隣（<入力フォント>.corners.npz）に保存し、2度目以降はフォントをデコードせずに
+カタログの配列から全グリフをまとめて1回のベクトル演算で丸める。
+
+保存するのは、全グリフの前処理済みの輪郭を連結した配列（座標・フラグ・輪郭の終点）と、
+各点（角の候補）の角度・前後の辺の長さ・前後の点を結ぶ線分との距離、グリフごとの区切りと品質チェック用の頂点数。
+キー（digest）はグリフデータのハッシュと前処理の設定・コードのバージョンから作り、一致しなければ作り直す。
+ファイルは非圧縮のnpzで、読み込み時は各配列をメモリマップする（大きなCJKフォントでも読み込みは一瞬）。
+"""
+
+import hashlib
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from .corner_kernel import CornerGeometry, analyze_corners
+from .glyph_cache import default_cache_dir
+from .glyph_outline import GlyphOutline
+
+# カタログの形式のバージョン（保存する配列を変えたら上げる）
+CATALOG_VERSION = 1
+
+# 入力フォントの隣に置くカタログファイルの接尾辞
+SUFFIX = ".corners.npz"
+
+# グリフの状態: 角丸処理の対象 / 対象外（コンポジット・空のグリフ） / デコードに失敗
+STATUS_OK, STATUS_EMPTY, STATUS_ERROR = 0, 1, 2
+
+
+def catalog_path(setting, input_font=None, digest=None):
+    """
+    corner_catalog設定からカタログファイルのパスを決める。
+    true → 入力フォントの隣（<入力フォント>.corners.npz。入力フォントが不明ならキャッシュディレクトリの<digest>.npz）、
+    文字列 → そのパス。false/None なら None（カタログを使わない）。
+    """
+    if not setting:
+        return None
+    if isinstance(setting, str) and setting.lower() not in ("true", "yes", "on", "1"):
+        return setting
+    if input_font:
+        return input_font + SUFFIX
+    return os.path.join(default_cache_dir(), "corners", f"{digest}.npz")
+
+
+def font_digest(version, glyph_sources):
+    """
+    カタログのキー（16進文字列）。
+    version: 前処理の設定・コードのバージョン、glyph_sources: (グリフ名, 元グリフのバイト列) の並び
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"catalog={CATALOG_VERSION},{version}".encode("utf-8"))
+    for glyph_name, data in glyph_sources:
+        digest.update(b"\0" + glyph_name.encode("utf-8") + b"\0")
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class CornerCatalog:
+    """
+    全グリフの前処理済みの輪郭と角の解析結果。
+    glyph_names: (G,) グリフ名、status: (G,) STATUS_*、base_points: (G,) 品質チェックの基準にする頂点数、
+    changed: (G,) 前処理で輪郭が変わったか（TrueTypeで、角がなくても書き戻す必要があるか）、widths: (G,) 送り幅（CFF）、
+    point_offsets / contour_offsets: (G+1,) グリフごとの点・輪郭の区切り、
+    points / flags / ends: 連結した輪郭（endsは連結後の通し番号）、
+    angle / norm1 / norm2 / segment_distance: (P,) 各点の角度・前後の辺の長さ・線分との距離。
+    """
+
+    ARRAYS = ('glyph_names', 'status', 'base_points', 'changed', 'widths', 'point_offsets', 'contour_offsets',
+              'points', 'flags', 'ends', 'angle', 'norm1', 'norm2', 'segment_distance')
+
+    def __init__(self, digest, cubic, arrays):
+        self.digest = digest
+        self.cubic = cubic
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def build(cls, digest, cubic, entries):
+        """
+        グリフごとの (グリフ名, 状態, 前処理済みのGlyphOutlineまたはNone, 基準の頂点数, 輪郭が変わったか, 送り幅) から作る。
+        角の解析は全グリフを連結した輪郭に対して1度に行う。
+        """
+        outlines = [outline if status == STATUS_OK else GlyphOutline() for _, status, outline, _, _, _ in entries]
+        point_counts = [outline.num_points for outline in outlines]
+        contour_counts = [outline.num_contours for outline in outlines]
+        outline = GlyphOutline.concatenate(outlines)
+        geom = analyze_corners(outline)
+        arrays = {
+            'glyph_names': np.array([entry[0] for entry in entries], dtype=str),
+            'status': np.array([entry[1] for entry in entries], dtype=np.uint8),
+            'base_points': np.array([entry[3] for entry in entries], dtype=np.int64),
+            'changed': np.array([entry[4] for entry in entries], dtype=bool),
+            'widths': np.array([entry[5] for entry in entries], dtype=np.float64),
+            'point_offsets': np.concatenate([[0], np.cumsum(point_counts, dtype=np.int64)]),
+            'contour_offsets': np.concatenate([[0], np.cumsum(contour_counts, dtype=np.int64)]),
+            'points': outline.points,
+            'flags': outline.flags,
+            'ends': outline.ends.astype(np.int64),
+            'angle': geom.angle,
+            'norm1': geom.norm1,
+            'norm2': geom.norm2,
+            'segment_distance': geom.segment_distance(),
+        }
+        return cls(digest, cubic, arrays)
+
+    def __len__(self):
+        return len(self.glyph_names)
+
+    def outline(self):
+        """全グリフを連結した輪郭"""
+        return GlyphOutline(self.points, self.flags, self.ends)
+
+    def geometry(self, outline):
+        """連結した輪郭の角の幾何情報（保存済みの角度・辺長を使う）"""
+        return CornerGeometry.from_arrays(outline, self.angle, self.norm1, self.norm2, self.segment_distance)
+
+    def glyph_outline(self, index):
+        """index番目のグリフの前処理済みの輪郭（配列はカタログのビュー）"""
+        p0, p1 = int(self.point_offsets[index]), int(self.point_offsets[index + 1])
+        c0, c1 = int(self.contour_offsets[index]), int(self.contour_offsets[index + 1])
+        return GlyphOutline(self.points[p0:p1], self.flags[p0:p1], self.ends[c0:c1] - p0)
+
+    def split(self, rounded):
+        """
+        連結した輪郭を角丸処理した結果（点の数は変わるが輪郭の並びは同じ）をグリフごとの輪郭に分ける。
+        (前処理済みの輪郭, 角丸処理後の輪郭, 角丸化した角の数) をグリフ順に返す（対象外のグリフは None）。
+        角1つで1点が3点になるので、角の数は増えた点の数の半分になる。
+        """
+        new_offsets = np.concatenate([[0], rounded.ends + 1])[self.contour_offsets]
+        for index in range(len(self)):
+            if self.status[index] != STATUS_OK:
+                yield None
+                continue
+            p0, p1 = int(new_offsets[index]), int(new_offsets[index + 1])
+            c0, c1 = int(self.contour_offsets[index]), int(self.contour_offsets[index + 1])
+            source = self.glyph_outline(index)
+            glyph = GlyphOutline(rounded.points[p0:p1], rounded.flags[p0:p1], rounded.ends[c0:c1] - p0)
+            yield source, glyph, (glyph.num_points - source.num_points) // 2
+
+    def save(self, path):
+        """非圧縮のnpzとして保存する（一時ファイルからの置き換えなので、読み込み中のプロセスがあっても壊れない）"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.savez(f, digest=np.array(self.digest), cubic=np.array(self.cubic),
+                     **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path, digest=None):
+        """
+        保存したカタログを読み込む（各配列はメモリマップ）。
+        ファイルがない・壊れている・digestが一致しない場合は None。
+        """
+        try:
+            arrays = _map_npz(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        if any(name not in arrays for name in cls.ARRAYS + ('digest', 'cubic')):
+            return None
+        stored = str(arrays['digest'][()])
+        if digest is not None and stored != digest:
+            return None
+        return cls(stored, bool(arrays['cubic'][()]), arrays)
+
+
+def _map_npz(path):
+    """
+    非圧縮のnpzの各配列を、zipのエントリ内のデータ位置を指すnp.memmapとして開く。
+    空の配列と0次元の配列（digestなど）は読み込む。
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED or not info.filename.endswith(".npy"):
+                raise ValueError(f"メモリマップできないエントリです: {info.filename}")
+            # ローカルファイルヘッダ（30バイト + ファイル名 + 拡張フィールド）の後にnpyのデータがある
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"オブジェクト配列はメモリマップできません: {info.filename}")
+            name = info.filename[:-len(".npy")]
+            count = int(np.prod(shape))
+            if count == 0 or not shape:
+                arrays[name] = np.frombuffer(f.read(count * dtype.itemsize), dtype=dtype).reshape(shape)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran_order else "C")
+    return arrays
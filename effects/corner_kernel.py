@@ -0,0 +1,310 @@
+"""
+corner_kernel.py
+
+角丸処理のベクトル化カーネル。
+グリフ全体をGlyphOutline（(n,2)のfloat64座標配列・フラグ配列・輪郭終点配列）として受け取り、
+前後の辺ベクトル・辺の長さ・角度・半径クランプ・接点T1/T2を、
+輪郭ごとに巡回シフトした配列を使って全点まとめて計算する。
+RoundCornersEffectの各角丸方式はこのモジュールの薄いラッパーになっている。
+"""
+
+import numpy as np
+
+from .glyph_outline import GlyphOutline
+
+
+class CornerGeometry:
+    """
+    輪郭の各点における角の幾何情報。
+    v1/v2は点から前/次の点へのベクトル、norm1/norm2はその長さ、
+    angleは2辺のなす角（度）。validは両辺の長さが0でない点、
+    eligibleは3点以上の輪郭に属する（角丸処理の対象になりうる）点を示す。
+    """
+
+    __slots__ = ('points', 'flags', 'prev_points', 'next_points',
+                 'v1', 'v2', 'norm1', 'norm2', 'angle', 'valid', 'eligible', '_segment_distance')
+
+    def __init__(self, outline):
+        self._set_neighbours(outline)
+        self.norm1 = np.hypot(self.v1[:, 0], self.v1[:, 1])
+        self.norm2 = np.hypot(self.v2[:, 0], self.v2[:, 1])
+        self.valid = (self.norm1 > 0) & (self.norm2 > 0)
+
+        dot = self.v1[:, 0] * self.v2[:, 0] + self.v1[:, 1] * self.v2[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_angle = np.clip(dot / (self.norm1 * self.norm2), -1.0, 1.0)
+        self.angle = np.degrees(np.arccos(cos_angle))
+        # 長さ0の辺を持つ点は角度が定義できないので比較対象から外す
+        self.angle[~self.valid] = np.nan
+        self._segment_distance = None
+
+    @classmethod
+    def from_arrays(cls, outline, angle, norm1, norm2, segment_distance=None):
+        """
+        保存済みの角度・辺長・線分との距離（corner_catalog.CornerCatalog）から作る。
+        値はanalyze_cornersで計算したものと同じなので、角丸処理の結果も変わらない。
+        """
+        geom = cls.__new__(cls)
+        geom._set_neighbours(outline)
+        geom.norm1 = norm1
+        geom.norm2 = norm2
+        geom.valid = (norm1 > 0) & (norm2 > 0)
+        geom.angle = angle
+        geom._segment_distance = segment_distance
+        return geom
+
+    def _set_neighbours(self, outline):
+        """点・フラグ・前後の点・辺ベクトル・対象になりうる点を設定する"""
+        points = outline.points
+        self.points = points
+        self.flags = outline.flags
+
+        # 輪郭ごとの巡回シフト（np.rollを各輪郭に適用したのと同じ）
+        starts = outline.starts
+        ends = outline.ends
+        index = np.arange(len(points))
+        prev_index = index - 1
+        prev_index[starts] = ends
+        next_index = index + 1
+        next_index[ends] = starts
+        self.prev_points = points[prev_index]
+        self.next_points = points[next_index]
+
+        lengths = ends - starts + 1
+        self.eligible = np.repeat(lengths >= 3, lengths)
+
+        self.v1 = self.prev_points - points
+        self.v2 = self.next_points - points
+
+    def segment_distance(self):
+        """各点と、前後の点を結ぶ線分との距離（半径によらないので1度だけ計算する）"""
+        if self._segment_distance is None:
+            self._segment_distance = _segment_distance(self)
+        return self._segment_distance
+
+
+def analyze_corners(outline):
+    """GlyphOutlineの全点について角の幾何情報を一括計算する"""
+    return CornerGeometry(outline)
+
+
+def expand_corners(outline, geom, mask, t1, ctrl, t2):
+    """
+    maskが立った点を T1(オンカーブ), 制御点(オフカーブ), T2(オンカーブ) の3点に置き換え、
+    それ以外の点はフラグごとそのまま残した新しいGlyphOutlineを返す。
+    """
+    counts = np.where(mask, 3, 1)
+    next_starts = np.cumsum(counts)
+    starts = next_starts - counts
+    total = int(next_starts[-1]) if len(next_starts) else 0
+
+    new_points = np.empty((total, 2), dtype=np.float64)
+    new_flags = np.empty(total, dtype=np.uint8)
+
+    keep = ~mask
+    new_points[starts[keep]] = geom.points[keep]
+    new_flags[starts[keep]] = geom.flags[keep]
+
+    s = starts[mask]
+    new_points[s] = t1[mask]
+    new_points[s + 1] = ctrl[mask]
+    new_points[s + 2] = t2[mask]
+    new_flags[s] = 1
+    new_flags[s + 1] = 0
+    new_flags[s + 2] = 1
+
+    new_ends = next_starts[outline.ends] - 1 if len(outline.ends) else outline.ends
+    return GlyphOutline(new_points, new_flags, new_ends)
+
+
+def _segment_distance(geom):
+    """各点p1と、前後の点を結ぶ線分p0-p2との距離"""
+    p0 = geom.prev_points
+    p1 = geom.points
+    d = geom.next_points - p0
+    denom = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+    degenerate = denom == 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = ((p1[:, 0] - p0[:, 0]) * d[:, 0] + (p1[:, 1] - p0[:, 1]) * d[:, 1]) / denom
+    t = np.clip(t, 0.0, 1.0)
+    proj_x = p0[:, 0] + t * d[:, 0]
+    proj_y = p0[:, 1] + t * d[:, 1]
+    dist = np.hypot(p1[:, 0] - proj_x, p1[:, 1] - proj_y)
+    # 線分p0-p2が1点に潰れている場合はp0との距離
+    return np.where(degenerate, geom.norm1, dist)
+
+
+def _direct_mask(geom, angle_threshold, straight_angle):
+    """round_directで丸める点（直線上の点と角度が閾値を超える点を除く）"""
+    dist = geom.segment_distance()
+    with np.errstate(invalid='ignore'):
+        return (geom.eligible & (dist > 0.001) & geom.valid
+                & (geom.angle < straight_angle) & (geom.angle <= angle_threshold))
+
+
+def _direct_tangents(geom, radius):
+    """round_directの接点 (T1, T2)。角ごとの最大半径を辺長から決定し、指定半径と比較して小さい方を使う"""
+    actual_radius = np.minimum(radius, np.minimum(geom.norm1, geom.norm2) / 2.0)
+    l1 = np.minimum(actual_radius, geom.norm1 * 0.5)
+    l2 = np.minimum(actual_radius, geom.norm2 * 0.5)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = geom.points + (geom.prev_points - geom.points) * (l1 / geom.norm1)[:, None]
+        t2 = geom.points + (geom.next_points - geom.points) * (l2 / geom.norm2)[:, None]
+    return t1, t2
+
+
+def round_direct(outline, radius, angle_threshold, straight_angle=178.0, geom=None):
+    """
+    TrueType向けの角丸処理（_round_corners_direct）。
+    p1と線分p0-p2の距離が0.001以下、または角度がstraight_angle以上の点は直線として残し、
+    angle_threshold以下の角を、辺長の半分を上限とした半径で T1-P1-T2 の二次曲線に置き換える。
+    geomに同じ輪郭のanalyze_cornersの結果を渡すと、解析を省略する（半径だけを変えて何度も丸める場合）。
+    (新しいGlyphOutline, 角丸化した角の数) を返す。
+    """
+    if radius == 0 or not outline.num_points:
+        return outline, 0
+    if geom is None:
+        geom = analyze_corners(outline)
+    mask = _direct_mask(geom, angle_threshold, straight_angle)
+    t1, t2 = _direct_tangents(geom, radius)
+    return expand_corners(outline, geom, mask, t1, geom.points, t2), int(mask.sum())
+
+
+def _finite_or_points(values, geom):
+    """長さ0の辺で計算できなかった点（NaN）を元の点に置き換える"""
+    return np.where(np.isfinite(values), values, geom.points)
+
+
+def round_direct_masters(outlines, radius, angle_threshold, straight_angle=178.0):
+    """
+    Variable Fontの各マスター（点の構成が同じ輪郭の並び）にround_directを適用する。
+    丸める角はいずれかのマスターで角と判定された点の和集合とし、半径のクランプは各マスターの辺長で行う。
+    角が潰れているマスター（長さ0の辺）では3点とも元の点に重ねる。
+    ([新しいGlyphOutline...], 角丸化した角の数) を返す。結果は互いに点の構成が同じになる。
+    """
+    if radius == 0 or not outlines[0].num_points:
+        return list(outlines), 0
+    geoms = [analyze_corners(outline) for outline in outlines]
+    # いずれかのマスターで角と判定された点を全マスターで丸め、点の構成を揃える
+    mask = np.logical_or.reduce([_direct_mask(geom, angle_threshold, straight_angle) for geom in geoms])
+    rounded = []
+    for outline, geom in zip(outlines, geoms):
+        t1, t2 = (_finite_or_points(t, geom) for t in _direct_tangents(geom, radius))
+        rounded.append(expand_corners(outline, geom, mask, t1, geom.points, t2))
+    return rounded, int(mask.sum())
+
+
+# 角度の区切り（150度, 170度, 175度）ごとの半径係数・制御点係数
+_CURVE_ANGLE_STEPS = np.array([150.0, 170.0, 175.0])
+_CURVE_RADIUS_FACTORS = np.array([0.4, 0.3, 0.2, 0.1])
+_CURVE_CTRL_FACTORS = np.array([0.5, 0.4, 0.3, 0.2])
+
+
+def curve_corner_factors(angle):
+    """角度に応じた (半径係数, 制御点係数)。滑らかな角ほど控えめに丸める。"""
+    step = np.searchsorted(_CURVE_ANGLE_STEPS, angle, side='left')
+    return _CURVE_RADIUS_FACTORS[step], _CURVE_CTRL_FACTORS[step]
+
+
+def _curve_mask(geom, actual_radius, angle_threshold, min_radius):
+    """round_curvesで丸める点（オンカーブ点のうち角度・半径が条件を満たすもの）"""
+    on_curve = (geom.flags & 1) != 0
+    with np.errstate(invalid='ignore'):
+        return (geom.eligible & on_curve & geom.valid
+                & (geom.angle < angle_threshold) & (actual_radius > min_radius))
+
+
+def _curve_corners(geom, radius):
+    """round_curvesの (実半径, 制御点係数, T1, T2)"""
+    radius_factor, ctrl_factor = curve_corner_factors(geom.angle)
+    actual_radius = np.minimum(radius * radius_factor, np.minimum(geom.norm1, geom.norm2) / 3.0)
+
+    l1 = np.minimum(actual_radius, geom.norm1 * 0.3)
+    l2 = np.minimum(actual_radius, geom.norm2 * 0.3)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = geom.points + geom.v1 * l1[:, None] / geom.norm1[:, None]
+        t2 = geom.points + geom.v2 * l2[:, None] / geom.norm2[:, None]
+    return actual_radius, ctrl_factor, t1, t2
+
+
+def _curve_control(geom, t1, t2, ctrl_factor):
+    """滑らかな制御点を生成"""
+    return geom.points + (t1 - geom.points + t2 - geom.points) * ctrl_factor[:, None] * 0.5
+
+
+def round_curves(outline, radius, angle_threshold=179.0, min_radius=0.5, geom=None):
+    """
+    曲線グリフ向けの角丸処理（_round_corners_improved_for_curves）。
+    制御点はそのまま残し、オンカーブ点のうちangle_threshold未満の角を
+    角度に応じた半径・制御点係数で丸める。geomはround_directと同じ。
+    (新しいGlyphOutline, 角丸化した角の数, 幾何情報, 実半径, 制御点係数) を返す。
+    """
+    if geom is None:
+        geom = analyze_corners(outline)
+    n = outline.num_points
+    if radius == 0 or not n:
+        return outline, 0, geom, np.zeros(n), np.zeros(n)
+
+    actual_radius, ctrl_factor, t1, t2 = _curve_corners(geom, radius)
+    mask = _curve_mask(geom, actual_radius, angle_threshold, min_radius)
+    ctrl = _curve_control(geom, t1, t2, ctrl_factor)
+
+    new_outline = expand_corners(outline, geom, mask, t1, ctrl, t2)
+    return new_outline, int(mask.sum()), geom, actual_radius, ctrl_factor
+
+
+def round_curves_masters(outlines, radius, angle_threshold=179.0, min_radius=0.5):
+    """
+    Variable Fontの各マスターにround_curvesを適用する（round_direct_mastersの曲線グリフ版）。
+    ([新しいGlyphOutline...], 角丸化した角の数) を返す。
+    """
+    if radius == 0 or not outlines[0].num_points:
+        return list(outlines), 0
+    geoms = [analyze_corners(outline) for outline in outlines]
+    corners = [_curve_corners(geom, radius) for geom in geoms]
+    mask = np.logical_or.reduce([
+        _curve_mask(geom, actual_radius, angle_threshold, min_radius)
+        for geom, (actual_radius, _, _, _) in zip(geoms, corners)
+    ])
+    rounded = []
+    for outline, geom, (_, ctrl_factor, t1, t2) in zip(outlines, geoms, corners):
+        t1 = _finite_or_points(t1, geom)
+        t2 = _finite_or_points(t2, geom)
+        ctrl = _curve_control(geom, t1, t2, ctrl_factor)
+        rounded.append(expand_corners(outline, geom, mask, t1, ctrl, t2))
+    return rounded, int(mask.sum())
+
+
+def quantize_coordinates(values, precision_level):
+    """CFF座標の精度レベルに合わせて丸める（0: 整数, 1: 2桁, 2: 4桁, 3: 6桁）"""
+    decimals = {0: 0, 1: 2, 2: 4}.get(precision_level, 6)
+    return np.round(values, decimals)
+
+
+def round_precision(outline, radius, angle_threshold, precision_level, straight_angle=178.0):
+    """
+    CFF専用の高精度座標角丸処理（_round_corners_cff_precision）。
+    接点T1/T2を元の座標精度に合わせて丸め、整数座標との混在を避ける。
+    (新しいGlyphOutline, 角丸化した角の数) を返す。
+    """
+    if radius == 0 or not outline.num_points:
+        return outline, 0
+    geom = analyze_corners(outline)
+
+    with np.errstate(invalid='ignore'):
+        mask = geom.eligible & geom.valid & (geom.angle < straight_angle) & (geom.angle < angle_threshold)
+
+    actual_radius = np.minimum(radius, np.minimum(geom.norm1, geom.norm2) / 2.0)
+    l1 = np.minimum(actual_radius, geom.norm1 * 0.5)
+    l2 = np.minimum(actual_radius, geom.norm2 * 0.5)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = geom.points + (geom.prev_points - geom.points) * (l1 / geom.norm1)[:, None]
+        t2 = geom.points + (geom.next_points - geom.points) * (l2 / geom.norm2)[:, None]
+    t1 = quantize_coordinates(t1, precision_level)
+    t2 = quantize_coordinates(t2, precision_level)
+
+    return expand_corners(outline, geom, mask, t1, geom.points, t2), int(mask.sum())
@@ -0,0 +1,96 @@
+"""
+font_subset.py
+
+設定ファイルのsubsetで、エフェクトを適用する前にフォントをサブセット化する（fontTools.subset）。
+表示する文字が決まっているWebフォントでは、全グリフを処理してから後でpyftsubsetで捨てる代わりに、
+残るグリフだけにエフェクトを適用し、そのままサブセットのフォントとして出力する。
+
+  subset:
+    text: "角丸のWebフォント"                   # 残す文字の並び
+    text_file: ./site_chars.txt                # 文字の並びを書いたテキストファイル（UTF-8、複数ならリスト）
+    unicodes: ["U+0020-007E"]                  # コードポイントの範囲（glyphsのunicodesと同じ書式）
+    names: ["period", "uni30FC\\.vert"]         # 残すグリフ名全体に一致する正規表現
+    layout_features: ["*"]                     # 残すGSUB/GPOSの機能（既定は全て）
+    flavor: woff2                              # 出力の形式（woff / woff2、既定は元のまま）
+    options: {hinting: false}                  # そのほかのfontTools.subset.Optionsの項目
+
+文字はフォントのcmapで引き、GSUBの置き換え先（縦書き・合字など）のグリフも閉包として残す。
+"""
+
+from dataclasses import dataclass, field
+
+from .glyph_selection import CRITERIA_KEYS, GlyphCriteria
+
+# 条件以外のキー
+OPTION_KEYS = ("layout_features", "flavor", "options")
+
+FLAVORS = ("woff", "woff2")
+
+
+def subset_options(**overrides):
+    """
+    サブセットの既定のオプション。
+    レイアウト機能（と置き換え先のグリフの閉包）・name・グリフ名・.notdefの輪郭を残す。
+    """
+    from fontTools import subset
+
+    options = subset.Options()
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.glyph_names = True
+    options.notdef_outline = True
+    try:
+        options.set(**overrides)
+    except subset.Options.OptionError as e:
+        raise ValueError(f"subsetのオプションが不正です: {e}") from None
+    return options
+
+
+@dataclass(frozen=True)
+class SubsetConfig:
+    """残す文字・グリフの条件と、fontTools.subsetに渡すオプション"""
+    criteria: GlyphCriteria
+    layout_features: tuple = ("*",)
+    flavor: str = None
+    options: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, setting):
+        """subset設定から作る。未指定なら None（サブセット化しない）。不正なら ValueError"""
+        if setting is None:
+            return None
+        if not isinstance(setting, dict):
+            raise ValueError("subsetは text / text_file / unicodes / names などの辞書で指定してください")
+        unknown = sorted(set(setting) - set(CRITERIA_KEYS) - set(OPTION_KEYS))
+        if unknown:
+            raise ValueError(f"subset に不明な項目があります: {', '.join(map(str, unknown))}"
+                             f"（{', '.join(CRITERIA_KEYS + OPTION_KEYS)} を指定してください）")
+        criteria = GlyphCriteria.from_config(setting, "subset", allowed=OPTION_KEYS)
+        if not criteria:
+            raise ValueError("subset に残す文字・グリフ（text / text_file / unicodes / names）がありません")
+        features = setting.get("layout_features", ["*"])
+        features = tuple(str(feature) for feature in ([features] if isinstance(features, str) else features or ()))
+        flavor = setting.get("flavor")
+        if flavor is not None and flavor not in FLAVORS:
+            raise ValueError(f"不明なsubset.flavorです: {flavor}（{', '.join(FLAVORS)}のいずれかを指定してください）")
+        options = setting.get("options") or {}
+        if not isinstance(options, dict):
+            raise ValueError("subset.options はfontTools.subset.Optionsの項目の辞書で指定してください")
+        # 不正なオプションはここで（フォントを読み込む前に）エラーにする
+        subset_options(**options)
+        return cls(criteria, features, flavor, dict(options))
+
+    def apply(self, font):
+        """フォントをその場でサブセット化する。残ったグリフ数を返す"""
+        from fontTools import subset
+
+        options = subset_options(**self.options)
+        options.layout_features = list(self.layout_features)
+        cmap = font.getBestCmap() or {}
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(glyphs=self.criteria.glyph_names(font.getGlyphOrder()),
+                           unicodes=self.criteria.codepoints(cmap))
+        subsetter.subset(font)
+        if self.flavor:
+            font.flavor = self.flavor
+        return len(font.getGlyphOrder())
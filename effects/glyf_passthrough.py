@@ -0,0 +1,228 @@
+"""
+glyf_passthrough.py
+
+TrueTypeフォントの保存時に、変更していないグリフを元のglyfバイト列のまま書き出すための補助関数。
+
+fontToolsは recalcBBoxes=True のまま保存すると、バウンディングボックスと
+maxp/hhea/vheaの値を再計算するために全グリフを展開・再コンパイルする。
+ここでは未変更グリフの値をglyfデータのヘッダから直接読み、
+変更したグリフ（と、それを参照するコンポジットグリフ）だけを展開して同じ値を計算する。
+計算後に recalcBBoxes を切っておけば、未変更グリフは元のバイト列がそのままコピーされる。
+"""
+
+import struct
+
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates
+
+_HEADER = struct.Struct(">hhhhh")
+
+
+def decode_glyph(glyf_table, glyph_name):
+    """
+    テーブル内のグリフを展開せずに、展開済みのコピーを返す。
+    （glyf_table[glyph_name] はテーブル内のグリフ自体を展開してしまい、保存時に再コンパイルされる）
+    """
+    glyph = glyf_table.glyphs[glyph_name]
+    data = getattr(glyph, 'data', None)
+    if not data or _HEADER.unpack_from(data)[0] <= 0:
+        # 空・コンポジットのグリフは角丸処理の対象外なので展開しない
+        return glyph
+    copy = Glyph(data)
+    copy.expand(glyf_table)
+    return copy
+
+
+def store_outline(glyph, outline):
+    """
+    GlyphOutlineをテーブル内の（展開済みの）単純グリフに書き戻す。
+    バウンディングボックスは recalc_metrics でまとめて再計算する。
+    """
+    # GlyphCoordinatesオブジェクトを作成（座標バッファをそのままコピー）
+    coordinates = GlyphCoordinates()
+    coordinates.array.frombytes(outline.points.tobytes())
+    glyph.coordinates = coordinates
+    glyph.endPtsOfContours = outline.ends.tolist()
+    glyph.flags = bytearray(outline.flags.tobytes())
+    glyph.numberOfContours = outline.num_contours
+
+
+def glyph_header(glyph):
+    """(numberOfContours, xMin, yMin, xMax, yMax)。未展開ならglyfデータのヘッダから読む"""
+    if hasattr(glyph, 'data'):
+        if not glyph.data:
+            return 0, 0, 0, 0, 0
+        return _HEADER.unpack_from(glyph.data)
+    if not glyph.numberOfContours:
+        return 0, 0, 0, 0, 0
+    return glyph.numberOfContours, glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax
+
+
+def _simple_maxp_values(glyph, number_of_contours):
+    """単純グリフの (点数, 輪郭数)。未展開ならendPtsOfContoursの最後の値から求める"""
+    if hasattr(glyph, 'data'):
+        last_end, = struct.unpack_from(">H", glyph.data, _HEADER.size + 2 * (number_of_contours - 1))
+        return last_end + 1, number_of_contours
+    return glyph.getMaxpValues()
+
+
+def _recalc_composite_bounds(glyf_table, composites, done):
+    """
+    変更されたグリフを参照するコンポジットグリフのバウンディングボックスを再計算する。
+    fontToolsの再計算は参照先のグリフを展開するので、
+    変更していないグリフは計算後に元のバイト列へ戻す。
+    """
+    glyphs = glyf_table.glyphs
+    raw = {name: glyph.data for name, glyph in glyphs.items()
+           if hasattr(glyph, 'data') and name not in composites}
+    for name in composites:
+        glyf_table[name].recalcBounds(glyf_table, boundsDone=done)
+    for name, data in raw.items():
+        if not hasattr(glyphs[name], 'data'):
+            glyphs[name] = Glyph(data)
+
+
+def recalc_metrics(font, modified):
+    """
+    maxp.recalc / hhea.recalc / vhea.recalc 相当の値（head のバウンディングボックスとフラグを含む）を、
+    未変更グリフを展開せずに計算して書き込み、font.recalcBBoxes を切る。
+    modified: 変更したグリフ名の集合（テーブル内で展開済みであること）
+    """
+    glyf_table = font['glyf']
+    glyphs = glyf_table.glyphs
+    glyph_order = font.getGlyphOrder()
+
+    done = set()
+    for name in modified:
+        glyph = glyphs[name]
+        if glyph.numberOfContours > 0:
+            glyph.recalcBounds(glyf_table)
+            done.add(name)
+
+    # コンポジットグリフの参照先（未展開のままでも取り出せる）
+    components = {}
+    for name in glyph_order:
+        glyph = glyphs[name]
+        if glyph.isComposite():
+            components[name] = glyph.getComponentNames(glyf_table)
+
+    # 変更されたグリフを（間接的に）参照するコンポジットグリフ
+    affected = {}
+
+    def is_affected(name):
+        if name not in affected:
+            affected[name] = False
+            affected[name] = any(
+                child in done or (child in components and is_affected(child))
+                for child in components[name]
+            )
+        return affected[name]
+
+    stale = [name for name in components if is_affected(name)]
+    if stale:
+        _recalc_composite_bounds(glyf_table, stale, done)
+
+    composite_values = {}
+
+    def composite_maxp_values(name):
+        """コンポジットグリフの (点数, 輪郭数, 参照の深さ)"""
+        if name not in composite_values:
+            composite_values[name] = (0, 0, 1)
+            points = contours = 0
+            depth = 1
+            for child in components[name]:
+                glyph = glyphs[child]
+                number_of_contours = glyph_header(glyph)[0]
+                if number_of_contours > 0:
+                    child_points, child_contours = _simple_maxp_values(glyph, number_of_contours)
+                elif number_of_contours < 0:
+                    child_points, child_contours, child_depth = composite_maxp_values(child)
+                    depth = max(depth, child_depth + 1)
+                else:
+                    continue
+                points += child_points
+                contours += child_contours
+            composite_values[name] = (points, contours, depth)
+        return composite_values[name]
+
+    hmtx = font['hmtx'] if 'hmtx' in font else None
+    vmtx = font['vmtx'] if 'vmtx' in font else None
+    INFINITY = 100000
+    x_min = y_min = INFINITY
+    x_max = y_max = -INFINITY
+    max_points = max_contours = 0
+    max_composite_points = max_composite_contours = 0
+    max_component_elements = max_component_depth = 0
+    all_x_min_is_lsb = True
+    widths = {}
+    heights = {}
+    for name in glyph_order:
+        glyph = glyphs[name]
+        number_of_contours, g_x_min, g_y_min, g_x_max, g_y_max = glyph_header(glyph)
+        if not number_of_contours:
+            continue
+        if hmtx is not None and hmtx[name][1] != g_x_min:
+            all_x_min_is_lsb = False
+        x_min = min(x_min, g_x_min)
+        y_min = min(y_min, g_y_min)
+        x_max = max(x_max, g_x_max)
+        y_max = max(y_max, g_y_max)
+        widths[name] = g_x_max - g_x_min
+        heights[name] = g_y_max - g_y_min
+        if number_of_contours > 0:
+            points, contours = _simple_maxp_values(glyph, number_of_contours)
+            max_points = max(max_points, points)
+            max_contours = max(max_contours, contours)
+        elif name in components:
+            points, contours, depth = composite_maxp_values(name)
+            max_composite_points = max(max_composite_points, points)
+            max_composite_contours = max(max_composite_contours, contours)
+            max_component_elements = max(max_component_elements, len(components[name]))
+            max_component_depth = max(max_component_depth, depth)
+
+    head = font['head']
+    if x_min == INFINITY:
+        head.xMin = head.yMin = head.xMax = head.yMax = 0
+    else:
+        head.xMin, head.yMin, head.xMax, head.yMax = x_min, y_min, x_max, y_max
+    if hmtx is not None:
+        if all_x_min_is_lsb:
+            head.flags = head.flags | 0x2
+        else:
+            head.flags = head.flags & ~0x2
+
+    if 'maxp' in font:
+        maxp = font['maxp']
+        maxp.numGlyphs = len(glyf_table)
+        if maxp.tableVersion != 0x00005000:
+            maxp.maxPoints = max_points
+            maxp.maxContours = max_contours
+            maxp.maxCompositePoints = max_composite_points
+            maxp.maxCompositeContours = max_composite_contours
+            maxp.maxComponentElements = max_component_elements
+            maxp.maxComponentDepth = max_component_depth
+
+    if 'hhea' in font and hmtx is not None:
+        _recalc_side_bearings(font['hhea'], hmtx, widths, 'advanceWidthMax',
+                              'minLeftSideBearing', 'minRightSideBearing', 'xMaxExtent')
+    if 'vhea' in font and vmtx is not None:
+        _recalc_side_bearings(font['vhea'], vmtx, heights, 'advanceHeightMax',
+                              'minTopSideBearing', 'minBottomSideBearing', 'yMaxExtent')
+
+    font.recalcBBoxes = False
+
+
+def _recalc_side_bearings(table, metrics, extents, advance_max, min_start, min_end, max_extent):
+    """hhea/vheaの最大送り幅・最小サイドベアリング・最大エクステントを計算する"""
+    setattr(table, advance_max, max(advance for advance, _ in metrics.metrics.values()))
+    if extents:
+        start, end, extent = float("inf"), float("inf"), -float("inf")
+        for name, size in extents.items():
+            advance, bearing = metrics[name]
+            start = min(start, bearing)
+            end = min(end, advance - bearing - size)
+            extent = max(extent, bearing + size)
+    else:
+        start = end = extent = 0
+    setattr(table, min_start, start)
+    setattr(table, min_end, end)
+    setattr(table, max_extent, extent)
@@ -0,0 +1,235 @@
+"""
+glyph_cache.py
+
+グリフ単位の処理結果をディスクに保存する永続キャッシュ。
+同じフォントをパラメータを少しずつ変えて何度も処理する場合、
+大半のグリフは毎回同じ結果になるため、幾何処理の前にここを引いて再利用する。
+
+キーは (元グリフのglyf/CharStringバイト列のハッシュ, エフェクト名, 正規化したparams,
+quality_level, エフェクトのコードバージョン) から作り、
+値にはエンコード済みの出力グリフを保存する。
+保存先はSQLite（既定: ~/.cache/fonteffecter/glyphs.sqlite）で、
+合計サイズの上限を超えると最後に使われた時刻が古いものから削除する（LRU）。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+
+import numpy as np
+
+from .glyph_outline import GlyphOutline
+
+# 既定のキャッシュ上限（MB）
+DEFAULT_MAX_SIZE_MB = 256
+
+# 出力に影響しないためキーに含めないパラメータ
+_NON_GEOMETRIC_PARAMS = ("workers", "glyph_cache", "corner_catalog")
+
+# 「処理不要（元グリフのまま）」を表す値
+UNCHANGED = b""
+
+
+def default_cache_dir():
+    """キャッシュディレクトリ（環境変数 FONTEFFECTER_CACHE_DIR で変更可能）"""
+    base = os.environ.get("FONTEFFECTER_CACHE_DIR")
+    if base:
+        return base
+    xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(xdg, "fonteffecter")
+
+
+def normalize_params(params):
+    """
+    キャッシュキー用にparamsを正規化する。
+    数値はfloatに揃え（40と40.0を同一視）、文字列は小文字化し、
+    出力に影響しないキー（workersなど）は除外する。
+    """
+    def normalize(value):
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            return value.lower()
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return str(value)
+
+    cleaned = {k: v for k, v in (params or {}).items() if k not in _NON_GEOMETRIC_PARAMS}
+    return json.dumps(normalize(cleaned), sort_keys=True, separators=(",", ":"))
+
+
+def source_version(*modules, extra=""):
+    """モジュールのソースファイルからエフェクトのコードバージョン（ハッシュ）を作る"""
+    digest = hashlib.blake2b(digest_size=16)
+    for module in modules:
+        path = getattr(module, "__file__", None)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    digest.update(extra.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def encode_outline(outline):
+    """GlyphOutlineをバイト列に変換する（座標はfloat64のまま保存するので往復で誤差は出ない）"""
+    header = struct.pack("<II", outline.num_points, outline.num_contours)
+    return (header
+            + outline.points.astype("<f8").tobytes()
+            + outline.flags.astype(np.uint8).tobytes()
+            + outline.ends.astype("<i4").tobytes())
+
+
+def decode_outline(data):
+    """encode_outlineで作ったバイト列からGlyphOutlineを復元する"""
+    num_points, num_contours = struct.unpack_from("<II", data)
+    offset = 8
+    points = np.frombuffer(data, dtype="<f8", count=num_points * 2, offset=offset).reshape(-1, 2)
+    offset += num_points * 16
+    flags = np.frombuffer(data, dtype=np.uint8, count=num_points, offset=offset)
+    offset += num_points
+    ends = np.frombuffer(data, dtype="<i4", count=num_contours, offset=offset)
+    return GlyphOutline(points.astype(np.float64), flags.copy(), ends.astype(np.intp))
+
+
+class GlyphCache:
+    """
+    SQLiteに保存するサイズ上限付きLRUキャッシュ。
+    hits / misses / stores / evictions のカウンタを持つ。
+    アクセス時刻の更新や追加はトランザクションにまとめ、close()（またはflush()）で確定する。
+    """
+
+    def __init__(self, path=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "glyphs.sqlite")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = int(float(max_size_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS glyphs ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS glyphs_last_used ON glyphs(last_used)")
+        self._conn.commit()
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM glyphs").fetchone()[0]
+        self._clock = time.time()
+
+    @classmethod
+    def from_config(cls, setting):
+        """
+        glyph_cache設定からキャッシュを作成する。
+        true → 既定の場所、{"path": ..., "max_size_mb": ...} → 指定の場所・上限。
+        false/None なら None を返す（キャッシュ無効）。
+        GlyphCacheと同じインターフェースのオブジェクト（font_server.pyのメモリ上のキャッシュなど）はそのまま返す。
+        """
+        if not setting:
+            return None
+        if hasattr(setting, "make_key"):
+            return setting
+        if isinstance(setting, dict):
+            return cls(setting.get("path"), setting.get("max_size_mb", DEFAULT_MAX_SIZE_MB))
+        if isinstance(setting, str) and setting.lower() not in ("true", "yes", "on", "1"):
+            return cls(setting)
+        return cls()
+
+    @staticmethod
+    def make_key(source_bytes, effect_name, params, quality_level, version):
+        """キャッシュキー（ハッシュ文字列）を作る"""
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (effect_name, normalize_params(params), str(quality_level).lower(), version):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(source_bytes)
+        return digest.hexdigest()
+
+    def _tick(self):
+        # 同一時刻のアクセスでも順序が付くよう単調増加させる
+        self._clock = max(time.time(), self._clock + 1e-6)
+        return self._clock
+
+    def get(self, key):
+        """キャッシュされた値（bytes）を返す。なければ None"""
+        row = self._conn.execute("SELECT value FROM glyphs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE glyphs SET last_used = ? WHERE key = ?", (self._tick(), key))
+        return bytes(row[0])
+
+    def put(self, key, value):
+        """値を保存し、上限を超えていれば古いものから削除する"""
+        value = bytes(value)
+        old = self._conn.execute("SELECT size FROM glyphs WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self._total_size -= old[0]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO glyphs (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), self._tick()),
+        )
+        self._total_size += len(value)
+        self.stores += 1
+        if self._total_size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """合計サイズが上限の9割を下回るまで、最後の使用が古いものから削除する"""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM glyphs ORDER BY last_used")
+        victims = []
+        for key, size in rows:
+            if self._total_size <= target:
+                break
+            victims.append((key,))
+            self._total_size -= size
+        self._conn.executemany("DELETE FROM glyphs WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM glyphs").fetchone()[0]
+
+    @property
+    def size_bytes(self):
+        return self._total_size
+
+    def stats(self):
+        """ヒット/ミスなどのカウンタ"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "size_bytes": self._total_size,
+        }
+
+    def flush(self):
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
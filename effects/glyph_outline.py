@@ -0,0 +1,264 @@
+"""
+glyph_outline.py
+
+TrueType/CFF共通の配列ベースのグリフ輪郭表現。
+glyfテーブルの GlyphCoordinates / endPtsOfContours と同じく、
+全輪郭の座標を1本のfloat64バッファ、フラグを1本のuint8バッファに並べ、
+各輪郭の終点インデックス配列で区切って保持する。
+"""
+
+import math
+
+import numpy as np
+
+from fontTools.pens.basePen import AbstractPen
+
+# オンカーブ点のフラグ（glyfのflagOnCurveと同じ値）
+FLAG_ON_CURVE = 0x01
+
+
+class GlyphOutline:
+    """
+    1グリフ分の輪郭データ。
+    points: (N, 2) float64, flags: (N,) uint8, ends: (C,) intp（各輪郭の最終点のインデックス）
+    各段階の処理は配列を書き換えず、新しいGlyphOutlineを返す。
+    """
+
+    __slots__ = ('points', 'flags', 'ends')
+
+    def __init__(self, points=None, flags=None, ends=None):
+        if points is None:
+            points = np.empty((0, 2), dtype=np.float64)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.flags = np.asarray(flags if flags is not None else (), dtype=np.uint8)
+        self.ends = np.asarray(ends if ends is not None else (), dtype=np.intp)
+
+    @classmethod
+    def from_contours(cls, contours):
+        """(coords, flags) の組、または {'coords', 'flags'} 辞書の並びから作成する"""
+        points = []
+        flags = []
+        ends = []
+        for contour in contours:
+            if isinstance(contour, dict):
+                coords, contour_flags = contour['coords'], contour['flags']
+            else:
+                coords, contour_flags = contour
+            if len(coords) == 0:
+                continue
+            points.extend(coords)
+            flags.extend(contour_flags)
+            ends.append(len(points) - 1)
+        return cls(np.array(points, dtype=np.float64).reshape(-1, 2), flags, ends)
+
+    @classmethod
+    def from_glyf(cls, glyph):
+        """
+        展開済みのglyfグリフから作成する。
+        座標とフラグはグリフのバッファをそのまま参照するので、読み取り専用として扱うこと。
+        """
+        points = np.frombuffer(glyph.coordinates.array, dtype=np.float64).reshape(-1, 2)
+        flags = np.frombuffer(glyph.flags, dtype=np.uint8)
+        return cls(points, flags, glyph.endPtsOfContours)
+
+    @classmethod
+    def concatenate(cls, outlines):
+        """複数のGlyphOutlineを輪郭の並びとして連結する"""
+        outlines = [o for o in outlines if len(o.points)]
+        if not outlines:
+            return cls()
+        offsets = np.cumsum([0] + [len(o.points) for o in outlines[:-1]])
+        return cls(
+            np.concatenate([o.points for o in outlines]),
+            np.concatenate([o.flags for o in outlines]),
+            np.concatenate([o.ends + offset for o, offset in zip(outlines, offsets)]),
+        )
+
+    @property
+    def num_points(self):
+        return len(self.points)
+
+    @property
+    def num_contours(self):
+        return len(self.ends)
+
+    @property
+    def starts(self):
+        """各輪郭の始点インデックス"""
+        starts = np.empty_like(self.ends)
+        if len(starts):
+            starts[0] = 0
+            starts[1:] = self.ends[:-1] + 1
+        return starts
+
+    def contour_lengths(self):
+        return self.ends - self.starts + 1
+
+    def contour(self, index):
+        """index番目の輪郭の (points, flags) ビューを返す"""
+        start = 0 if index == 0 else int(self.ends[index - 1]) + 1
+        end = int(self.ends[index]) + 1
+        return self.points[start:end], self.flags[start:end]
+
+    def contours(self):
+        """全輪郭の (points, flags) ビューを順に返す"""
+        start = 0
+        for end in self.ends.tolist():
+            yield self.points[start:end + 1], self.flags[start:end + 1]
+            start = end + 1
+
+    def select(self, indices):
+        """指定した輪郭だけを取り出したGlyphOutlineを返す"""
+        parts = []
+        for i in indices:
+            points, flags = self.contour(i)
+            parts.append(GlyphOutline(points, flags, [len(points) - 1]))
+        return GlyphOutline.concatenate(parts)
+
+    def bounds(self):
+        """(xMin, yMin, xMax, yMax)。点がなければ None"""
+        if not len(self.points):
+            return None
+        mins = self.points.min(axis=0)
+        maxs = self.points.max(axis=0)
+        return float(mins[0]), float(mins[1]), float(maxs[0]), float(maxs[1])
+
+    def copy(self):
+        return GlyphOutline(self.points.copy(), self.flags.copy(), self.ends.copy())
+
+    def draw(self, pen, cubic=False):
+        """
+        ペン（fontToolsのAbstractPen）に描画する。オフカーブ点の連続は次のオンカーブ点（輪郭の最後では始点）までの
+        二次スプラインとして描き、cubic=Trueなら2つ続きのオフカーブ点は三次ベジェの制御点として描く。
+        オンカーブ点のない輪郭はTrueTypeの閉じた二次スプラインとして描く。
+        """
+        for points, flags in self.contours():
+            coords = [tuple(point) for point in points.tolist()]
+            on_curve = np.flatnonzero(flags & FLAG_ON_CURVE)
+            if not len(on_curve):
+                pen.qCurveTo(*coords, None)
+                pen.closePath()
+                continue
+            # 最初のオンカーブ点から始め、始点に戻るまでたどる
+            first = int(on_curve[0])
+            coords = coords[first:] + coords[:first + 1]
+            on = flags[first:].tolist() + flags[:first + 1].tolist()
+            pen.moveTo(coords[0])
+            off = []
+            last = len(coords) - 1
+            for i, (point, flag) in enumerate(zip(coords[1:], on[1:]), 1):
+                if not flag & FLAG_ON_CURVE:
+                    off.append(point)
+                elif not off:
+                    # 始点に戻る直線はclosePathで閉じる
+                    if i < last:
+                        pen.lineTo(point)
+                elif cubic and len(off) == 2:
+                    pen.curveTo(*off, point)
+                else:
+                    pen.qCurveTo(*off, point)
+                if flag & FLAG_ON_CURVE:
+                    off = []
+            pen.closePath()
+
+    def __eq__(self, other):
+        if not isinstance(other, GlyphOutline):
+            return NotImplemented
+        return (np.array_equal(self.points, other.points)
+                and np.array_equal(self.flags, other.flags)
+                and np.array_equal(self.ends, other.ends))
+
+    def __repr__(self):
+        return f"<GlyphOutline {self.num_contours} contours, {self.num_points} points>"
+
+
+class GlyphOutlinePen(AbstractPen):
+    """
+    描画コマンドを直接GlyphOutlineに変換するペン。
+    曲線の制御点はオフカーブ(0)、それ以外の点はオンカーブ(1)として記録する。
+    （三次ベジェの制御点も同様に扱う）
+    コンポーネント（CFFのseacによるアクセント付き文字など）は輪郭に含めず、componentsに (グリフ名, 変換行列) を記録する。
+    """
+
+    def __init__(self):
+        self._points = []
+        self._flags = []
+        self._ends = []
+        self._in_contour = False
+        self.components = []
+
+    def _close_current(self):
+        if self._in_contour:
+            self._ends.append(len(self._flags) - 1)
+            self._in_contour = False
+
+    def moveTo(self, pt):
+        self._close_current()
+        self._points.append(pt)
+        self._flags.append(FLAG_ON_CURVE)
+        self._in_contour = True
+
+    def lineTo(self, pt):
+        self._points.append(pt)
+        self._flags.append(FLAG_ON_CURVE)
+
+    def _curve(self, *points):
+        self._points.extend(points[:-1])
+        self._flags.extend([0] * (len(points) - 1))
+        self._points.append(points[-1])
+        self._flags.append(FLAG_ON_CURVE)
+
+    def qCurveTo(self, *points):
+        self._curve(*points)
+
+    def curveTo(self, *points):
+        self._curve(*points)
+
+    def closePath(self):
+        pass
+
+    def endPath(self):
+        pass
+
+    def addComponent(self, glyphName, transformation):
+        self.components.append((glyphName, transformation))
+
+    @property
+    def outline(self):
+        """記録した輪郭をGlyphOutlineとして返す"""
+        self._close_current()
+        return GlyphOutline(np.array(self._points, dtype=np.float64).reshape(-1, 2), self._flags, self._ends)
+
+
+class EndpointIndex:
+    """
+    輪郭の始点・終点を許容誤差tolの格子で量子化したハッシュ索引。
+    距離がtol未満の2点は隣接するセルに入るので、
+    問い合わせ点の周囲3x3セルだけを調べれば一致する端点がすべて見つかる。
+    """
+
+    __slots__ = ('tol', 'cells')
+
+    START = 0
+    END = 1
+
+    def __init__(self, tol):
+        self.tol = tol
+        self.cells = {}
+
+    def _cell(self, point):
+        return (math.floor(point[0] / self.tol), math.floor(point[1] / self.tol))
+
+    def add(self, contour_index, end, point):
+        self.cells.setdefault(self._cell(point), []).append((contour_index, end, point))
+
+    def nearby(self, point):
+        """pointからの距離がtol未満の端点を (輪郭番号, START/END) で返す"""
+        cx, cy = self._cell(point)
+        x, y = point
+        tol = self.tol
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for contour_index, end, p in self.cells.get((cx + dx, cy + dy), ()):
+                    if math.hypot(x - p[0], y - p[1]) < tol:
+                        yield contour_index, end
@@ -0,0 +1,256 @@
+"""
+glyph_pipeline.py
+
+グリフ単位の融合パイプライン。
+apply_outline に対応した複数のエフェクトを、グリフごとに
+「1回のデコード → 各エフェクトを順に適用 → 1回のエンコード」でまとめて処理する。
+エフェクトごとにフォント全体をデコード・再エンコードする従来の方式と比べ、
+変換のコストがエフェクトの数によらず1回分で済む。
+
+TrueTypeでは変更したグリフだけをglyfテーブルに書き戻し（glyf_passthrough）、
+CFFでは変更しないグリフ・サブルーチンのバイトコードをそのまま残す（cff_passthrough）。
+"""
+
+import importlib
+import io
+import logging
+from collections import Counter
+
+from . import cff_passthrough, glyf_passthrough
+from .glyph_outline import GlyphOutline, GlyphOutlinePen
+from .metrics import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+class GlyphPipeline:
+    """
+    apply_outline に対応したエフェクトの並びをグリフごとに適用する。
+    effects: (エフェクトのインスタンス, begin_outlinesに渡す引数の辞書) の並び
+    glyphs: 処理するグリフ名の集合（glyphs設定で選んだもの）。None なら全グリフ
+    countersとtimingsにはデコード・エンコードなどパイプライン自体の集計と時間を記録し、
+    角丸化した角の数などエフェクト固有のものは各エフェクトのcounters/timingsに記録される。
+    """
+
+    def __init__(self, effects, workers=1, glyphs=None):
+        self.effects = list(effects)
+        self.workers = max(1, int(workers or 1))
+        self.glyphs = glyphs
+        self.counters = Counter()
+        self.timings = StageTimer()
+
+    def apply(self, font):
+        """フォントの全グリフにエフェクトの並びを適用し、変更後のフォントを返す"""
+        for effect, kwargs in self.effects:
+            effect.begin_outlines(font, **kwargs)
+            if kwargs.get('glyph_cache'):
+                logger.info("グリフ単位のパイプラインではグリフキャッシュを使いません（%s）", type(effect).__name__)
+
+        if 'CFF ' in font:
+            self._apply_to_cff_font(font)
+        elif 'glyf' in font:
+            self._apply_to_truetype_font(font)
+        else:
+            raise ValueError("サポートされていないフォント形式です。TrueType (.ttf) または OpenType/CFF (.otf) フォントを使用してください。")
+
+        for effect, _ in self.effects:
+            effect.end_outlines(font)
+        return font
+
+    def run_chain(self, glyph_name, outline, cubic):
+        """1グリフの輪郭に各エフェクトを順に適用する。どのエフェクトも変更しなければ None"""
+        changed = False
+        for effect, _ in self.effects:
+            try:
+                result = effect.apply_outline(outline, effect.params, cubic=cubic, glyph_name=glyph_name)
+            except Exception as e:
+                self.counters['errors'] += 1
+                logger.error("  エラー: グリフ '%s' に %s を適用中に例外が発生: %s", glyph_name, type(effect).__name__, e)
+                continue
+            if result is not None:
+                outline = result
+                changed = True
+        return outline if changed else None
+
+    def _apply_to_truetype_font(self, font):
+        glyf_table = font['glyf']
+        glyph_names = self._selected(glyf_table.keys())
+        modified = set()
+        for glyph_name, outline in self._compute('truetype', font, glyph_names):
+            if outline is None:
+                continue
+            with self.timings.stage('encode'):
+                glyf_passthrough.store_outline(glyf_table[glyph_name], outline)
+            modified.add(glyph_name)
+        with self.timings.stage('metrics'):
+            glyf_passthrough.recalc_metrics(font, modified)
+        logger.info("グリフ単位のパイプライン: %d個のグリフを変更しました", len(modified))
+
+    def _apply_to_cff_font(self, font):
+        from fontTools.misc.psCharStrings import T2CharString
+
+        cff = font['CFF '].cff
+        topDict = cff.topDictIndex[0]
+        charStrings = topDict.CharStrings
+        glyph_names = self._selected(charStrings.keys())
+        modified = 0
+
+        # 変更しないグリフが参照するサブルーチンは、描画で展開されても元のバイトコードに戻す
+        subr_bytecodes = cff_passthrough.snapshot_subr_bytecodes(cff, topDict)
+        try:
+            for glyph_name, bytecode in self._compute('cff', font, glyph_names):
+                if bytecode is None:
+                    continue
+                charString = charStrings[glyph_name]
+                charStrings[glyph_name] = T2CharString(
+                    bytecode=bytecode,
+                    private=getattr(charString, 'private', None),
+                    globalSubrs=getattr(charString, 'globalSubrs', None),
+                )
+                modified += 1
+        finally:
+            cff_passthrough.restore_subr_bytecodes(subr_bytecodes)
+        logger.info("グリフ単位のパイプライン: %d個のグリフを変更しました", modified)
+
+    def _selected(self, glyph_names):
+        """処理するグリフ名のリスト（選ばれなかったグリフはデコードしない）"""
+        if self.glyphs is None:
+            return list(glyph_names)
+        return [name for name in glyph_names if name in self.glyphs]
+
+    def _compute(self, kind, font, glyph_names):
+        """グリフごとの処理結果を (glyph_name, 結果) の形でグリフ順に返す（逐次または並列）"""
+        if self.workers > 1:
+            return self._run_in_workers(font, kind, glyph_names)
+        if kind == 'truetype':
+            glyf_table = font['glyf']
+            return ((name, self.process_truetype_glyph(glyf_table, name)) for name in glyph_names)
+        charStrings = font['CFF '].cff.topDictIndex[0].CharStrings
+        return ((name, self.process_cff_glyph(charStrings, name)) for name in glyph_names)
+
+    def process_truetype_glyph(self, glyf_table, glyph_name):
+        """TrueTypeグリフ1つをデコードしてエフェクトの並びを適用する。変更後のGlyphOutline、変更なしは None"""
+        t = self.timings.start()
+        glyph = glyf_passthrough.decode_glyph(glyf_table, glyph_name)
+        # 空・コンポジットのグリフは対象外
+        if glyf_passthrough.glyph_header(glyph)[0] <= 0:
+            self.timings.lap('decode', t)
+            return None
+        outline = GlyphOutline.from_glyf(glyph)
+        self.timings.lap('decode', t)
+        return self.run_chain(glyph_name, outline, cubic=False)
+
+    def process_cff_glyph(self, charStrings, glyph_name):
+        """
+        CFFグリフ1つをデコードしてエフェクトの並びを適用し、エンコードしたバイトコードを返す。変更なしは None。
+        """
+        t = self.timings.start()
+        charString = charStrings[glyph_name]
+        source = cff_passthrough.decodable_copy(charString)
+        pen = GlyphOutlinePen()
+        source.draw(pen)
+        outline = pen.outline
+        width = getattr(source, 'width', 0)
+        self.timings.lap('decode', t)
+        # 輪郭のないグリフとコンポーネント（seac）を含むグリフは処理しない
+        if not outline.num_contours or pen.components:
+            return None
+
+        outline = self.run_chain(glyph_name, outline, cubic=True)
+        if outline is None:
+            return None
+
+        t = self.timings.start()
+        try:
+            new_charstring = cff_passthrough.encode_outline(outline, getattr(charString, 'private', None), width)
+            new_charstring.compile()
+        except Exception as char_error:
+            self.counters['errors'] += 1
+            logger.error("    CharString作成エラー: グリフ '%s': %s", glyph_name, char_error)
+            return None
+        self.timings.lap('encode', t)
+        return new_charstring.bytecode
+
+    def _run_in_workers(self, font, kind, glyph_names):
+        """
+        グリフ集合をチャンクに分割し、ProcessPoolExecutorで並列に処理する。
+        各ワーカーはフォントのバイト列とエフェクトの設定からパイプラインを復元し、
+        変更したグリフのデータ（GlyphOutlineまたはCharStringバイトコード）だけを返す。
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+
+        # ワーカーに渡すため、現在のフォント状態をバイト列に書き出す
+        t = self.timings.start()
+        buf = io.BytesIO()
+        recalc_timestamp, recalc_bboxes = font.recalcTimestamp, font.recalcBBoxes
+        font.recalcTimestamp = font.recalcBBoxes = False
+        try:
+            font.save(buf)
+        finally:
+            font.recalcTimestamp, font.recalcBBoxes = recalc_timestamp, recalc_bboxes
+        specs = [(type(effect).__module__, type(effect).__name__, dict(effect.params), kwargs)
+                 for effect, kwargs in self.effects]
+        self.timings.lap('worker_setup', t)
+
+        chunk_size = max(1, -(-len(glyph_names) // (self.workers * 4)))
+        chunks = [glyph_names[i:i + chunk_size] for i in range(0, len(glyph_names), chunk_size)]
+        logger.info("並列処理: %dワーカー, %dチャンク（%dグリフ/チャンク）", self.workers, len(chunks), chunk_size)
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_pipeline_worker,
+            initargs=(buf.getvalue(), specs),
+        ) as executor:
+            for results, stats, effect_stats in executor.map(_run_pipeline_chunk, repeat(kind), chunks):
+                # ワーカー側の集計と時間を、パイプラインと各エフェクトに集約する
+                self.counters.update(stats[0])
+                self.timings.merge(stats[1])
+                for (effect, _), (counters, timings) in zip(self.effects, effect_stats):
+                    effect.counters.update(counters)
+                    effect.timings.merge(timings)
+                yield from results
+
+
+# --- 並列処理用ワーカー ---
+# ProcessPoolExecutorから呼ばれるため、モジュールレベルの関数として定義する。
+
+_worker_state = {}
+
+
+def _init_pipeline_worker(font_data, specs):
+    """ワーカープロセスの初期化。フォントとエフェクトの並びを1度だけ復元する。"""
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(io.BytesIO(font_data))
+    effects = []
+    for module_name, class_name, params, kwargs in specs:
+        effect = getattr(importlib.import_module(module_name), class_name)(params=params)
+        effect.begin_outlines(font, **kwargs)
+        effects.append((effect, kwargs))
+    _worker_state['font'] = font
+    _worker_state['pipeline'] = GlyphPipeline(effects)
+
+
+def _run_pipeline_chunk(kind, glyph_names):
+    """
+    チャンク内のグリフを処理し、変更したグリフのデータのみを返す。
+    パイプラインと各エフェクトのカウンタ・段階ごとの時間も合わせて返す。
+    """
+    font = _worker_state['font']
+    pipeline = _worker_state['pipeline']
+    pipeline.counters = Counter()
+    pipeline.timings = StageTimer()
+    for effect, _ in pipeline.effects:
+        effect.counters = Counter()
+        effect.timings = StageTimer()
+
+    if kind == 'truetype':
+        glyf_table = font['glyf']
+        results = [(name, pipeline.process_truetype_glyph(glyf_table, name)) for name in glyph_names]
+    else:
+        charStrings = font['CFF '].cff.topDictIndex[0].CharStrings
+        results = [(name, pipeline.process_cff_glyph(charStrings, name)) for name in glyph_names]
+
+    effect_stats = [(effect.counters, effect.timings) for effect, _ in pipeline.effects]
+    return results, (pipeline.counters, pipeline.timings), effect_stats
@@ -0,0 +1,154 @@
+"""
+glyph_selection.py
+
+設定ファイルのglyphsで、エフェクトを適用するグリフを絞り込む。
+JIS第1水準の漢字とかなだけ、サイトで実際に使う文字だけ、のように一部のグリフだけを処理したい場合、
+選ばれなかったグリフはデコードもせず元のバイト列のまま残す。
+
+  glyphs:
+    unicodes: ["U+3041-3096", "U+30A1-30FA"]   # コードポイントの範囲（U+XXXX-YYYY / XXXX..YYYY / U+XXXX / [開始, 終了]）
+    text: "角丸"                                # 文字の並び
+    text_file: ./chars.txt                      # 文字の並びを書いたテキストファイル（UTF-8、複数ならリスト）
+    names: ["uni4E.*", "g00[0-9]"]              # グリフ名全体に一致する正規表現
+    exclude:                                    # 除外する条件（キーは上と同じ）
+      text: "々"
+
+上の条件のいずれかに当てはまるグリフを選び（条件がなければ全グリフ）、excludeに当てはまるものを除く。
+文字・コードポイントはフォントのcmap（getBestCmap）でグリフ名に引く。
+解決はFontProcessorがフォントを読み込んだ後に1度だけ行い、グリフ名の集合を各エフェクトに glyphs として渡す。
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+
+# 条件のキー
+CRITERIA_KEYS = ("unicodes", "text", "text_file", "names")
+
+_RANGE_PATTERN = re.compile(r"^(?:U\+)?([0-9A-F]{1,6})(?:\s*(?:-|\.\.)\s*(?:U\+)?([0-9A-F]{1,6}))?$", re.IGNORECASE)
+
+
+def parse_unicode_range(value):
+    """コードポイントの範囲の指定を (開始, 終了) にする。不正なら ValueError"""
+    if isinstance(value, bool):
+        raise ValueError(f"コードポイントの範囲を解釈できません: {value!r}")
+    if isinstance(value, int):
+        start = end = value
+    elif isinstance(value, (list, tuple)) and len(value) == 2:
+        start, end = (parse_unicode_range(item)[0] for item in value)
+    elif isinstance(value, str) and _RANGE_PATTERN.match(value.strip()):
+        first, last = _RANGE_PATTERN.match(value.strip()).groups()
+        start = int(first, 16)
+        end = int(last, 16) if last else start
+    else:
+        raise ValueError(f"コードポイントの範囲を解釈できません: {value!r}")
+    if not 0 <= start <= end <= 0x10FFFF:
+        raise ValueError(f"コードポイントの範囲が不正です: {value!r}")
+    return start, end
+
+
+def _merge_ranges(ranges):
+    """重なる・隣り合う範囲をまとめ、開始位置の順に並べる"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+@dataclass(frozen=True)
+class GlyphCriteria:
+    """コードポイントの範囲（まとめ済み）とグリフ名の正規表現の組"""
+    ranges: tuple = ()
+    names: tuple = ()
+
+    @classmethod
+    def from_config(cls, config, where="glyphs", allowed=("exclude",)):
+        """unicodes / text / text_file / names の辞書から作る（text_fileはここで読み込む）。allowedのキーは無視する"""
+        unknown = sorted(set(config) - set(CRITERIA_KEYS) - set(allowed))
+        if unknown:
+            raise ValueError(f"{where} に不明な項目があります: {', '.join(map(str, unknown))}"
+                             f"（{', '.join(CRITERIA_KEYS)} を指定してください）")
+        ranges = [parse_unicode_range(value) for value in _as_list(config.get("unicodes"))]
+        text = "".join(str(value) for value in _as_list(config.get("text")))
+        for path in _as_list(config.get("text_file")):
+            with open(path, "r", encoding="utf-8") as f:
+                text += f.read()
+        # 改行などの空白はテキストファイルの区切りとみなす
+        ranges.extend((ord(char), ord(char)) for char in set(text) if not char.isspace())
+        names = tuple(str(pattern) for pattern in _as_list(config.get("names")))
+        for pattern in names:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"{where}.names の正規表現が不正です: {pattern!r}（{e}）") from None
+        return cls(_merge_ranges(ranges), names)
+
+    def __bool__(self):
+        return bool(self.ranges or self.names)
+
+    def codepoints(self, cmap):
+        """cmap（{コードポイント: グリフ名}）のうち、範囲に含まれるコードポイントのリスト"""
+        if not self.ranges:
+            return []
+        starts = [start for start, _ in self.ranges]
+        matched = []
+        for codepoint in cmap:
+            index = bisect.bisect_right(starts, codepoint) - 1
+            if index >= 0 and codepoint <= self.ranges[index][1]:
+                matched.append(codepoint)
+        return matched
+
+    def glyph_names(self, glyph_order):
+        """グリフ名の正規表現に全体が一致するグリフ名のリスト"""
+        if not self.names:
+            return []
+        pattern = re.compile("|".join(f"(?:{name})" for name in self.names))
+        return [glyph_name for glyph_name in glyph_order if pattern.fullmatch(glyph_name)]
+
+    def match(self, glyph_order, cmap):
+        """条件に当てはまるグリフ名の集合。cmapは {コードポイント: グリフ名}"""
+        matched = {cmap[codepoint] for codepoint in self.codepoints(cmap)}
+        matched.update(self.glyph_names(glyph_order))
+        return matched
+
+
+@dataclass(frozen=True)
+class GlyphSelection:
+    """選ぶ条件（includeが空なら全グリフ）と除く条件"""
+    include: GlyphCriteria = GlyphCriteria()
+    exclude: GlyphCriteria = GlyphCriteria()
+
+    @classmethod
+    def from_config(cls, setting):
+        """glyphs設定から作る。未指定なら None（全グリフを処理する）。不正なら ValueError"""
+        if setting is None:
+            return None
+        if not isinstance(setting, dict):
+            raise ValueError("glyphsは unicodes / text / text_file / names / exclude の辞書で指定してください")
+        exclude = setting.get("exclude") or {}
+        if not isinstance(exclude, dict):
+            raise ValueError("glyphs.exclude は unicodes / text / text_file / names の辞書で指定してください")
+        if "exclude" in exclude:
+            raise ValueError("glyphs.exclude の中に exclude は指定できません")
+        selection = cls(GlyphCriteria.from_config(setting), GlyphCriteria.from_config(exclude, "glyphs.exclude"))
+        return selection if selection.include or selection.exclude else None
+
+    def resolve(self, font):
+        """フォントで処理するグリフ名の集合（frozenset）"""
+        glyph_order = font.getGlyphOrder()
+        cmap = font.getBestCmap() or {}
+        selected = self.include.match(glyph_order, cmap) if self.include else set(glyph_order)
+        if self.exclude:
+            selected -= self.exclude.match(glyph_order, cmap)
+        return frozenset(selected)
@@ -0,0 +1,203 @@
+"""
+instance_cache.py
+
+Variable Fontから作った静的インスタンスをディスクに保存するキャッシュ。
+instancer.instantiateVariableFont は大きなCJKフォントでは角丸処理より時間がかかるため、
+同じフォント・同じ軸の位置の組み合わせは2回目以降これを読み込むだけにする。
+
+キーは (入力フォントファイルのハッシュ, 正規化した軸座標, fontToolsのバージョン) から作る。
+軸座標はfvarの範囲で -1.0〜1.0 に正規化し、instancerと同じくF2Dot14に丸めるので、
+700 と 700.0、範囲外の値と範囲の端のように同じインスタンスになる指定は同じキーになる。
+値には保存済みのフォントのバイト列をそのままファイル（<キー>.font）として置き、
+合計サイズの上限を超えると最後に使われた時刻（ファイルのmtime）が古いものから削除する（LRU）。
+"""
+
+import hashlib
+import io
+import os
+
+import fontTools
+from fontTools.misc.fixedTools import floatToFixed
+from fontTools.varLib.models import normalizeValue
+
+from .glyph_cache import default_cache_dir
+
+# 既定のキャッシュ上限（MB）
+DEFAULT_MAX_SIZE_MB = 1024
+
+# キャッシュファイルの拡張子
+SUFFIX = ".font"
+
+# 同じプロセスで同じファイルを何度もハッシュしないための記録 {(パス, サイズ, mtime): ハッシュ}
+_digest_memo = {}
+
+
+def file_digest(path):
+    """
+    ファイル内容のハッシュ（16進文字列）。
+    パス・サイズ・更新時刻が同じならプロセス内で記録した値を使う（バッチ処理で同じフォントを繰り返す場合）。
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _digest_memo.get(memo_key)
+    if digest is None:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+        digest = _digest_memo[memo_key] = hasher.hexdigest()
+    return digest
+
+
+def data_digest(data):
+    """バイト列（bytes / memoryview / mmap）のハッシュ。同じ内容のファイルの file_digest と同じ値になる"""
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(memoryview(data))
+    return hasher.hexdigest()
+
+
+def normalize_location(font, variation):
+    """
+    軸名と値の辞書を、fvarの範囲で正規化したF2Dot14の整数の組（軸名順）にする。
+    fvarにない軸名があれば None（キャッシュせず、instancerにエラーを任せる）。
+    """
+    axes = {axis.axisTag: (axis.minValue, axis.defaultValue, axis.maxValue) for axis in font["fvar"].axes}
+    location = []
+    for tag in sorted(variation):
+        if tag not in axes:
+            return None
+        location.append((tag, floatToFixed(normalizeValue(float(variation[tag]), axes[tag]), 14)))
+    return tuple(location)
+
+
+class InstanceCache:
+    """
+    静的インスタンスをファイルで保存するサイズ上限付きLRUキャッシュ。
+    hits / misses / stores / evictions のカウンタを持つ。
+    書き込みは一時ファイルからの置き換えで行うので、複数のプロセスが同じディレクトリを使っても壊れない。
+    """
+
+    def __init__(self, path=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "instances")
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = int(float(max_size_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, setting):
+        """
+        instance_cache設定からキャッシュを作成する。
+        true → 既定の場所、{"path": ..., "max_size_mb": ...} → 指定の場所・上限、文字列 → 指定のディレクトリ。
+        false/None なら None を返す（キャッシュ無効）。
+        """
+        if not setting:
+            return None
+        if isinstance(setting, dict):
+            return cls(setting.get("path"), setting.get("max_size_mb", DEFAULT_MAX_SIZE_MB))
+        if isinstance(setting, str) and setting.lower() not in ("true", "yes", "on", "1"):
+            return cls(setting)
+        return cls()
+
+    @staticmethod
+    def make_key(font_digest, location):
+        """キャッシュキー（ハッシュ文字列）を作る。locationは normalize_location の戻り値"""
+        digest = hashlib.blake2b(digest_size=20)
+        parts = [font_digest, fontTools.version] + [f"{tag}={value}" for tag, value in location]
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + SUFFIX)
+
+    def get(self, key):
+        """キャッシュされたインスタンスのファイルパスを返す。なければ None"""
+        path = self._file(key)
+        try:
+            # 最後に使われた時刻としてmtimeを更新する
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key, font):
+        """
+        インスタンス（TTFont）を保存し、保存したバイト列を返す。上限を超えていれば古いものから削除する。
+        保存時刻でhead.modifiedが変わらないよう、タイムスタンプは更新しない。
+        """
+        recalc = font.recalcTimestamp
+        font.recalcTimestamp = False
+        try:
+            buf = io.BytesIO()
+            font.save(buf)
+        finally:
+            font.recalcTimestamp = recalc
+        data = buf.getvalue()
+        path = self._file(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+        self.stores += 1
+        self._evict()
+        return data
+
+    def _entries(self):
+        """(mtime, サイズ, パス) の一覧"""
+        entries = []
+        for filename in os.listdir(self.path):
+            if not filename.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.path, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """合計サイズが上限を超えていれば、上限の9割を下回るまで最後の使用が古いものから削除する"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries())
+
+    @property
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def stats(self):
+        """ヒット/ミスなどのカウンタ"""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+        }
+
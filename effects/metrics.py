@@ -0,0 +1,87 @@
+"""
+metrics.py
+
+処理段階ごとの所要時間を集計する軽量タイマー。
+グリフ単位のループ内でも使えるよう、計測は time.perf_counter の差分を
+辞書に足し込むだけにしている。
+"""
+
+import time
+
+perf_counter = time.perf_counter
+
+
+class StageTimer:
+    """
+    段階名ごとの累積秒数と呼び出し回数を記録する。
+
+        t = timer.start()
+        ...デコード...
+        t = timer.lap("decode", t)
+        ...角丸...
+        t = timer.lap("rounding", t)
+
+    のように、前の段階の終了時刻を次の段階の開始時刻として使い回せる。
+    """
+
+    __slots__ = ('seconds', 'calls')
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    @staticmethod
+    def start():
+        return perf_counter()
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def lap(self, name, started):
+        """startedからの経過時間をnameに加算し、現在時刻を返す"""
+        now = perf_counter()
+        self.add(name, now - started)
+        return now
+
+    def stage(self, name):
+        """with文で1つの段階を計測する"""
+        return _Stage(self, name)
+
+    def merge(self, other):
+        """別のStageTimer（またはas_dict()の結果）を足し合わせる"""
+        if isinstance(other, StageTimer):
+            items = ((name, other.seconds[name], other.calls.get(name, 0)) for name in other.seconds)
+        else:
+            items = ((name, value["seconds"], value["calls"]) for name, value in other.items())
+        for name, seconds, calls in items:
+            self.add(name, seconds, calls)
+
+    def total(self):
+        return sum(self.seconds.values())
+
+    def as_dict(self):
+        """{段階名: {"seconds": 秒, "calls": 回数}} 形式の辞書（計測順）"""
+        return {
+            name: {"seconds": round(seconds, 6), "calls": self.calls.get(name, 0)}
+            for name, seconds in self.seconds.items()
+        }
+
+    def __bool__(self):
+        return bool(self.seconds)
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.lap(self.name, self.started)
+        return False
@@ -0,0 +1,202 @@
+"""
+overlap_screen.py
+
+パス統合（Union）の前に、グリフの輪郭が重なっているかを安く判定する事前スクリーニング。
+大半のグリフは輪郭同士が交差しないので、ここで重なりがないと分かったグリフはUnionを省略できる。
+
+1. 曲線を誤差 tolerance（既定0.5フォント単位。出力時の整数化より細かい）以下の折れ線にする。
+2. 線分ごとのバウンディングボックスをx方向にソートして走査し（sweep-and-prune）、
+   ボックスが重なる線分の組だけを候補にする。
+3. 候補の組を一定数（PAIR_CHUNK）ずつ厳密に判定し、交差が見つかった時点で打ち切る。
+別の輪郭の線分の組と、1つの輪郭の隣り合わない線分の組（自己交差）を同じ走査で調べる。
+線分の全組み合わせは作らないので、点の多いグリフでも作業用の配列はPAIR_CHUNK程度の大きさに収まる。
+
+輪郭が別の輪郭に完全に含まれる場合（交差はない）は重なりとして扱わない。
+同じ向きなら内側の輪郭は塗りに影響せず、逆向きなら穴なので、どちらもUnionしなくても見た目は変わらない。
+
+グリフ単位で呼ばれるので、輪郭や線分ごとのPythonループは避け、
+グリフ全体をまとめたNumPy配列で処理する。
+"""
+
+import numpy as np
+
+from .glyph_outline import FLAG_ON_CURVE
+
+# 曲線を折れ線にするときの許容誤差（フォント単位）
+DEFAULT_TOLERANCE = 0.5
+# 1つの曲線を分割する最大数
+MAX_SUBDIVISIONS = 64
+# 一度に厳密に判定する線分の組の数
+PAIR_CHUNK = 1 << 16
+
+
+def _pieces(outline, cubic):
+    """
+    輪郭を区間（直線・二次・三次ベジェ）に分け、すべて三次ベジェの制御点 (始点, 制御点1, 制御点2, 終点) で表す。
+    区間は元の点の位置ごとに高々1つで、点の順に並べれば輪郭をたどる順になる。
+    (制御点 (4,k,2), 区間の元の点の位置 (k,)) を返す。
+    """
+    points = outline.points
+    on = (outline.flags & FLAG_ON_CURVE).astype(bool)
+    count = len(points)
+    # 輪郭内で巡回する前後の点
+    following = np.arange(1, count + 1)
+    following[outline.ends] = outline.starts
+    preceding = np.arange(-1, count - 1)
+    preceding[outline.starts] = outline.ends
+
+    off = ~on
+    # 三次ベジェ（CFF）: オンカーブ点 → オフカーブ点2つ → オンカーブ点
+    cubic_first = np.zeros(count, dtype=bool)
+    cubic_second = np.zeros(count, dtype=bool)
+    if cubic:
+        cubic_first = off & on[preceding] & off[following] & on[following[following]]
+        cubic_second = cubic_first[preceding]
+    quadratic = off & ~cubic_first & ~cubic_second
+    line = on & on[following]
+
+    index = np.flatnonzero(line | quadratic | cubic_first)
+    kind_line = line[index][:, None]
+    kind_cubic = cubic_first[index][:, None]
+    p = points[index]
+    prv = points[preceding[index]]
+    nxt = points[following[index]]
+    # 二次スプライン: 隣がオフカーブ点なら間に暗黙のオンカーブ点がある
+    q_start = np.where(on[preceding[index], None], prv, (prv + p) / 2)
+    q_end = np.where(on[following[index], None], nxt, (p + nxt) / 2)
+
+    start = np.where(kind_line, p, np.where(kind_cubic, prv, q_start))
+    end = np.where(kind_line, nxt, np.where(kind_cubic, points[following[following[index]]], q_end))
+    # 直線・二次ベジェは三次ベジェに次数上げする
+    c1 = np.where(kind_cubic, p, start + 2 / 3 * (p - start))
+    c2 = np.where(kind_cubic, nxt, end + 2 / 3 * (p - end))
+    c1 = np.where(kind_line, start + (end - start) / 3, c1)
+    c2 = np.where(kind_line, end + (start - end) / 3, c2)
+    return (start, c1, c2, end), index
+
+
+def glyph_polylines(outline, cubic=False, tolerance=DEFAULT_TOLERANCE, max_length=None):
+    """
+    グリフの全輪郭を折れ線にする。
+    max_lengthを指定すると、曲線はどの線分もおよそmax_length以下になるよう細かく分割する（直線は分割しない）。
+    (頂点 (N,2), 輪郭ごとの開始位置 (n+1,)) を返す。各輪郭は最後の頂点から始点へ戻って閉じる。
+    長さ0の線分はできないよう、同じ頂点の連続は1つにまとめる。
+    cubic=False（TrueType）ではオフカーブ点の連続を暗黙のオンカーブ点を挟んだ二次スプライン、
+    cubic=True（CFF）では2つ連続するオフカーブ点を三次ベジェの制御点として扱う。
+    """
+    (start, c1, c2, end), index = _pieces(outline, cubic)
+
+    # 制御点の折れ線からの最大偏差（の上限）から分割数を決める（直線は1）
+    deviation = 0.75 * np.maximum(
+        np.hypot(*(start - 2 * c1 + c2).T), np.hypot(*(c1 - 2 * c2 + end).T)
+    )
+    steps = np.ones(len(index), dtype=np.intp)
+    curved = deviation > tolerance
+    steps[curved] = np.minimum(np.ceil(np.sqrt(deviation[curved] / tolerance)), MAX_SUBDIVISIONS)
+    if max_length is not None:
+        # 制御点の折れ線の長さは曲線の長さの上限
+        polygon = np.hypot(*(c1 - start).T) + np.hypot(*(c2 - c1).T) + np.hypot(*(end - c2).T)
+        steps[curved] = np.maximum(steps[curved], np.ceil(polygon[curved] / max_length))
+
+    # 各区間の分割点（t = 1/steps, 2/steps, ..., 1）を評価する
+    piece = np.repeat(np.arange(len(index)), steps)
+    first = np.cumsum(steps) - steps
+    t = ((np.arange(len(piece)) - first[piece] + 1) / steps[piece])[:, None]
+    u = 1 - t
+    vertices = (u ** 3 * start[piece] + 3 * u * u * t * c1[piece]
+                + 3 * u * t * t * c2[piece] + t ** 3 * end[piece])
+
+    # 頂点の属する輪郭
+    contour = np.searchsorted(outline.ends, index)[piece]
+    # 同じ輪郭で次の頂点と同じ頂点（長さ0の線分）を除く。1点だけの輪郭は1頂点残す
+    repeated = np.zeros(len(vertices), dtype=bool)
+    if len(vertices) > 1:
+        repeated[:-1] = (contour[:-1] == contour[1:]) & np.all(vertices[:-1] == vertices[1:], axis=1)
+    if repeated.any():
+        vertices, contour = vertices[~repeated], contour[~repeated]
+    counts = np.bincount(contour, minlength=outline.num_contours)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    # 輪郭の最後の頂点が始点と同じなら除く
+    nonempty = np.flatnonzero(counts > 1)
+    closing = offsets[nonempty + 1] - 1
+    duplicate = closing[np.all(vertices[closing] == vertices[offsets[nonempty]], axis=1)]
+    if len(duplicate):
+        keep = np.ones(len(vertices), dtype=bool)
+        keep[duplicate] = False
+        vertices, contour = vertices[keep], contour[keep]
+        counts = np.bincount(contour, minlength=outline.num_contours)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+    return vertices, offsets
+
+
+def _overlapping_boxes(lows, highs, chunk=PAIR_CHUNK):
+    """
+    バウンディングボックス（左下 lows (n,2)、右上 highs (n,2)）が重なる組を sweep-and-prune で列挙する。
+    ボックスをxの最小値でソートし、各ボックスとxの範囲が重なる後続のボックスだけを組にしてyの範囲で絞り込む。
+    組は (i, j) の配列としておよそchunk個ずつ返す（各組は1度だけ、iとjの大小は決まっていない）。
+    """
+    order = np.argsort(lows[:, 0], kind='stable')
+    x_min = lows[order, 0]
+    # ソート後の位置ごとの、xの範囲が重なる後続のボックスの数と、その累計
+    counts = np.searchsorted(x_min, highs[order, 0], side='right') - np.arange(1, len(order) + 1)
+    totals = np.cumsum(counts)
+    start = 0
+    while start < len(order):
+        # 組の数の合計がchunkを超えない範囲（少なくとも1つのボックス）をまとめて作る
+        done = int(totals[start - 1]) if start else 0
+        stop = max(int(np.searchsorted(totals, done + chunk, side='right')), start + 1)
+        sizes = counts[start:stop]
+        first = np.repeat(np.arange(start, stop), sizes)
+        local = np.arange(len(first)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        i, j = order[first], order[first + 1 + local]
+        close = (lows[i, 1] <= highs[j, 1]) & (lows[j, 1] <= highs[i, 1])
+        if close.any():
+            yield i[close], j[close]
+        start = stop
+
+
+def candidate_pairs(boxes):
+    """
+    バウンディングボックスが重なる組 (i, j)（i < j）を sweep-and-prune で列挙する。
+    boxes: (n,4) [xMin, yMin, xMax, yMax]
+    """
+    for i, j in _overlapping_boxes(boxes[:, :2], boxes[:, 2:]):
+        yield from zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist())
+
+
+def _segments_intersect(starts, ends, i, j):
+    """ボックスが重なる線分の組 (i[k], j[k]) のどれかが交差（接触を含む）すればTrue"""
+    p1, p2 = starts[i], ends[i]
+    q1, q2 = starts[j], ends[j]
+
+    def cross(o, u, v):
+        return (u[:, 0] - o[:, 0]) * (v[:, 1] - o[:, 1]) - (u[:, 1] - o[:, 1]) * (v[:, 0] - o[:, 0])
+
+    # 両方の線分が互いの直線をまたぐ（0を含むので接触・同一直線上の重なりも交差とする。
+    # 同一直線上でもボックスが重なっていれば線分は重なっている）
+    return bool(np.any(
+        (cross(q1, q2, p1) * cross(q1, q2, p2) <= 0) & (cross(p1, p2, q1) * cross(p1, p2, q2) <= 0)
+    ))
+
+
+def has_overlaps(outline, cubic=False, tolerance=DEFAULT_TOLERANCE):
+    """輪郭同士の交差、または輪郭の自己交差があればTrue"""
+    if outline.num_points == 0:
+        return False
+    vertices, offsets = glyph_polylines(outline, cubic, tolerance)
+    counts = np.diff(offsets)
+    nonempty = np.flatnonzero(counts)
+    following = np.arange(1, len(vertices) + 1)
+    following[offsets[nonempty + 1] - 1] = offsets[nonempty]
+    starts, ends = vertices, vertices[following]
+    # 線分の属する輪郭と、輪郭内での位置
+    contour = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(len(vertices)) - offsets[contour]
+
+    for i, j in _overlapping_boxes(np.minimum(starts, ends), np.maximum(starts, ends)):
+        # 同じ輪郭で端点を共有する隣の線分との組は除く（3辺以下の折れ線はすべて隣同士なので自己交差しない）
+        gap = np.abs(local[i] - local[j])
+        keep = (contour[i] != contour[j]) | ((gap != 1) & (gap != counts[contour[i]] - 1))
+        if _segments_intersect(starts, ends, i[keep], j[keep]):
+            return True
+    return False
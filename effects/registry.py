@@ -0,0 +1,234 @@
+"""
+registry.py
+
+エフェクトプラグインのレジストリ。
+effects/ディレクトリ（名前空間パッケージの全パス）の *_effect.py と、
+エントリポイント（グループ fonteffecter.effects）で登録されたエフェクトを名前で引けるようにする。
+
+実装モジュールは必要になったとき（load）に初めて、1プロセスにつき1度だけインポートする。
+説明文やapply_outline対応の有無などのメタデータは、ソースを構文解析して取り出すので
+実装やその依存ライブラリ（numpy・fontToolsなど）をインポートしない。
+エントリポイントの一覧はeffects/にない名前を引いたときと、全エフェクトを列挙するときだけ読む。
+
+エントリポイントの登録例（pyproject.toml）:
+    [project.entry-points."fonteffecter.effects"]
+    outline = "my_package.outline:OutlineEffect"
+"""
+
+import ast
+import importlib
+import importlib.util
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# サードパーティのエフェクトを登録するエントリポイントのグループ名
+ENTRY_POINT_GROUP = "fonteffecter.effects"
+
+# effects/ のエフェクトモジュールのファイル名の接尾辞
+MODULE_SUFFIX = "_effect.py"
+# 接尾辞は同じだがエフェクトではないモジュール（抽象基底クラス）
+EXCLUDED_MODULES = ("base_effect.py",)
+
+
+def class_name_for(name):
+    """エフェクト名からクラス名を作る（round_corners → RoundCornersEffect）"""
+    return "".join(part.capitalize() for part in name.split("_")) + "Effect"
+
+
+class EffectSpec:
+    """
+    1つのエフェクトの登録情報。
+    origin: 'builtin'（effects/のファイル）、'entry_point'、'module'（名前からの推定）のいずれか
+    """
+
+    __slots__ = ('name', 'module', 'class_name', 'origin', '_path', '_info', '_class')
+
+    def __init__(self, name, module, class_name, origin, path=None):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.origin = origin
+        self._path = path
+        self._info = None
+        self._class = None
+
+    def load(self):
+        """エフェクトクラスを返す。モジュールのインポートは初回だけ行う"""
+        if self._class is None:
+            module = importlib.import_module(self.module)
+            self._class = getattr(module, self.class_name)
+            logger.debug("エフェクトクラス %s を %s からロードしました", self.class_name, self.module)
+        return self._class
+
+    @property
+    def loaded(self):
+        return self._class is not None
+
+    @property
+    def path(self):
+        """実装のソースファイルのパス（インポートせずに探す）。見つからなければ None"""
+        if self._path is None:
+            try:
+                spec = importlib.util.find_spec(self.module)
+            except (ImportError, ValueError):
+                spec = None
+            self._path = getattr(spec, 'origin', None) or ''
+        return self._path or None
+
+    def _read_info(self):
+        """ソースを構文解析し、説明文とapply_outlineの有無を取り出す"""
+        if self._info is None:
+            info = {'description': '', 'supports_outline': False}
+            path = self.path
+            if path and path.endswith('.py'):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        tree = ast.parse(f.read(), filename=path)
+                except (OSError, SyntaxError, ValueError) as e:
+                    logger.debug("エフェクト '%s' のソースを解析できません: %s", self.name, e)
+                else:
+                    module_doc = ast.get_docstring(tree) or ''
+                    for node in tree.body:
+                        if isinstance(node, ast.ClassDef) and node.name == self.class_name:
+                            info['description'] = _summary(ast.get_docstring(node) or '')
+                            info['supports_outline'] = any(
+                                isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == 'apply_outline'
+                                for item in node.body
+                            )
+                            break
+                    if not info['description']:
+                        info['description'] = _summary(module_doc, skip=os.path.basename(path))
+            self._info = info
+        return self._info
+
+    @property
+    def description(self):
+        """クラス（なければモジュール）のdocstringの要約"""
+        return self._read_info()['description']
+
+    @property
+    def supports_outline(self):
+        """
+        クラスがapply_outlineを定義しているか（グリフ単位のパイプラインに対応するか）。
+        ロード済みならクラスから正確に判定し、未ロードならソースで定義されているかを見る。
+        """
+        if self._class is not None:
+            return self._class.supports_outline()
+        return self._read_info()['supports_outline']
+
+    def metadata(self):
+        return {
+            'name': self.name,
+            'module': self.module,
+            'class': self.class_name,
+            'origin': self.origin,
+            'description': self.description,
+            'supports_outline': self.supports_outline,
+        }
+
+    def __repr__(self):
+        return f"<EffectSpec {self.name} ({self.module}:{self.class_name}, {self.origin})>"
+
+
+def _summary(docstring, skip=None):
+    """docstringの最初の空でない行（ファイル名だけの行は除く）"""
+    for line in docstring.splitlines():
+        line = line.strip()
+        if line and line != skip:
+            return line
+    return ''
+
+
+class EffectRegistry:
+    """
+    エフェクト名からEffectSpecを引くレジストリ。
+    effects/のファイル一覧は初回の参照時に、エントリポイントは必要になったときに1度だけ読む。
+    """
+
+    def __init__(self, package="effects", use_entry_points=True):
+        self.package = package
+        self.use_entry_points = use_entry_points
+        self._builtin = None
+        self._entry_points = None
+        self._guessed = {}
+
+    def _builtin_specs(self):
+        """effects/（名前空間パッケージの全ディレクトリ）の *_effect.py"""
+        if self._builtin is None:
+            specs = {}
+            for directory in self._package_paths():
+                try:
+                    filenames = sorted(os.listdir(directory))
+                except OSError:
+                    continue
+                for filename in filenames:
+                    if not filename.endswith(MODULE_SUFFIX) or filename.startswith('_') or filename in EXCLUDED_MODULES:
+                        continue
+                    name = filename[:-len(MODULE_SUFFIX)]
+                    # 先に見つかったディレクトリのものを優先する（インポート時と同じ順序）
+                    specs.setdefault(name, EffectSpec(
+                        name, f"{self.package}.{name}_effect", class_name_for(name), 'builtin',
+                        path=os.path.join(directory, filename),
+                    ))
+            self._builtin = specs
+        return self._builtin
+
+    def _package_paths(self):
+        try:
+            package = importlib.import_module(self.package)
+        except ImportError:
+            return []
+        return list(getattr(package, '__path__', []))
+
+    def _entry_point_specs(self):
+        """エントリポイント（グループ ENTRY_POINT_GROUP）で登録されたエフェクト"""
+        if self._entry_points is None:
+            specs = {}
+            if self.use_entry_points:
+                from importlib.metadata import entry_points
+                try:
+                    found = entry_points(group=ENTRY_POINT_GROUP)
+                except Exception as e:
+                    logger.warning("エフェクトのエントリポイントを読み込めません: %s", e)
+                    found = ()
+                for entry_point in found:
+                    module, _, attr = entry_point.value.partition(':')
+                    module = module.strip()
+                    attr = attr.strip() or class_name_for(entry_point.name)
+                    specs.setdefault(entry_point.name, EffectSpec(entry_point.name, module, attr, 'entry_point'))
+            self._entry_points = specs
+        return self._entry_points
+
+    def get(self, name):
+        """
+        名前からEffectSpecを返す。effects/ → エントリポイントの順に探し、
+        どちらにもなければ従来どおり effects.{name}_effect モジュールとみなす（インポート時に存在を確認する）。
+        """
+        spec = self._builtin_specs().get(name)
+        if spec is None:
+            spec = self._entry_point_specs().get(name)
+        if spec is None:
+            spec = self._guessed.get(name)
+            if spec is None:
+                spec = self._guessed[name] = EffectSpec(
+                    name, f"{self.package}.{name}_effect", class_name_for(name), 'module')
+        return spec
+
+    def load(self, name):
+        """名前からエフェクトクラスを返す（モジュールのインポートは初回だけ）"""
+        return self.get(name).load()
+
+    def specs(self):
+        """登録されている全エフェクトのEffectSpec（名前順）。effects/のものがエントリポイントより優先される"""
+        specs = dict(self._entry_point_specs())
+        specs.update(self._builtin_specs())
+        return [specs[name] for name in sorted(specs)]
+
+    def names(self):
+        return [spec.name for spec in self.specs()]
+
+
+# プロセス全体で共有する既定のレジストリ
+registry = EffectRegistry()
@@ -5,89 +5,435 @@ round_corners_effect.py
 グリフデータを直接操作する安全な方式で実装。
 """
 
+import json
+import logging
+import struct
+import sys
+from collections import Counter
+
+import numpy as np
+from fontTools.pens.basePen import BasePen
+
 from .base_effect import BaseEffect
+from . import cff_passthrough, corner_catalog, corner_kernel, glyf_passthrough, glyph_outline, overlap_screen
+from .glyph_cache import GlyphCache, UNCHANGED, decode_outline, encode_outline, source_version
+from .glyph_outline import FLAG_ON_CURVE, EndpointIndex, GlyphOutline, GlyphOutlinePen
+from .metrics import StageTimer
+from .run_config import DEFAULT_QUALITY_LEVEL, quality_preset
+
+try:
+    import pathops
+except ImportError:
+    pathops = None
+
+logger = logging.getLogger(__name__)
+
+# booleanOperationsの (BooleanGlyph, union)。未読み込みはEllipsis、利用できなければ None
+_boolean_operations = ...
+
+
+def _load_boolean_operations():
+    """booleanOperationsを初回だけインポートし、(BooleanGlyph, union) を返す。利用できなければ None"""
+    global _boolean_operations
+    if _boolean_operations is ...:
+        try:
+            from booleanOperations import union
+            from booleanOperations.booleanGlyph import BooleanGlyph
+            _boolean_operations = (BooleanGlyph, union)
+        except ImportError:
+            _boolean_operations = None
+            logger.debug("Path union feature failed to load. Glyphs with overlapping paths may not look correct.")
+    return _boolean_operations
+
+
+class _CubicPen(BasePen):
+    """二次曲線を等価な三次ベジェに変換して別のペンに描く（booleanOperationsは二次曲線を扱えない）"""
+
+    def __init__(self, pen):
+        super().__init__(None)
+        self.pen = pen
+
+    def _moveTo(self, pt):
+        self.pen.moveTo(pt)
+
+    def _lineTo(self, pt):
+        self.pen.lineTo(pt)
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        # BasePenは二次曲線もここに（正確な三次ベジェとして）渡す
+        self.pen.curveTo(pt1, pt2, pt3)
+
+    def _closePath(self):
+        self.pen.closePath()
+
+
+def _clipper_engine():
+    """engine: clipper を使うときだけpyclipperを含むclipper_engineをインポートする"""
+    from . import clipper_engine
+    return clipper_engine
+
 
 class RoundCornersEffect(BaseEffect):
     _warned_once = False
+    # グリフキャッシュのキーに使うエフェクト名
+    effect_name = "round_corners"
+    # パス統合（Union）のバックエンド（params['union']で指定。'auto'は使えるものを優先順に選ぶ）
+    UNION_BACKENDS = ('pathops', 'booleanoperations', 'none')
+    # 角丸処理のエンジン（params['engine']で指定）。
+    # 'kernel'は点ごとの幾何計算（corner_kernel）、'clipper'はpyclipperのオフセットによるモルフォロジー演算
+    ENGINES = ('kernel', 'clipper')
+    # Variable Fontの扱い（params['variable']で指定）。
+    # 'masters'は全マスターの輪郭を丸めて差分を作り直し、'default'はデフォルトの輪郭だけを丸める（従来の動作）
+    VARIABLE_MODES = ('masters', 'default')
+    # params['overlap_screen']の文字列の指定（'auto'はbooleanOperationsで統合するときだけ調べる）
+    OVERLAP_SCREEN_TRUE = ('true', 'yes', 'on', '1')
+    OVERLAP_SCREEN_FALSE = ('false', 'no', 'off', '0', 'none')
+    # unionバックエンド（とスクリーニングの有無）ごとのコードバージョン（キャッシュキー用）
+    _code_versions = {}
     
     def __init__(self, params=None):
         super().__init__(params)
         # 属性を確実に初期化
         self._boolean_ops_available = False
-        
-        # 動的インポートを __init__ で実行
-        import importlib
-        try:
-            from fontTools.pens.recordingPen import RecordingPen
-            from fontTools.pens.basePen import decomposeQuadraticSegment
-            from fontTools.pens.ttGlyphPen import TTGlyphPen
-            from fontTools.booleanOperations import BooleanGlyph, union
-            self.BooleanGlyph = BooleanGlyph
-            self.union = union
+        self.workers = 1
+        self.glyph_cache = None
+        self.cache_stats = None
+        # コーナーカタログの設定と、既定の保存先を決める入力フォントのパス
+        self.catalog_setting = None
+        self._catalog_input = None
+        # 処理するグリフ名の集合（glyphs設定で選んだもの。None なら全グリフ）
+        self.glyph_filter = None
+        # 処理中に例外が発生した（errorsに数えた）グリフ名。グリフキャッシュには保存しない
+        self.failed_glyphs = set()
+        # グリフごとの処理で増えたカウンタ（品質スキップ・Union省略など）。グリフキャッシュに結果と一緒に保存する
+        self.glyph_counters = {}
+        
+        # booleanOperationsの読み込みはプロセスごとに1度だけ行う
+        boolean_operations = _load_boolean_operations()
+        if boolean_operations is not None:
+            self.BooleanGlyph, self.union = boolean_operations
             self._boolean_ops_available = True
-        except ImportError:
-            try:
-                boolean_ops_module = importlib.import_module("fontTools.booleanOperations")
-                self.BooleanGlyph = boolean_ops_module.BooleanGlyph
-                self.union = boolean_ops_module.union
-                self._boolean_ops_available = True
-                print("INFO: Successfully loaded booleanOperations via dynamic import.")
-            except ImportError:
-                self._boolean_ops_available = False
-                print("WARNING: Path union feature failed to load. Glyphs with overlapping paths may not look correct.")
-    
-    def apply(self, font, radius=10, **kwargs):
+
+        self.union_backend = self._resolve_union_backend(self.params.get('union', 'auto'))
+        self.overlap_screen = self._resolve_overlap_screen(self.params.get('overlap_screen', 'auto'))
+        self.engine = self._resolve_engine(self.params.get('engine', 'kernel'))
+        self.variable = self._resolve_variable(self.params.get('variable', 'masters'))
+
+    @staticmethod
+    def _resolve_variable(setting):
+        """params['variable']からVariable Fontの扱いを決める"""
+        variable = str(setting or 'masters').lower()
+        if variable not in RoundCornersEffect.VARIABLE_MODES:
+            raise ValueError(f"不明なvariableの指定です: {setting}（{', '.join(RoundCornersEffect.VARIABLE_MODES)}のいずれかを指定してください）")
+        return variable
+
+    @staticmethod
+    def _resolve_engine(setting):
         """
-        フォントの各グリフに角丸処理を適用する。
-        グリフ輪郭の角を指定した半径で丸める。
-        radiusはself.params['radius']で取得することを前提とする。
+        params['engine']から角丸処理のエンジンを決める。
+        'clipper'でpyclipperがインストールされていない場合は警告して'kernel'を使う。
         """
-        import math
-        import yaml
-
-        print("角丸処理を開始します...")
+        engine = str(setting or 'kernel').lower()
+        if engine not in RoundCornersEffect.ENGINES:
+            raise ValueError(f"不明な角丸エンジンです: {setting}（{', '.join(RoundCornersEffect.ENGINES)}のいずれかを指定してください）")
+        if engine == 'clipper' and not _clipper_engine().available():
+            logger.warning("pyclipperが利用できないため、角丸エンジン 'kernel' を使います")
+            return 'kernel'
+        return engine
+
+    def _resolve_overlap_screen(self, setting):
+        """
+        params['overlap_screen']から、Unionの前に輪郭の重なりを調べるかを決める。
+        'auto'（既定）はunionが'booleanoperations'のときだけ調べる。pathopsは統合自体がスクリーニングと
+        同程度の時間で済み、漢字の多くのグリフはどのみち統合が必要になるので、調べても速くならない。
+        文字列は'true' / 'false'などの真偽値として解釈し、それ以外の文字列は ValueError。
+        """
+        if self.union_backend == 'none':
+            return False
+        if setting is None or (isinstance(setting, str) and setting.strip().lower() == 'auto'):
+            return self.union_backend == 'booleanoperations'
+        if isinstance(setting, str):
+            value = setting.strip().lower()
+            if value in self.OVERLAP_SCREEN_TRUE:
+                return True
+            if value in self.OVERLAP_SCREEN_FALSE:
+                return False
+            raise ValueError(f"不明なoverlap_screenの指定です: {setting}（auto / true / false のいずれかを指定してください）")
+        return bool(setting)
+
+    def _resolve_union_backend(self, setting):
+        """
+        params['union']から実際に使うunionバックエンドを決める。
+        'auto'（既定）はpathops → booleanOperations の順に使えるものを選び、
+        false/'none' なら統合しない。指定したバックエンドが使えない場合は警告して'auto'と同じ扱いにする。
+        """
+        if setting is None or setting is True:
+            setting = 'auto'
+        elif setting is False:
+            setting = 'none'
+        setting = str(setting).lower().replace('_', '')
+        available = {
+            'pathops': pathops is not None,
+            'booleanoperations': self._boolean_ops_available,
+            'none': True,
+        }
+        if setting in ('off', 'false'):
+            setting = 'none'
+        if setting != 'auto':
+            if setting not in available:
+                raise ValueError(f"不明なunionバックエンドです: {setting}（{', '.join(('auto',) + self.UNION_BACKENDS)}のいずれかを指定してください）")
+            if available[setting]:
+                return setting
+            logger.warning("unionバックエンド '%s' が利用できないため、自動選択します", setting)
+        for backend in self.UNION_BACKENDS:
+            if available[backend]:
+                if backend == 'none' and not RoundCornersEffect._warned_once:
+                    logger.warning("Path union feature failed to load. Glyphs with overlapping paths may not look correct. Continuing with basic corner rounding.")
+                    RoundCornersEffect._warned_once = True
+                return backend
+
+    def _run_setting(self, kwargs, name, default=None):
+        """
+        実行設定（workers / glyph_cache / corner_catalog）を返す。
+        applyの引数（FontProcessorの実行設定）を優先し、渡されていなければparamsの値を使う。
+        """
+        value = kwargs.get(name)
+        return self.params.get(name, default) if value is None else value
 
+    def _resolve_settings(self, radius, kwargs):
+        """
+        paramsとapplyの引数から処理の設定を決める。
+        (radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level) を返す。
+        品質レベルは params['quality_level'] → run_config（FontProcessorが解決した実行設定）→ medium の順に決める。
+        """
         # 設定ファイルからradius取得
         radius = self.params.get('radius', radius)
 
-        # 品質レベル取得（params優先、なければconfig.yamlから）
+        # パス統合（Union）のバックエンド（paramsは生成後に差し替えられることがあるので再判定する）
+        self.union_backend = self._resolve_union_backend(self.params.get('union', 'auto'))
+        self.overlap_screen = self._resolve_overlap_screen(self.params.get('overlap_screen', 'auto'))
+        self.engine = self._resolve_engine(self.params.get('engine', 'kernel'))
+        self.variable = self._resolve_variable(self.params.get('variable', 'masters'))
+
+        # 並列ワーカー数（1なら従来どおり逐次処理）
+        self.workers = max(1, int(self._run_setting(kwargs, 'workers', 1) or 1))
+        self.failed_glyphs = set()
+        self.glyph_counters = {}
+
+        # 処理するグリフ（FontProcessorがglyphs設定から解決したグリフ名の集合）
+        self.glyph_filter = kwargs.get('glyphs')
+
+        # 品質レベル（params優先、なければ実行設定から）
         quality_level = self.params.get('quality_level')
         if not quality_level:
-            try:
-                with open('config.yaml', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f)
-                    quality_level = config_data.get('quality_level', 'medium')
-            except Exception:
-                quality_level = 'medium'
+            run_config = kwargs.get('run_config')
+            quality_level = run_config.quality_level if run_config is not None else DEFAULT_QUALITY_LEVEL
         quality_level = str(quality_level).lower()
 
         # 品質レベルごとの閾値
-        if quality_level == 'high':
-            ANGLE_THRESHOLD = 175.0
-            angle_threshold = 160
-            min_reduction_ratio = 0.7  # 30%以上減少で警告
-        elif quality_level == 'low':
-            ANGLE_THRESHOLD = 160.0
-            angle_threshold = 110
-            min_reduction_ratio = 0.5  # 50%以上減少で警告
-        else:
-            ANGLE_THRESHOLD = 170.0
-            angle_threshold = 140
-            min_reduction_ratio = 0.5  # 50%以上減少で警告
+        preset = quality_preset(quality_level)
+        return radius, preset.corner_angle, preset.angle_threshold, preset.min_reduction_ratio, quality_level
+
+    def apply(self, font, radius=10, **kwargs):
+        """
+        フォントの各グリフに角丸処理を適用する。
+        グリフ輪郭の角を指定した半径で丸める。
+        radiusはself.params['radius']で取得することを前提とする。
+        """
+        logger.info("角丸処理を開始します...")
+
+        radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level = self._resolve_settings(radius, kwargs)
 
         # 早期リターン: radiusが0の場合は処理を完全にスキップ
         if radius == 0:
             return font
 
+        # コーナーカタログ（corner_catalog設定がある場合のみ有効。使う場合はグリフキャッシュを使わない）
+        self.catalog_setting = self._run_setting(kwargs, 'corner_catalog')
+        run_config = kwargs.get('run_config')
+        self._catalog_input = run_config.input_font if run_config is not None else None
+
+        # グリフキャッシュ（glyph_cache設定がある場合のみ有効）
+        self.glyph_cache = None if self._use_catalog() else GlyphCache.from_config(
+            self._run_setting(kwargs, 'glyph_cache'))
+        self._cache_params = dict(self.params, radius=radius)
+        try:
+            return self._apply_by_format(font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level)
+        finally:
+            if self.glyph_cache is not None:
+                self.cache_stats = self.glyph_cache.stats()
+                self.glyph_cache.close()
+                self.glyph_cache = None
+                self.counters['cache_hits'] += self.cache_stats['hits']
+                self.counters['cache_misses'] += self.cache_stats['misses']
+                logger.info("グリフキャッシュ: ヒット %d件 / ミス %d件（削除 %d件）",
+                            self.cache_stats['hits'], self.cache_stats['misses'], self.cache_stats['evictions'])
+            self._log_skipped()
+
+    def _selected(self, glyph_names):
+        """処理するグリフ名のリスト（選ばれなかったグリフはデコードしない）"""
+        if self.glyph_filter is None:
+            return list(glyph_names)
+        return [name for name in glyph_names if name in self.glyph_filter]
+
+    def _log_skipped(self):
+        """品質チェックでスキップしたグリフ数とエラー数を警告する"""
+        if self.counters['glyphs_skipped_quality']:
+            logger.warning("品質チェックにより %d個のグリフの処理をスキップしました",
+                           self.counters['glyphs_skipped_quality'])
+        if self.counters['errors']:
+            logger.warning("%d個のグリフでエラーが発生しました", self.counters['errors'])
+
+    def apply_sweep(self, font, radii, **kwargs):
+        """
+        半径ごとに角丸処理したフォントをまとめて作る（パラメータスイープ）。
+        グリフのデコード・パス自動連結・統合・角の解析は1度だけ行い、半径ごとに接点の配置と品質チェックをして、
+        元のフォントから作った半径ごとのコピーに書き戻す。元のフォントは変更しない。
+        [(半径, フォント), ...] を返し、半径ごとの集計（glyphs_processed / corners_rounded など）を
+        self.sweep_counters に同じ順で入れる（品質チェックのスキップ数は全半径の合計としてself.countersにのみ入る）。
+        グリフキャッシュは使わない。Variable Fontをマスター単位で処理する場合は半径ごとに処理する。
+        """
+        import io
+        from fontTools.ttLib import TTFont
+
+        logger.info("角丸処理を開始します（スイープ: 半径 %s）...", ", ".join(str(radius) for radius in radii))
+
+        _, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level = self._resolve_settings(0, kwargs)
+
+        data = self._font_bytes(font)
+        variants = [(radius, TTFont(io.BytesIO(data))) for radius in radii]
+        self.sweep_counters = [Counter() for _ in radii]
+        # 半径0のフォントは元のまま
+        active = [index for index, radius in enumerate(radii) if radius != 0]
+        if not active:
+            return variants
+
+        if self.variable == 'masters' and 'fvar' in font:
+            from . import variable_masters
+
+            if variable_masters.is_variable(font):
+                for index in active:
+                    radius, variant = variants[index]
+                    self._store_sweep(index, lambda: self._apply_to_variable_font(
+                        variant, radius, ANGLE_THRESHOLD, angle_threshold, quality_level))
+                self._log_skipped()
+                return variants
+
+        if 'glyf' not in font and 'CFF ' not in font:
+            raise ValueError("サポートされていないフォント形式です。TrueType (.ttf) または OpenType/CFF (.otf) フォントを使用してください。")
+
+        if 'CFF ' in font:
+            cff = font['CFF '].cff
+            topDict = cff.topDictIndex[0]
+            charStrings = topDict.CharStrings
+            glyph_names = self._selected(charStrings.keys())
+            effective_radii = tuple(self._cff_effective_radius(radii[index], quality_level) for index in active)
+            subr_bytecodes = cff_passthrough.snapshot_subr_bytecodes(cff, topDict)
+            try:
+                if self.workers > 1:
+                    results = list(self._run_in_workers(font, 'cff_sweep', glyph_names, (effective_radii,)))
+                else:
+                    results = [
+                        (glyph_name, [self._compile_cff_glyph(result) for result in
+                                      self._round_cff_glyph_radii(glyph_name, charStrings[glyph_name], effective_radii)])
+                        for glyph_name in glyph_names
+                    ]
+            finally:
+                cff_passthrough.restore_subr_bytecodes(subr_bytecodes)
+
+            def store(variant, position):
+                variant_charStrings = variant['CFF '].cff.topDictIndex[0].CharStrings
+                return self._store_cff_results(
+                    variant_charStrings, [(glyph_name, radii_results[position]) for glyph_name, radii_results in results])
+        else:
+            glyf_table = font['glyf']
+            glyph_names = self._selected(glyf_table.keys())
+            settings = (tuple(radii[index] for index in active), ANGLE_THRESHOLD, angle_threshold,
+                        min_reduction_ratio, quality_level)
+            if self.workers > 1:
+                results = list(self._run_in_workers(font, 'truetype_sweep', glyph_names, settings))
+            else:
+                results = [
+                    (glyph_name, self._round_truetype_glyph_radii(
+                        glyph_name, self._expand_glyph(glyf_table, glyph_name), *settings))
+                    for glyph_name in glyph_names
+                ]
+
+            def store(variant, position):
+                return self._store_truetype_results(
+                    variant, [(glyph_name, radii_results[position]) for glyph_name, radii_results in results])
+
+        for position, index in enumerate(active):
+            radius, variant = variants[index]
+            processed_count = self._store_sweep(index, lambda: store(variant, position))
+            logger.info("半径 %s の角丸処理が完了しました。処理されたグリフ数: %d個", radius, processed_count)
+        self._log_skipped()
+        return variants
+
+    def _store_sweep(self, index, store):
+        """スイープのindex番目の半径の書き戻しを行い、その間の集計をsweep_counters[index]にも記録する"""
+        total, self.counters = self.counters, self.sweep_counters[index]
+        try:
+            return store()
+        finally:
+            total.update(self.counters)
+            self.counters = total
+
+    # --- グリフ単位のパイプライン用のフック（effects/glyph_pipeline.py） ---
+
+    def begin_outlines(self, font, radius=10, **kwargs):
+        """設定を解決する。グリフキャッシュはフォント全体のapplyでのみ使う"""
+        settings = self._resolve_settings(radius, kwargs)
+        self._outline_settings = settings if settings[0] != 0 else None
+
+    def apply_outline(self, outline, params, cubic=False, glyph_name=None):
+        """1グリフの輪郭を角丸処理する。applyと同じ処理を、デコード・エンコードを除いて行う"""
+        settings = getattr(self, '_outline_settings', None)
+        if settings is None:
+            return None
+        radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level = settings
+        try:
+            if cubic:
+                result = self._round_cff_outline(glyph_name, outline, self._cff_effective_radius(radius, quality_level))
+            else:
+                result = self._round_truetype_outline(glyph_name, outline, *settings)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+            return None
+        if result is None:
+            return None
+        rounded, corners_processed = result
+        self.counters['glyphs_processed'] += 1
+        self.counters['corners_rounded'] += corners_processed
+        logger.debug("  グリフ '%s' の処理完了 (%d角を角丸化)", glyph_name, corners_processed)
+        return rounded
+
+    def end_outlines(self, font):
+        self._log_skipped()
+
+    def _apply_by_format(self, font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """フォント形式に応じてTrueType/CFF/Variable Fontの角丸処理を呼び分ける"""
+        if self.variable == 'masters' and 'fvar' in font:
+            from . import variable_masters
+
+            if variable_masters.is_variable(font):
+                return self._apply_to_variable_font(font, radius, ANGLE_THRESHOLD, angle_threshold, quality_level)
+
         # フォント形式の判定と対応
         has_glyf = 'glyf' in font
         has_cff = 'CFF ' in font
         
-        print(f"フォント形式: {'TrueType' if has_glyf else 'OpenType/CFF' if has_cff else '不明'}")
+        logger.info("フォント形式: %s", 'TrueType' if has_glyf else 'OpenType/CFF' if has_cff else '不明')
         
         if not has_glyf and not has_cff:
             raise ValueError("サポートされていないフォント形式です。TrueType (.ttf) または OpenType/CFF (.otf) フォントを使用してください。")
         
+        if self._use_catalog():
+            return self._apply_from_catalog(font, has_cff, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level)
+        if self.catalog_setting:
+            logger.info("clipperエンジンではコーナーカタログを使いません")
+
         if has_cff:
             # OpenType/CFFフォントの処理
             return self._apply_to_cff_font(font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level)
@@ -95,484 +441,979 @@ class RoundCornersEffect(BaseEffect):
             # TrueTypeフォントの処理
             return self._apply_to_truetype_font(font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level)
 
-    def _apply_to_truetype_font(self, font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
-        """TrueTypeフォント用の角丸処理"""
-        import math
-        
-        glyf_table = font['glyf']
-        glyph_names = glyf_table.keys()
-
-        processed_count = 0
+    def _use_catalog(self):
+        """コーナーカタログから処理するか（kernelエンジンのみ対応）"""
+        return bool(self.catalog_setting) and self.engine == 'kernel'
 
-        for glyph_name in glyph_names:
-            glyph = glyf_table[glyph_name]
-
-            # コンポジットグリフはスキップ
-            if glyph.isComposite():
+    def _apply_from_catalog(self, font, cubic, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """
+        コーナーカタログ（effects/corner_catalog.py）から角丸処理する。
+        全グリフを連結した前処理済みの輪郭を、保存済みの角度・辺長を使って1回のベクトル演算で丸め、
+        グリフごとに分けて品質チェックをしてから書き戻す。グリフのデコード・前処理・角の解析は行わない。
+        出力はカタログを使わない場合と同一。並列処理とグリフキャッシュは使わない。
+        """
+        catalog = self.load_corner_catalog(font, cubic)
+
+        t = self.timings.start()
+        outline = catalog.outline()
+        geom = catalog.geometry(outline)
+        if cubic:
+            effective_radius = self._cff_effective_radius(radius, quality_level)
+            rounded = corner_kernel.round_curves(outline, effective_radius, 179.0, geom=geom)[0]
+        else:
+            # 品質レベルごとに角度閾値を適用
+            threshold = angle_threshold if quality_level != 'high' else ANGLE_THRESHOLD
+            rounded, _ = corner_kernel.round_direct(outline, radius, threshold, geom=geom)
+        self.timings.lap('rounding', t)
+
+        results = []
+        glyph_names = catalog.glyph_names.tolist()
+        for index, (glyph_name, pieces) in enumerate(zip(glyph_names, catalog.split(rounded))):
+            # カタログは全グリフ分を丸めるので、選ばれなかったグリフは書き戻さない
+            if self.glyph_filter is not None and glyph_name not in self.glyph_filter:
                 continue
-            if not hasattr(glyph, "coordinates") or glyph.numberOfContours == 0:
+            if catalog.status[index] == corner_catalog.STATUS_ERROR:
+                self.counters['errors'] += 1
+            if pieces is None:
                 continue
+            source, glyph, corners_processed = pieces
+            base_points = int(catalog.base_points[index])
+            if cubic:
+                result = self._check_cff_result(glyph_name, glyph, corners_processed, base_points)
+                if result is not None:
+                    width = float(catalog.widths[index])
+                    private = getattr(font['CFF '].cff.topDictIndex[0].CharStrings[glyph_name], 'private', None)
+                    result = self._encode_cff_glyph(result, int(width) if width.is_integer() else width, private)
+            else:
+                # 前処理で輪郭が変わったグリフは、角がなくても前処理後の輪郭を書き戻す（元の輪郭と一致しない）
+                result = self._check_truetype_result(glyph_name, None if catalog.changed[index] else source, glyph,
+                                                     corners_processed, base_points, min_reduction_ratio)
+            results.append((glyph_name, result))
 
+        if cubic:
+            processed_count = self._store_cff_results(font['CFF '].cff.topDictIndex[0].CharStrings, results)
+        else:
+            processed_count = self._store_truetype_results(font, results)
+        logger.info("コーナーカタログからの角丸処理が完了しました。処理されたグリフ数: %d個", processed_count)
+        return font
+
+    def load_corner_catalog(self, font, cubic):
+        """
+        フォントのコーナーカタログを読み込む。
+        保存先にないか、グリフデータ・前処理の設定・コードのいずれかが変わっていれば作り直して保存する。
+        """
+        t = self.timings.start()
+        digest = self._corner_catalog_digest(font, cubic)
+        path = corner_catalog.catalog_path(self.catalog_setting, self._catalog_input, digest)
+        catalog = corner_catalog.CornerCatalog.load(path, digest)
+        self.timings.lap('catalog', t)
+        if catalog is not None:
+            self.counters['catalog_hits'] += 1
+            logger.info("コーナーカタログを読み込みました: %s（%dグリフ）", path, len(catalog))
+            return catalog
+
+        catalog = self.build_corner_catalog(font, cubic, digest)
+        t = self.timings.start()
+        try:
+            catalog.save(path)
+        except OSError as e:
+            logger.warning("コーナーカタログを保存できませんでした: %s (%s)", path, e)
+        else:
+            logger.info("コーナーカタログを作成しました: %s（%dグリフ）", path, len(catalog))
+        self.timings.lap('catalog', t)
+        self.counters['catalog_builds'] += 1
+        return catalog
+
+    def build_corner_catalog(self, font, cubic, digest):
+        """全グリフをデコードして前処理（パス自動連結・統合）し、角の解析結果とともにカタログにまとめる"""
+        entries = []
+        if cubic:
+            cff = font['CFF '].cff
+            topDict = cff.topDictIndex[0]
+            charStrings = topDict.CharStrings
+            # 描画で展開されたサブルーチンは元のバイトコードに戻す
+            subr_bytecodes = cff_passthrough.snapshot_subr_bytecodes(cff, topDict)
             try:
-                # グリフデータを直接操作する安全なアプローチ
+                for glyph_name in charStrings.keys():
+                    entries.append(self._catalog_cff_entry(glyph_name, charStrings[glyph_name]))
+            finally:
+                cff_passthrough.restore_subr_bytecodes(subr_bytecodes)
+        else:
+            glyf_table = font['glyf']
+            for glyph_name in glyf_table.keys():
+                entries.append(self._catalog_truetype_entry(glyph_name, self._expand_glyph(glyf_table, glyph_name)))
+        t = self.timings.start()
+        catalog = corner_catalog.CornerCatalog.build(digest, cubic, entries)
+        self.timings.lap('analysis', t)
+        return catalog
+
+    def _catalog_truetype_entry(self, glyph_name, glyph):
+        """TrueTypeグリフ1つ分のカタログの項目（_round_truetype_glyphと同じ判定・前処理）"""
+        if glyph.isComposite() or not hasattr(glyph, 'coordinates') or glyph.numberOfContours == 0 or not glyph.coordinates:
+            return glyph_name, corner_catalog.STATUS_EMPTY, None, 0, False, 0
+        try:
+            with self.timings.stage('decode'):
+                source = GlyphOutline.from_glyf(glyph)
+            outline, base_points = self._prepare_truetype_outline(glyph_name, source)
+        except Exception as e:
+            logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+            return glyph_name, corner_catalog.STATUS_ERROR, None, 0, False, 0
+        return glyph_name, corner_catalog.STATUS_OK, outline, base_points, outline != source, 0
+
+    def _catalog_cff_entry(self, glyph_name, charString):
+        """CFFグリフ1つ分のカタログの項目（_round_cff_glyphと同じ判定・前処理）"""
+        try:
+            with self.timings.stage('decode'):
+                source = cff_passthrough.decodable_copy(charString)
+                pen = GlyphOutlinePen()
+                source.draw(pen)
+            # 輪郭のないグリフとコンポーネント（seac）を含むグリフは処理しない
+            if not pen.outline.num_contours or pen.components:
+                return glyph_name, corner_catalog.STATUS_EMPTY, None, 0, False, 0
+            outline = self._prepare_cff_outline(glyph_name, pen.outline)
+        except Exception as e:
+            logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+            return glyph_name, corner_catalog.STATUS_ERROR, None, 0, False, 0
+        return glyph_name, corner_catalog.STATUS_OK, outline, outline.num_points, False, getattr(source, 'width', 0)
+
+    def _corner_catalog_digest(self, font, cubic):
+        """カタログのキー。全グリフの元データ（glyf/CharStringバイト列）と前処理の設定・コードのバージョンから作る"""
+        if cubic:
+            charStrings = font['CFF '].cff.topDictIndex[0].CharStrings
+            subrs_digests = {}
+            sources = ((name, self._cff_source_bytes(charStrings[name], subrs_digests)) for name in charStrings.keys())
+        else:
+            glyf_table = font['glyf']
+            sources = ((name, self._truetype_source_bytes(glyf_table, name)) for name in glyf_table.keys())
+        return corner_catalog.font_digest(f"{'cff' if cubic else 'truetype'},{self._cache_version()}", sources)
+
+    def _apply_to_variable_font(self, font, radius, ANGLE_THRESHOLD, angle_threshold, quality_level):
+        """
+        Variable Font用の角丸処理。
+        各グリフの全マスターの輪郭を同じ角の集合で丸め（点の構成を揃える）、
+        gvarのデルタまたはCFF2のblendを元の領域のまま作り直す。出力はVariable Fontのまま。
+        パス自動連結・統合（Union）・clipperエンジンはマスターごとに輪郭の構成が変わりうるため使わない。
+        並列処理とグリフキャッシュにも対応しない（逐次処理）。
+        """
+        if self.engine == 'clipper' or self.union_backend != 'none':
+            logger.info("Variable Fontのマスター単位の処理では、パスの統合とclipperエンジンを使いません")
+        if 'CFF2' in font:
+            processed_count = self._round_cff2_masters(font, self._cff_effective_radius(radius, quality_level))
+        else:
+            processed_count = self._round_gvar_masters(
+                font, radius, angle_threshold if quality_level != 'high' else ANGLE_THRESHOLD)
+        logger.info("Variable Fontの角丸処理が完了しました（全マスター）。処理されたグリフ数: %d個", processed_count)
+        return font
 
-                # 元の座標データを取得
-                if not hasattr(glyph, 'coordinates') or not glyph.coordinates:
+    def _count_rounded(self, glyph_name, corners_processed):
+        self.counters['glyphs_processed'] += 1
+        self.counters['corners_rounded'] += corners_processed
+        logger.debug("  グリフ '%s' の処理完了 (%d角を角丸化)", glyph_name, corners_processed)
+
+    def _round_gvar_masters(self, font, radius, angle_threshold):
+        """glyf+gvarの全マスターを角丸処理する。書き戻したグリフ数を返す"""
+        from . import variable_masters
+
+        timings = self.timings
+        with timings.stage('decode'):
+            glyf_table = font['glyf']
+            gvar = font['gvar']
+        modified = set()
+        for glyph_name in self._selected(glyf_table.keys()):
+            glyph = self._expand_glyph(glyf_table, glyph_name)
+            if glyph.isComposite() or not getattr(glyph, 'numberOfContours', 0) or not hasattr(glyph, 'coordinates'):
+                continue
+            try:
+                t = timings.start()
+                variations = gvar.variations.get(glyph_name) or []
+                locations, outlines, phantoms = variable_masters.glyf_masters(glyph, variations)
+                t = timings.lap('decode', t)
+                rounded, corners_processed = corner_kernel.round_direct_masters(outlines, radius, angle_threshold)
+                t = timings.lap('rounding', t)
+                if corners_processed == 0:
                     continue
+                default, new_variations = variable_masters.glyf_variations(variations, locations, rounded, phantoms)
+                self._store_truetype_glyph(glyf_table[glyph_name], default)
+                if variations:
+                    gvar.variations[glyph_name] = new_variations
+                timings.lap('encode', t)
+            except Exception as e:
+                self.counters['errors'] += 1
+                logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+                continue
+            modified.add(glyph_name)
+            self._count_rounded(glyph_name, corners_processed)
 
-                original_coords = list(glyph.coordinates)
-                original_endPts = list(glyph.endPtsOfContours)
-                original_flags = list(glyph.flags)
-                original_point_count = len(original_coords)
-
-                # 座標データから輪郭を抽出
-                contours = self._extract_contours_from_coordinates(original_coords, original_endPts, original_flags)
-                # パス自動連結前処理
-                contours = self._auto_join_contours(contours)
-
-                # パス統合（Union）処理の可否判定
-                use_union = self._boolean_ops_available
-
-                if use_union:
-                    from fontTools.pens.recordingPen import RecordingPen
-                    from fontTools.pens.basePen import decomposeQuadraticSegment
-                    from fontTools.pens.ttGlyphPen import TTGlyphPen
-                    from fontTools.booleanOperations import BooleanGlyph, union
-
-                    def contours_to_BooleanGlyph(contours):
-                        bg = BooleanGlyph()
-                        for contour in contours:
-                            coords = contour['coords']
-                            flags = contour['flags']
-                            if not coords or len(coords) < 2:
-                                continue
-                            pen = bg.getPen()
-                            pen.moveTo(coords[0])
-                            i = 1
-                            while i < len(coords):
-                                is_on_curve = flags[i] & 1
-                                if is_on_curve:
-                                    pen.lineTo(coords[i])
-                                else:
-                                    if i + 1 < len(coords) and (flags[i + 1] & 1):
-                                        pen.qCurveTo(coords[i], coords[i + 1])
-                                        i += 1
-                                    else:
-                                        mid = (
-                                            (coords[i - 1][0] + coords[i][0]) / 2,
-                                            (coords[i - 1][1] + coords[i][1]) / 2
-                                        )
-                                        pen.qCurveTo(coords[i], mid)
-                                i += 1
-                            pen.closePath()
-                        return bg
-
-                    def BooleanGlyph_to_contours(bg):
-                        pen = RecordingPen()
-                        bg.draw(pen)
-                        contours = []
-                        current_coords = []
-                        current_flags = []
-                        for cmd, pts in pen.value:
-                            if cmd == "moveTo":
-                                if current_coords:
-                                    contours.append({'coords': current_coords, 'flags': current_flags})
-                                current_coords = [pts[0]]
-                                current_flags = [1]
-                            elif cmd == "lineTo":
-                                current_coords.append(pts[0])
-                                current_flags.append(1)
-                            elif cmd == "qCurveTo":
-                                for p in pts[:-1]:
-                                    current_coords.append(p)
-                                    current_flags.append(0)  # off-curve
-                                current_coords.append(pts[-1])
-                                current_flags.append(1)  # end on-curve
-                            elif cmd == "closePath":
-                                pass
-                            elif cmd == "endPath":
-                                pass
-                        if current_coords:
-                            contours.append({'coords': current_coords, 'flags': current_flags})
-                        return contours
-
-                    bg = contours_to_BooleanGlyph(contours)
-                    union_bg = BooleanGlyph()
-                    union(bg, union_bg)
-                    unified_contours = BooleanGlyph_to_contours(union_bg)
-                else:
-                    if not RoundCornersEffect._warned_once:
-                        print("WARNING: Path union feature failed to load. Glyphs with overlapping paths may not look correct. Continuing with basic corner rounding.")
-                        RoundCornersEffect._warned_once = True
-                    unified_contours = contours
-
-                # 角丸処理を各輪郭に適用
-                new_coords = []
-                new_endPts = []
-                new_flags = []
-
-                for contour_idx, contour in enumerate(unified_contours):
-                    if len(contour['coords']) < 3:
-                        new_coords.extend(contour['coords'])
-                        new_flags.extend(contour['flags'])
-                    else:
-                        # 品質レベルごとに角度閾値を適用
-                        rounded_contour = self._round_corners_direct(
-                            contour, radius, angle_threshold if quality_level != 'high' else ANGLE_THRESHOLD
-                        )
-                        new_coords.extend(rounded_contour['coords'])
-                        new_flags.extend(rounded_contour['flags'])
-
-                    # 輪郭終点を記録
-                    new_endPts.append(len(new_coords) - 1)
-
-                # 頂点数比較（品質維持チェック）
-                new_point_count = len(new_coords)
-                if original_point_count > 0:
-                    reduction_ratio = new_point_count / original_point_count
-                    if reduction_ratio < min_reduction_ratio:
-                        print(f"[品質警告] グリフ '{glyph_name}': 頂点数が{int((1-reduction_ratio)*100)}%減少（{original_point_count}→{new_point_count}）。品質低下の可能性あり、処理をスキップします。")
-                        continue
+        with timings.stage('metrics'):
+            glyf_passthrough.recalc_metrics(font, modified)
+        return len(modified)
 
-                # データ整合性チェック
-                if len(new_coords) != len(new_flags):
-                    print(f"  [ERROR] 座標数とフラグ数が一致しません: coords={len(new_coords)}, flags={len(new_flags)}")
+    def _round_cff2_masters(self, font, effective_radius):
+        """CFF2の全マスターを角丸処理する。書き戻したグリフ数を返す"""
+        from . import variable_masters
 
-                # 元と同じ形式でデータを作成
-                from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+        timings = self.timings
+        with timings.stage('decode'):
+            cff = font['CFF2'].cff
+            topDict = cff.topDictIndex[0]
+            charStrings = topDict.CharStrings
 
-                # GlyphCoordinatesオブジェクトを作成
-                coord_obj = GlyphCoordinates(new_coords)
+        processed_count = 0
+        subr_bytecodes = cff_passthrough.snapshot_subr_bytecodes(cff, topDict)
+        try:
+            for glyph_name in self._selected(charStrings.keys()):
+                try:
+                    t = timings.start()
+                    source = cff_passthrough.decodable_copy(charStrings[glyph_name])
+                    source.decompile()
+                    vsindex, supports = variable_masters.cff2_regions(font, source)
+                    locations = variable_masters.master_locations(supports)
+                    outlines = variable_masters.cff2_masters(font, source, locations)
+                    t = timings.lap('decode', t)
+                    if not outlines[0].num_contours:
+                        continue
+                    rounded, corners_processed = corner_kernel.round_curves_masters(outlines, effective_radius, 179.0)
+                    t = timings.lap('rounding', t)
+                    if corners_processed == 0:
+                        continue
+                    charStrings[glyph_name] = variable_masters.cff2_charstring(
+                        source, glyph_name, vsindex, locations, supports, rounded)
+                    timings.lap('encode', t)
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+                    continue
+                processed_count += 1
+                self._count_rounded(glyph_name, corners_processed)
+        finally:
+            cff_passthrough.restore_subr_bytecodes(subr_bytecodes)
+        return processed_count
 
-                # フラグをbytearrayに変換
-                flag_array = bytearray(new_flags)
+    def _apply_to_truetype_font(self, font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """
+        TrueTypeフォント用の角丸処理。
+        グリフはコピー上でデコードし、実際に変更したグリフだけをテーブル内で置き換える。
+        最後にmaxp/hhea等を再計算して recalcBBoxes を切るので、
+        保存時には未変更グリフが元のglyfバイト列のまま書き出される。
+        """
+        with self.timings.stage('decode'):
+            glyf_table = font['glyf']
+        glyph_names = self._selected(glyf_table.keys())
+        settings = (radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level)
 
-                # 輪郭終点はlistのまま
-                endPts_list = new_endPts
+        def compute(names):
+            if self.workers > 1:
+                return self._run_in_workers(font, 'truetype', names, settings)
+            return self._round_each(
+                names, lambda glyph_name: self._round_truetype_glyph(glyph_name, self._expand_glyph(glyf_table, glyph_name), *settings))
 
-                # グリフデータを更新
-                glyph.coordinates = coord_obj
-                glyph.endPtsOfContours = endPts_list
-                glyph.flags = flag_array
+        results = self._round_with_cache(
+            glyph_names, compute, quality_level,
+            source_bytes=lambda name: self._truetype_source_bytes(glyf_table, name),
+            encode=lambda result: UNCHANGED if result is None else struct.pack('<I', result[1]) + encode_outline(result[0]),
+            decode=lambda value: (decode_outline(value[4:]), struct.unpack_from('<I', value)[0]) if value else None,
+        )
 
-                # バウンディングボックスを再計算
-                if new_coords:
-                    x_coords = [coord[0] for coord in new_coords]
-                    y_coords = [coord[1] for coord in new_coords]
-                    glyph.xMin = min(x_coords)
-                    glyph.xMax = max(x_coords)
-                    glyph.yMin = min(y_coords)
-                    glyph.yMax = max(y_coords)
-                
-                processed_count += 1
-                print(f"  グリフ '{glyph_name}' の処理完了")
-                    
-            except Exception as e:
-                print(f"  エラー: グリフ '{glyph_name}' の処理中に例外が発生: {str(e)}")
+        processed_count = self._store_truetype_results(font, results)
 
-        print(f"TrueTypeフォントの角丸処理が完了しました。処理されたグリフ数: {processed_count}個")
+        logger.info("TrueTypeフォントの角丸処理が完了しました。処理されたグリフ数: %d個", processed_count)
         
         return font
 
+    def _store_truetype_results(self, font, results):
+        """
+        (グリフ名, (GlyphOutline, 角数) または None) の並びをglyfテーブルに書き戻し、maxp/hhea等を再計算する。
+        書き戻したグリフ数を返す。
+        """
+        glyf_table = font['glyf']
+        modified = set()
+        for glyph_name, result in results:
+            if result is None:
+                continue
+            outline, corners_processed = result
+            with self.timings.stage('encode'):
+                self._store_truetype_glyph(glyf_table[glyph_name], outline)
+            modified.add(glyph_name)
+            self._count_rounded(glyph_name, corners_processed)
+
+        with self.timings.stage('metrics'):
+            glyf_passthrough.recalc_metrics(font, modified)
+        return len(modified)
+
+    def _round_truetype_glyph(self, glyph_name, glyph, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """
+        TrueTypeグリフ1つ分の角丸処理。
+        (角丸処理後のGlyphOutline, 角丸化した角の数) を返す。更新不要またはエラー時は None。
+        """
+        return self._round_truetype_glyph_radii(glyph_name, glyph, (radius,), ANGLE_THRESHOLD, angle_threshold,
+                                                min_reduction_ratio, quality_level)[0]
+
+    def _round_truetype_glyph_radii(self, glyph_name, glyph, radii, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """
+        TrueTypeグリフ1つ分を、radiiの半径ごとに角丸処理する（デコードは1度だけ）。
+        半径ごとの (角丸処理後のGlyphOutline, 角丸化した角の数) または None（更新不要・エラー）のリストを返す。
+        """
+        skipped = [None] * len(radii)
+        # コンポジットグリフはスキップ
+        if glyph.isComposite():
+            return skipped
+        if not hasattr(glyph, "coordinates") or glyph.numberOfContours == 0:
+            return skipped
+
+        try:
+            # グリフデータを直接操作する安全なアプローチ
+
+            # 元の座標データを取得
+            if not hasattr(glyph, 'coordinates') or not glyph.coordinates:
+                return skipped
+
+            # 座標データから輪郭を抽出
+            with self.timings.stage('decode'):
+                outline = GlyphOutline.from_glyf(glyph)
+            return self._round_truetype_outline_radii(glyph_name, outline, radii, ANGLE_THRESHOLD, angle_threshold,
+                                                      min_reduction_ratio, quality_level)
+
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+            return skipped
+
+    def _round_truetype_outline(self, glyph_name, outline, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """
+        デコード済みのTrueType輪郭の角丸処理（パス自動連結・統合・角丸・品質チェック）。
+        (角丸処理後のGlyphOutline, 角丸化した角の数) を返す。更新不要なら None。
+        """
+        return self._round_truetype_outline_radii(glyph_name, outline, (radius,), ANGLE_THRESHOLD, angle_threshold,
+                                                  min_reduction_ratio, quality_level)[0]
+
+    def _round_truetype_outline_radii(self, glyph_name, outline, radii, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
+        """
+        デコード済みのTrueType輪郭を、radiiの半径ごとに角丸処理する。
+        パス自動連結・統合と角の解析（角度・辺長）は半径によらないので1度だけ行い、半径ごとに接点の配置と品質チェックを行う。
+        半径ごとの (角丸処理後のGlyphOutline, 角丸化した角の数) または None（更新不要）のリストを返す。
+        """
+        timings = self.timings
+        source = outline
+        if self.engine == 'clipper':
+            t = timings.start()
+            # パス自動連結前処理
+            outline = self._auto_join_contours(outline)
+            timings.lap('auto_join', t)
+            # モルフォロジー演算で丸める（重なった輪郭の統合も同時に行われる）
+            return [self._round_with_clipper(glyph_name, outline, radius, cubic=False) for radius in radii]
+
+        outline, original_point_count = self._prepare_truetype_outline(glyph_name, outline)
+        t = timings.start()
+
+        # 品質レベルごとに角度閾値を適用
+        threshold = angle_threshold if quality_level != 'high' else ANGLE_THRESHOLD
+        geom = corner_kernel.analyze_corners(outline) if len(radii) > 1 and outline.num_points else None
+        results = []
+        for radius in radii:
+            # 角丸処理を全輪郭に一括適用（3点未満の輪郭はそのまま）
+            rounded, corners_processed = corner_kernel.round_direct(outline, radius, threshold, geom=geom)
+            timings.lap('rounding', t)
+            results.append(self._check_truetype_result(glyph_name, source, rounded, corners_processed,
+                                                       original_point_count, min_reduction_ratio))
+            t = timings.start()
+        return results
+
+    def _prepare_truetype_outline(self, glyph_name, outline):
+        """
+        角丸処理の前処理（パス自動連結・統合）。半径によらない。
+        (前処理後のGlyphOutline, 品質チェックの基準にする頂点数) を返す。
+        """
+        original_point_count = outline.num_points
+        t = self.timings.start()
+        # パス自動連結前処理
+        outline = self._auto_join_contours(outline)
+        self.timings.lap('auto_join', t)
+
+        # 重なった輪郭の統合（Union）
+        if self.union_backend != 'none':
+            outline = self._union_overlapping(glyph_name, outline, cubic=False)
+            # 品質チェックは角丸処理による頂点数の変化を見るので、統合後の点数を基準にする
+            original_point_count = outline.num_points
+        return outline, original_point_count
+
+    def _check_truetype_result(self, glyph_name, source, rounded, corners_processed, original_point_count, min_reduction_ratio):
+        """角丸処理の結果の品質チェック。(GlyphOutline, 角数) か、更新不要・スキップなら None を返す"""
+        # 角が1つもなく輪郭も元のままなら、グリフを書き換えない（保存時に元のバイト列を使える）
+        if corners_processed == 0 and rounded == source:
+            return None
+
+        # 頂点数比較（品質維持チェック）
+        new_point_count = rounded.num_points
+        if original_point_count > 0:
+            reduction_ratio = new_point_count / original_point_count
+            if reduction_ratio < min_reduction_ratio:
+                self.counters['glyphs_skipped_quality'] += 1
+                logger.debug("[品質警告] グリフ '%s': 頂点数が%d%%減少（%d→%d）。品質低下の可能性あり、処理をスキップします。",
+                             glyph_name, int((1 - reduction_ratio) * 100), original_point_count, new_point_count)
+                return None
+
+        # データ整合性チェック
+        if len(rounded.points) != len(rounded.flags):
+            logger.error("  座標数とフラグ数が一致しません: coords=%d, flags=%d", len(rounded.points), len(rounded.flags))
+
+        return rounded, corners_processed
+
+    def _expand_glyph(self, glyf_table, glyph_name):
+        """glyfテーブルからグリフを取り出す（テーブル内のグリフは展開せず、デコードしたコピーを返す）"""
+        with self.timings.stage('decode'):
+            return glyf_passthrough.decode_glyph(glyf_table, glyph_name)
+
+    def _store_truetype_glyph(self, glyph, outline):
+        """角丸処理の結果（GlyphOutline）をTrueTypeグリフに書き戻す"""
+        glyf_passthrough.store_outline(glyph, outline)
+
     def _apply_to_cff_font(self, font, radius, ANGLE_THRESHOLD, angle_threshold, min_reduction_ratio, quality_level):
         """OpenType/CFFフォント用の角丸処理 - T2CharString座標変化対応版"""
-        import math
-        from fontTools.pens.recordingPen import RecordingPen
-        from fontTools.pens.t2CharStringPen import T2CharStringPen
-        
-        print("OpenType/CFFフォントの角丸処理を開始します（T2CharString座標変化対応版）...")
+        logger.info("OpenType/CFFフォントの角丸処理を開始します（T2CharString座標変化対応版）...")
         
         try:
-            cff_table = font['CFF ']
+            with self.timings.stage('decode'):
+                cff_table = font['CFF ']
             cff = cff_table.cff
             topDict = cff.topDictIndex[0]
             charStrings = topDict.CharStrings
         except Exception as cff_error:
-            print(f"エラー: CFFテーブルの読み込みに失敗しました: {cff_error}")
+            self.counters['errors'] += 1
+            logger.error("CFFテーブルの読み込みに失敗しました: %s", cff_error)
             return font
         
-        processed_count = 0
-        
-        # T2CharString座標変化を考慮した最適化設定
-        if quality_level == 'high':
-            effective_angle_threshold = 160  # より多くの角を処理
-            effective_radius = radius * 0.8  # より積極的な半径
-            min_corner_radius = 1.0
-        elif quality_level == 'low':
-            effective_angle_threshold = 120  # 中程度の角まで処理
-            effective_radius = radius * 0.5  # 控えめな半径
-            min_corner_radius = 2.0
-        else:  # medium
-            effective_angle_threshold = 150  # 多くの角を処理
-            effective_radius = radius * 0.6  # バランスの取れた半径
-            min_corner_radius = 1.0
-        
-        for glyph_name in charStrings.keys():
-            try:
-                # CFFグリフからパスデータを取得
-                charString = charStrings[glyph_name]
-                
-                # RecordingPenを使ってパスデータを記録
-                pen = RecordingPen()
-                charString.draw(pen)
-                
-                # パスデータから輪郭を抽出
-                contours = self._extract_contours_from_recording_pen(pen.value)
-                
-                if not contours:
-                    continue
-                
-                # パス自動連結前処理
-                contours = self._auto_join_contours(contours)
-                
-                # オリジナル頂点数（全contour合計）
-                original_point_count = sum(len(c['coords']) for c in contours)
+        effective_radius = self._cff_effective_radius(radius, quality_level)
 
-                # 改良された角丸処理を各輪郭に適用（ベジェ曲線対応）
-                rounded_contours = []
-                corners_processed = 0
-                
-                for contour in contours:
-                    if len(contour['coords']) >= 3:
-                        # 改良された角丸処理を使用（角度閾値を179度まで拡張）
-                        print(f"    輪郭処理開始: {len(contour['coords'])}点")
-                        rounded_contour, corner_count = self._round_corners_improved_for_curves(
-                            contour, effective_radius, 179.0  # 滑らかな曲線も処理
-                        )
-                        rounded_contours.append(rounded_contour)
-                        corners_processed += corner_count
-                    else:
-                        rounded_contours.append(contour)
-
-                # 角丸処理が実際に行われた場合のみ更新
-                if corners_processed > 0:
-                    # 新しい頂点数（全contour合計）
-                    new_point_count = sum(len(c['coords']) for c in rounded_contours)
-                    
-                    # 品質チェックを緩和（T2CharStringの座標変化を考慮）
-                    if original_point_count > 0:
-                        reduction_ratio = new_point_count / original_point_count
-                        # より緩い品質チェック（30%減少まで許容）
-                        if reduction_ratio < 0.3:
-                            print(f"[品質警告] グリフ '{glyph_name}': 頂点数が{int((1-reduction_ratio)*100)}%減少（{original_point_count}→{new_point_count}）。処理をスキップします。")
-                            continue
-
-                    # 新しいCharStringを作成
-                    try:
-                        # 元のCharStringの幅を取得
-                        original_width = getattr(charString, 'width', 0)
-                        
-                        # 元のPrivateDictを取得（安全にアクセス）
-                        original_private = None
-                        if hasattr(charString, 'private') and charString.private is not None:
-                            original_private = charString.private
-                        
-                        t2_pen = T2CharStringPen(width=original_width, glyphSet=None)
-                        
-                        for contour in rounded_contours:
-                            coords = contour['coords']
-                            flags = contour['flags']
-                            
-                            if not coords:
-                                continue
-                            
-                            # パスを描画
-                            t2_pen.moveTo(coords[0])
-                            
-                            i = 1
-                            while i < len(coords):
-                                if i >= len(flags):
-                                    break
-                                
-                                if flags[i] & 1:  # オンカーブ点
-                                    t2_pen.lineTo(coords[i])
-                                else:  # オフカーブ点（制御点）
-                                    if i + 1 < len(coords) and i + 1 < len(flags) and (flags[i + 1] & 1):
-                                        # 二次ベジェ曲線
-                                        t2_pen.qCurveTo(coords[i], coords[i + 1])
-                                        i += 1
-                                    else:
-                                        # 単独の制御点処理を改善
-                                        t2_pen.lineTo(coords[i])
-                                i += 1
-                            
-                            t2_pen.closePath()
-                        
-                        # 新しいCharStringで置き換え
-                        new_charstring = t2_pen.getCharString()
-                        
-                        # 属性を適切に設定
-                        new_charstring.width = original_width
-                        
-                        # PrivateDictを安全に設定
-                        if original_private is not None:
-                            try:
-                                new_charstring.private = original_private
-                            except Exception as private_error:
-                                print(f"    警告: PrivateDict設定エラー: {private_error}")
-                                self._set_default_private_dict(new_charstring, original_private)
-                        else:
-                            self._set_default_private_dict(new_charstring, None)
-                        
-                        charStrings[glyph_name] = new_charstring
-                        processed_count += 1
-                        print(f"  グリフ '{glyph_name}' の処理完了 ({corners_processed}角を角丸化)")
-                        
-                    except Exception as char_error:
-                        print(f"    CharString作成エラー: {char_error}")
-                        continue
-                
-            except Exception as e:
-                print(f"  エラー: グリフ '{glyph_name}' の処理中に例外が発生: {str(e)}")
+        glyph_names = self._selected(charStrings.keys())
+
+        # 変更しないグリフが参照するサブルーチンは、描画で展開されても元のバイトコードに戻す
+        subr_bytecodes = cff_passthrough.snapshot_subr_bytecodes(cff, topDict)
+        try:
+            processed_count = self._round_cff_glyphs(
+                font, charStrings, glyph_names, effective_radius, quality_level
+            )
+        finally:
+            cff_passthrough.restore_subr_bytecodes(subr_bytecodes)
         
-        print(f"OpenType/CFFフォントの角丸処理が完了しました。処理されたグリフ数: {processed_count}個")
+        logger.info("OpenType/CFFフォントの角丸処理が完了しました。処理されたグリフ数: %d個", processed_count)
         
         return font
 
+    @staticmethod
+    def _cff_effective_radius(radius, quality_level):
+        """T2CharStringの座標変化を考慮した、CFFグリフに使う半径"""
+        return radius * quality_preset(quality_level).cff_radius_scale
+
+    def _round_cff_glyphs(self, font, charStrings, glyph_names, effective_radius, quality_level):
+        """
+        CFFの各グリフを角丸処理し、変更のあったグリフだけをCharStringsに書き戻す。
+        変更のないグリフは元のT2CharString（バイトコード・サブルーチン参照）をそのまま残す。
+        書き戻したグリフ数を返す。
+        """
+        def compute(names):
+            if self.workers > 1:
+                # ワーカーからはコンパイル済みのバイトコードだけを受け取る
+                return self._run_in_workers(font, 'cff', names, (effective_radius,))
+            return self._round_each(
+                names, lambda glyph_name: self._round_cff_glyph(glyph_name, charStrings[glyph_name], effective_radius))
+
+        subrs_digests = {}
+        results = self._round_with_cache(
+            glyph_names, compute, quality_level,
+            source_bytes=lambda name: self._cff_source_bytes(charStrings[name], subrs_digests),
+            encode=self._encode_cff_result,
+            decode=lambda value: (value[4:], struct.unpack_from('<I', value)[0]) if value else None,
+        )
+
+        return self._store_cff_results(charStrings, results)
+
+    def _store_cff_results(self, charStrings, results):
+        """
+        (グリフ名, (T2CharStringまたはバイトコード, 角数) または None) の並びをCharStringsに書き戻す。
+        書き戻したグリフ数を返す。
+        """
+        from fontTools.misc.psCharStrings import T2CharString
+
+        processed_count = 0
+        for glyph_name, result in results:
+            if result is None:
+                continue
+            new_charstring, corners_processed = result
+            t = self.timings.start()
+            charString = charStrings[glyph_name]
+            if isinstance(new_charstring, bytes):
+                new_charstring = T2CharString(bytecode=new_charstring, globalSubrs=charString.globalSubrs)
+
+            try:
+                # PrivateDictを安全に設定
+                original_private = getattr(charString, 'private', None)
+                if original_private is not None:
+                    try:
+                        new_charstring.private = original_private
+                    except Exception as private_error:
+                        logger.warning("    PrivateDict設定エラー: %s", private_error)
+                        self._set_default_private_dict(new_charstring, original_private)
+                else:
+                    self._set_default_private_dict(new_charstring, None)
+
+                charStrings[glyph_name] = new_charstring
+                self.timings.lap('encode', t)
+                processed_count += 1
+                self.counters['glyphs_processed'] += 1
+                self.counters['corners_rounded'] += corners_processed
+                logger.debug("  グリフ '%s' の処理完了 (%d角を角丸化)", glyph_name, corners_processed)
+
+            except Exception as char_error:
+                self.counters['errors'] += 1
+                logger.error("    CharString作成エラー: %s", char_error)
+                continue
+
+        return processed_count
+
+    def _round_cff_glyph(self, glyph_name, charString, effective_radius):
+        """
+        CFFグリフ1つ分の角丸処理。
+        (新しいT2CharString, 角丸化した角の数) を返す。更新不要またはエラー時は None。
+        """
+        return self._round_cff_glyph_radii(glyph_name, charString, (effective_radius,))[0]
+
+    def _round_cff_glyph_radii(self, glyph_name, charString, effective_radii):
+        """
+        CFFグリフ1つ分を、effective_radiiの半径ごとに角丸処理する（デコードは1度だけ）。
+        半径ごとの (新しいT2CharString, 角丸化した角の数) または None（更新不要・エラー）のリストを返す。
+        """
+        timings = self.timings
+        try:
+            # ペンで描画コマンドを直接輪郭データに変換
+            # drawはCharStringをプログラムに展開して書き換えるため、変更しないグリフの
+            # 元のバイトコードを残せるよう、コンパイル済みのものはコピーを描画する
+            t = timings.start()
+            source = cff_passthrough.decodable_copy(charString)
+            pen = GlyphOutlinePen()
+            source.draw(pen)
+            outline = pen.outline
+            # 元のCharStringの幅を取得
+            original_width = getattr(source, 'width', 0)
+            t = timings.lap('decode', t)
+            
+            # 輪郭のないグリフとコンポーネント（seac）を含むグリフは処理しない
+            if not outline.num_contours or pen.components:
+                return [None] * len(effective_radii)
+
+            results = self._round_cff_outline_radii(glyph_name, outline, effective_radii)
+
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.error("  エラー: グリフ '%s' の処理中に例外が発生: %s", glyph_name, e)
+            return [None] * len(effective_radii)
+
+        private = getattr(source, 'private', None)
+        return [None if result is None else self._encode_cff_glyph(result, original_width, private) for result in results]
+
+    def _encode_cff_glyph(self, result, original_width, private):
+        """
+        角丸処理の結果 (GlyphOutline, 角数) から (新しいT2CharString, 角数) を作る。エラー時は None。
+        エンコードはグリフ単位のパイプラインと同じcff_passthrough.encode_outlineで行う。
+        """
+        rounded, corners_processed = result
+        t = self.timings.start()
+        # 新しいCharStringを作成
+        try:
+            new_charstring = cff_passthrough.encode_outline(rounded, private, original_width)
+            self.timings.lap('encode', t)
+            return new_charstring, corners_processed
+
+        except Exception as char_error:
+            self.counters['errors'] += 1
+            logger.error("    CharString作成エラー: %s", char_error)
+            return None
+
+    def _compile_cff_glyph(self, result):
+        """(T2CharString, 角数) を (CharStringバイトコード, 角数) にする。Noneやコンパイルエラー時は None"""
+        if result is None:
+            return None
+        new_charstring, corners_processed = result
+        try:
+            with self.timings.stage('encode'):
+                new_charstring.compile()
+        except Exception as char_error:
+            self.counters['errors'] += 1
+            logger.error("    CharString作成エラー: %s", char_error)
+            return None
+        return new_charstring.bytecode, corners_processed
+
+    def _round_cff_outline(self, glyph_name, outline, effective_radius):
+        """
+        デコード済みのCFF輪郭の角丸処理（パス自動連結・統合・角丸・品質チェック）。
+        (角丸処理後のGlyphOutline, 角丸化した角の数) を返す。更新不要なら None。
+        """
+        return self._round_cff_outline_radii(glyph_name, outline, (effective_radius,))[0]
+
+    def _round_cff_outline_radii(self, glyph_name, outline, effective_radii):
+        """
+        デコード済みのCFF輪郭を、effective_radiiの半径ごとに角丸処理する。
+        パス自動連結・統合と角の解析は1度だけ行う。
+        半径ごとの (角丸処理後のGlyphOutline, 角丸化した角の数) または None（更新不要）のリストを返す。
+        """
+        timings = self.timings
+        if self.engine == 'clipper':
+            t = timings.start()
+            # パス自動連結前処理
+            outline = self._auto_join_contours(outline)
+            timings.lap('auto_join', t)
+            # モルフォロジー演算で丸める（重なった輪郭の統合も同時に行われる）
+            return [self._round_with_clipper(glyph_name, outline, radius, cubic=True) for radius in effective_radii]
+
+        outline = self._prepare_cff_outline(glyph_name, outline)
+        t = timings.start()
+
+        # オリジナル頂点数（全contour合計）
+        original_point_count = outline.num_points
+
+        geom = corner_kernel.analyze_corners(outline) if len(effective_radii) > 1 else None
+        results = []
+        for effective_radius in effective_radii:
+            # 改良された角丸処理を全輪郭に一括適用（ベジェ曲線対応、3点未満の輪郭はそのまま）
+            # 角度閾値を179度まで拡張し、滑らかな曲線も処理
+            rounded, corners_processed = self._round_corners_improved_for_curves(
+                outline, effective_radius, 179.0, geom=geom
+            )
+            timings.lap('rounding', t)
+            results.append(self._check_cff_result(glyph_name, rounded, corners_processed, original_point_count))
+            t = timings.start()
+        return results
+
+    def _prepare_cff_outline(self, glyph_name, outline):
+        """CFFの角丸処理の前処理（パス自動連結・統合）。半径によらない。前処理後のGlyphOutlineを返す"""
+        t = self.timings.start()
+        # パス自動連結前処理
+        outline = self._auto_join_contours(outline)
+        self.timings.lap('auto_join', t)
+
+        # 重なった輪郭の統合（Union）
+        if self.union_backend != 'none':
+            outline = self._union_overlapping(glyph_name, outline, cubic=True)
+        return outline
+
+    def _check_cff_result(self, glyph_name, rounded, corners_processed, original_point_count):
+        """CFFの角丸処理の結果の品質チェック。(GlyphOutline, 角数) か、更新不要・スキップなら None を返す"""
+        # 角丸処理が実際に行われた場合のみ更新
+        if corners_processed == 0:
+            return None
+
+        # 新しい頂点数（全contour合計）
+        new_point_count = rounded.num_points
+
+        # 品質チェックを緩和（T2CharStringの座標変化を考慮）
+        if original_point_count > 0:
+            reduction_ratio = new_point_count / original_point_count
+            # より緩い品質チェック（30%減少まで許容）
+            if reduction_ratio < 0.3:
+                self.counters['glyphs_skipped_quality'] += 1
+                logger.debug("[品質警告] グリフ '%s': 頂点数が%d%%減少（%d→%d）。処理をスキップします。",
+                             glyph_name, int((1 - reduction_ratio) * 100), original_point_count, new_point_count)
+                return None
+
+        return rounded, corners_processed
+
+    def _round_each(self, glyph_names, round_glyph):
+        """
+        グリフをround_glyph(グリフ名)で順に処理し、(glyph_name, result) の形で順次返す。
+        グリフごとに増えたカウンタはglyph_countersに、処理中に例外が発生してerrorsに数えたグリフはfailed_glyphsに記録する。
+        """
+        for glyph_name in glyph_names:
+            before = Counter(self.counters)
+            result = round_glyph(glyph_name)
+            delta = self.counters - before
+            if delta:
+                self.glyph_counters[glyph_name] = delta
+            if delta['errors']:
+                self.failed_glyphs.add(glyph_name)
+            yield glyph_name, result
+
+    def _round_with_cache(self, glyph_names, compute, quality_level, source_bytes, encode, decode):
+        """
+        グリフキャッシュを引いてから角丸処理を行う。
+        キャッシュにあるグリフは幾何処理をせずに保存済みの結果を使い、
+        残りのグリフだけをcompute(names)で処理して結果をキャッシュに保存する。
+        処理に失敗したグリフ（failed_glyphs）は保存せず、次の実行でもう一度処理してエラーに数える。
+        グリフの処理で増えたカウンタ（glyph_counters）も結果と一緒に保存し、キャッシュから読んだときに数え直す。
+        結果はグリフ順に (glyph_name, result) の形で順次返される。
+        """
+        cache = self.glyph_cache
+        if cache is None:
+            yield from compute(glyph_names)
+            return
+
+        version = self._cache_version()
+        keys = {}
+        cached = {}
+        pending = []
+        t = self.timings.start()
+        for glyph_name in glyph_names:
+            key = cache.make_key(source_bytes(glyph_name), self.effect_name, self._cache_params, quality_level, version)
+            value = cache.get(key)
+            if value is None:
+                keys[glyph_name] = key
+                pending.append(glyph_name)
+            else:
+                counters, value = self._unpack_cache_value(value)
+                self.counters.update(counters)
+                cached[glyph_name] = decode(value)
+        self.timings.lap('cache_lookup', t)
+
+        computed = iter(compute(pending)) if pending else iter(())
+        for glyph_name in glyph_names:
+            if glyph_name in cached:
+                yield glyph_name, cached[glyph_name]
+                continue
+            _, result = next(computed)
+            if glyph_name not in self.failed_glyphs:
+                with self.timings.stage('cache_store'):
+                    counters = self.glyph_counters.get(glyph_name)
+                    cache.put(keys[glyph_name], self._pack_cache_value(counters, encode(result)))
+            yield glyph_name, result
+
+    @staticmethod
+    def _pack_cache_value(counters, payload):
+        """キャッシュに保存する値（カウンタのJSONの長さ・カウンタのJSON・処理結果のバイト列）"""
+        data = json.dumps(dict(sorted(counters.items())), separators=(',', ':')).encode('utf-8') if counters else b''
+        return struct.pack('<I', len(data)) + data + payload
+
+    @staticmethod
+    def _unpack_cache_value(value):
+        """_pack_cache_valueの値を (カウンタ, 処理結果のバイト列) に戻す"""
+        size, = struct.unpack_from('<I', value)
+        counters = json.loads(value[4:4 + size]) if size else {}
+        return counters, value[4 + size:]
+
+    def _cache_version(self):
+        """エフェクトのコードバージョン（ソースが変わればキャッシュは自動的に無効になる）"""
+        key = (self.engine, self.union_backend, self.overlap_screen)
+        version = RoundCornersEffect._code_versions.get(key)
+        if version is None:
+            extra = f"engine={self.engine},union={self.union_backend},overlap_screen={self.overlap_screen}"
+            if self.union_backend == 'pathops':
+                extra += f",pathops={getattr(pathops, '__version__', '')}"
+            if self.engine == 'clipper':
+                extra += f",pyclipper={getattr(_clipper_engine().pyclipper, '__version__', '')}"
+            version = source_version(sys.modules[__name__], corner_kernel, glyph_outline, overlap_screen,
+                                     cff_passthrough, _clipper_engine(), extra=extra)
+            RoundCornersEffect._code_versions[key] = version
+        return version
+
+    @staticmethod
+    def _truetype_source_bytes(glyf_table, glyph_name):
+        """キャッシュキー用の元グリフのglyfバイト列（未展開ならそのまま、展開済みなら再コンパイル）"""
+        glyph = glyf_table.glyphs[glyph_name]
+        data = getattr(glyph, 'data', None)
+        if data is None:
+            data = glyph.compile(glyf_table, recalcBBoxes=False)
+        return data
+
+    @staticmethod
+    def _cff_source_bytes(charString, subrs_digests):
+        """
+        キャッシュキー用の元グリフのCharStringバイト列。
+        サブルーチン呼び出しの結果も出力に影響するため、
+        グローバル/ローカルSubrsと幅の既定値のハッシュ（フォントごとに1度だけ計算）を付け加える。
+        """
+        import hashlib
+
+        if charString.bytecode is None:
+            charString.compile()
+        globalSubrs = getattr(charString, 'globalSubrs', None)
+        private = getattr(charString, 'private', None)
+        context = (id(globalSubrs), id(private))
+        digest = subrs_digests.get(context)
+        if digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for subrs in (globalSubrs, getattr(private, 'Subrs', None)):
+                for i in range(len(subrs) if subrs is not None else 0):
+                    subr = subrs[i]
+                    if subr.bytecode is None:
+                        subr.compile()
+                    h.update(subr.bytecode)
+                    h.update(b'\0')
+                h.update(b'\1')
+            widths = (getattr(private, 'nominalWidthX', 0), getattr(private, 'defaultWidthX', 0))
+            h.update(repr(widths).encode('ascii'))
+            digest = subrs_digests[context] = h.digest()
+        return digest + charString.bytecode
+
+    @staticmethod
+    def _encode_cff_result(result):
+        """CFFの処理結果を (角数, CharStringバイトコード) のバイト列にする"""
+        if result is None:
+            return UNCHANGED
+        new_charstring, corners_processed = result
+        if not isinstance(new_charstring, bytes):
+            new_charstring.compile()
+            new_charstring = new_charstring.bytecode
+        return struct.pack('<I', corners_processed) + new_charstring
+
+    @staticmethod
+    def _font_bytes(font):
+        """
+        現在のフォント状態をバイト列に書き出す。
+        head.modifiedを書き換えないよう、タイムスタンプ更新は一時的に止める。
+        バウンディングボックスの再計算も止め、全グリフが展開されないようにする。
+        """
+        import io
+
+        buf = io.BytesIO()
+        recalc_timestamp, recalc_bboxes = font.recalcTimestamp, font.recalcBBoxes
+        font.recalcTimestamp = font.recalcBBoxes = False
+        try:
+            font.save(buf)
+        finally:
+            font.recalcTimestamp, font.recalcBBoxes = recalc_timestamp, recalc_bboxes
+        return buf.getvalue()
+
+    def _run_in_workers(self, font, kind, glyph_names, settings):
+        """
+        グリフ集合をチャンクに分割し、ProcessPoolExecutorで並列に角丸処理する。
+        各ワーカーはフォントのバイト列から自前のTTFontを復元し、
+        処理済みのグリフデータ（GlyphOutlineまたはCharStringバイトコード）だけを返す。
+        結果はグリフ順に (glyph_name, result) の形で順次返される。
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+
+        # ワーカーに渡すため、現在のフォント状態をバイト列に書き出す
+        t = self.timings.start()
+        font_data = self._font_bytes(font)
+        self.timings.lap('worker_setup', t)
+
+        # ワーカー数の数倍に分割して負荷を平準化する
+        chunk_size = max(1, -(-len(glyph_names) // (self.workers * 4)))
+        chunks = [glyph_names[i:i + chunk_size] for i in range(0, len(glyph_names), chunk_size)]
+
+        logger.info("並列処理: %dワーカー, %dチャンク（%dグリフ/チャンク）", self.workers, len(chunks), chunk_size)
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_round_worker,
+            initargs=(font_data, dict(self.params)),
+        ) as executor:
+            chunks_done = executor.map(_round_glyph_chunk, repeat(kind), chunks, repeat(settings))
+            for chunk_results, chunk_counters, chunk_timings, chunk_failed, chunk_glyph_counters in chunks_done:
+                # ワーカー側で数えたスキップ数・エラー数・失敗したグリフと段階ごとの時間を集約する
+                # （時間は全ワーカーの合計なので、経過時間より大きくなりうる）
+                self.counters.update(chunk_counters)
+                self.timings.merge(chunk_timings)
+                self.failed_glyphs.update(chunk_failed)
+                self.glyph_counters.update(chunk_glyph_counters)
+                yield from chunk_results
+
     def _round_corners_cff_precision(self, contour, config_radius, angle_threshold=160):
         """
         CFF専用の高精度座標角丸処理
         座標精度を制御し、整数座標との混在を避ける
+        contourにはGlyphOutline（全輪郭を一括処理）か、従来の輪郭辞書を渡せる。
         """
-        import math
-        
-        coords = contour['coords']
-        flags = contour['flags']
-        n = len(coords)
+        outline = self._as_outline(contour)
         
-        if config_radius == 0 or n < 3:
+        if config_radius == 0 or outline.num_points < 3:
             return contour
         
         # CFF座標の精度レベルを分析
-        precision_level = self._analyze_cff_coordinate_precision(coords)
-        print(f"    CFF座標精度レベル: {precision_level}")
-        
-        new_coords = []
-        new_flags = []
-        
-        for i in range(n):
-            p0 = coords[i - 1]
-            p1 = coords[i]
-            p2 = coords[(i + 1) % n]
-            
-            # ベクトル計算
-            v1 = (p0[0] - p1[0], p0[1] - p1[1])
-            v2 = (p2[0] - p1[0], p2[1] - p1[1])
-            norm1 = math.hypot(*v1)
-            norm2 = math.hypot(*v2)
-            
-            if norm1 == 0 or norm2 == 0:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
-            
-            # 角度計算
-            dot = v1[0] * v2[0] + v1[1] * v2[1]
-            cos_angle = dot / (norm1 * norm2)
-            cos_angle = max(-1.0, min(1.0, cos_angle))
-            angle_deg = math.degrees(math.acos(cos_angle))
-            
-            # 直線判定（CFF用の厳密な閾値）
-            if angle_deg >= 178.0:  # CFF用の直線閾値
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
-            
-            # 角丸判定
-            if angle_deg < angle_threshold:
-                # 動的半径計算
-                max_radius = min(norm1, norm2) / 2.0
-                actual_radius = min(config_radius, max_radius)
-                
-                # 高精度座標計算（精度制御付き）
-                l1 = min(actual_radius, norm1 * 0.5)
-                l2 = min(actual_radius, norm2 * 0.5)
-                
-                # 座標計算（精度制御）
-                T1 = self._calculate_precise_coordinate(p1, p0, l1 / norm1, precision_level)
-                T2 = self._calculate_precise_coordinate(p1, p2, l2 / norm2, precision_level)
-                
-                # 3点を追加: T1 (オンカーブ), P1 (制御点), T2 (オンカーブ)
-                new_coords.append(T1)
-                new_flags.append(1)  # オンカーブ
-                new_coords.append(p1)
-                new_flags.append(0)  # オフカーブ（制御点）
-                new_coords.append(T2)
-                new_flags.append(1)  # オンカーブ
-            else:
-                # 通常の点をそのまま保持
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-        
-        return {"coords": new_coords, "flags": new_flags}
+        precision_level = self._analyze_cff_coordinate_precision(outline.points.tolist())
+        logger.debug("    CFF座標精度レベル: %s", precision_level)
+
+        rounded, _ = corner_kernel.round_precision(outline, config_radius, angle_threshold, precision_level)
+        return self._same_form(contour, rounded)
+
+    @staticmethod
+    def _as_outline(contour):
+        """GlyphOutlineまたは従来の輪郭辞書 {'coords', 'flags'} をGlyphOutlineとして扱う"""
+        if isinstance(contour, GlyphOutline):
+            return contour
+        return GlyphOutline.from_contours([contour])
+
+    @staticmethod
+    def _same_form(contour, outline):
+        """入力が輪郭辞書だった場合は結果を辞書形式に戻す"""
+        if isinstance(contour, GlyphOutline):
+            return outline
+        return {"coords": [tuple(p) for p in outline.points.tolist()], "flags": outline.flags.tolist()}
     
     def _round_corners_t2charstring_compatible(self, contour, radius, angle_threshold, min_radius):
         """
         T2CharString互換の角丸処理
         座標変化を前提とした最適化実装
+        contourにはGlyphOutline（全輪郭を一括処理）か、従来の輪郭辞書を渡せる。
         """
         import math
         
-        coords = contour['coords']
-        flags = contour['flags']
-        n = len(coords)
+        outline = self._as_outline(contour)
         
-        if radius == 0 or n < 3:
+        if radius == 0 or outline.num_points < 3:
             return contour, 0
         
-        new_coords = []
-        new_flags = []
+        rounded_contours = []
         corners_rounded = 0
         
-        for i in range(n):
-            p0 = coords[i - 1]
-            p1 = coords[i]
-            p2 = coords[(i + 1) % n]
+        for points, contour_flags in outline.contours():
+            coords = [tuple(p) for p in points.tolist()]
+            flags = contour_flags.tolist()
+            n = len(coords)
+            new_coords = []
+            new_flags = []
             
-            # ベクトル計算
-            v1 = (p0[0] - p1[0], p0[1] - p1[1])
-            v2 = (p2[0] - p1[0], p2[1] - p1[1])
-            norm1 = math.hypot(*v1)
-            norm2 = math.hypot(*v2)
+            for i in range(n if n >= 3 else 0):
+                p0 = coords[i - 1]
+                p1 = coords[i]
+                p2 = coords[(i + 1) % n]
             
-            if norm1 == 0 or norm2 == 0:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
+                # ベクトル計算
+                v1 = (p0[0] - p1[0], p0[1] - p1[1])
+                v2 = (p2[0] - p1[0], p2[1] - p1[1])
+                norm1 = math.hypot(*v1)
+                norm2 = math.hypot(*v2)
             
-            # 角度計算
-            dot = v1[0] * v2[0] + v1[1] * v2[1]
-            cos_angle = dot / (norm1 * norm2)
-            cos_angle = max(-1.0, min(1.0, cos_angle))
-            angle_deg = math.degrees(math.acos(cos_angle))
+                if norm1 == 0 or norm2 == 0:
+                    new_coords.append(p1)
+                    new_flags.append(flags[i])
+                    continue
             
-            # 角丸判定（より緩い条件）
-            if angle_deg < angle_threshold and angle_deg > 3:
-                # 動的半径計算
-                max_radius = min(norm1, norm2) / 3.0
-                actual_radius = min(radius, max_radius)
-                
-                if actual_radius >= min_radius:
-                    # T2CharString対応の角丸処理
-                    corner_result = self._create_t2charstring_compatible_corner(
-                        p0, p1, p2, actual_radius, norm1, norm2, angle_deg
-                    )
-                    
-                    if corner_result:
-                        new_coords.extend(corner_result['coords'])
-                        new_flags.extend(corner_result['flags'])
-                        corners_rounded += 1
+                # 角度計算
+                dot = v1[0] * v2[0] + v1[1] * v2[1]
+                cos_angle = dot / (norm1 * norm2)
+                cos_angle = max(-1.0, min(1.0, cos_angle))
+                angle_deg = math.degrees(math.acos(cos_angle))
+            
+                # 角丸判定（より緩い条件）
+                if angle_deg < angle_threshold and angle_deg > 3:
+                    # 動的半径計算
+                    max_radius = min(norm1, norm2) / 3.0
+                    actual_radius = min(radius, max_radius)
+            
+                    if actual_radius >= min_radius:
+                        # T2CharString対応の角丸処理
+                        corner_result = self._create_t2charstring_compatible_corner(
+                            p0, p1, p2, actual_radius, norm1, norm2, angle_deg
+                        )
+            
+                        if corner_result:
+                            new_coords.extend(corner_result['coords'])
+                            new_flags.extend(corner_result['flags'])
+                            corners_rounded += 1
+                        else:
+                            new_coords.append(p1)
+                            new_flags.append(flags[i])
                     else:
                         new_coords.append(p1)
                         new_flags.append(flags[i])
                 else:
                     new_coords.append(p1)
                     new_flags.append(flags[i])
-            else:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
+            
+            if n < 3:
+                new_coords, new_flags = coords, flags
+            rounded_contours.append((new_coords, new_flags))
         
-        return {"coords": new_coords, "flags": new_flags}, corners_rounded
+        return self._same_form(contour, GlyphOutline.from_contours(rounded_contours)), corners_rounded
     
     def _create_t2charstring_compatible_corner(self, p0, p1, p2, radius, norm1, norm2, angle_deg):
         """T2CharString互換の角丸コーナーを作成"""
@@ -719,122 +1560,101 @@ class RoundCornersEffect(BaseEffect):
         return (x, y)
 
     def _extract_contours_from_recording_pen(self, pen_value):
-        """RecordingPenの記録からcontourデータを抽出"""
-        contours = []
-        current_coords = []
-        current_flags = []
-        
+        """RecordingPenの記録からGlyphOutlineを作成する"""
+        # 三次ベジェ曲線の制御点も二次と同様にオフカーブ点として追加する
+        pen = GlyphOutlinePen()
         for cmd, pts in pen_value:
-            if cmd == "moveTo":
-                if current_coords:
-                    contours.append({'coords': current_coords, 'flags': current_flags})
-                current_coords = [pts[0]]
-                current_flags = [1]  # オンカーブ
-            elif cmd == "lineTo":
-                current_coords.append(pts[0])
-                current_flags.append(1)  # オンカーブ
-            elif cmd == "qCurveTo":
-                # 制御点を追加
-                for p in pts[:-1]:
-                    current_coords.append(p)
-                    current_flags.append(0)  # オフカーブ
-                # 終点を追加
-                current_coords.append(pts[-1])
-                current_flags.append(1)  # オンカーブ
-            elif cmd == "curveTo":
-                # 三次ベジェ曲線を二次ベジェ曲線に近似
-                # 簡単な実装として制御点を追加
-                for p in pts[:-1]:
-                    current_coords.append(p)
-                    current_flags.append(0)  # オフカーブ
-                current_coords.append(pts[-1])
-                current_flags.append(1)  # オンカーブ
-            elif cmd == "closePath":
-                pass
-            elif cmd == "endPath":
-                pass
-        
-        if current_coords:
-            contours.append({'coords': current_coords, 'flags': current_flags})
-        
-        return contours
+            getattr(pen, cmd)(*pts)
+        return pen.outline
 
 
     def _extract_contours_from_coordinates(self, coordinates, endPts, flags):
         """
-        座標データから直接輪郭を抽出する。
+        座標データから直接輪郭（GlyphOutline）を抽出する。
         """
-        contours = []
-        start_idx = 0
-        
-        for end_idx in endPts:
-            contour_coords = coordinates[start_idx:end_idx + 1]
-            contour_flags = flags[start_idx:end_idx + 1]
-            
-            contours.append({
-                'coords': contour_coords,
-                'flags': contour_flags
-            })
-            
-            start_idx = end_idx + 1
-        
-        return contours
+        return GlyphOutline(coordinates, flags, endPts)
 
-    def _auto_join_contours(self, contours, tol=1e-3):
+    def _auto_join_contours(self, outline, tol=1e-3):
         """
         端点が一致する複数のcontourを自動連結する。
         tol: float, 端点一致判定の許容誤差（単位: フォント座標系）
+
+        端点を格子ハッシュ（EndpointIndex）に登録しておき、連結相手は
+        連結中の輪郭の始点・終点の近傍セルだけから探す。
+        候補のうち番号が最小の輪郭を、終点-始点 / 始点-終点 / 始点-始点 / 終点-終点
+        の優先順で連結する（全輪郭を先頭から走査する方式と同じ結果になる）。
         """
+        import math
         import numpy as np
+        from itertools import chain
+
+        if outline.num_contours < 2 or tol <= 0:
+            return outline
 
         def points_close(p1, p2):
-            return np.linalg.norm(np.array(p1) - np.array(p2)) < tol
+            return math.hypot(p1[0] - p2[0], p1[1] - p2[1]) < tol
+
+        contours = list(outline.contours())
+        start_points = [tuple(p) for p in outline.points[outline.starts].tolist()]
+        end_points = [tuple(p) for p in outline.points[outline.ends].tolist()]
+
+        index = EndpointIndex(tol)
+        for j in range(len(contours)):
+            index.add(j, EndpointIndex.START, start_points[j])
+            index.add(j, EndpointIndex.END, end_points[j])
 
         used = [False] * len(contours)
-        joined_contours = []
+        joined = []
+        changed_any = False
 
-        for i, c in enumerate(contours):
+        for i, (points, flags) in enumerate(contours):
             if used[i]:
                 continue
-            coords = list(c['coords'])
-            flags = list(c['flags'])
-            changed = True
             used[i] = True
-            while changed:
-                changed = False
-                for j, c2 in enumerate(contours):
-                    if used[j] or i == j:
-                        continue
-                    # 終点-始点
-                    if points_close(coords[-1], c2['coords'][0]):
-                        coords.extend(c2['coords'][1:])
-                        flags.extend(c2['flags'][1:])
-                        used[j] = True
-                        changed = True
-                        break
-                    # 始点-終点
-                    elif points_close(coords[0], c2['coords'][-1]):
-                        coords = c2['coords'][:-1] + coords
-                        flags = c2['flags'][:-1] + flags
-                        used[j] = True
-                        changed = True
-                        break
-                    # 始点-始点（反転して連結）
-                    elif points_close(coords[0], c2['coords'][0]):
-                        coords = list(reversed(c2['coords']))[:-1] + coords
-                        flags = list(reversed(c2['flags']))[:-1] + flags
-                        used[j] = True
-                        changed = True
-                        break
-                    # 終点-終点（反転して連結）
-                    elif points_close(coords[-1], c2['coords'][-1]):
-                        coords.extend(list(reversed(c2['coords']))[1:])
-                        flags.extend(list(reversed(c2['flags']))[1:])
-                        used[j] = True
-                        changed = True
-                        break
-            joined_contours.append({'coords': coords, 'flags': flags})
-        return joined_contours
+            # 前に付ける部分（逆順に積む）と後ろに付ける部分
+            head = []
+            tail = []
+            first = start_points[i]
+            last = end_points[i]
+            while True:
+                j = min(
+                    (j for j, _ in chain(index.nearby(last), index.nearby(first)) if not used[j]),
+                    default=None,
+                )
+                if j is None:
+                    break
+                points2, flags2 = contours[j]
+                single = len(points2) == 1
+                # 終点-始点
+                if points_close(last, start_points[j]):
+                    tail.append((points2[1:], flags2[1:]))
+                    last = last if single else end_points[j]
+                # 始点-終点
+                elif points_close(first, end_points[j]):
+                    head.append((points2[:-1], flags2[:-1]))
+                    first = first if single else start_points[j]
+                # 始点-始点（反転して連結）
+                elif points_close(first, start_points[j]):
+                    head.append((points2[::-1][:-1], flags2[::-1][:-1]))
+                    first = first if single else end_points[j]
+                # 終点-終点（反転して連結）
+                else:
+                    tail.append((points2[::-1][1:], flags2[::-1][1:]))
+                    last = last if single else start_points[j]
+                used[j] = True
+                changed_any = True
+
+            if head or tail:
+                pieces = head[::-1] + [(points, flags)] + tail
+                points = np.concatenate([p for p, _ in pieces])
+                flags = np.concatenate([f for _, f in pieces])
+            joined.append((points, flags))
+
+        if not changed_any:
+            return outline
+        return GlyphOutline.concatenate(
+            GlyphOutline(points, flags, [len(points) - 1]) for points, flags in joined
+        )
 
     def _round_corners_direct(self, contour, config_radius, angle_threshold=160):
         """
@@ -843,304 +1663,164 @@ class RoundCornersEffect(BaseEffect):
 
         直線判定は、3点(p0, p1, p2)についてp1と線分p0-p2の距離が0.001以下であれば直線とみなす。
         角ごとに辺長に応じて最大半径を計算し、config.yaml指定のradiusと比較して小さい方を使用する。
+        contourにはGlyphOutline（全輪郭を一括処理）か、従来の輪郭辞書を渡せる。
         """
-        import math
-
-        coords = contour['coords']
-        flags = contour['flags']
-        n = len(coords)
+        outline = self._as_outline(contour)
 
-        if config_radius == 0 or n < 3:
+        if config_radius == 0 or outline.num_points < 3:
             return contour
 
-        new_coords = []
-        new_flags = []
-        
-        for i in range(n):
-            p0 = coords[i - 1]
-            p1 = coords[i]
-            p2 = coords[(i + 1) % n]
-
-            # p1と線分p0-p2の距離を計算
-            x0, y0 = p0
-            x1, y1 = p1
-            x2, y2 = p2
-
-            # 線分p0-p2が1点に潰れている場合は距離を直接
-            dx = x2 - x0
-            dy = y2 - y0
-            if dx == 0 and dy == 0:
-                dist = math.hypot(x1 - x0, y1 - y0)
-            else:
-                # 線分p0-p2上の最近点を求める
-                t = ((x1 - x0) * dx + (y1 - y0) * dy) / (dx * dx + dy * dy)
-                t = max(0.0, min(1.0, t))
-                proj_x = x0 + t * dx
-                proj_y = y0 + t * dy
-                dist = math.hypot(x1 - proj_x, y1 - proj_y)
-
-            # ハイブリッド直線判定: 距離または角度で直線扱い
-            ANGLE_THRESHOLD = 178.0  # ここで閾値を調整
-            # 距離が非常に小さい場合は直線扱い
-            if dist <= 0.001:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
+        rounded, _ = corner_kernel.round_direct(outline, config_radius, angle_threshold)
+        return self._same_form(contour, rounded)
 
-            # 動的角丸半径計算: 角ごとに最大半径を辺長から決定
-            # P0-P1, P1-P2それぞれの距離
-            dist1 = math.hypot(x1 - x0, y1 - y0)
-            dist2 = math.hypot(x2 - x1, y2 - y1)
-            max_radius = min(dist1, dist2) / 2.0
-            actual_radius = min(config_radius, max_radius)
-
-            # 以降はactual_radiusを使って角丸処理（既存のradius使用部分をactual_radiusに差し替え）
-            # --- この下の角丸生成ロジックで actual_radius を利用してください ---
-
-            # 距離が閾値を超えた場合、角度判定も追加
-            v1 = (x0 - x1, y0 - y1)
-            v2 = (x2 - x1, y2 - y1)
-            norm1 = math.hypot(*v1)
-            norm2 = math.hypot(*v2)
-            if norm1 == 0 or norm2 == 0:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
-            dot = v1[0] * v2[0] + v1[1] * v2[1]
-            # 内積から角度（度数法）を算出
-            cos_theta = max(-1.0, min(1.0, dot / (norm1 * norm2)))
-            angle_deg = math.degrees(math.acos(cos_theta))
-            # 角度が閾値以上なら直線扱い
-            if angle_deg >= ANGLE_THRESHOLD:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
-            cos_angle = dot / (norm1 * norm2)
-            cos_angle = min(1.0, max(-1.0, cos_angle))
-            angle = math.degrees(math.acos(cos_angle))
-            if angle > angle_threshold:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
+    def _round_with_clipper(self, glyph_name, outline, radius, cubic):
+        """
+        engine: clipper の角丸処理。(角丸処理後のGlyphOutline, 丸めた角の数) を返す。
+        丸める角がない（曲線を当てはめ直すだけになる）グリフは書き換えない。
+        半径を下げても画が消える・隙間が埋まるグリフは処理せず、品質チェックのスキップとして数える。
+        """
+        with self.timings.stage('rounding'):
+            result = _clipper_engine().round_outline(outline, radius, cubic=cubic)
+        if result is None:
+            self.counters['glyphs_skipped_quality'] += 1
+            logger.debug("[品質警告] グリフ '%s': 半径を下げても輪郭の形が保てないため、処理をスキップします。", glyph_name)
+            return None
+        if result[1] == 0:
+            return None
+        return result
 
-            # 角丸処理を実行
-            def distance(p1, p2):
-                return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+    def _union_overlapping(self, glyph_name, outline, cubic):
+        """
+        パス統合（Union）する。overlap_screenが有効なら、輪郭が重なっている（交差・自己交差がある）グリフだけ統合する。
+        重なりのないグリフは統合しても形が変わらないので、統合を省略してunion_skippedに数える。
+        """
+        timings = self.timings
+        t = timings.start()
+        if self.overlap_screen:
+            overlapping = overlap_screen.has_overlaps(outline, cubic=cubic)
+            t = timings.lap('overlap_screen', t)
+            if not overlapping:
+                self.counters['union_skipped'] += 1
+                return outline
+        outline = self._union_outline(glyph_name, outline, cubic=cubic)
+        timings.lap('union', t)
+        return outline
+
+    def _union_outline(self, glyph_name, outline, cubic):
+        """
+        重なった輪郭を統合（Union）する。
+        cubic: Trueなら連続する2つのオフカーブ点を三次ベジェ（CFF）、Falseなら二次スプライン（TrueType）として扱う。
+        統合に失敗した場合は元の輪郭をそのまま返す。
+        """
+        if outline.num_contours == 0:
+            return outline
+        try:
+            if self.union_backend == 'pathops':
+                path = self._contours_to_skia_path(outline, cubic=cubic)
+                return self._skia_path_to_contours(pathops.simplify(path, clockwise=path.clockwise), cubic=cubic)
+            return self._union_with_boolean_operations(outline, cubic=cubic)
+        except Exception as e:
+            self.counters['union_failed'] += 1
+            logger.debug("  グリフ '%s' のパス統合に失敗しました（統合せずに続行）: %s", glyph_name, e)
+            return outline
 
-            def lerp(p1, p2, t):
-                return (p1[0] + (p2[0] - p1[0]) * t, p1[1] + (p2[1] - p1[1]) * t)
-            
-            # ベクトル計算
-            v1 = (x0 - x1, y0 - y1)
-            v2 = (x2 - x1, y2 - y1)
-            norm1 = math.hypot(*v1)
-            norm2 = math.hypot(*v2)
-            
-            if norm1 > 0 and norm2 > 0:
-                # 角丸処理: 元の点を3点（T1, P1, T2）に置き換え
-                l1 = min(actual_radius, norm1 * 0.5)
-                l2 = min(actual_radius, norm2 * 0.5)
-                
-                T1 = lerp(p1, p0, l1 / norm1)
-                T2 = lerp(p1, p2, l2 / norm2)
-                
-                # 3点を追加: T1 (オンカーブ), P1 (制御点), T2 (オンカーブ)
-                new_coords.append(T1)
-                new_flags.append(1)  # オンカーブ
-                new_coords.append(p1)
-                new_flags.append(0)  # オフカーブ（制御点）
-                new_coords.append(T2)
-                new_flags.append(1)  # オンカーブ
-            else:
-                # ベクトルが0の場合は元の点をそのまま
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-        
-        return {"coords": new_coords, "flags": new_flags}
-        
-        def distance(p1, p2):
-            return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+    def _union_with_boolean_operations(self, outline, cubic=False):
+        """
+        booleanOperationsによるパス統合。
+        曲線の扱いは描画時と同じ（cubic=Trueなら三次ベジェ、Falseなら暗黙のオンカーブ点を挟む二次スプライン）。
+        booleanOperationsは三次ベジェしか扱えないので二次曲線は等価な三次ベジェにして渡し、
+        TrueTypeでは結果の三次ベジェをcu2quで二次曲線に戻す。
+        """
+        from fontTools.pens.cu2quPen import Cu2QuPen
+        from fontTools.pens.recordingPen import RecordingPen
 
-        def lerp(p1, p2, t):
-            return (p1[0] + (p2[0] - p1[0]) * t, p1[1] + (p2[1] - p1[1]) * t)
+        # 1点だけの輪郭は統合できないので除く
+        contours = [(points, flags) for points, flags in outline.contours() if len(points) > 1]
+        glyph = self.BooleanGlyph()
+        GlyphOutline.from_contours(contours).draw(_CubicPen(glyph.getPen()), cubic=cubic)
+        recording = RecordingPen()
+        glyph.removeOverlap().draw(recording if cubic else Cu2QuPen(recording, max_err=1.0))
+        return self._recorded_to_contours(recording.value, cubic=cubic)
 
-        # 角丸処理が必要な点の情報を収集（元のリストは変更しない）
-        corner_modifications = []
-        
-        # オンカーブ点のみを抽出して角度を計算
-        oncurve_points = []
-        oncurve_indices = []
-        
-        for i, (coord, flag) in enumerate(zip(coords, flags)):
-            if flag & 1:  # オンカーブ点
-                oncurve_points.append(coord)
-                oncurve_indices.append(i)
-        
-        if len(oncurve_points) < 3:
-            return contour
-        
-        # 各オンカーブ点で角度を計算し、角丸が必要かを判定
-        for i in range(len(oncurve_points)):
-            original_idx = oncurve_indices[i]
-            p1 = oncurve_points[(i - 1) % len(oncurve_points)]
-            p2 = oncurve_points[i]
-            p3 = oncurve_points[(i + 1) % len(oncurve_points)]
-            
-            # ベクトル計算
-            v1 = (p2[0] - p1[0], p2[1] - p1[1])
-            v2 = (p3[0] - p2[0], p3[1] - p2[1])
-            norm1 = math.hypot(*v1)
-            norm2 = math.hypot(*v2)
-            
-            if norm1 == 0 or norm2 == 0:
-                continue
-            
-            dot = v1[0]*v2[0] + v1[1]*v2[1]
-            angle = math.acos(max(-1, min(1, dot / (norm1 * norm2))))
-            angle_degrees = math.degrees(angle)
-            
-            # 第一段階: 直線判定（180度に非常に近い場合、または極小角度の場合は直線とみなして除外）
-            # 点数や全体サイズから自動的に直線判定閾値を推定
-            straight_line_tolerance = self._estimate_straightness_threshold(coords)
-            very_small_angle_threshold = 3.0  # 3度未満の極小角度も直線の一部とみなす
-            
-            # 180度に近い角度（ほぼ直線）
-            if abs(angle_degrees - 180.0) <= straight_line_tolerance:
-                continue
-            
-            # 極小角度の場合も直線の延長とみなす（ユーザー報告の問題に対応）
-            if angle_degrees <= very_small_angle_threshold:
-                continue
-            
-            # 第二段階: 角度閾値による判定（直線でない点に対してのみ実行）
-            if angle_degrees < angle_threshold:
-                l1 = min(actual_radius, norm1 * 0.5)
-                l2 = min(actual_radius, norm2 * 0.5)
-                
-                T1 = lerp(p2, p1, l1 / norm1)
-                T2 = lerp(p2, p3, l2 / norm2)
-                
-                corner_modifications.append({
-                    'original_idx': original_idx,
-                    'replace_with': [
-                        (T1, 1),      # T1 (オンカーブ)
-                        (p2, 0),      # 制御点P2 (オフカーブ)
-                        (T2, 1)       # T2 (オンカーブ)
-                    ]
-                })
-        
-        # 新しい輪郭データを一括で構築
-        new_coords = []
-        new_flags = []
-        
-        i = 0
-        while i < n:
-            # この点が角丸処理対象かチェック
-            corner_mod = None
-            for mod in corner_modifications:
-                if mod['original_idx'] == i:
-                    corner_mod = mod
-                    break
-            
-            if corner_mod:
-                # 角丸処理: 元の点を置き換え
-                for coord, flag in corner_mod['replace_with']:
-                    new_coords.append(coord)
-                    new_flags.append(flag)
-            else:
-                # 通常の点: そのまま保持（オンカーブ・オフカーブ問わず）
-                new_coords.append(coords[i])
-                new_flags.append(flags[i])
-            
-            i += 1
-        
-        return {
-            'coords': new_coords,
-            'flags': new_flags
-        }
-
-    def _contours_to_skia_path(self, contours):
+    def _contours_to_skia_path(self, outline, cubic=False):
         """
-        fontToolsの輪郭データをskia.Pathオブジェクトに変換する。
+        GlyphOutlineをskia-pathopsのPathオブジェクトに変換する。
+        cubic=False（TrueType）ではオフカーブ点の連続を暗黙のオンカーブ点を挟んだ二次スプラインとして、
+        cubic=True（CFF）では2つ連続するオフカーブ点を三次ベジェの制御点として扱う。
         """
-        from pathops import Path
-        
-        path = Path()
-        
-        for contour in contours:
-            coords = contour['coords']
-            flags = contour['flags']
-            
-            if not coords:
+        path = pathops.Path()
+        pen = path.getPen()
+
+        for points, flags in outline.contours():
+            if not len(points):
                 continue
-                
-            # 最初の点に移動
-            path.moveTo(*coords[0])
-            
-            i = 1
-            while i < len(coords):
-                if flags[i] & 1:  # オンカーブ点
-                    path.lineTo(*coords[i])
-                    i += 1
-                else:  # オフカーブ点（制御点）
-                    if i + 1 < len(coords) and flags[i + 1] & 1:
-                        # 二次ベジェ曲線: 制御点 + 終点
-                        path.quadTo(*coords[i], *coords[i + 1])
-                        i += 2
-                    elif i + 2 < len(coords) and flags[i + 1] == 0 and flags[i + 2] & 1:
-                        # 三次ベジェ曲線: 制御点1 + 制御点2 + 終点
-                        path.cubicTo(*coords[i], *coords[i + 1], *coords[i + 2])
-                        i += 3
-                    else:
-                        # 単独の制御点の場合は直線として処理
-                        if i + 1 < len(coords):
-                            path.lineTo(*coords[i + 1])
-                            i += 2
-                        else:
-                            i += 1
-            
-            # 輪郭を閉じる（pathopsでは close() メソッドを使用）
-            path.close()
-        
+            coords = [tuple(point) for point in points.tolist()]
+            on_curve = np.flatnonzero(flags & FLAG_ON_CURVE)
+
+            if not len(on_curve):
+                # オンカーブ点のない（TrueTypeの）閉じた二次スプライン
+                pen.qCurveTo(*coords, None)
+                pen.closePath()
+                continue
+
+            # オンカーブ点から始まるように回転し、最後に始点へ戻る
+            first = int(on_curve[0])
+            coords = coords[first:] + coords[:first]
+            on = (flags[first:] & FLAG_ON_CURVE).tolist() + (flags[:first] & FLAG_ON_CURVE).tolist()
+            pen.moveTo(coords[0])
+            off_curve = []
+            last = len(coords) - 1
+            for i, (point, is_on) in enumerate(zip(coords[1:] + coords[:1], on[1:] + on[:1])):
+                if not is_on:
+                    off_curve.append(point)
+                    continue
+                if not off_curve:
+                    # 始点へ戻る直線はclosePathが補うので描かない
+                    if i < last:
+                        pen.lineTo(point)
+                elif cubic and len(off_curve) == 2:
+                    pen.curveTo(*off_curve, point)
+                else:
+                    pen.qCurveTo(*off_curve, point)
+                off_curve = []
+            pen.closePath()
+
         return path
 
-    def _skia_path_to_contours(self, skia_path):
+    def _skia_path_to_contours(self, skia_path, cubic=False):
         """
-        skia.PathオブジェクトをfontToolsの輪郭データに変換する。
+        skia-pathopsのPathオブジェクトをGlyphOutlineに変換する。
+        二次・三次ベジェの制御点はオフカーブ点として残す。
+        pathopsは連続する二次曲線を暗黙のオンカーブ点でつないだ1つのqCurveToにまとめるので、
+        cubic=True（CFF）では三次ベジェと区別できるよう1区間ずつの二次曲線に分解する。
+        また閉じた輪郭の最後に始点へ戻る線分を明示的に出力するので、重複する終点は取り除く。
         """
+        from fontTools.pens.recordingPen import RecordingPen
+
+        recording = RecordingPen()
+        skia_path.draw(recording)
+        return self._recorded_to_contours(recording.value, cubic=cubic)
+
+    @staticmethod
+    def _recorded_to_contours(commands, cubic=False):
+        """RecordingPenの描画コマンドをGlyphOutlineに変換する（_skia_path_to_contoursを参照）"""
+        from fontTools.pens.basePen import decomposeQuadraticSegment
+
+        pen = GlyphOutlinePen()
+        for operator, args in commands:
+            if operator == 'qCurveTo' and cubic and len(args) > 2:
+                for segment in decomposeQuadraticSegment(args):
+                    pen.qCurveTo(*segment)
+            else:
+                getattr(pen, operator)(*args)
+        outline = pen.outline
+
         contours = []
-        
-        # pathopsのPathからセグメント情報を取得
-        # 簡単な実装として、pathの描画コマンドを解析
-        try:
-            # skia-pathopsのPathオブジェクトから座標を抽出
-            # 実際の実装では、pathの内部構造にアクセスする必要がある
-            # ここでは基本的な変換のみ実装
-            
-            # pathの境界ボックスから基本的な矩形パスを生成（暫定実装）
-            bounds = skia_path.getBounds()
-            if bounds:
-                x_min, y_min, x_max, y_max = bounds
-                
-                # 矩形の4つの角の座標
-                coords = [
-                    (x_min, y_min),
-                    (x_max, y_min),
-                    (x_max, y_max),
-                    (x_min, y_max)
-                ]
-                flags = [1, 1, 1, 1]  # すべてオンカーブ点
-                
-                contours.append({
-                    'coords': coords,
-                    'flags': flags
-                })
-        except Exception as e:
-            print(f"警告: skia.Pathの変換中にエラーが発生しました: {e}")
-            # エラーの場合は空の輪郭を返す
-            contours = []
-        
-        return contours
+        for points, flags in outline.contours():
+            if len(points) > 1 and flags[-1] & FLAG_ON_CURVE and np.array_equal(points[0], points[-1]):
+                points, flags = points[:-1], flags[:-1]
+            contours.append((points, flags))
+        return GlyphOutline.from_contours(contours)
 
     def _estimate_straightness_threshold(self, coords):
         """
@@ -1204,7 +1884,7 @@ class RoundCornersEffect(BaseEffect):
                             setattr(private_dict, attr, getattr(original_private, attr))
                             
                 except Exception as copy_error:
-                    print(f"    警告: PrivateDict属性コピーエラー: {copy_error}")
+                    logger.warning("    PrivateDict属性コピーエラー: %s", copy_error)
                     # コピーに失敗した場合はデフォルト値を設定
                     private_dict.nominalWidthX = 0
                     private_dict.defaultWidthX = 1000
@@ -1217,7 +1897,7 @@ class RoundCornersEffect(BaseEffect):
             charstring.private = private_dict
             
         except Exception as e:
-            print(f"    警告: デフォルトPrivateDict作成エラー: {e}")
+            logger.warning("    デフォルトPrivateDict作成エラー: %s", e)
             # 最後の手段として、空のオブジェクトを作成
             try:
                 class SafePrivateDict:
@@ -1227,109 +1907,98 @@ class RoundCornersEffect(BaseEffect):
                 
                 charstring.private = SafePrivateDict()
             except Exception as fallback_error:
-                print(f"    エラー: フォールバックPrivateDict作成失敗: {fallback_error}")
+                logger.error("    フォールバックPrivateDict作成失敗: %s", fallback_error)
 
-    def _round_corners_improved_for_curves(self, contour, radius, angle_threshold=179.0):
+    def _round_corners_improved_for_curves(self, contour, radius, angle_threshold=179.0, geom=None):
         """
         曲線グリフ用の改良された角丸処理
         ベジェ曲線の制御点を考慮し、179度まで処理対象を拡張
+        contourにはGlyphOutline（全輪郭を一括処理）か、従来の輪郭辞書を渡せる。
+        geomには同じ輪郭の解析結果（corner_kernel.analyze_corners）を渡せる。
         """
-        import math
+        outline = self._as_outline(contour)
         
-        coords = contour['coords']
-        flags = contour['flags']
-        n = len(coords)
-        
-        if radius == 0 or n < 3:
+        if radius == 0 or outline.num_points < 3:
             return contour, 0
-        
-        print(f"    改良角丸処理: {n}点, 制御点{sum(1 for f in flags if not (f & 1))}個")
-        
-        new_coords = []
-        new_flags = []
-        corners_rounded = 0
-        
-        for i in range(n):
-            p0 = coords[i - 1]
-            p1 = coords[i]
-            p2 = coords[(i + 1) % n]
-            
-            # 現在の点が制御点かどうかをチェック
-            is_control_point = not (flags[i] & 1)
-            
-            if is_control_point:
-                # 制御点はそのまま保持（ベジェ曲線の形状を維持）
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-                continue
-            
-            # オンカーブ点での角度計算
-            v1 = (p0[0] - p1[0], p0[1] - p1[1])
-            v2 = (p2[0] - p1[0], p2[1] - p1[1])
-            norm1 = math.hypot(*v1)
-            norm2 = math.hypot(*v2)
-            
-            if norm1 == 0 or norm2 == 0:
-                new_coords.append(p1)
-                new_flags.append(flags[i])
+
+        rounded, corners_rounded, geom, actual_radius, ctrl_factor = corner_kernel.round_curves(
+            outline, radius, angle_threshold, geom=geom
+        )
+
+        # 輪郭ごとに各オンカーブ点の判定結果を出力（DEBUGレベルが有効な場合のみ）
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_curve_corners(outline, geom, angle_threshold, actual_radius, ctrl_factor)
+
+        return self._same_form(contour, rounded), corners_rounded
+
+    @staticmethod
+    def _log_curve_corners(outline, geom, angle_threshold, actual_radius, ctrl_factor):
+        """改良角丸処理の点ごとの判定結果をDEBUGログに出力する"""
+        for start, end in zip(outline.starts.tolist(), outline.ends.tolist()):
+            n = end - start + 1
+            if n < 3:
                 continue
-            
-            # 角度計算
-            dot = v1[0] * v2[0] + v1[1] * v2[1]
-            cos_angle = dot / (norm1 * norm2)
-            cos_angle = max(-1.0, min(1.0, cos_angle))
-            angle_deg = math.degrees(math.acos(cos_angle))
-            
-            print(f"      点{i}: 角度{angle_deg:.1f}度")
-            
-            # 拡張された角度閾値で判定（179度まで処理）
-            if angle_deg < angle_threshold:
-                # 角度に応じた動的半径調整
-                if angle_deg > 175:
-                    # 非常に滑らかな角度 - 軽微な角丸
-                    radius_factor = 0.1
-                    ctrl_factor = 0.2
-                elif angle_deg > 170:
-                    # 滑らかな角度 - 控えめな角丸
-                    radius_factor = 0.2
-                    ctrl_factor = 0.3
-                elif angle_deg > 150:
-                    # 中程度の角度 - 標準的な角丸
-                    radius_factor = 0.3
-                    ctrl_factor = 0.4
-                else:
-                    # 鋭角 - 強めの角丸
-                    radius_factor = 0.4
-                    ctrl_factor = 0.5
-                
-                # 動的半径計算
-                max_radius = min(norm1, norm2) / 3.0
-                actual_radius = min(radius * radius_factor, max_radius)
-                
-                if actual_radius > 0.5:  # 最小半径チェック
-                    l1 = min(actual_radius, norm1 * 0.3)
-                    l2 = min(actual_radius, norm2 * 0.3)
-                    
-                    T1 = (p1[0] + v1[0] * l1 / norm1, p1[1] + v1[1] * l1 / norm1)
-                    T2 = (p1[0] + v2[0] * l2 / norm2, p1[1] + v2[1] * l2 / norm2)
-                    
-                    # 滑らかな制御点を生成
-                    ctrl_x = p1[0] + (T1[0] - p1[0] + T2[0] - p1[0]) * ctrl_factor * 0.5
-                    ctrl_y = p1[1] + (T1[1] - p1[1] + T2[1] - p1[1]) * ctrl_factor * 0.5
-                    
-                    new_coords.extend([T1, (ctrl_x, ctrl_y), T2])
-                    new_flags.extend([1, 0, 1])  # オンカーブ, オフカーブ, オンカーブ
-                    corners_rounded += 1
-                    
-                    print(f"        角丸適用: 半径{actual_radius:.1f}, 制御点係数{ctrl_factor}")
-                else:
-                    # 半径が小さすぎる場合は元の点を保持
-                    new_coords.append(p1)
-                    new_flags.append(flags[i])
-            else:
-                # 角度が閾値以上の場合は元の点を保持
-                new_coords.append(p1)
-                new_flags.append(flags[i])
-        
-        print(f"    角丸処理完了: {corners_rounded}角を処理")
-        return {"coords": new_coords, "flags": new_flags}, corners_rounded
\ No newline at end of file
+            flags = outline.flags[start:end + 1]
+            logger.debug("    改良角丸処理: %d点, 制御点%d個", n, int(np.count_nonzero((flags & 1) == 0)))
+            contour_corners = 0
+            for i in range(start, end + 1):
+                if not (geom.flags[i] & 1) or not geom.valid[i]:
+                    continue
+                logger.debug("      点%d: 角度%.1f度", i - start, geom.angle[i])
+                if geom.angle[i] < angle_threshold and actual_radius[i] > 0.5:
+                    contour_corners += 1
+                    logger.debug("        角丸適用: 半径%.1f, 制御点係数%s", actual_radius[i], ctrl_factor[i])
+            logger.debug("    角丸処理完了: %d角を処理", contour_corners)
+
+
+# --- 並列処理用ワーカー ---
+# ProcessPoolExecutorから呼ばれるため、モジュールレベルの関数として定義する。
+
+_worker_state = {}
+
+
+def _init_round_worker(font_data, params):
+    """ワーカープロセスの初期化。フォントとエフェクトを1度だけ復元する。"""
+    import io
+    from fontTools.ttLib import TTFont
+
+    _worker_state['font'] = TTFont(io.BytesIO(font_data))
+    _worker_state['effect'] = RoundCornersEffect(params)
+
+
+def _round_glyph_chunk(kind, glyph_names, settings):
+    """
+    チャンク内のグリフを角丸処理し、処理済みデータのみを返す。
+    TrueType: (GlyphOutline, 角数) / CFF: (CharStringバイトコード, 角数)
+    truetype_sweep / cff_sweep では、半径ごとの結果のリストを返す。
+    チャンク内で数えたカウンタ（品質スキップ・エラー）と段階ごとの時間、処理に失敗したグリフ名、
+    グリフごとに増えたカウンタも合わせて返す。
+    """
+    font = _worker_state['font']
+    effect = _worker_state['effect']
+    effect.counters = Counter()
+    effect.timings = StageTimer()
+    effect.failed_glyphs = set()
+    effect.glyph_counters = {}
+
+    # *_sweep はsettingsの半径の並びごとの結果のリストを返す（RoundCornersEffect.apply_sweep）
+    sweep = kind.endswith('_sweep')
+    if kind.startswith('truetype'):
+        glyf_table = font['glyf']
+        round_glyph = effect._round_truetype_glyph_radii if sweep else effect._round_truetype_glyph
+        results = list(effect._round_each(
+            glyph_names, lambda glyph_name: round_glyph(glyph_name, effect._expand_glyph(glyf_table, glyph_name), *settings)))
+    else:
+        charStrings = font['CFF '].cff.topDictIndex[0].CharStrings
+        round_glyph = effect._round_cff_glyph_radii if sweep else effect._round_cff_glyph
+
+        def round_and_compile(glyph_name):
+            # コンパイルのエラーもグリフごとのカウンタに含める
+            result = round_glyph(glyph_name, charStrings[glyph_name], *settings)
+            if sweep:
+                return [effect._compile_cff_glyph(item) for item in result]
+            return effect._compile_cff_glyph(result)
+
+        results = list(effect._round_each(glyph_names, round_and_compile))
+
+    return results, effect.counters, effect.timings, effect.failed_glyphs, effect.glyph_counters
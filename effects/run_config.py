@@ -0,0 +1,233 @@
+"""
+run_config.py
+
+1回の実行（FontProcessor.run）の設定を、検証・既定値の補完を済ませた変更不可のオブジェクトにまとめる。
+FontProcessorの生成時に1度だけ作り、各エフェクトには apply(font, run_config=...) として渡す。
+エフェクトはこれを参照するだけで、設定ファイルを自分で読みに行かない。
+"""
+
+import os
+from dataclasses import dataclass, field
+
+from .font_subset import SubsetConfig
+from .glyph_selection import GlyphSelection
+
+
+class FrozenParams(dict):
+    """
+    書き換えできない辞書（エフェクトのparamsやvariationに使う）。
+    dictのサブクラスなので、従来どおり get や ** 展開でそのまま使え、ワーカープロセスにも渡せる。
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("設定は変更できません（FrozenParams）")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return FrozenParams, (dict(self),)
+
+    def __hash__(self):
+        return hash(tuple(sorted((key, _hashable(value)) for key, value in self.items())))
+
+    def __repr__(self):
+        return f"FrozenParams({dict.__repr__(self)})"
+
+
+def _hashable(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def freeze(value):
+    """辞書・リストを再帰的にFrozenParams・タプルに変換する"""
+    if isinstance(value, dict):
+        return FrozenParams({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class QualityPreset:
+    """
+    品質レベルごとの閾値。
+    corner_angle: 高品質時にTrueTypeの角とみなす角度（度）
+    angle_threshold: それ以外の品質レベルでTrueTypeの角とみなす角度（度）
+    min_reduction_ratio: 角丸処理後の頂点数がこの割合を下回ったら処理をスキップする
+    cff_radius_scale: CFFグリフに使う半径の倍率（T2CharStringの座標変化を考慮）
+    """
+    name: str
+    corner_angle: float
+    angle_threshold: float
+    min_reduction_ratio: float
+    cff_radius_scale: float
+
+
+QUALITY_PRESETS = {
+    'high': QualityPreset('high', 175.0, 160, 0.7, 0.8),   # 30%以上減少で警告、より積極的な半径
+    'medium': QualityPreset('medium', 170.0, 140, 0.5, 0.6),  # 50%以上減少で警告、バランスの取れた半径
+    'low': QualityPreset('low', 160.0, 110, 0.5, 0.5),  # 50%以上減少で警告、控えめな半径
+}
+
+DEFAULT_QUALITY_LEVEL = 'medium'
+
+PIPELINE_MODES = ("effect", "glyph")
+
+
+def quality_preset(quality_level):
+    """品質レベルの閾値。不明なレベルはmediumと同じ閾値を使う"""
+    return QUALITY_PRESETS.get(str(quality_level).lower(), QUALITY_PRESETS[DEFAULT_QUALITY_LEVEL])
+
+
+def resolve_workers(workers):
+    """workers設定を正の整数に解決する。0または"auto"はCPUコア数を意味する。"""
+    if workers is None:
+        return 1
+    if str(workers).lower() == "auto" or int(workers) <= 0:
+        return os.cpu_count() or 1
+    return int(workers)
+
+
+def _sweep_radii(radii, index):
+    """パラメータスイープの半径のリストを検証する（数値で、空でなく、重複しないこと）"""
+    if not radii or not all(isinstance(radius, (int, float)) and not isinstance(radius, bool) for radius in radii):
+        raise ValueError(f"effects[{index}] のradiusのリストは数値で指定してください: {radii}")
+    if len(set(radii)) != len(radii):
+        raise ValueError(f"effects[{index}] のradiusのリストに同じ値があります: {radii}")
+    return tuple(radii)
+
+
+@dataclass(frozen=True)
+class EffectConfig:
+    """設定ファイルのeffectsの1項目（名前とパラメータ）"""
+    name: str
+    params: FrozenParams = field(default_factory=FrozenParams)
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    """
+    検証済みの実行設定。
+    workersは正の整数、quality_levelは QUALITY_PRESETS のいずれかに解決済みで、qualityにその閾値が入る。
+    エフェクトのradiusに数値のリストを指定した場合（パラメータスイープ）は、sweepにその半径の並び、
+    sweep_effectにそのエフェクトの位置が入る。
+    glyphsには処理するグリフの選択条件（未指定なら None で全グリフ）が入る。
+    subsetにはエフェクトの前に行うサブセット化の設定（未指定なら None でサブセット化しない）が入る。
+    """
+    input_font: str
+    output_font: str
+    effects: tuple = ()
+    variation: FrozenParams = None
+    workers: int = 1
+    glyph_cache: object = None
+    instance_cache: object = None
+    corner_catalog: object = None
+    pipeline: str = "effect"
+    quality_level: str = DEFAULT_QUALITY_LEVEL
+    quality: QualityPreset = QUALITY_PRESETS[DEFAULT_QUALITY_LEVEL]
+    sweep: tuple = ()
+    sweep_effect: int = None
+    glyphs: GlyphSelection = None
+    subset: SubsetConfig = None
+
+    @classmethod
+    def from_dict(cls, config, workers=None, glyph_cache=None, pipeline=None, instance_cache=None, corner_catalog=None,
+                  require_paths=True):
+        """
+        設定ファイルの内容（辞書）から作る。引数（CLIの指定）は設定ファイルより優先する。
+        必須項目がない・値が不正な場合は ValueError。
+        require_pathsがFalseなら input_font / output_font は省略でき（バイト列を処理する場合）、省略時は None になる。
+        """
+        if not isinstance(config, dict):
+            raise ValueError("設定は辞書（YAMLのマッピング）で指定してください")
+        for key in ("input_font", "output_font"):
+            if require_paths and not config.get(key):
+                raise ValueError(f"設定に {key} がありません")
+
+        effects = []
+        sweep, sweep_effect = (), None
+        for index, effect in enumerate(config.get("effects") or ()):
+            if not isinstance(effect, dict) or not effect.get("name"):
+                raise ValueError(f"effects[{index}] にエフェクト名（name）がありません")
+            params = effect.get("params") or {}
+            if not isinstance(params, dict):
+                raise ValueError(f"effects[{index}]（{effect['name']}）のparamsは辞書で指定してください")
+            if isinstance(params.get("radius"), (list, tuple)):
+                if sweep:
+                    raise ValueError("radiusのリスト（パラメータスイープ）は1つのエフェクトにだけ指定できます")
+                sweep, sweep_effect = _sweep_radii(params["radius"], index), index
+            effects.append(EffectConfig(str(effect["name"]), freeze(params)))
+
+        variation = config.get("variation")
+        if variation is not None:
+            if not isinstance(variation, dict):
+                raise ValueError("variationは軸名と値の辞書で指定してください")
+            try:
+                variation = FrozenParams({axis: float(value) for axis, value in variation.items()})
+            except (TypeError, ValueError):
+                raise ValueError(f"variationの値は数値で指定してください: {variation}") from None
+
+        try:
+            # 並列ワーカー数: 引数（CLIの--workers）> 設定ファイルのworkers > 1
+            workers = resolve_workers(workers if workers is not None else config.get("workers", 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"workersは整数またはautoで指定してください: {workers}") from None
+
+        # エフェクトの適用方式: 引数（CLIの--pipeline）> 設定ファイルのpipeline > effect
+        pipeline = str(pipeline or config.get("pipeline") or "effect").lower()
+        if pipeline not in PIPELINE_MODES:
+            raise ValueError(f"不明なpipelineです: {pipeline}（{', '.join(PIPELINE_MODES)}のいずれかを指定してください）")
+
+        quality_level = str(config.get("quality_level") or DEFAULT_QUALITY_LEVEL).lower()
+        if quality_level not in QUALITY_PRESETS:
+            raise ValueError(f"不明なquality_levelです: {quality_level}（{', '.join(QUALITY_PRESETS)}のいずれかを指定してください）")
+
+        return cls(
+            input_font=str(config["input_font"]) if config.get("input_font") else None,
+            output_font=str(config["output_font"]) if config.get("output_font") else None,
+            effects=tuple(effects),
+            variation=variation or None,
+            workers=workers,
+            # グリフキャッシュ: 引数（CLIの--glyph-cache）> 設定ファイルのglyph_cache > 無効
+            glyph_cache=freeze(glyph_cache if glyph_cache is not None else config.get("glyph_cache")),
+            # インスタンスキャッシュ: 引数（CLIの--instance-cache）> 設定ファイルのinstance_cache > 無効
+            instance_cache=freeze(instance_cache if instance_cache is not None else config.get("instance_cache")),
+            # コーナーカタログ: 引数（CLIの--corner-catalog）> 設定ファイルのcorner_catalog > 無効
+            corner_catalog=freeze(corner_catalog if corner_catalog is not None else config.get("corner_catalog")),
+            pipeline=pipeline,
+            quality_level=quality_level,
+            quality=QUALITY_PRESETS[quality_level],
+            sweep=sweep,
+            sweep_effect=sweep_effect,
+            glyphs=GlyphSelection.from_config(config.get("glyphs")),
+            subset=SubsetConfig.from_config(config.get("subset")),
+        )
+
+    def sweep_output(self, radius):
+        """
+        パラメータスイープの半径ごとの出力先。
+        output_fontに {radius} があれば半径で置き換え、なければ拡張子の前に _r<半径> を付ける。
+        """
+        label = f"{radius:g}"
+        if "{radius}" in self.output_font:
+            return self.output_font.replace("{radius}", label)
+        root, ext = os.path.splitext(self.output_font)
+        return f"{root}_r{label}{ext}"
+
+    def effect_kwargs(self, effect):
+        """
+        エフェクトのapply / begin_outlinesに渡す引数。
+        run_configのほか、従来どおりworkers・glyph_cache・corner_catalogとparamsを展開して渡す
+        （workers/glyph_cache/corner_catalogは実行設定を優先し、実行設定にないものだけエフェクト個別のparamsを使う）。
+        """
+        kwargs = {"workers": self.workers, "glyph_cache": self.glyph_cache, "corner_catalog": self.corner_catalog}
+        kwargs.update((key, value) for key, value in effect.params.items() if kwargs.get(key) is None)
+        kwargs["run_config"] = self
+        return kwargs
@@ -0,0 +1,207 @@
+"""
+variable_masters.py
+
+Variable Font（TrueTypeのglyf+gvar、CFF2）のグリフを、各マスター（バリエーション領域の頂点）の輪郭に分解し、
+加工したマスターの輪郭から差分（gvarのデルタ・CFF2のblend）を作り直す。
+
+マスターの位置は、グリフの各領域（gvarのタプル・CFF2のVarRegion）のピークの座標とする。
+差分は元の領域をそのまま使い、「各マスターの位置で、加工後のマスターの輪郭が再現される」ように
+領域の寄与（サポートスカラー）の連立方程式を解いて求める。
+そのため、マスターの間の補間の仕方（中間領域を含む）は元のフォントと変わらない。
+加工はすべてのマスターで点の構成を揃えて行う必要がある（corner_kernel.round_*_masters）。
+"""
+
+import numpy as np
+
+from fontTools.ttLib.tables.TupleVariation import TupleVariation
+from fontTools.varLib.iup import iup_delta
+from fontTools.varLib.models import supportScalar
+
+from . import cff_passthrough
+from .glyph_outline import GlyphOutline, GlyphOutlinePen
+
+# gvarのデルタに含まれるファントムポイント（送り幅・サイドベアリング）の数
+PHANTOM_POINTS = 4
+
+
+def is_variable(font):
+    """グリフの輪郭にバリエーションを持つフォント（glyf+gvar、またはCFF2）か"""
+    return 'gvar' in font or 'CFF2' in font
+
+
+def _peak(support):
+    """領域のピークの位置（0でない軸だけ）"""
+    return {axis: peak for axis, (_, peak, _) in support.items() if peak != 0}
+
+
+def master_locations(supports):
+    """領域のピークから重複を除いたマスターの位置の並び（先頭はデフォルトの {}）"""
+    locations = [{}]
+    seen = {()}
+    for support in supports:
+        peak = _peak(support)
+        key = tuple(sorted(peak.items()))
+        if key not in seen:
+            seen.add(key)
+            locations.append(peak)
+    return locations
+
+
+def scalar_matrix(locations, supports):
+    """各マスターの位置（デフォルトを除く）における各領域のサポートスカラーの行列"""
+    return np.array([[supportScalar(location, support) for support in supports]
+                     for location in locations[1:]], dtype=np.float64).reshape(len(locations) - 1, len(supports))
+
+
+def solve_deltas(matrix, default, masters):
+    """
+    マスターの値から各領域の差分を求める。
+    default: (N,) デフォルトの値、masters: (M, N) デフォルト以外のマスターの値
+    (R, N) の差分を返す（同じピークを持つ領域がある場合は最小ノルム解）。
+    """
+    deltas, *_ = np.linalg.lstsq(matrix, masters - default, rcond=None)
+    return deltas
+
+
+def _round(values):
+    """OpenTypeの丸め（0.5は正の方向へ）"""
+    return np.floor(values + 0.5)
+
+
+# --- TrueType（glyf + gvar） ---
+
+def glyf_masters(glyph, variations):
+    """
+    単純グリフの各マスターの輪郭を求める。
+    glyph: 展開済みのグリフ、variations: gvarのTupleVariationのリスト
+    (マスターの位置, [GlyphOutline...], (マスター数, 点数+4, 2) のファントムポイント込みの座標) を返す。
+    """
+    outline = GlyphOutline.from_glyf(glyph)
+    n = outline.num_points
+    # ファントムポイントはIUPで他の点から補間されないので、座標の値は差分の計算に影響しない
+    coords = np.concatenate([outline.points, np.zeros((PHANTOM_POINTS, 2))])
+    # IUPの輪郭の終点にはファントムポイントを含めない（末尾の4点として扱われる）
+    ends = [int(end) for end in outline.ends]
+    base = [tuple(point) for point in coords.tolist()]
+
+    supports = [variation.axes for variation in variations]
+    locations = master_locations(supports)
+    full_deltas = [np.array(iup_delta(variation.coordinates, base, ends), dtype=np.float64)
+                   for variation in variations]
+    values = []
+    for location in locations:
+        value = coords.copy()
+        for support, deltas in zip(supports, full_deltas):
+            scalar = supportScalar(location, support)
+            if scalar:
+                value += scalar * deltas
+        values.append(value)
+    values = _round(np.array(values))
+    outlines = [GlyphOutline(value[:n], outline.flags.copy(), outline.ends.copy()) for value in values]
+    return locations, outlines, values[:, n:]
+
+
+def glyf_variations(variations, locations, outlines, phantoms):
+    """
+    加工後のマスターの輪郭（点の構成が同じ）から、元の領域のままgvarのTupleVariationを作り直す。
+    (デフォルトの輪郭（整数座標）, 新しいTupleVariationのリスト) を返す。
+    """
+    points = [np.concatenate([_round(outline.points), phantom]) for outline, phantom in zip(outlines, phantoms)]
+    default = points[0]
+    masters = np.array(points[1:]).reshape(len(points) - 1, -1)
+    supports = [variation.axes for variation in variations]
+    deltas = _round(solve_deltas(scalar_matrix(locations, supports), default.reshape(-1), masters))
+
+    n = outlines[0].num_points
+    ends = [int(end) for end in outlines[0].ends]
+    orig = [tuple(point) for point in default.tolist()]
+    new_variations = []
+    for support, delta in zip(supports, deltas):
+        variation = TupleVariation(dict(support), [(int(x), int(y)) for x, y in delta.reshape(-1, 2).tolist()])
+        # 補間で求まる点のデルタは省略する（IUP）
+        variation.optimize(orig, ends)
+        new_variations.append(variation)
+    default_outline = GlyphOutline(default[:n], outlines[0].flags, outlines[0].ends)
+    return default_outline, new_variations
+
+
+# --- CFF2 ---
+
+def _vsindex(charString):
+    """CharStringが使うVarData（vsindex）。プログラム内の指定がなければPrivate DICTの既定値"""
+    program = charString.program
+    if 'vsindex' in program:
+        return program[program.index('vsindex') - 1]
+    return getattr(charString.private, 'vsindex', 0) or 0
+
+
+def cff2_regions(font, charString):
+    """
+    CFF2グリフのvsindexと、その領域（{軸名: (開始, ピーク, 終了)} のリスト、VarDataの順）。
+    charStringはデコード済みであること。
+    """
+    var_store = font['CFF2'].cff.topDictIndex[0].VarStore.otVarStore
+    axis_tags = [axis.axisTag for axis in font['fvar'].axes]
+    vsindex = _vsindex(charString)
+    supports = []
+    for region_index in var_store.VarData[vsindex].VarRegionIndex:
+        region = var_store.VarRegionList.Region[region_index]
+        supports.append({
+            tag: (axis.StartCoord, axis.PeakCoord, axis.EndCoord)
+            for tag, axis in zip(axis_tags, region.VarRegionAxis)
+            if axis.PeakCoord != 0
+        })
+    return vsindex, supports
+
+
+def cff2_masters(font, charString, locations):
+    """CFF2グリフを各マスターの位置で描画した輪郭のリスト（三次ベジェの制御点はオフカーブ点）"""
+    from fontTools.varLib.varStore import VarStoreInstancer
+
+    var_store = font['CFF2'].cff.topDictIndex[0].VarStore.otVarStore
+    axes = font['fvar'].axes
+    outlines = []
+    for location in locations:
+        # 描画でプログラムに展開されても元のバイトコードが残るよう、コピーを描画する
+        source = cff_passthrough.decodable_copy(charString)
+        blender = VarStoreInstancer(var_store, axes, location).interpolateFromDeltas if location else None
+        pen = GlyphOutlinePen()
+        source.draw(pen, blender)
+        outlines.append(pen.outline)
+    return outlines
+
+
+class _RegionModel:
+    """
+    CFF2CharStringMergePen.getCharStringに渡すモデル。
+    マスターの値の並びを、元の領域の順の差分（blendの引数）に変換する。
+    """
+
+    def __init__(self, locations, supports):
+        self.matrix = scalar_matrix(locations, supports)
+
+    def getDeltas(self, master_values, round=round):
+        values = np.asarray(master_values, dtype=np.float64)
+        deltas = solve_deltas(self.matrix, values[:1], values[1:, None])[:, 0]
+        return [round(values[0])] + [round(delta) for delta in deltas.tolist()]
+
+
+def cff2_charstring(charString, glyph_name, vsindex, locations, supports, outlines):
+    """
+    加工後のマスターの輪郭（点の構成が同じ）から、元の領域のままblendを使ったCFF2のCharStringを作る。
+    ヒントは引き継がない（CFFの角丸処理と同じ）。
+    """
+    from fontTools.misc.psCharStrings import T2CharString
+    from fontTools.varLib.cff import CFF2CharStringMergePen
+
+    pen = CFF2CharStringMergePen([], glyph_name, len(outlines), 0)
+    outlines[0].draw(pen, cubic=True)
+    for index, outline in enumerate(outlines[1:], 1):
+        pen.restart(index)
+        outline.draw(pen, cubic=True)
+    new_charstring = pen.getCharString(private=charString.private, globalSubrs=charString.globalSubrs,
+                                       var_model=_RegionModel(locations, supports), optimize=True)
+    if 'vsindex' in charString.program:
+        new_charstring = T2CharString(program=[vsindex, 'vsindex'] + new_charstring.program,
+                                      private=charString.private, globalSubrs=charString.globalSubrs)
+    return new_charstring
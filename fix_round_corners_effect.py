@@ -5,11 +5,16 @@ T2CharStringの座標変化を前提とした最適化実装
 """
 
 import os
+import sys
 import math
 from fontTools.ttLib import TTFont
 from fontTools.pens.recordingPen import RecordingPen
 from fontTools.pens.t2CharStringPen import T2CharStringPen
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from effects.glyph_outline import GlyphOutline, GlyphOutlinePen
+
 def apply_optimized_cff_corner_rounding(font, radius=10, quality_level='medium'):
     """
     CFFフォント用の最適化された角丸処理
@@ -57,7 +62,7 @@ def apply_optimized_cff_corner_rounding(font, radius=10, quality_level='medium')
             # 輪郭データを抽出
             contours = extract_contours_from_recording_pen(pen.value)
             
-            if not contours:
+            if not contours.num_contours:
                 continue
             
             # 最適化された角丸処理を適用
@@ -84,54 +89,24 @@ def apply_optimized_cff_corner_rounding(font, radius=10, quality_level='medium')
     return font
 
 def extract_contours_from_recording_pen(pen_value):
-    """RecordingPenの値から輪郭データを抽出"""
-    contours = []
-    current_coords = []
-    current_flags = []
-    
+    """RecordingPenの値から輪郭データ（GlyphOutline）を抽出"""
+    pen = GlyphOutlinePen()
     for cmd, pts in pen_value:
-        if cmd == "moveTo":
-            if current_coords:
-                contours.append({'coords': current_coords, 'flags': current_flags})
-            current_coords = [pts[0]]
-            current_flags = [1]
-        elif cmd == "lineTo":
-            current_coords.append(pts[0])
-            current_flags.append(1)
-        elif cmd == "qCurveTo":
-            for p in pts[:-1]:
-                current_coords.append(p)
-                current_flags.append(0)
-            current_coords.append(pts[-1])
-            current_flags.append(1)
-        elif cmd == "curveTo":
-            for p in pts[:-1]:
-                current_coords.append(p)
-                current_flags.append(0)
-            current_coords.append(pts[-1])
-            current_flags.append(1)
-        elif cmd == "closePath":
-            pass
-        elif cmd == "endPath":
-            pass
-    
-    if current_coords:
-        contours.append({'coords': current_coords, 'flags': current_flags})
-    
-    return contours
+        getattr(pen, cmd)(*pts)
+    return pen.outline
 
 def apply_cff_optimized_rounding(contours, radius, angle_threshold, min_radius, radius_factor):
-    """CFF最適化角丸処理"""
+    """CFF最適化角丸処理（GlyphOutlineを受け取り、新しいGlyphOutlineを返す）"""
     
     rounded_contours = []
     
-    for contour in contours:
-        coords = contour['coords']
-        flags = contour['flags']
+    for points, contour_flags in contours.contours():
+        coords = [tuple(p) for p in points.tolist()]
+        flags = contour_flags.tolist()
         n = len(coords)
         
         if n < 3:
-            rounded_contours.append(contour)
+            rounded_contours.append((coords, flags))
             continue
         
         new_coords = []
@@ -183,9 +158,9 @@ def apply_cff_optimized_rounding(contours, radius, angle_threshold, min_radius,
                 new_coords.append(p1)
                 new_flags.append(flags[i])
         
-        rounded_contours.append({"coords": new_coords, "flags": new_flags})
+        rounded_contours.append((new_coords, new_flags))
     
-    return rounded_contours
+    return GlyphOutline.from_contours(rounded_contours)
 
 def create_cff_compatible_corner(p0, p1, p2, radius, norm1, norm2, angle_deg):
     """CFF互換の角丸コーナーを作成"""
@@ -245,8 +220,8 @@ def create_cff_compatible_corner(p0, p1, p2, radius, norm1, norm2, angle_deg):
 
 def has_significant_changes(original_contours, rounded_contours):
     """有意な変化があるかチェック"""
-    original_points = sum(len(c['coords']) for c in original_contours)
-    rounded_points = sum(len(c['coords']) for c in rounded_contours)
+    original_points = original_contours.num_points
+    rounded_points = rounded_contours.num_points
     
     # 点数が20%以上変化した場合は有意な変化とみなす
     return abs(rounded_points - original_points) / original_points > 0.2
@@ -293,12 +268,11 @@ def create_optimized_charstring(contours, original_charstring, topDict):
         return None
 
 def contours_to_recording_pen(contours):
-    """輪郭データをRecordingPenの形式に変換"""
+    """輪郭データ（GlyphOutline）をRecordingPenの形式に変換"""
     pen_value = []
     
-    for contour in contours:
-        coords = contour['coords']
-        flags = contour['flags']
+    for points, flags in contours.contours():
+        coords = [tuple(p) for p in points.tolist()]
         
         if not coords:
             continue
@@ -307,13 +281,10 @@ def contours_to_recording_pen(contours):
         
         i = 1
         while i < len(coords):
-            if i >= len(flags):
-                break
-                
             if flags[i] & 1:
                 pen_value.append(("lineTo", (coords[i],)))
             else:
-                if i + 1 < len(coords) and i + 1 < len(flags) and (flags[i + 1] & 1):
+                if i + 1 < len(coords) and (flags[i + 1] & 1):
                     pen_value.append(("qCurveTo", (coords[i], coords[i + 1])))
                     i += 1
                 else:
@@ -0,0 +1,114 @@
+"""
+font_fixtures.py
+
+テスト用の小さなフォントをfontTools.fontBuilderで生成するヘルパー。
+グリフ名ごとの輪郭を渡すだけで、TrueType（glyf）とCFFのどちらのフォントも同じ手順で作れる。
+
+輪郭は直線だけの点の並び、または (座標, フラグ) の組（フラグ1がオンカーブ点、0がオフカーブ点）で表す。
+TrueTypeではオフカーブ点の連続を二次スプライン、CFFでは2つ続きのオフカーブ点を三次ベジェの制御点として描く。
+"""
+
+import io
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+
+def draw_contours(pen, contours, cff=False):
+    """輪郭の並びをペンに描画する"""
+    for contour in contours:
+        points, flags = contour if isinstance(contour, tuple) else (contour, [1] * len(contour))
+        points, flags = list(points), list(flags)
+        if 1 not in flags:
+            # オンカーブ点のない二次スプラインの輪郭
+            pen.qCurveTo(*points, None)
+            pen.closePath()
+            continue
+        # 最初のオンカーブ点から始め、始点に戻るまでたどる
+        first = flags.index(1)
+        points = points[first:] + points[:first + 1]
+        flags = flags[first:] + flags[:first + 1]
+        pen.moveTo(points[0])
+        off = []
+        last = len(points) - 1
+        for i in range(1, len(points)):
+            if not flags[i]:
+                off.append(points[i])
+            elif not off:
+                # 始点に戻る直線はclosePathで閉じる
+                if i < last:
+                    pen.lineTo(points[i])
+            elif cff and len(off) == 2:
+                pen.curveTo(*off, points[i])
+                off = []
+            else:
+                pen.qCurveTo(*off, points[i])
+                off = []
+        pen.closePath()
+
+
+def draw_glyph(contours, cff=False, advance=700):
+    """輪郭の並びからglyfのグリフ（cff=TrueならT2CharString）を作る"""
+    pen = T2CharStringPen(advance, None) if cff else TTGlyphPen(None)
+    draw_contours(pen, contours, cff)
+    return pen.getCharString() if cff else pen.glyph()
+
+
+def font_builder(glyphs, cff=False, cmap=None, family="Test Font", advance=700, metrics=None):
+    """
+    {グリフ名: 輪郭の並び} から各テーブルを設定したFontBuilderを返す（保存はしない）。
+    輪郭の代わりにglyfのグリフやT2CharStringを渡すと、そのまま使う。.notdefを省略すると空のグリフを先頭に加える。
+    metrics: {グリフ名: (幅, 左サイドベアリング)}。省略したグリフは (advance, 0)
+    """
+    glyph_order = [".notdef"] + [name for name in glyphs if name != ".notdef"]
+    fb = FontBuilder(1000, isTTF=not cff)
+    fb.setupGlyphOrder(glyph_order)
+    fb.setupCharacterMap(cmap or {})
+
+    charstrings = {}
+    for name in glyph_order:
+        glyph = glyphs.get(name, [])
+        charstrings[name] = draw_glyph(glyph, cff, advance) if isinstance(glyph, (list, tuple)) else glyph
+
+    if cff:
+        fb.setupCFF(family.replace(" ", ""), {"FullName": family}, charstrings, {})
+    else:
+        fb.setupGlyf(charstrings)
+    metrics = metrics or {}
+    fb.setupHorizontalMetrics({name: metrics.get(name, (advance, 0)) for name in glyph_order})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({"familyName": family, "styleName": "Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    return fb
+
+
+def build_font(glyphs, cff=False, **kwargs):
+    """font_builderで作ったフォントを保存し、バイト列で返す"""
+    buf = io.BytesIO()
+    font_builder(glyphs, cff, **kwargs).save(buf)
+    return buf.getvalue()
+
+
+def _test_glyph_contours(index):
+    """角を持つ簡単な図形（矩形・L字・三角形）の輪郭"""
+    offset = (index % 7) * 10
+    shape = index % 3
+    if shape == 0:
+        return [[(100 + offset, 0), (100 + offset, 700), (500, 700), (500, 0)]]
+    if shape == 1:
+        return [[(100, 0), (100, 700), (250 + offset, 700), (250 + offset, 150), (550, 150), (550, 0)]]
+    return [
+        [(50, 0), (300 + offset, 650), (550, 0)],
+        ([(200, 100), (400, 100), (300, 300 + offset)], [1, 1, 0]),
+    ]
+
+
+def build_test_font(cff=False, glyph_count=24):
+    """角を持つグリフ g000, g001, ... をU+4E00から順に割り当てたテスト用フォントをTTFontとして返す"""
+    names = [f"g{i:03d}" for i in range(glyph_count)]
+    data = build_font({name: _test_glyph_contours(i + 1) for i, name in enumerate(names)}, cff,
+                      cmap={0x4E00 + i: name for i, name in enumerate(names)}, advance=600)
+    return TTFont(io.BytesIO(data))
@@ -7,12 +7,28 @@ font_processor.py
 
 import yaml
 from fontTools.ttLib import TTFont
-from fontTools.varLib import instancer
-import importlib
-import os
+from collections import Counter
+import io
+import json
+import logging
+import mmap
+
+from effects.metrics import StageTimer
+from effects.registry import registry as default_registry
+from effects.run_config import PIPELINE_MODES, EffectConfig, FrozenParams, RunConfig, resolve_workers
+
+# 起動時間を短くするため、fontTools.varLib（Variable Fontのインスタンス化）と
+# effects.glyph_pipeline（numpy）は必要になったときにインポートする
+
+logger = logging.getLogger(__name__)
 
 class FontProcessor:
-    def __init__(self, config_path=None, config_dict=None):
+    # エフェクトの適用方式: effect はエフェクトごとにフォント全体を処理し、
+    # glyph は apply_outline に対応した連続するエフェクトをグリフ単位の1パスにまとめる
+    PIPELINE_MODES = PIPELINE_MODES
+
+    def __init__(self, config_path=None, config_dict=None, workers=None, glyph_cache=None, pipeline=None,
+                 registry=None, instance_cache=None, corner_catalog=None, require_paths=True):
         if config_dict is not None:
             self.config = config_dict
         elif config_path is not None:
@@ -20,68 +36,434 @@ class FontProcessor:
                 self.config = yaml.safe_load(f)
         else:
             raise ValueError("Either config_path or config_dict must be provided")
-        self.input_font = self.config["input_font"]
-        self.output_font = self.config["output_font"]
-        self.effects = self.config.get("effects", [])
+        # 設定の検証と既定値の解決はここで1度だけ行い、各エフェクトにはこの実行設定を渡す
+        # （引数で指定したworkers / glyph_cache / pipeline / instance_cache / corner_catalog は設定ファイルより優先）。
+        # require_pathsがFalseなら input_font / output_font は省略できる（process_bytesだけを使う場合）
+        self.run_config = RunConfig.from_dict(self.config, workers=workers, glyph_cache=glyph_cache, pipeline=pipeline,
+                                              instance_cache=instance_cache, corner_catalog=corner_catalog,
+                                              require_paths=require_paths)
+        self.input_font = self.run_config.input_font
+        self.output_font = self.run_config.output_font
+        self.effects = self.run_config.effects
+        self.workers = self.run_config.workers
+        self.glyph_cache = self.run_config.glyph_cache
+        self.pipeline = self.run_config.pipeline
+        self.instance_cache = self.run_config.instance_cache
+        self.corner_catalog = self.run_config.corner_catalog
+        # エフェクト名からクラスを引くレジストリ（effects/とエントリポイント）
+        self.registry = registry if registry is not None else default_registry
+        # 全エフェクトの集計（角丸化した角の数・品質チェックでスキップしたグリフ数・エラー数など）
+        self.counters = Counter()
+        # 段階ごとの所要時間（load_font / instance_cache / instancing / subset / save_font）とエフェクトごとの内訳
+        self.timings = StageTimer()
+        self.effect_timings = []
+        # パラメータスイープの半径ごとの出力先と集計
+        self.sweep_results = []
+        # glyphs設定で選んだグリフ名の集合（未指定なら None で全グリフ）
+        self.selected_glyphs = None
+
+    @staticmethod
+    def _resolve_workers(workers):
+        """workers設定を正の整数に解決する。0または"auto"はCPUコア数を意味する。"""
+        return resolve_workers(workers)
 
     @classmethod
     def from_config_dict(cls, config_dict):
         return cls(config_dict=config_dict)
 
-    def load_font(self):
-        font = TTFont(self.input_font)
+    def load_font(self, source=None):
+        """
+        入力フォントを読み込み、variation指定があれば静的インスタンス化する。
+        sourceにバイト列（bytes / bytearray / memoryview / mmap）を渡すと、input_fontの代わりにそれを読み込む。
+        mmapはコピーせずに開き、テーブルは使うときにだけ読む（大きなフォントでも全体をメモリに読み込まない）。
+        """
+        with self.timings.stage("load_font"):
+            if source is None:
+                font = TTFont(self.input_font)
+            elif isinstance(source, mmap.mmap):
+                font = TTFont(source, lazy=True)
+            else:
+                font = TTFont(io.BytesIO(source))
         # Variable Font判定
         if "fvar" in font:
-            variation = self.config.get("variation", None)
+            variation = self.run_config.variation
             if variation:
-                # variation指定あり→静的インスタンス生成
-                var_dict = {k: float(v) for k, v in variation.items()}
-                font = instancer.instantiateVariableFont(font, var_dict)
-                print(f"Variable Font: variation {var_dict} で静的インスタンス化")
+                # variation指定あり→静的インスタンス生成（キャッシュにあれば読み込むだけ）
+                var_dict = dict(variation)
+                if font.lazy:
+                    # instancerはフォントを複製するため、mmapから開いたフォントはメモリに読み込み直す
+                    with self.timings.stage("load_font"):
+                        font = TTFont(io.BytesIO(source))
+                font = self._instantiate(font, var_dict, source)
             else:
-                print("Variable Font: variation指定なし（デフォルトインスタンスで処理）")
+                logger.info("Variable Font: variation指定なし（Variable Fontのまま、対応エフェクトは全マスターを処理）")
         else:
-            print("Static Fontとして処理")
+            logger.info("Static Fontとして処理")
+        return font
+
+    def load_font_data(self):
+        """
+        入力フォントを、エフェクトを適用する前の状態（variation指定があれば静的インスタンス化済み）のバイト列として読み込む。
+        同じ入力フォント・同じvariationの複数のジョブで、読み込みとインスタンス化を1度だけにするために使う（batch_processor.py）。
+        """
+        with self.timings.stage("load_font"):
+            with open(self.input_font, "rb") as f:
+                data = f.read()
+        if not self.run_config.variation:
+            return data
+        font = TTFont(io.BytesIO(data))
+        if "fvar" not in font:
+            return data
+        return self._font_bytes(self._instantiate(font, dict(self.run_config.variation)))
+
+    def _instantiate(self, font, var_dict, source=None):
+        """
+        Variable Fontを静的インスタンスにする。
+        instance_cacheが有効なら (入力ファイル（sourceを指定した場合はそのバイト列）のハッシュ, 正規化した軸座標) でキャッシュを引き、
+        あればinstancerを呼ばずに保存済みのインスタンスを読み込む。
+        なければインスタンス化して保存し、保存したバイト列から読み直す（初回と2回目以降で同じ出力にするため）。
+        """
+        cache = key = None
+        if self.instance_cache:
+            from effects.instance_cache import InstanceCache, data_digest, file_digest, normalize_location
+
+            with self.timings.stage("instance_cache"):
+                location = normalize_location(font, var_dict)
+                if location is not None:
+                    cache = InstanceCache.from_config(self.instance_cache)
+                    digest = file_digest(self.input_font) if source is None else data_digest(source)
+                    key = cache.make_key(digest, location)
+                    path = cache.get(key)
+                    if path is not None:
+                        self.counters["instance_cache_hits"] += 1
+                        logger.info("Variable Font: variation %s の静的インスタンスをキャッシュから読み込み（%s）", var_dict, path)
+                        return TTFont(path)
+                    self.counters["instance_cache_misses"] += 1
+
+        with self.timings.stage("instancing"):
+            from fontTools.varLib import instancer
+            font = instancer.instantiateVariableFont(font, var_dict)
+        logger.info("Variable Font: variation %s で静的インスタンス化", var_dict)
+        if cache is not None:
+            with self.timings.stage("instance_cache"):
+                font = TTFont(io.BytesIO(cache.put(key, font)))
         return font
 
-    def save_font(self, font):
-        font.save(self.output_font)
+    def save_font(self, font, path=None):
+        """フォントをpath（省略時はoutput_font）に保存する。pathにはファイルオブジェクトも渡せる"""
+        with self.timings.stage("save_font"):
+            font.save(path or self.output_font)
+
+    def _load_effect(self, name, params):
+        """レジストリからエフェクトクラスを引き、paramsを渡してインスタンスを作る"""
+        effect_class = self.registry.load(name)
+        effect_instance = effect_class(params=params)
+        logger.debug("エフェクトインスタンス作成完了（params: %s）", getattr(effect_instance, 'params', None))
+        return effect_instance
 
-    def apply_effects(self, font):
-        for effect in self.effects:
-            name = effect["name"]
-            params = effect.get("params", {})
-            print(f"DEBUG: エフェクト '{name}' の設定パラメータ: {params}")
-            module_path = f"effects.{name}_effect"
-            class_name = "".join([part.capitalize() for part in name.split("_")]) + "Effect"
+    def apply_effects(self, font, effects=None):
+        """
+        設定順にエフェクト（effectsを指定した場合はその並び）を適用する。
+        pipelineがglyphの場合、apply_outlineに対応した連続するエフェクトは
+        GlyphPipelineでグリフごとに1回のデコード・エンコードにまとめて適用する
+        （Variable Fontのまま処理する場合を除く）。
+        """
+        fused = []
+        for effect in self.effects if effects is None else effects:
+            name = effect.name
+            params = effect.params
+            logger.debug("エフェクト '%s' の設定パラメータ: %s", name, params)
+            started = StageTimer.start()
+            effect_instance = None
             try:
-                module = importlib.import_module(module_path)
-                effect_class = getattr(module, class_name)
-                print(f"DEBUG: エフェクトクラス {class_name} をロードしました")
-                # 修正: パラメータを渡してインスタンス作成
-                effect_instance = effect_class(params=params)
-                print(f"DEBUG: エフェクトインスタンス作成完了（パラメータ付き）")
-                print(f"DEBUG: インスタンスにparams属性があるか: {hasattr(effect_instance, 'params')}")
-                if hasattr(effect_instance, 'params'):
-                    print(f"DEBUG: 現在のparams値: {effect_instance.params}")
-                font = effect_instance.apply(font, **params)
-                print(f"Applied effect: {name}")
+                effect_instance = self._load_effect(name, params)
+                if self.pipeline == "glyph" and effect_instance.supports_outline() and not self._has_variations(font):
+                    fused.append((effect, effect_instance))
+                    continue
+                font = self._apply_fused(font, fused)
+                fused = []
+                started = StageTimer.start()
+                font = effect_instance.apply(font, **self._effect_kwargs(effect))
+                self.counters.update(getattr(effect_instance, 'counters', {}))
+                logger.info("Applied effect: %s", name)
             except Exception as e:
-                print(f"Error applying effect '{name}': {e}")
-                import traceback
-                traceback.print_exc()
+                self.counters['errors'] += 1
+                logger.exception("Error applying effect '%s': %s", name, e)
+            stages = getattr(effect_instance, 'timings', None)
+            self.effect_timings.append({
+                "name": name,
+                "seconds": round(StageTimer.start() - started, 6),
+                "stages": stages.as_dict() if stages else {},
+            })
+        return self._apply_fused(font, fused)
+
+    def _effect_kwargs(self, effect):
+        """エフェクトのapplyに渡す引数（glyphs設定があれば、選んだグリフ名の集合を glyphs として加える）"""
+        kwargs = self.run_config.effect_kwargs(effect)
+        if self.selected_glyphs is not None:
+            kwargs["glyphs"] = self.selected_glyphs
+        return kwargs
+
+    def _subset(self, font):
+        """subset設定があれば、エフェクトを適用する前にフォントをその場でサブセット化する"""
+        if self.run_config.subset is None:
+            return
+        glyph_count = len(font.getGlyphOrder())
+        with self.timings.stage("subset"):
+            self.counters["glyphs_subset"] = self.run_config.subset.apply(font)
+        logger.info("サブセット化: %d / %dグリフを残しました", self.counters["glyphs_subset"], glyph_count)
+
+    def _select_glyphs(self, font):
+        """glyphs設定があれば、処理するグリフ名の集合をフォントのcmapから1度だけ解決する"""
+        self.selected_glyphs = None
+        if self.run_config.glyphs is None:
+            return
+        self.selected_glyphs = self.run_config.glyphs.resolve(font)
+        self.counters["glyphs_selected"] = len(self.selected_glyphs)
+        logger.info("グリフの選択: %d / %dグリフを処理します", len(self.selected_glyphs), len(font.getGlyphOrder()))
+
+    @staticmethod
+    def _has_variations(font):
+        """
+        グリフの輪郭にバリエーション（gvar / CFF2）を持つVariable Fontか。
+        グリフ単位のパイプラインはデフォルトの輪郭しか扱えないため、その場合は各エフェクトのapplyで
+        （round_cornersは全マスターを）処理する。
+        """
+        return "fvar" in font and ("gvar" in font or "CFF2" in font)
+
+    def _apply_fused(self, font, fused):
+        """(EffectConfig, エフェクト) の並びをGlyphPipelineでまとめて適用する"""
+        if not fused:
+            return font
+        from effects.glyph_pipeline import GlyphPipeline
+
+        name = "+".join(effect.name for effect, _ in fused)
+        started = StageTimer.start()
+        pipeline = GlyphPipeline(
+            [(effect_instance, self._effect_kwargs(effect)) for effect, effect_instance in fused],
+            workers=self.workers,
+            glyphs=self.selected_glyphs,
+        )
+        try:
+            font = pipeline.apply(font)
+            self.counters.update(pipeline.counters)
+            for _, effect_instance in fused:
+                self.counters.update(effect_instance.counters)
+            logger.info("Applied effects (glyph pipeline): %s", name)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.exception("Error applying effects '%s': %s", name, e)
+        # パイプライン自体のdecode/encodeと、各エフェクトの内部段階を合わせた内訳
+        stages = StageTimer()
+        stages.merge(pipeline.timings)
+        for _, effect_instance in fused:
+            stages.merge(effect_instance.timings)
+        self.effect_timings.append({
+            "name": name,
+            "seconds": round(StageTimer.start() - started, 6),
+            "stages": stages.as_dict(),
+        })
         return font
 
-    def run(self):
-        font = self.load_font()
+    def _run_sweep(self, font):
+        """
+        パラメータスイープ（エフェクトのradiusに数値のリストを指定）を実行する。
+        スイープするエフェクトより前のエフェクトは1度だけ適用し、スイープするエフェクトは
+        apply_sweepがあれば角の解析を共有して全半径をまとめて処理する（なければ半径ごとにapplyする）。
+        後のエフェクトは半径ごとのフォントに適用し、それぞれ run_config.sweep_output(半径) に保存する。
+        """
+        index = self.run_config.sweep_effect
+        effect = self.effects[index]
+        radii = self.run_config.sweep
+        font = self.apply_effects(font, self.effects[:index])
+
+        # スイープするエフェクトには、radiusを除いたparamsを渡す
+        base = EffectConfig(effect.name, FrozenParams({key: value for key, value in effect.params.items() if key != "radius"}))
+        started = StageTimer.start()
+        effect_instance = None
+        variants = sweep_counters = None
+        try:
+            effect_instance = self._load_effect(effect.name, base.params)
+            if hasattr(effect_instance, "apply_sweep"):
+                variants = effect_instance.apply_sweep(font, radii, **self._effect_kwargs(base))
+                sweep_counters = effect_instance.sweep_counters
+                self.counters.update(effect_instance.counters)
+                logger.info("Applied effect (sweep): %s", effect.name)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.exception("Error applying effect '%s': %s", effect.name, e)
+            variants = [(radius, font) for radius in radii]
+            sweep_counters = [Counter() for _ in radii]
+        if variants is not None:
+            stages = getattr(effect_instance, 'timings', None)
+            self.effect_timings.append({
+                "name": effect.name,
+                "seconds": round(StageTimer.start() - started, 6),
+                "stages": stages.as_dict() if stages else {},
+            })
+        else:
+            # apply_sweepのないエフェクトは、半径ごとにコピーしたフォントにapplyする
+            data = self._font_bytes(font)
+            variants, sweep_counters = [], []
+            for radius in radii:
+                before = Counter(self.counters)
+                variant = TTFont(io.BytesIO(data))
+                variant = self.apply_effects(
+                    variant, [EffectConfig(effect.name, FrozenParams(dict(base.params, radius=radius)))])
+                variants.append((radius, variant))
+                sweep_counters.append(self.counters - before)
+
+        for (radius, variant), counters in zip(variants, sweep_counters):
+            before = Counter(self.counters)
+            variant = self.apply_effects(variant, self.effects[index + 1:])
+            path = self.run_config.sweep_output(radius)
+            self.save_font(variant, path)
+            logger.info("Output saved to: %s (radius %s)", path, radius)
+            self.sweep_results.append({
+                "radius": radius,
+                "output_font": path,
+                "counters": dict(counters + (self.counters - before)),
+            })
+
+    @staticmethod
+    def _font_bytes(font):
+        """フォントをバイト列に書き出す（head.modifiedとバウンディングボックスは再計算しない）"""
+        buf = io.BytesIO()
+        recalc_timestamp, recalc_bboxes = font.recalcTimestamp, font.recalcBBoxes
+        font.recalcTimestamp = font.recalcBBoxes = False
+        try:
+            font.save(buf)
+        finally:
+            font.recalcTimestamp, font.recalcBBoxes = recalc_timestamp, recalc_bboxes
+        return buf.getvalue()
+
+    def run(self, metrics_json=None, font_data=None):
+        """
+        フォントを読み込み、エフェクトを適用して保存する。
+        font_dataにload_font_dataのバイト列を渡すと、入力フォントを読み込む代わりにそれを使う。
+        処理結果のレポートを辞書で返す:
+          counters: 全エフェクトの集計（corners_rounded, glyphs_skipped_quality, union_skipped, errors など）
+          timings:  段階ごとの所要時間（秒）。effectsにはエフェクトごとの合計と内部段階
+                    （decode / auto_join / overlap_screen / union / rounding / encode など）の内訳が入る
+          sweep:    パラメータスイープの場合のみ。半径ごとの radius / output_font / counters のリスト
+        metrics_jsonを指定すると、同じレポートをJSONファイルに書き出す。
+        """
+        self._reset()
+        started = StageTimer.start()
+        if font_data is None:
+            font = self.load_font()
+        else:
+            with self.timings.stage("load_font"):
+                font = TTFont(io.BytesIO(font_data))
+        self._subset(font)
+        self._select_glyphs(font)
+        if self.run_config.sweep:
+            self._run_sweep(font)
+        else:
+            font = self.apply_effects(font)
+            self.save_font(font)
+            logger.info("Output saved to: %s", self.output_font)
+
+        report = self.report(total_seconds=StageTimer.start() - started)
+        logger.info("集計: %s", report["counters"])
+        if metrics_json:
+            with open(metrics_json, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            logger.info("Metrics saved to: %s", metrics_json)
+        return report
+
+    def process_bytes(self, data):
+        """
+        フォントのバイト列（bytes / bytearray / memoryview / mmap）にエフェクトを適用し、結果のバイト列を返す。
+        入力・出力ともメモリ上（BytesIO）で扱い、input_font / output_font は使わず一時ファイルも作らない
+        （グリフキャッシュ・インスタンスキャッシュ・コーナーカタログを有効にした場合を除き、ファイルにはアクセスしない）。
+        集計と所要時間はこの後 report() で受け取れる。出力が複数になるパラメータスイープには使えない。
+        """
+        if self.run_config.sweep:
+            raise ValueError("process_bytesはパラメータスイープ（radiusのリスト）には使えません")
+        self._reset()
+        started = StageTimer.start()
+        font = self.load_font(data)
+        self._subset(font)
+        self._select_glyphs(font)
         font = self.apply_effects(font)
-        self.save_font(font)
-        print(f"Output saved to: {self.output_font}")
+        buf = io.BytesIO()
+        self.save_font(font, buf)
+        logger.info("集計: %s", self.report(total_seconds=StageTimer.start() - started)["counters"])
+        return buf.getvalue()
+
+    def _reset(self):
+        """直前の実行の集計・所要時間を消す"""
+        self.counters = Counter()
+        self.timings = StageTimer()
+        self.effect_timings = []
+        self.sweep_results = []
+
+    def report(self, total_seconds=None):
+        """直近のrun()の集計と段階ごとの所要時間をまとめた辞書"""
+        stages = self.timings.seconds
+        timings = {
+            "load_font": round(stages.get("load_font", 0.0), 6),
+            "instancing": round(stages.get("instancing", 0.0), 6),
+            "instance_cache": round(stages.get("instance_cache", 0.0), 6),
+            "subset": round(stages.get("subset", 0.0), 6),
+            "effects": self.effect_timings,
+            "save_font": round(stages.get("save_font", 0.0), 6),
+        }
+        if total_seconds is not None:
+            timings["total"] = round(total_seconds, 6)
+        report = {
+            "input_font": self.input_font,
+            "output_font": self.output_font,
+            "counters": {"corners_rounded": 0, "glyphs_skipped_quality": 0, "union_skipped": 0, "errors": 0,
+                         **self.counters},
+            "timings": timings,
+        }
+        if self.sweep_results:
+            report["sweep"] = self.sweep_results
+        return report
+
+
+def process_bytes(data, config, **options):
+    """
+    設定（config.yamlと同じ内容の辞書。input_font / output_font は不要）に従ってフォントのバイト列を処理し、
+    結果のバイト列を返す。optionsはFontProcessorの引数（workers / glyph_cache / pipeline など）。
+    """
+    return FontProcessor(config_dict=config, require_paths=False, **options).process_bytes(data)
+
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 2:
-        print("Usage: python font_processor.py config.yaml")
-        exit(1)
-    processor = FontProcessor(sys.argv[1])
-    processor.run()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="フォントにエフェクトを適用する")
+    parser.add_argument("config", nargs="?", help="設定ファイル（config.yaml）のパス")
+    parser.add_argument("--list-effects", action="store_true",
+                        help="利用できるエフェクトの一覧を表示して終了する（実装はインポートしない）")
+    parser.add_argument("--workers", default=None,
+                        help="グリフ処理の並列ワーカー数（0またはautoでCPUコア数、config.yamlのworkersより優先）")
+    parser.add_argument("--glyph-cache", nargs="?", const=True, default=None, metavar="PATH",
+                        help="グリフ単位の処理結果キャッシュを使う（PATH省略時は~/.cache/fonteffecter/glyphs.sqlite）")
+    parser.add_argument("--instance-cache", nargs="?", const=True, default=None, metavar="DIR",
+                        help="Variable Fontの静的インスタンスをキャッシュする（DIR省略時は~/.cache/fonteffecter/instances）")
+    parser.add_argument("--corner-catalog", nargs="?", const=True, default=None, metavar="PATH",
+                        help="角の解析結果のカタログを使う（PATH省略時は入力フォントの隣の<入力フォント>.corners.npz）")
+    parser.add_argument("--pipeline", default=None, choices=FontProcessor.PIPELINE_MODES,
+                        help="エフェクトの適用方式（glyphで対応エフェクトをグリフ単位の1パスにまとめる、config.yamlのpipelineより優先）")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="ログの出力レベル（DEBUGで点ごとの詳細も出力）")
+    parser.add_argument("--metrics-json", default=None, metavar="PATH",
+                        help="集計と段階ごとの所要時間をJSONファイルに書き出す")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+    if args.list_effects:
+        for spec in default_registry.specs():
+            outline = "グリフ単位対応" if spec.supports_outline else "フォント全体"
+            print(f"{spec.name}\t{spec.origin}\t{outline}\t{spec.description}")
+        raise SystemExit(0)
+    if args.config is None:
+        parser.error("設定ファイル（config）を指定してください")
+    processor = FontProcessor(args.config, workers=args.workers, glyph_cache=args.glyph_cache,
+                              pipeline=args.pipeline, instance_cache=args.instance_cache,
+                              corner_catalog=args.corner_catalog)
+    counters = processor.run(metrics_json=args.metrics_json)["counters"]
+    print(f"角丸化した角: {counters['corners_rounded']}個, 品質チェックでスキップ: {counters['glyphs_skipped_quality']}グリフ, "
+          f"重なりがなくUnionを省略: {counters['union_skipped']}グリフ, エラー: {counters['errors']}件")
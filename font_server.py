@@ -0,0 +1,372 @@
+"""
+font_server.py
+
+フォントエフェクトを常駐プロセスで提供するローカルサーバー（Webフォントのプレビュー用）。
+リクエストごとにフォントの読み込み・インスタンス化・角丸処理・保存をやり直すと大きなフォントでは数秒かかるため、
+次の3つをサイズ上限付きのLRUキャッシュとしてメモリに保持し、同じ・似たリクエストをミリ秒で返す。
+
+- fonts:     入力フォント（variation指定があれば静的インスタンス化済み）のバイト列。キーはパス・更新時刻・サイズ・variation
+- glyphs:    グリフ単位の処理結果（RoundCornersEffectのグリフキャッシュ。半径やテキストが変わっても同じグリフは再計算しない）
+- responses: 返したフォントのバイト列。キーは入力フォントと設定・グリフの組
+
+HTTP（既定は127.0.0.1:8765）またはUnixソケットで待ち受ける。
+  POST /process  JSONで {"font": <サーバー上のパス>, "radius": 40, "text": "..."} などを受け取り、処理したフォントを返す
+                 （text / glyphs を指定すると、そのグリフだけのサブセットを処理して返す）
+  GET  /stats    キャッシュのヒット数・件数・サイズ
+  GET  /health   {"status": "ok"}
+処理はFontProcessor.process_bytesで行い、フォントの処理は同時に1つずつ行う（キャッシュの共有のため）。
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from effects.font_subset import subset_options
+from effects.glyph_cache import GlyphCache
+from effects.run_config import RunConfig
+from font_processor import FontProcessor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# リクエストで指定できる実行設定の項目（config.yamlと同じ意味）
+CONFIG_KEYS = ("effects", "quality_level", "pipeline")
+
+# エフェクトのparamsでも指定できるが、サーバーが決める実行設定（プロセスプールの起動やファイルの作成につながる）。
+# リクエストのparamsからは取り除く
+SERVER_PARAMS = ("workers", "glyph_cache", "corner_catalog")
+
+
+class LRUCache:
+    """
+    件数と合計サイズ（バイト）の上限を持つメモリ上のLRUキャッシュ（値はbytes）。
+    hits / misses / evictions のカウンタを持つ。複数のスレッドから使える。
+    """
+
+    def __init__(self, max_entries=None, max_size_mb=None):
+        self.max_entries = max_entries
+        self.max_bytes = int(float(max_size_mb) * 1024 * 1024) if max_size_mb else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """キャッシュされた値を返す。なければ None"""
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """値を保存し、上限を超えていれば最後の使用が古いものから削除する（上限より大きい値は保存しない）"""
+        value = bytes(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._total_size -= len(old)
+            if self.max_bytes is not None and len(value) > self.max_bytes:
+                return
+            self._items[key] = value
+            self._total_size += len(value)
+            while ((self.max_entries is not None and len(self._items) > self.max_entries)
+                   or (self.max_bytes is not None and self._total_size > self.max_bytes)):
+                _, evicted = self._items.popitem(last=False)
+                self._total_size -= len(evicted)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size_bytes(self):
+        return self._total_size
+
+    def stats(self):
+        """ヒット/ミスなどのカウンタ"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "size_bytes": self._total_size,
+        }
+
+
+class _GlyphCacheView:
+    """
+    1回のエフェクトの適用で使うグリフキャッシュ（GlyphCacheと同じインターフェース）。
+    内容はサーバーのLRUCacheに置くのでclose()しても消えず、ヒット数などはこの適用の分だけを数える。
+    """
+
+    make_key = staticmethod(GlyphCache.make_key)
+
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key):
+        value = self.store.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.store.put(key, value)
+        self.stores += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": 0,
+                "entries": len(self.store), "size_bytes": self.store.size_bytes}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FontEffectService:
+    """
+    キャッシュを持ち、リクエスト（辞書）を処理してフォントのバイト列を返す本体。
+    HTTP / Unixソケットの受け付けとは分けてあり、そのまま関数として呼ぶこともできる。
+    """
+
+    def __init__(self, max_fonts=8, font_cache_mb=1024, glyph_cache_mb=256, response_cache_mb=256):
+        self.fonts = LRUCache(max_fonts, font_cache_mb)
+        self.glyphs = LRUCache(None, glyph_cache_mb)
+        self.responses = LRUCache(None, response_cache_mb)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def process(self, request):
+        """
+        リクエストを処理し、(フォントのバイト列, 情報の辞書) を返す。
+        情報には cache（"hit" / "miss"）、counters（エフェクトの集計。キャッシュから返した場合は空）、seconds が入る。
+        リクエストの内容が不正なら ValueError、フォントがなければ FileNotFoundError。
+        """
+        started = time.perf_counter()
+        font_path, variation, config, text, glyphs = self._parse(request)
+        stat = os.stat(font_path)
+        source_key = json.dumps([os.path.abspath(font_path), stat.st_mtime_ns, stat.st_size, variation],
+                                sort_keys=True)
+        key = json.dumps([source_key, config, text, glyphs], sort_keys=True, default=str)
+        with self._lock:
+            self.requests += 1
+            output = self.responses.get(key)
+            if output is not None:
+                return output, {"cache": "hit", "counters": {}, "seconds": round(time.perf_counter() - started, 6)}
+            try:
+                data = self._source(source_key, font_path, variation)
+                if text or glyphs:
+                    data = self._subset(data, text, glyphs)
+                processor = FontProcessor(config_dict=config, require_paths=False, workers=1,
+                                          glyph_cache=_GlyphCacheView(self.glyphs))
+                output = processor.process_bytes(data)
+            except Exception:
+                self.errors += 1
+                raise
+            counters = processor.report()["counters"]
+            # エフェクトの適用に失敗した結果は、次のリクエストでやり直せるようにキャッシュしない
+            if not counters["errors"]:
+                self.responses.put(key, output)
+        return output, {"cache": "miss", "counters": counters, "seconds": round(time.perf_counter() - started, 6)}
+
+    @staticmethod
+    def _parse(request):
+        """リクエストを (フォントのパス, variation, 実行設定, テキスト, グリフ名) に分ける"""
+        if not isinstance(request, dict):
+            raise ValueError("リクエストはJSONオブジェクトで指定してください")
+        font_path = request.get("font")
+        if not font_path:
+            raise ValueError("リクエストに font（サーバー上のフォントのパス）がありません")
+        config = {key: request[key] for key in CONFIG_KEYS if key in request}
+        if isinstance(config.get("effects"), list):
+            config["effects"] = [FontEffectService._strip_server_params(effect) for effect in config["effects"]]
+        if "radius" in request:
+            # 短縮形: radius（とparams）だけならround_cornersを1つ適用する
+            params = dict(request.get("params") or {}, radius=request["radius"])
+            effect = FontEffectService._strip_server_params({"name": "round_corners", "params": params})
+            config["effects"] = list(config.get("effects") or []) + [effect]
+        if not config.get("effects"):
+            raise ValueError("リクエストに effects または radius がありません")
+        variation = request.get("variation") or None
+        if variation is not None:
+            # 検証と数値への変換は設定ファイルのvariationと同じにする
+            variation = dict(RunConfig.from_dict({"variation": variation}, require_paths=False).variation)
+        # テキストとグリフ名は順序・重複によらず同じキャッシュのキーになるように揃える
+        text = "".join(sorted(set(str(request.get("text") or ""))))
+        glyphs = sorted(set(request.get("glyphs") or ()))
+        return str(font_path), variation, config, text, glyphs
+
+    @staticmethod
+    def _strip_server_params(effect):
+        """エフェクトの設定のparamsから、サーバーが決める実行設定（SERVER_PARAMS）を取り除く"""
+        if not isinstance(effect, dict) or not isinstance(effect.get("params"), dict):
+            return effect
+        ignored = [key for key in SERVER_PARAMS if key in effect["params"]]
+        if not ignored:
+            return effect
+        logger.warning("リクエストのparamsの %s は無視します", ", ".join(ignored))
+        params = {key: value for key, value in effect["params"].items() if key not in SERVER_PARAMS}
+        return dict(effect, params=params)
+
+    def _source(self, source_key, font_path, variation):
+        """入力フォント（静的インスタンス化済み）のバイト列。キャッシュになければ読み込む"""
+        data = self.fonts.get(source_key)
+        if data is None:
+            config = {"input_font": font_path, "variation": variation}
+            data = FontProcessor(config_dict=config, require_paths=False).load_font_data()
+            self.fonts.put(source_key, data)
+        return data
+
+    @staticmethod
+    def _subset(data, text, glyphs):
+        """textの文字とglyphsのグリフだけを残したサブセットのバイト列（レイアウト機能・グリフ名は残す）"""
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+
+        font = TTFont(io.BytesIO(data))
+        subsetter = subset.Subsetter(subset_options())
+        subsetter.populate(glyphs=glyphs, text=text)
+        subsetter.subset(font)
+        buf = io.BytesIO()
+        font.save(buf)
+        return buf.getvalue()
+
+    def stats(self):
+        """リクエスト数と各キャッシュのカウンタ"""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "fonts": self.fonts.stats(),
+            "glyphs": self.glyphs.stats(),
+            "responses": self.responses.stats(),
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTPのリクエストをFontEffectServiceに渡す"""
+
+    server_version = "FontEffecter"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(200, self.server.service.stats())
+        else:
+            self._send_json(404, {"error": f"不明なパスです: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/process":
+            self._send_json(404, {"error": f"不明なパスです: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"null")
+            output, info = self.server.service.process(request)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception("リクエストの処理に失敗しました: %s", e)
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "font/otf" if output[:4] == b"OTTO" else "font/ttf")
+        self.send_header("Content-Length", str(len(output)))
+        self.send_header("X-Cache", info["cache"])
+        self.send_header("X-Counters", json.dumps(info["counters"]))
+        self.send_header("X-Process-Seconds", str(info["seconds"]))
+        self.end_headers()
+        self.wfile.write(output)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unixソケットでは接続元のアドレスがない
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+    """
+    serviceを提供するサーバーを作る（serve_forever()で待ち受ける）。
+    unix_socketを指定するとそのパスのUnixソケット、なければhost:portのHTTPで待ち受ける（port=0なら空いているポート）。
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = _UnixHTTPServer(unix_socket, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="フォントエフェクトを提供するローカルサーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="HTTPで待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="HTTPで待ち受けるポート")
+    parser.add_argument("--unix-socket", default=None, metavar="PATH", help="HTTPの代わりにUnixソケットで待ち受ける")
+    parser.add_argument("--max-fonts", type=int, default=8, help="メモリに保持する入力フォントの数")
+    parser.add_argument("--font-cache-mb", type=float, default=1024, help="入力フォントのキャッシュの上限（MB）")
+    parser.add_argument("--glyph-cache-mb", type=float, default=256, help="グリフ単位の処理結果のキャッシュの上限（MB）")
+    parser.add_argument("--response-cache-mb", type=float, default=256, help="返したフォントのキャッシュの上限（MB）")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="ログの出力レベル")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+
+    service = FontEffectService(args.max_fonts, args.font_cache_mb, args.glyph_cache_mb, args.response_cache_mb)
+    server = make_server(service, args.host, args.port, args.unix_socket)
+    logger.info("待ち受けを開始しました: %s", args.unix_socket or "http://%s:%d" % server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
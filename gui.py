@@ -172,8 +172,13 @@ class FontConfigGUI:
             with open(CONFIG_PATH, "r", encoding="utf-8") as f:
                 cfg = yaml.safe_load(f)
             processor = FontProcessor.from_config_dict(cfg)
-            processor.run()
-            messagebox.showinfo("完了", f"処理が完了しました。\n出力ファイル: {self.output_entry.get()}")
+            counters = processor.run()["counters"]
+            messagebox.showinfo(
+                "完了",
+                f"処理が完了しました。\n出力ファイル: {self.output_entry.get()}\n"
+                f"角丸化した角: {counters['corners_rounded']}個 / 品質チェックでスキップ: {counters['glyphs_skipped_quality']}グリフ / "
+                f"エラー: {counters['errors']}件",
+            )
         except Exception as e:
             messagebox.showerror("エラー", f"処理中にエラーが発生しました:\n{e}")
 
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+輪郭の自動連結（_auto_join_contours）の検証テスト
+
+確認内容:
+- 4種類の連結方向（終点-始点 / 始点-終点 / 始点-始点 / 終点-終点）が従来どおり連結されること
+- 端点ハッシュ索引による実装が、全輪郭を走査する従来方式と同じ結果になること
+- tol未満の距離だけが一致とみなされること
+"""
+
+import math
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from effects.glyph_outline import GlyphOutline
+from effects.round_corners_effect import RoundCornersEffect
+
+
+def _reference_join(outline, tol=1e-3):
+    """従来の全走査による連結（比較用）"""
+    def points_close(p1, p2):
+        return math.hypot(p1[0] - p2[0], p1[1] - p2[1]) < tol
+
+    contours = list(outline.contours())
+    used = [False] * len(contours)
+    joined = []
+    for i, (points, flags) in enumerate(contours):
+        if used[i]:
+            continue
+        changed = True
+        used[i] = True
+        while changed:
+            changed = False
+            for j, (points2, flags2) in enumerate(contours):
+                if used[j] or i == j:
+                    continue
+                if points_close(points[-1], points2[0]):
+                    points = np.concatenate((points, points2[1:]))
+                    flags = np.concatenate((flags, flags2[1:]))
+                elif points_close(points[0], points2[-1]):
+                    points = np.concatenate((points2[:-1], points))
+                    flags = np.concatenate((flags2[:-1], flags))
+                elif points_close(points[0], points2[0]):
+                    points = np.concatenate((points2[::-1][:-1], points))
+                    flags = np.concatenate((flags2[::-1][:-1], flags))
+                elif points_close(points[-1], points2[-1]):
+                    points = np.concatenate((points, points2[::-1][1:]))
+                    flags = np.concatenate((flags, flags2[::-1][1:]))
+                else:
+                    continue
+                used[j] = True
+                changed = True
+                break
+        joined.append((points, flags))
+    return GlyphOutline.from_contours((p.tolist(), f.tolist()) for p, f in joined)
+
+
+def _random_outline(rng, count):
+    """端点を共有する開いた輪郭をランダムに生成する"""
+    anchors = [(rng.randint(0, 5) * 100.0, rng.randint(0, 5) * 100.0) for _ in range(6)]
+    contours = []
+    for _ in range(count):
+        length = rng.randint(1, 4)
+        coords = [(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(length)]
+        # 端点の一部をアンカー（±tol/4 のずれ付き）に揃える
+        for k in (0, -1):
+            if rng.random() < 0.7:
+                ax, ay = rng.choice(anchors)
+                coords[k] = (ax + rng.uniform(-2.5e-4, 2.5e-4), ay + rng.uniform(-2.5e-4, 2.5e-4))
+        flags = [1] + [rng.choice((0, 1)) for _ in range(length - 2)] + [1] * (length > 1)
+        contours.append((coords, flags))
+    return GlyphOutline.from_contours(contours)
+
+
+def test_four_orientations():
+    """4種類の連結方向でそれぞれ1本の輪郭になること"""
+    effect = RoundCornersEffect()
+    base = [(0, 0), (10, 0)]
+    cases = {
+        '終点-始点': [(10, 0), (10, 10)],
+        '始点-終点': [(0, 10), (0, 0)],
+        '始点-始点': [(0, 0), (0, 10)],
+        '終点-終点': [(10, 10), (10, 0)],
+    }
+    expected = {
+        '終点-始点': [[0, 0], [10, 0], [10, 10]],
+        '始点-終点': [[0, 10], [0, 0], [10, 0]],
+        '始点-始点': [[0, 10], [0, 0], [10, 0]],
+        '終点-終点': [[0, 0], [10, 0], [10, 10]],
+    }
+    for name, other in cases.items():
+        outline = GlyphOutline.from_contours([(base, [1, 1]), (other, [1, 1])])
+        joined = effect._auto_join_contours(outline)
+        assert joined.num_contours == 1, name
+        assert joined.points.tolist() == expected[name], name
+
+
+def test_matches_reference_scan():
+    """ランダムな輪郭群で従来方式と完全に一致すること"""
+    effect = RoundCornersEffect()
+    rng = random.Random(1234)
+    for _ in range(200):
+        outline = _random_outline(rng, rng.randint(2, 12))
+        assert effect._auto_join_contours(outline) == _reference_join(outline)
+
+
+def test_tolerance_is_strict():
+    """距離がtolちょうどの端点は連結しない"""
+    effect = RoundCornersEffect()
+    outline = GlyphOutline.from_contours([
+        ([(0, 0), (1, 0)], [1, 1]),
+        ([(1.5, 0), (2, 0)], [1, 1]),
+    ])
+    assert effect._auto_join_contours(outline, tol=0.5).num_contours == 2
+    assert effect._auto_join_contours(outline, tol=0.5000001).num_contours == 1
+
+
+if __name__ == "__main__":
+    test_four_orientations()
+    test_matches_reference_scan()
+    test_tolerance_is_strict()
+    print("✅ 輪郭自動連結のテストが成功しました")
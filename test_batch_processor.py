@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+バッチ実行（batch_processor.py）の検証テスト
+
+確認内容:
+- マニフェスト（YAMLのdefaults / jobs、JSONL）とglobからジョブが作られること
+- 各ジョブの出力が、同じ設定でFontProcessorを個別に実行した結果と一致すること（逐次・ワーカープールの両方）
+- 同じ入力フォントのジョブでは入力フォントの読み込みが1度だけ行われること
+- ジョブごとの結果がJSONLで出力され、失敗したジョブがあるときだけ終了コードが1になること
+- エフェクトの読み込み・適用に失敗したジョブ（エラーの集計が0でない）が失敗として報告されること
+"""
+
+import io
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+import yaml
+from fontTools.ttLib import TTFont
+
+import batch_processor
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+
+
+def _write_font(path, cff=False):
+    font = build_test_font(cff=cff, glyph_count=8)
+    font.save(str(path))
+    return str(path)
+
+
+def _tables(path):
+    """保存時刻（head）以外のテーブルのバイト列"""
+    font = TTFont(str(path))
+    return {tag: font.reader[tag] for tag in font.reader.keys() if tag != "head"}
+
+
+def _job(input_font, output_font, radius, **extra):
+    return dict({"input_font": input_font, "output_font": output_font,
+                 "effects": [{"name": "round_corners", "params": {"radius": radius, "quality_level": "medium"}}]},
+                **extra)
+
+
+def _manifest(tmp_path):
+    """2つのフォントに対する3つのジョブと、存在しないフォントのジョブ1つ"""
+    ttf = _write_font(tmp_path / "a.ttf")
+    otf = _write_font(tmp_path / "b.otf", cff=True)
+    (tmp_path / "out").mkdir(exist_ok=True)
+    manifest = {
+        "defaults": {"effects": [{"name": "round_corners", "params": {"radius": 30, "quality_level": "medium"}}]},
+        "jobs": [
+            {"id": "a30", "input_font": ttf, "output_font": str(tmp_path / "out" / "a30.ttf")},
+            {"id": "b30", "input_font": otf, "output_font": str(tmp_path / "out" / "b30.otf")},
+            _job(ttf, str(tmp_path / "out" / "a60.ttf"), 60, id="a60"),
+            {"id": "missing", "input_font": str(tmp_path / "missing.ttf"), "output_font": str(tmp_path / "out" / "x.ttf")},
+        ],
+    }
+    path = tmp_path / "manifest.yaml"
+    path.write_text(yaml.safe_dump(manifest), encoding="utf-8")
+    return str(path)
+
+
+def test_load_manifest(tmp_path):
+    """YAML（defaults / jobs、config:）とJSONLのマニフェスト"""
+    jobs = batch_processor.load_manifest(_manifest(tmp_path))
+    assert [job["id"] for job in jobs] == ["a30", "b30", "a60", "missing"]
+    assert jobs[0]["effects"][0]["params"]["radius"] == 30
+    assert jobs[2]["effects"][0]["params"]["radius"] == 60
+
+    config = tmp_path / "base.yaml"
+    config.write_text(yaml.safe_dump({"variation": {"wght": 700}, "pipeline": "glyph"}), encoding="utf-8")
+    lines = [{"input_font": "x.ttf", "output_font": "y.ttf", "config": str(config), "pipeline": "effect"},
+             {"input_font": "z.ttf", "output_font": "w.ttf"}]
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n\n", encoding="utf-8")
+    jobs = batch_processor.load_manifest(str(path))
+    assert jobs[0] == {"input_font": "x.ttf", "output_font": "y.ttf", "variation": {"wght": 700}, "pipeline": "effect"}
+    assert jobs[1] == lines[1]
+
+    groups = batch_processor.group_jobs(jobs + [dict(jobs[0], output_font="v.ttf"), dict(jobs[0], variation=None)])
+    assert [[index for index, _ in group] for group in groups] == [[0, 2], [1], [3]]
+
+
+def test_expand_inputs(tmp_path):
+    """globに一致したフォントごとにジョブを作ること（重複は1度だけ）"""
+    for name in ("b.ttf", "a.ttf", "c.otf"):
+        (tmp_path / name).write_bytes(b"")
+    base = {"effects": [], "output_font": "ignored.ttf"}
+    jobs = batch_processor.expand_inputs([str(tmp_path / "*.ttf"), str(tmp_path / "a.*")], base, "out")
+    assert [os.path.basename(job["input_font"]) for job in jobs] == ["a.ttf", "b.ttf"]
+    assert [job["output_font"] for job in jobs] == [os.path.join("out", "a.ttf"), os.path.join("out", "b.ttf")]
+    assert all(job["effects"] == [] for job in jobs)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_matches_single_runs(tmp_path, workers):
+    """各ジョブの出力が個別実行と一致し、失敗したジョブが報告されること"""
+    jobs = batch_processor.load_manifest(_manifest(tmp_path))
+    results = []
+    failed = batch_processor.run_batch(jobs, results.append, workers)
+
+    assert failed == 1
+    by_id = {result["id"]: result for result in results}
+    assert sorted(by_id) == ["a30", "a60", "b30", "missing"]
+    assert by_id["missing"]["status"] == "failed" and "missing.ttf" in by_id["missing"]["error"]
+    for job in jobs[:3]:
+        result = by_id[job["id"]]
+        assert result["status"] == "ok" and result["counters"]["corners_rounded"] > 0
+        single = str(tmp_path / f"single_{job['id']}")
+        FontProcessor(config_dict=dict(job, output_font=single)).run()
+        assert _tables(job["output_font"]) == _tables(single)
+    assert _tables(by_id["a30"]["output_font"]) != _tables(by_id["a60"]["output_font"])
+
+
+def test_font_loaded_once_per_group(tmp_path, monkeypatch):
+    """同じ入力フォントのジョブでは読み込みが1度だけ行われること"""
+    loaded = []
+    load_font_data = FontProcessor.load_font_data
+
+    def counting_load(self):
+        loaded.append(self.input_font)
+        return load_font_data(self)
+
+    monkeypatch.setattr(FontProcessor, "load_font_data", counting_load)
+    jobs = batch_processor.load_manifest(_manifest(tmp_path))[:3]
+    assert batch_processor.run_batch(jobs, lambda result: None) == 0
+    assert sorted(loaded) == sorted([jobs[0]["input_font"], jobs[1]["input_font"]])
+
+
+def test_main_exit_code(tmp_path, capsys):
+    """結果のJSONLと終了コード（失敗したジョブがあるときだけ1）"""
+    manifest = _manifest(tmp_path)
+    results = tmp_path / "results.jsonl"
+    assert batch_processor.main([manifest, "--results", str(results)]) == 1
+    lines = [json.loads(line) for line in results.read_text(encoding="utf-8").splitlines()]
+    assert [line["status"] for line in lines] == ["ok", "ok", "ok", "failed"]
+
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump(_job(None, None, 20)), encoding="utf-8")
+    assert batch_processor.main(["--inputs", str(tmp_path / "*.ttf"), "--config", str(config),
+                                 "--output-dir", str(tmp_path / "globbed")]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["status"] for line in lines] == ["ok"]
+    assert os.path.exists(tmp_path / "globbed" / "a.ttf")
+
+
+@pytest.mark.parametrize("effect", [
+    {"name": "round_cornrs", "params": {"radius": 30}},
+    {"name": "round_corners", "params": {"radius": 30, "union": "bogus"}},
+])
+def test_effect_errors_fail_job(tmp_path, effect):
+    """エフェクトが見つからない・適用に失敗したジョブは、run()が例外を出さなくても失敗になる"""
+    ttf = _write_font(tmp_path / "a.ttf")
+    jobs = [{"input_font": ttf, "output_font": str(tmp_path / "bad.ttf"), "effects": [effect]},
+            _job(ttf, str(tmp_path / "good.ttf"), 30)]
+    results = []
+    assert batch_processor.run_batch(jobs, results.append) == 1
+    assert [result["status"] for result in results] == ["failed", "ok"]
+    assert results[0]["counters"]["errors"] > 0
+    assert "エラー" in results[0]["error"]
+
+
+if __name__ == "__main__":
+    import contextlib
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, target.__dict__[name]))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    class _CaptureSys:
+        """標準出力を横取りする（pytestのcapsysの代わり）"""
+        def __init__(self):
+            self.buf = io.StringIO()
+
+        def readouterr(self):
+            return type("Captured", (), {"out": self.buf.getvalue()})()
+
+    for test in (test_load_manifest, test_expand_inputs):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    for workers in (1, 2):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_batch_matches_single_runs(pathlib.Path(tmp), workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch = _MonkeyPatch()
+        try:
+            test_font_loaded_once_per_group(pathlib.Path(tmp), monkeypatch)
+        finally:
+            monkeypatch.undo()
+    for effect in ({"name": "round_cornrs", "params": {"radius": 30}},
+                   {"name": "round_corners", "params": {"radius": 30, "union": "bogus"}}):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_effect_errors_fail_job(pathlib.Path(tmp), effect)
+    with tempfile.TemporaryDirectory() as tmp:
+        capsys = _CaptureSys()
+        with contextlib.redirect_stdout(capsys.buf):
+            test_main_exit_code(pathlib.Path(tmp), capsys)
+    print("✅ バッチ実行のテストが成功しました")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク用合成フォントとベンチマーク実行の検証テスト
+
+確認内容:
+- TrueType / CFF の合成フォントが指定したグリフ数・複雑さで生成され、同じシードなら同一になること
+- 1ケース分のベンチマークが速度・メモリ・出力サイズを記録し、結果がJSONLに追記されること
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks import run_benchmarks
+from benchmarks.synthetic_fonts import build_font, build_font_bytes, outline_stats
+
+
+def test_synthetic_fonts():
+    """合成フォントのグリフ数・輪郭数と再現性"""
+    for cff in (False, True):
+        font = build_font(glyph_count=20, complexity=6, cff=cff, cjk_ratio=1.0)
+        assert len(font.getGlyphOrder()) == 21
+        assert ("CFF " in font) == cff and ("glyf" in font) == (not cff)
+        # 漢字風グリフは画数と同じ数の輪郭を持つ
+        assert outline_stats(font)["contours"] == 20 * 6
+        assert build_font_bytes(glyph_count=5, cff=cff, seed=3) == build_font_bytes(glyph_count=5, cff=cff, seed=3)
+
+
+def test_run_case_records_metrics():
+    """run_caseが速度・メモリ・出力サイズを返すこと"""
+    case = {"format": "cff", "profile": "cjk", "glyphs": 10, "complexity": 4, "cjk_ratio": 1.0,
+            "radius": 40, "quality": "medium", "workers": 1, "repeat": 1, "seed": 0}
+    result = run_benchmarks.run_case(case)
+    assert result["glyphs_per_sec"] > 0
+    assert result["output_bytes"] > 0 and result["input_bytes"] > 0
+    assert result["counters"]["corners_rounded"] > 0
+    assert "rounding" in result["stages"]
+
+
+def test_results_are_appended():
+    """結果がJSONLに追記され、ケースIDで前回の結果を引けること"""
+    tmpdir = tempfile.mkdtemp()
+    try:
+        results_path = os.path.join(tmpdir, "results.jsonl")
+        args = ["--formats", "truetype", "--profiles", "latin", "--glyphs", "5", "--repeat", "1",
+                "--results", results_path, "--label", "test"]
+        run_benchmarks.main(args)
+        run_benchmarks.main(args)
+        history = run_benchmarks.load_results(results_path)
+        assert len(history) == 2
+        assert history[0]["case_id"] == history[1]["case_id"]
+        assert run_benchmarks.previous_result(history, history[0]["case_id"]) is history[1]
+        assert history[1]["label"] == "test" and history[1]["peak_rss_mb"] is not None
+        with open(results_path, encoding="utf-8") as f:
+            assert all(json.loads(line)["glyphs_per_sec"] > 0 for line in f)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    test_synthetic_fonts()
+    test_run_case_records_metrics()
+    test_results_are_appended()
+    print("✅ ベンチマークのテストが成功しました")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+CFFの未変更グリフのパススルー検証テスト
+
+確認内容:
+- 角丸処理で変更されないグリフは元のバイトコード（サブルーチン呼び出しを含む）のまま残ること
+- サブルーチン自体も展開・再コンパイルされず元のバイトコードのまま残ること
+- 変更されたグリフだけが新しいCharStringに置き換わること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontTools.cffLib import GlobalSubrsIndex, SubrsIndex
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.ttLib import TTFont
+
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import font_builder
+
+# サブルーチン番号のバイアス（サブルーチン数が1240未満の場合）
+BIAS = 107
+
+
+def _build_subroutinized_font():
+    """
+    ローカル/グローバルサブルーチンを使うCFFフォントを作る。
+    square: 矩形（角があるので変更される）
+    circle: 滑らかな曲線だけの円（角がないので変更されない）
+    """
+    programs = {
+        ".notdef": ["endchar"],
+        # ローカルサブルーチン0: 矩形の3辺
+        "square": [100, 100, "rmoveto", -BIAS, "callsubr", "endchar"],
+        # グローバルサブルーチン0: 円の4つの曲線
+        "circle": [500, 100, "rmoveto", -BIAS, "callgsubr", "endchar"],
+    }
+    charstrings = {name: T2CharString(program=program) for name, program in programs.items()}
+    fb = font_builder(charstrings, cff=True, cmap={0x41: "square", 0x4F: "circle"}, family="Pass Through", advance=600)
+
+    cff = fb.font["CFF "].cff
+    top = cff.topDictIndex[0]
+    private = top.Private
+
+    local_subrs = SubrsIndex()
+    local_subrs.append(T2CharString(program=[0, 600, "rlineto", 400, 0, "rlineto", 0, -600, "rlineto", "return"],
+                                    private=private, globalSubrs=cff.GlobalSubrs))
+    private.Subrs = local_subrs
+
+    global_subrs = GlobalSubrsIndex()
+    global_subrs.append(T2CharString(program=[
+        110, 0, 200, 90, 0, 200, "rrcurveto",
+        0, 110, -90, 200, -200, 0, "rrcurveto",
+        -110, 0, -200, -90, 0, -200, "rrcurveto",
+        0, -110, 90, -200, 200, 0, "rrcurveto",
+        "return",
+    ], private=private))
+    cff.GlobalSubrs = global_subrs
+    for charstring in top.CharStrings.values():
+        charstring.globalSubrs = global_subrs
+    for subr in local_subrs:
+        subr.globalSubrs = global_subrs
+
+    buf = io.BytesIO()
+    fb.save(buf)
+    return buf.getvalue()
+
+
+def _bytecodes(font):
+    cff = font["CFF "].cff
+    top = cff.topDictIndex[0]
+    glyphs = {name: top.CharStrings[name].bytecode for name in font.getGlyphOrder()}
+    subrs = [s.bytecode for s in top.Private.Subrs] + [s.bytecode for s in cff.GlobalSubrs]
+    return glyphs, subrs
+
+
+def test_unchanged_glyphs_keep_bytecode():
+    """変更されないグリフとサブルーチンは元のバイトコードのまま残ること"""
+    data = _build_subroutinized_font()
+    original_glyphs, original_subrs = _bytecodes(TTFont(io.BytesIO(data)))
+    assert all(original_glyphs.values()) and all(original_subrs)
+
+    for workers in (1, 2):
+        font = TTFont(io.BytesIO(data))
+        effect = RoundCornersEffect({'radius': 40, 'quality_level': 'medium', 'workers': workers})
+        font = effect.apply(font)
+        assert effect.counters['glyphs_processed'] == 1
+
+        glyphs, subrs = _bytecodes(font)
+        # 処理直後（保存前）も展開されていない
+        assert glyphs["circle"] == original_glyphs["circle"]
+        assert glyphs[".notdef"] == original_glyphs[".notdef"]
+        assert subrs == original_subrs
+
+        buf = io.BytesIO()
+        font.save(buf)
+        saved_glyphs, saved_subrs = _bytecodes(TTFont(io.BytesIO(buf.getvalue())))
+        assert saved_glyphs["circle"] == original_glyphs["circle"]
+        assert saved_subrs == original_subrs
+        # 矩形は角丸処理されて置き換わる
+        assert saved_glyphs["square"] != original_glyphs["square"]
+
+
+if __name__ == "__main__":
+    test_unchanged_glyphs_keep_bytecode()
+    print("✅ CFF未変更グリフのパススルーのテストが成功しました")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+pyclipperによるモルフォロジー演算の角丸処理（engine: clipper）の検証テスト
+
+確認内容:
+- 正方形の4つの角が円弧（三次ベジェ／二次スプライン）になり、辺は直線のまま残ること
+- 重なった輪郭が1つに統合され、凹の角も丸められること
+- TrueTypeでは外側の輪郭が時計回り、CFFでは反時計回りで、各輪郭がオンカーブ点から始まること
+- 半径より細い画は半径を下げてやり直し、それでも保てないグリフは処理しないこと
+- params['engine'] の検証と、エフェクト全体での逐次・並列処理の結果の一致
+"""
+
+import io
+import math
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from fontTools.pens.areaPen import AreaPen
+from fontTools.ttLib import TTFont
+
+from effects.glyph_outline import GlyphOutline
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font
+
+pytest.importorskip("pyclipper")
+from effects import clipper_engine  # noqa: E402
+
+
+def _rectangle(x, y, width, height):
+    """時計回り（TrueTypeの外側の輪郭の向き）の長方形"""
+    return [(x, y), (x, y + height), (x + width, y + height), (x + width, y)], [1] * 4
+
+
+def _signed_area(outline, contour):
+    """輪郭の制御点の多角形の符号付き面積（反時計回りが正）"""
+    points = outline.points[outline.starts[contour]:outline.ends[contour] + 1]
+    x, y = points[:, 0], points[:, 1]
+    return (np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+@pytest.mark.parametrize("cubic", [False, True])
+def test_square(cubic):
+    """正方形の角が半径の円弧になり、面積は角の分だけ減ること"""
+    radius = 40
+    outline = GlyphOutline.from_contours([_rectangle(0, 0, 400, 400)])
+    rounded, corners = clipper_engine.round_outline(outline, radius, cubic=cubic)
+    assert corners == 4
+    assert rounded.num_contours == 1
+    # 4本の辺と4つの円弧
+    assert int(rounded.flags.sum()) == 8
+    assert rounded.flags[0] == 1
+    xs, ys = rounded.points[:, 0], rounded.points[:, 1]
+    assert xs.min() == pytest.approx(0, abs=0.5) and xs.max() == pytest.approx(400, abs=0.5)
+    assert ys.min() == pytest.approx(0, abs=0.5) and ys.max() == pytest.approx(400, abs=0.5)
+    # 角の頂点は円弧に置き換わる
+    assert not np.any(np.all(np.isclose(rounded.points, [0, 0], atol=1), axis=1))
+    # TrueTypeは時計回り、CFFは反時計回り
+    area = _signed_area(rounded, 0)
+    assert (area > 0) == cubic
+    expected = 400 * 400 - (4 - math.pi) * radius ** 2
+    assert abs(area) == pytest.approx(expected, rel=0.02)
+
+
+@pytest.mark.parametrize("cubic", [False, True])
+def test_crossing_strokes_are_merged(cubic):
+    """重なった十字の2本の画が1つの輪郭に統合され、凸の角8つと凹の角4つが丸められること"""
+    outline = GlyphOutline.from_contours([_rectangle(100, 300, 500, 100), _rectangle(300, 50, 100, 600)])
+    rounded, corners = clipper_engine.round_outline(outline, 20, cubic=cubic)
+    assert corners == 12
+    assert rounded.num_contours == 1
+    assert int(rounded.flags.sum()) == 24
+
+
+def test_hole_keeps_direction():
+    """穴（逆回りの輪郭）は穴のまま残ること"""
+    outer = _rectangle(0, 0, 500, 500)
+    inner_points, inner_flags = _rectangle(150, 150, 200, 200)
+    outline = GlyphOutline.from_contours([outer, (inner_points[::-1], inner_flags)])
+    rounded, corners = clipper_engine.round_outline(outline, 20, cubic=False)
+    assert corners == 8
+    assert rounded.num_contours == 2
+    areas = sorted(_signed_area(rounded, contour) for contour in range(2))
+    # 外側は時計回り（負）、穴は反時計回り（正）
+    assert areas[0] < 0 < areas[1]
+
+
+def test_smooth_contour():
+    """オフカーブ点だけの輪郭（円）は角がなく、少数の曲線に当てはめ直されること"""
+    circle = GlyphOutline.from_contours([([(0, 100), (100, 100), (100, 0), (0, 0)], [0] * 4)])
+    rounded, corners = clipper_engine.round_outline(circle, 10, cubic=True)
+    assert corners == 0
+    assert int(rounded.flags.sum()) <= 8
+
+
+def test_thin_stroke_is_skipped():
+    """半径より十分細い画は、半径を下げても形が保てなければ None を返すこと"""
+    outline = GlyphOutline.from_contours([_rectangle(0, 0, 10, 10)])
+    assert clipper_engine.round_outline(outline, 40, cubic=False) is None
+    # 半径を下げれば保てる画は、下げた半径で丸められる
+    bar = GlyphOutline.from_contours([_rectangle(0, 0, 600, 50)])
+    rounded, corners = clipper_engine.round_outline(bar, 40, cubic=False)
+    assert corners == 4
+    assert rounded.num_contours == 1
+
+
+def test_engine_setting():
+    """不明なエンジン名はエラーにすること"""
+    assert RoundCornersEffect({'engine': 'clipper'}).engine == 'clipper'
+    assert RoundCornersEffect({}).engine == 'kernel'
+    with pytest.raises(ValueError):
+        RoundCornersEffect({'engine': 'offset'})
+
+
+def _build_font(cff):
+    contours = {
+        "cross": [_rectangle(100, 300, 500, 100)[0], _rectangle(300, 50, 100, 600)[0]],
+        "box": [_rectangle(100, 100, 500, 500)[0], _rectangle(200, 200, 300, 300)[0][::-1]],
+        "bar": [_rectangle(100, 100, 500, 80)[0]],
+    }
+    if cff:
+        # CFFの外側の輪郭は反時計回り
+        contours = {name: [points[::-1] for points in glyph] for name, glyph in contours.items()}
+    return build_font(contours, cff, cmap={0x5341: "cross", 0x53E3: "box", 0x4E00: "bar"}, family="Clipper Test")
+
+
+def _apply(data, workers):
+    font = TTFont(io.BytesIO(data))
+    effect = RoundCornersEffect({'radius': 30, 'quality_level': 'medium', 'engine': 'clipper', 'workers': workers})
+    font = effect.apply(font)
+    # 保存時刻で head.modified が変わらないようにする
+    font.recalcTimestamp = False
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue(), effect
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_effect(cff):
+    """エフェクト全体で全グリフが丸められ、面積の変化が小さく、並列処理でも同じ出力になること"""
+    data = _build_font(cff)
+    serial, effect = _apply(data, 1)
+    assert effect.counters['glyphs_processed'] == 3
+    assert effect.counters['corners_rounded'] == 12 + 8 + 4
+    assert effect.timings.calls['rounding'] == 3
+    # 統合はエンジンの中で行うので、Unionのバックエンドは使わない
+    assert 'union' not in effect.timings.calls
+
+    # 塗られる面積（十字は重なりを除く）は、凸の角で (1 - π/4)r² 減り、凹の角で同じだけ増える
+    # （CFFの半径は品質レベルmediumで0.6倍になる）
+    radius = 30 * 0.6 if cff else 30
+    corner = (1 - math.pi / 4) * radius ** 2
+    result = TTFont(io.BytesIO(serial)).getGlyphSet()
+    for name, area in (("cross", 100000 - 4 * corner), ("box", 160000), ("bar", 40000 - 4 * corner)):
+        pen = AreaPen(result)
+        result[name].draw(pen)
+        assert abs(pen.value) == pytest.approx(area, rel=0.002)
+
+    parallel, _ = _apply(data, 2)
+    assert parallel == serial
+
+
+if __name__ == "__main__":
+    for cubic in (False, True):
+        test_square(cubic)
+        test_crossing_strokes_are_merged(cubic)
+    test_hole_keeps_direction()
+    test_smooth_contour()
+    test_thin_stroke_is_skipped()
+    test_engine_setting()
+    for cff in (False, True):
+        test_effect(cff)
+    print("✅ clipperエンジンによる角丸処理のテストが成功しました")
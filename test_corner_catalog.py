@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+コーナーカタログ（effects/corner_catalog.py）の検証テスト
+
+確認内容:
+- カタログを作る1回目・読み込む2回目とも、カタログを使わない場合と出力が同一になること（TrueType / CFF、半径・品質レベルを変えても）
+- 2回目以降はグリフをデコードせず、カタログの配列はメモリマップで読み込まれること
+- グリフデータや前処理の設定が変わるとカタログが作り直されること
+- corner_catalog: true では入力フォントの隣（<入力フォント>.corners.npz）に保存されること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from fontTools.ttLib import TTFont
+
+from effects import cff_passthrough
+from effects.corner_catalog import SUFFIX, CornerCatalog
+from effects.glyph_outline import GlyphOutline
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+
+
+def _source_bytes(cff, glyph_count=24):
+    buf = io.BytesIO()
+    build_test_font(cff=cff, glyph_count=glyph_count).save(buf)
+    return buf.getvalue()
+
+
+def _round(data, catalog_path=None, **params):
+    params = dict({'radius': 40, 'quality_level': 'medium'}, **params)
+    if catalog_path:
+        params['corner_catalog'] = str(catalog_path)
+    effect = RoundCornersEffect(params)
+    font = effect.apply(TTFont(io.BytesIO(data)))
+    # 保存時刻で head.modified が変わらないようにする
+    font.recalcTimestamp = False
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue(), effect.counters
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_same_output_as_without_catalog(tmp_path, cff):
+    """カタログを作る回・読み込む回とも、カタログなしと同じ出力になること"""
+    data = _source_bytes(cff)
+    path = tmp_path / "font.corners.npz"
+    for params in ({}, {'radius': 15}, {'radius': 80, 'quality_level': 'high'}, {'quality_level': 'low'}):
+        plain, plain_counters = _round(data, **params)
+        built, _ = _round(data, path, **params)
+        loaded, counters = _round(data, path, **params)
+        assert built == plain and loaded == plain
+        assert counters['catalog_hits'] == 1 and 'catalog_builds' not in counters
+        assert counters['corners_rounded'] == plain_counters['corners_rounded'] > 0
+
+
+def test_loaded_run_skips_decoding(tmp_path, monkeypatch):
+    """2回目はグリフをデコードせず、配列はメモリマップで読み込まれること"""
+    path = tmp_path / "font.corners.npz"
+    for cff in (False, True):
+        data = _source_bytes(cff)
+        _, counters = _round(data, path)
+        assert counters['catalog_builds'] == 1
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("glyphs must not be decoded when the catalog is up to date")
+
+    # CFFのカタログで上書きされているので、CFFを読み込み済みのカタログから処理する
+    monkeypatch.setattr(GlyphOutline, "from_glyf", staticmethod(no_decoding))
+    monkeypatch.setattr(cff_passthrough, "decodable_copy", no_decoding)
+    _, counters = _round(data, path)
+    assert counters['catalog_hits'] == 1 and counters['errors'] == 0
+
+    catalog = CornerCatalog.load(str(path))
+    assert catalog.cubic
+    assert isinstance(catalog.points, np.memmap) and isinstance(catalog.angle, np.memmap)
+    assert len(catalog) == 25
+
+
+def test_rebuilt_when_font_or_settings_change(tmp_path):
+    """グリフデータ・前処理の設定が変わるとカタログを作り直すこと"""
+    path = tmp_path / "font.corners.npz"
+    data = _source_bytes(cff=False)
+    assert _round(data, path, union='none')[1]['catalog_builds'] == 1
+    assert _round(data, path, union='none', radius=20)[1]['catalog_hits'] == 1
+    # 統合の設定は前処理の結果を変えうるので別のカタログになる
+    assert _round(data, path, union='booleanoperations')[1]['catalog_builds'] == 1
+    other = _source_bytes(cff=False, glyph_count=12)
+    plain, _ = _round(other, union='booleanoperations')
+    rebuilt, counters = _round(other, path, union='booleanoperations')
+    assert counters['catalog_builds'] == 1 and rebuilt == plain
+
+
+def test_sidecar_next_to_input_font(tmp_path):
+    """corner_catalog: true では入力フォントの隣に保存されること"""
+    input_path = tmp_path / "input.ttf"
+    input_path.write_bytes(_source_bytes(cff=False))
+    processor = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(tmp_path / "output.ttf"),
+        "effects": [{"name": "round_corners", "params": {"radius": 40}}],
+        "corner_catalog": True,
+    })
+    assert processor.run()["counters"]["catalog_builds"] == 1
+    assert os.path.exists(str(input_path) + SUFFIX)
+    assert processor.run()["counters"]["catalog_hits"] == 1
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, target.__dict__[name]))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    for cff in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_same_output_as_without_catalog(pathlib.Path(tmp), cff)
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch = _MonkeyPatch()
+        try:
+            test_loaded_run_skips_decoding(pathlib.Path(tmp), monkeypatch)
+        finally:
+            monkeypatch.undo()
+    for test in (test_rebuilt_when_font_or_settings_change, test_sidecar_next_to_input_font):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ コーナーカタログのテストが成功しました")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+ベクトル化角丸カーネル（effects/corner_kernel.py）の検証テスト
+
+確認内容:
+- 90度の角が T1(オンカーブ), P1(制御点), T2(オンカーブ) の3点に置き換わること
+- ほぼ直線の点・長さ0の辺を持つ点はそのまま残ること
+- 3つの角丸方式のラッパーが同じカーネルの結果を返すこと
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from effects import corner_kernel
+from effects.glyph_outline import GlyphOutline
+from effects.round_corners_effect import RoundCornersEffect
+
+SQUARE = {
+    'coords': [(0, 0), (0, 100), (100, 100), (100, 0)],
+    'flags': [1, 1, 1, 1],
+}
+
+
+def test_square_corners_are_rounded():
+    """正方形の4つの角がすべて丸められること"""
+    outline, count = corner_kernel.round_direct(GlyphOutline.from_contours([SQUARE]), 10, 160)
+    points, flags = outline.points, outline.flags
+    assert count == 4
+    assert len(points) == 12
+    assert flags.tolist() == [1, 0, 1] * 4
+    # 最初の角 (0, 0) の接点は前の点(100, 0)方向と次の点(0, 100)方向に半径10
+    assert points[0].tolist() == [10.0, 0.0]
+    assert points[1].tolist() == [0.0, 0.0]
+    assert points[2].tolist() == [0.0, 10.0]
+
+
+def test_straight_and_degenerate_points_are_kept():
+    """直線上の点と重複点は角丸処理の対象外"""
+    coords = [(0, 0), (50, 0), (100, 0), (100, 0), (100, 100), (0, 100)]
+    flags = [1, 1, 1, 1, 1, 1]
+    outline = GlyphOutline.from_contours([(coords, flags)])
+    geom = corner_kernel.analyze_corners(outline)
+    assert not geom.valid[2] and not geom.valid[3]
+    assert np.isclose(geom.angle[1], 180.0)
+
+    rounded, count = corner_kernel.round_direct(outline, 10, 160)
+    # (0,0), (100,100), (0,100) の3つの角だけが丸められる
+    assert count == 3
+    assert rounded.num_points == len(coords) + 2 * 3
+
+
+def test_curve_strategy_keeps_control_points():
+    """曲線用の方式では制御点は変更されない"""
+    coords = [(0, 0), (0, 100), (50, 150), (100, 100), (100, 0)]
+    flags = [1, 1, 0, 1, 1]
+    outline = GlyphOutline.from_contours([(coords, flags)])
+    rounded, count, geom, actual_radius, ctrl_factor = corner_kernel.round_curves(outline, 40, 179.0)
+    assert (50.0, 150.0) in [tuple(p) for p in rounded.points.tolist()]
+    assert count > 0
+    assert rounded.flags.tolist().count(0) == 1 + count
+
+
+def test_multiple_contours_are_processed_together():
+    """複数輪郭をまとめて処理しても、輪郭ごとに処理した結果と一致すること"""
+    inner = {'coords': [(20, 20), (20, 80), (80, 80), (80, 20)], 'flags': [1, 1, 1, 1]}
+    line = {'coords': [(0, 0), (10, 10)], 'flags': [1, 1]}
+    outline = GlyphOutline.from_contours([SQUARE, line, inner])
+
+    rounded, count = corner_kernel.round_direct(outline, 10, 160)
+    separate = [corner_kernel.round_direct(GlyphOutline.from_contours([c]), 10, 160)[0]
+                for c in (SQUARE, line, inner)]
+    assert count == 8
+    # 2点の輪郭はそのまま残る
+    assert rounded.ends.tolist() == [11, 13, 25]
+    assert rounded == GlyphOutline.concatenate(separate)
+
+
+def test_effect_wrappers_use_kernel():
+    """RoundCornersEffectの各方式が輪郭辞書形式・GlyphOutlineのどちらでも結果を返すこと"""
+    effect = RoundCornersEffect()
+    direct = effect._round_corners_direct(SQUARE, 10, 160)
+    curves, count = effect._round_corners_improved_for_curves(SQUARE, 40, 179.0)
+    precision = effect._round_corners_cff_precision(SQUARE, 10, 160)
+
+    assert len(direct['coords']) == len(direct['flags']) == 12
+    assert count == 4 and len(curves['coords']) == 12
+    # 整数座標のフォントでは接点も整数に丸められる
+    assert all(float(x).is_integer() and float(y).is_integer() for x, y in precision['coords'])
+
+    outline = effect._round_corners_direct(GlyphOutline.from_contours([SQUARE]), 10, 160)
+    assert isinstance(outline, GlyphOutline)
+    assert outline.points.tolist() == [list(p) for p in direct['coords']]
+
+
+if __name__ == "__main__":
+    test_square_corners_are_rounded()
+    test_straight_and_degenerate_points_are_kept()
+    test_curve_strategy_keeps_control_points()
+    test_multiple_contours_are_processed_together()
+    test_effect_wrappers_use_kernel()
+    print("✅ 角丸カーネルのテストが成功しました")
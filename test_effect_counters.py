@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+処理結果の集計（counters）とログ出力の検証テスト
+
+確認内容:
+- FontProcessor.run が角丸化した角の数・スキップ数・エラー数を返すこと
+- 並列処理でもワーカー側の集計が親プロセスに集約されること
+- DEBUGログが無効なときは点ごとのログが出力されないこと
+"""
+
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontTools.ttLib import TTFont
+
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+from effects.round_corners_effect import RoundCornersEffect
+
+
+def _run_processor(cff, workers=1):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        input_path = os.path.join(tmpdir, "input.otf")
+        build_test_font(cff=cff).save(input_path)
+        processor = FontProcessor.from_config_dict({
+            "input_font": input_path,
+            "output_font": os.path.join(tmpdir, "output.otf"),
+            "quality_level": "medium",
+            "workers": workers,
+            "effects": [{"name": "round_corners", "params": {"radius": 40}}],
+        })
+        return processor.run()["counters"]
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_run_returns_counters():
+    """run() が集計を返し、角丸化した角が数えられていること"""
+    for cff in (False, True):
+        counters = _run_processor(cff)
+        assert counters["corners_rounded"] > 0
+        assert counters["glyphs_processed"] > 0
+        assert counters["glyphs_skipped_quality"] == 0
+        assert counters["errors"] == 0
+
+
+def test_parallel_counters_match_serial():
+    """並列処理でも逐次処理と同じ集計になること"""
+    for cff in (False, True):
+        assert _run_processor(cff, workers=1) == _run_processor(cff, workers=2)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_debug_logging_is_disabled_by_default():
+    """DEBUGレベルが無効なら点ごとのログは記録されず、有効にすると記録されること"""
+    logger = logging.getLogger("effects.round_corners_effect")
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    previous_level = logger.level
+    try:
+        for level, expect_debug in ((logging.INFO, False), (logging.DEBUG, True)):
+            handler.records.clear()
+            logger.setLevel(level)
+            effect = RoundCornersEffect({'radius': 40, 'quality_level': 'medium'})
+            effect.apply(build_test_font(cff=True))
+            debug_records = [r for r in handler.records if r.levelno == logging.DEBUG]
+            assert bool(debug_records) == expect_debug
+            assert effect.counters['corners_rounded'] > 0
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+
+
+if __name__ == "__main__":
+    test_run_returns_counters()
+    test_parallel_counters_match_serial()
+    test_debug_logging_is_disabled_by_default()
+    print("✅ 集計とログ出力のテストが成功しました")
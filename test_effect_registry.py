@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+エフェクトプラグインのレジストリ（effects/registry.py）の検証テスト
+
+確認内容:
+- effects/の *_effect.py がエフェクトとして見つかり、抽象基底クラスのモジュールは含まれないこと
+- 説明文とapply_outline対応の有無を、実装（とnumpy）をインポートせずに取り出せること
+- エフェクトクラスのインポートは1度だけで、2回目以降は同じクラスを返すこと
+- エントリポイントで登録したエフェクトも引けて、同名ならeffects/のものが優先されること
+- font_processorのインポートでfontTools.varLib・numpy・エフェクトの実装が読み込まれないこと
+"""
+
+import importlib.metadata
+import os
+import subprocess
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from effects.base_effect import BaseEffect
+from effects.registry import ENTRY_POINT_GROUP, EffectRegistry
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class PluginEffect(BaseEffect):
+    """エントリポイントで登録するテスト用エフェクト"""
+
+    def apply(self, font, **kwargs):
+        return font
+
+
+def _fake_entry_points(*entries):
+    def entry_points(group=None):
+        return [importlib.metadata.EntryPoint(name=name, value=value, group=ENTRY_POINT_GROUP)
+                for name, value in entries if group == ENTRY_POINT_GROUP]
+    return entry_points
+
+
+def _run_python(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def test_builtin_effects():
+    """effects/のエフェクトが見つかり、base_effect.pyは含まれないこと"""
+    registry = EffectRegistry(use_entry_points=False)
+    assert "round_corners" in registry.names()
+    assert "base" not in registry.names()
+    spec = registry.get("round_corners")
+    assert (spec.module, spec.class_name, spec.origin) == ("effects.round_corners_effect", "RoundCornersEffect", "builtin")
+    assert spec.description
+    assert spec.supports_outline
+
+
+def test_metadata_without_import():
+    """メタデータの取得では実装もnumpyもインポートされないこと"""
+    output = _run_python(
+        "import sys\n"
+        "from effects.registry import registry\n"
+        "print([spec.metadata()['supports_outline'] for spec in registry.specs()])\n"
+        "print('effects.round_corners_effect' in sys.modules, 'numpy' in sys.modules)\n"
+    )
+    assert output.splitlines()[-1] == "False False"
+
+
+def test_startup_imports():
+    """font_processorのインポートでは重いモジュールを読み込まないこと"""
+    output = _run_python(
+        "import sys, font_processor\n"
+        "print(*(name in sys.modules for name in ('fontTools.varLib', 'numpy', 'effects.round_corners_effect')))\n"
+    )
+    assert output == "False False False"
+
+
+def test_load_once():
+    """クラスの解決は1度だけで、同じクラスが返ること"""
+    from effects.round_corners_effect import RoundCornersEffect
+
+    registry = EffectRegistry(use_entry_points=False)
+    spec = registry.get("round_corners")
+    assert not spec.loaded
+    assert registry.load("round_corners") is RoundCornersEffect
+    assert spec.loaded
+    assert registry.get("round_corners") is spec
+    assert registry.load("round_corners") is RoundCornersEffect
+
+
+def test_entry_points(monkeypatch):
+    """エントリポイントのエフェクトを引けて、effects/と同名のものは無視されること"""
+    monkeypatch.setattr(importlib.metadata, "entry_points", _fake_entry_points(
+        ("plugin", "test_effect_registry:PluginEffect"),
+        ("round_corners", "test_effect_registry:PluginEffect"),
+    ))
+    registry = EffectRegistry()
+    spec = registry.get("plugin")
+    assert spec.origin == "entry_point"
+    assert spec.description == "エントリポイントで登録するテスト用エフェクト"
+    assert not spec.supports_outline
+    assert registry.load("plugin").__name__ == "PluginEffect"
+    assert registry.get("round_corners").origin == "builtin"
+    assert registry.names().count("round_corners") == 1
+    assert "plugin" in registry.names()
+
+
+def test_entry_points_are_read_lazily(monkeypatch):
+    """effects/にある名前を引くだけならエントリポイントは読まないこと"""
+    def entry_points(group=None):
+        raise AssertionError("entry points should not be read")
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", entry_points)
+    registry = EffectRegistry()
+    assert registry.get("round_corners").origin == "builtin"
+
+
+def test_unknown_effect():
+    """未登録の名前は従来どおりeffects.{name}_effectとみなし、存在しなければロード時にエラーになること"""
+    registry = EffectRegistry(use_entry_points=False)
+    spec = registry.get("no_such")
+    assert (spec.module, spec.class_name, spec.origin) == ("effects.no_such_effect", "NoSuchEffect", "module")
+    with pytest.raises(ImportError):
+        registry.load("no_such")
+
+
+if __name__ == "__main__":
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    test_builtin_effects()
+    test_metadata_without_import()
+    test_startup_imports()
+    test_load_once()
+    for test in (test_entry_points, test_entry_points_are_read_lazily):
+        monkeypatch = _MonkeyPatch()
+        try:
+            test(monkeypatch)
+        finally:
+            monkeypatch.undo()
+    test_unknown_effect()
+    print("✅ エフェクトレジストリのテストが成功しました")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+常駐サーバー（font_server.py）の検証テスト
+
+確認内容:
+- text / glyphs を指定したリクエストの出力が、サブセットをキャッシュなしで処理した結果と一致すること（TrueType / CFF）
+- 同じリクエスト（文字の順序・重複が違うものを含む）はキャッシュから返り、重なるグリフはグリフ単位のキャッシュを使うこと
+- 入力フォントが更新されると読み込み直すこと
+- LRUCacheが件数・サイズの上限を守ること
+- リクエストのparamsでworkers / glyph_cache / corner_catalogを指定しても無視され、ファイルが作られないこと
+- HTTPとUnixソケットで /process・/stats・/health に応答し、不正なリクエストは400、ないフォントは404になること
+"""
+
+import http.client
+import io
+import json
+import os
+import socket
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fontTools.ttLib import TTFont
+
+import font_processor
+from font_fixtures import build_test_font
+from font_server import FontEffectService, LRUCache, make_server
+
+PARAMS = {"quality_level": "medium"}
+
+
+def _write_font(path, cff, glyph_count=24):
+    build_test_font(cff=cff, glyph_count=glyph_count).save(str(path))
+    return str(path)
+
+
+def _tables(data):
+    """保存時刻（head）以外のテーブルのバイト列"""
+    font = TTFont(io.BytesIO(data))
+    return {tag: font.reader[tag] for tag in font.reader.keys() if tag != "head"}
+
+
+def _expected(path, text, radius):
+    """サブセットを作ってキャッシュなしで処理した結果"""
+    return _tables(font_processor.process_bytes(FontEffectService._subset(open(path, "rb").read(), text, []), {
+        "effects": [{"name": "round_corners", "params": dict(PARAMS, radius=radius)}]}))
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_matches_uncached_processing(tmp_path, cff):
+    """出力がキャッシュなしの処理と一致し、キャッシュが効くこと"""
+    path = _write_font(tmp_path / "font.ttf", cff)
+    service = FontEffectService()
+    output, info = service.process({"font": path, "radius": 40, "params": PARAMS, "text": "一丁丂七"})
+    assert info["cache"] == "miss" and info["counters"]["corners_rounded"] > 0
+    assert _tables(output) == _expected(path, "一丁丂七", 40)
+    assert set(TTFont(io.BytesIO(output)).getGlyphOrder()) == {".notdef", "g000", "g001", "g002", "g003"}
+
+    again, info = service.process({"font": path, "radius": 40, "params": PARAMS, "text": "七丂丁一一"})
+    assert info["cache"] == "hit" and again == output
+
+    # 重なるグリフはグリフ単位のキャッシュから（結果はキャッシュなしと同じ）
+    output, info = service.process({"font": path, "radius": 40, "params": PARAMS, "text": "一丁丂万"})
+    assert info["cache"] == "miss" and info["counters"]["cache_hits"] > 0
+    assert _tables(output) == _expected(path, "一丁丂万", 40)
+    assert service.stats()["fonts"]["misses"] == 1
+
+
+def test_reloads_updated_font(tmp_path):
+    """入力フォントが更新されると読み込み直すこと"""
+    path = _write_font(tmp_path / "font.ttf", cff=False)
+    service = FontEffectService()
+    service.process({"font": path, "radius": 30, "glyphs": ["g000"]})
+    _write_font(path, cff=False, glyph_count=30)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    _, info = service.process({"font": path, "radius": 30, "glyphs": ["g000"]})
+    assert info["cache"] == "miss"
+    assert service.stats()["fonts"]["misses"] == 2
+
+
+def test_ignores_server_params(tmp_path):
+    """リクエストのparamsからworkers / glyph_cache / corner_catalogを取り除くこと"""
+    path = _write_font(tmp_path / "font.ttf", cff=False)
+    params = dict(PARAMS, workers=4, glyph_cache={"path": str(tmp_path / "cache.sqlite")},
+                  corner_catalog=str(tmp_path / "catalog.npz"))
+    requests = [
+        {"font": path, "radius": 40, "params": params, "text": "一丁"},
+        {"font": path, "effects": [{"name": "round_corners", "params": dict(params, radius=40)}], "text": "一丁"},
+    ]
+    for request in requests:
+        _, _, config, _, _ = FontEffectService._parse(request)
+        assert config["effects"] == [{"name": "round_corners", "params": dict(PARAMS, radius=40)}]
+        output, info = FontEffectService().process(request)
+        assert info["cache"] == "miss" and not info["counters"]["errors"]
+        assert _tables(output) == _expected(path, "一丁", 40)
+    assert sorted(os.listdir(tmp_path)) == ["font.ttf"]
+
+
+def test_lru_limits():
+    """件数・サイズの上限を超えると最後の使用が古いものから削除すること"""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None and cache.get("a") == b"1" and len(cache) == 2
+    cache = LRUCache(max_size_mb=10 / (1024 * 1024))
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"123")
+    assert cache.get("a") is None and cache.size_bytes == 8
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None and cache.stats()["evictions"] == 1
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def _request(connection, method, path, body=None):
+    connection.request(method, path, json.dumps(body) if body is not None else None)
+    response = connection.getresponse()
+    return response.status, response.getheader("X-Cache"), response.read()
+
+
+@pytest.mark.parametrize("unix", [False, True])
+def test_http_endpoints(tmp_path, unix):
+    """HTTP / Unixソケットでの応答"""
+    path = _write_font(tmp_path / "font.otf", cff=True)
+    socket_path = str(tmp_path / "server.sock") if unix else None
+    server = make_server(FontEffectService(), port=0, unix_socket=socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        def connect():
+            if unix:
+                return _UnixConnection(socket_path)
+            return http.client.HTTPConnection(*server.server_address[:2])
+
+        assert _request(connect(), "GET", "/health")[2] == b'{"status": "ok"}'
+        request = {"font": path, "radius": 40, "text": "一丁"}
+        status, cache, body = _request(connect(), "POST", "/process", request)
+        assert status == 200 and cache == "miss" and body[:4] == b"OTTO"
+        assert _request(connect(), "POST", "/process", request)[:3] == (200, "hit", body)
+        assert _request(connect(), "POST", "/process", {"font": path})[0] == 400
+        assert _request(connect(), "POST", "/process", {"font": str(tmp_path / "none.otf"), "radius": 4})[0] == 404
+        stats = json.loads(_request(connect(), "GET", "/stats")[2])
+        assert stats["requests"] == 2 and stats["responses"]["hits"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for cff in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_matches_uncached_processing(pathlib.Path(tmp), cff)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reloads_updated_font(pathlib.Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_ignores_server_params(pathlib.Path(tmp))
+    test_lru_limits()
+    for unix in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_http_endpoints(pathlib.Path(tmp), unix)
+    print("✅ 常駐サーバーのテストが成功しました")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+エフェクトの前のサブセット化（subset設定、effects/font_subset.py）の検証テスト
+
+確認内容:
+- 出力が、全グリフにエフェクトを適用してから同じ条件でサブセット化した結果と一致すること（TrueType / CFF）
+- GSUBの置き換え先のグリフ（cmapにないもの）も残り、エフェクトが適用されること（layout_featuresを空にすると残らないこと）
+- エフェクトは残るグリフだけに適用されること
+- flavor（woff）で出力の形式を指定でき、run()のレポートにサブセットの集計と所要時間が入ること
+- 不正な指定はFontProcessorの生成時にValueErrorになること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+import font_processor
+from effects.font_subset import SubsetConfig
+from effects.glyph_outline import GlyphOutline
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+
+EFFECTS = [{"name": "round_corners", "params": {"radius": 40, "quality_level": "medium"}}]
+
+FEATURES = """
+feature vert { sub g000 by g010; } vert;
+feature liga { sub g001 g002 by g011; } liga;
+"""
+
+
+def _font_bytes(cff):
+    """g010・g011はcmapになく、GSUB（vert / liga）の置き換え先としてだけ使われるフォント"""
+    font = build_test_font(cff=cff, glyph_count=12)
+    for table in font["cmap"].tables:
+        for codepoint in (0x4E0A, 0x4E0B):
+            table.cmap.pop(codepoint, None)
+    addOpenTypeFeaturesFromString(font, FEATURES)
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _tables(data):
+    """保存時刻（head）以外のテーブルのバイト列"""
+    font = TTFont(io.BytesIO(data))
+    return {tag: font.reader[tag] for tag in font.reader.keys() if tag != "head"}
+
+
+def _drawings(data):
+    """グリフ名ごとの描画結果"""
+    font = TTFont(io.BytesIO(data))
+    glyph_set = font.getGlyphSet()
+    drawings = {}
+    for name in font.getGlyphOrder():
+        pen = RecordingPen()
+        glyph_set[name].draw(pen)
+        drawings[name] = pen.value
+    return drawings
+
+
+def _subset_after(data, setting):
+    """全グリフにエフェクトを適用してから、同じ条件でサブセット化した結果"""
+    font = TTFont(io.BytesIO(font_processor.process_bytes(data, {"effects": EFFECTS})))
+    SubsetConfig.from_config(setting).apply(font)
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_matches_subset_after_effects(cff):
+    """エフェクトの後にサブセット化した結果と一致し、GSUBの置き換え先も残ること"""
+    data = _font_bytes(cff)
+    setting = {"text": "一丁丂", "names": ["g00[5]"]}
+    output = font_processor.process_bytes(data, {"effects": EFFECTS, "subset": setting})
+    assert _tables(output) == _tables(_subset_after(data, setting))
+    source, drawings = _drawings(data), _drawings(output)
+    assert set(drawings) == {".notdef", "g000", "g001", "g002", "g005", "g010", "g011"}
+    assert drawings["g010"] != source["g010"] and drawings["g011"] != source["g011"]
+
+
+def test_layout_features():
+    """layout_featuresを空にするとGSUBの置き換え先は残らないこと"""
+    output = font_processor.process_bytes(_font_bytes(cff=False), {
+        "effects": EFFECTS, "subset": {"text": "一丁丂", "layout_features": []}})
+    assert set(TTFont(io.BytesIO(output)).getGlyphOrder()) == {".notdef", "g000", "g001", "g002"}
+
+
+def test_effects_run_only_on_kept_glyphs(monkeypatch):
+    """エフェクトは残るグリフだけに適用されること"""
+    decoded = []
+    from_glyf = GlyphOutline.from_glyf
+
+    def counting_from_glyf(glyph):
+        decoded.append(glyph)
+        return from_glyf(glyph)
+
+    monkeypatch.setattr(GlyphOutline, "from_glyf", staticmethod(counting_from_glyf))
+    processor = FontProcessor(config_dict={"effects": EFFECTS, "subset": {"text": "一"}}, require_paths=False)
+    processor.process_bytes(_font_bytes(cff=False))
+    # g000と、その縦書きの置き換え先のg010（.notdefは輪郭がない）
+    assert len(decoded) == 2
+    assert processor.report()["counters"]["glyphs_subset"] == 3
+
+
+def test_flavor_and_report(tmp_path):
+    """woffで出力し、レポートにサブセットの集計と所要時間が入ること"""
+    input_path = tmp_path / "input.ttf"
+    input_path.write_bytes(_font_bytes(cff=False))
+    output_path = tmp_path / "output.woff"
+    report = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(output_path),
+        "effects": EFFECTS,
+        "subset": {"unicodes": ["U+4E00-4E01"], "flavor": "woff"},
+    }).run()
+    assert output_path.read_bytes()[:4] == b"wOFF"
+    assert TTFont(str(output_path)).getGlyphOrder() == [".notdef", "g000", "g001", "g010"]
+    assert report["counters"]["glyphs_subset"] == 4 and report["timings"]["subset"] > 0
+
+
+@pytest.mark.parametrize("setting", [
+    "一丁",
+    {},
+    {"layout_features": ["*"]},
+    {"text": "一", "flavor": "eot"},
+    {"text": "一", "options": {"no_such_option": True}},
+    {"text": "一", "exclude": {"text": "丁"}},
+])
+def test_invalid_subset(setting):
+    """不正な指定はエラーになること"""
+    with pytest.raises(ValueError):
+        FontProcessor(config_dict={"effects": EFFECTS, "subset": setting}, require_paths=False)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, target.__dict__[name]))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    for cff in (False, True):
+        test_matches_subset_after_effects(cff)
+    test_layout_features()
+    monkeypatch = _MonkeyPatch()
+    try:
+        test_effects_run_only_on_kept_glyphs(monkeypatch)
+    finally:
+        monkeypatch.undo()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_flavor_and_report(pathlib.Path(tmp))
+    test_invalid_subset({"text": "一", "flavor": "eot"})
+    print("✅ サブセット化のテストが成功しました")
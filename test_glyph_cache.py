@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+グリフ単位の永続キャッシュ（effects/glyph_cache.py）の検証テスト
+
+確認内容:
+- 2回目の実行ではすべてのグリフがキャッシュから読まれ、出力が変わらないこと（TrueType / CFF）
+- パラメータを変えるとキャッシュは使われないこと
+- 処理に失敗したグリフはキャッシュせず、2回目の実行でも同じようにエラーに数えること（逐次 / 並列）
+- キャッシュから読んだグリフも、Unionの省略・品質チェックのスキップを1回目と同じように数えること（逐次 / 並列）
+- 容量上限を超えると最後に使われた時刻が古いものから削除されること
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontTools.ttLib import TTFont
+
+from effects.glyph_cache import GlyphCache, normalize_params
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font, build_test_font
+
+
+def _source_bytes(cff):
+    buf = io.BytesIO()
+    build_test_font(cff=cff).save(buf)
+    return buf.getvalue()
+
+
+def _round(data, cache_path, radius=40, workers=1, **extra):
+    params = {'radius': radius, 'quality_level': 'medium', 'workers': workers, **extra}
+    if cache_path:
+        params['glyph_cache'] = {'path': cache_path}
+    effect = RoundCornersEffect(params)
+    font = effect.apply(TTFont(io.BytesIO(data)))
+    font.recalcTimestamp = False
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue(), effect.cache_stats, effect.counters
+
+
+def _check_cached_run(cff):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        cache_path = os.path.join(tmpdir, "glyphs.sqlite")
+        data = _source_bytes(cff)
+        uncached, _, _ = _round(data, None)
+        first, first_stats, _ = _round(data, cache_path)
+        second, second_stats, _ = _round(data, cache_path)
+
+        assert first == uncached and second == uncached
+        assert first_stats['hits'] == 0 and first_stats['misses'] > 0
+        assert second_stats['misses'] == 0 and second_stats['hits'] == first_stats['misses']
+
+        # 半径を変えると別のキーになる
+        _, changed_stats, _ = _round(data, cache_path, radius=30)
+        assert changed_stats['hits'] == 0
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_truetype_cache_reuses_results():
+    """TrueType: 2回目はすべてキャッシュヒットし、出力が同一であること"""
+    _check_cached_run(cff=False)
+
+
+def test_cff_cache_reuses_results():
+    """CFF: 2回目はすべてキャッシュヒットし、出力が同一であること"""
+    _check_cached_run(cff=True)
+
+
+def test_failed_glyphs_not_cached():
+    """処理に失敗したグリフはキャッシュせず、キャッシュの有無でエラー数が変わらないこと"""
+    prepare = {'truetype': RoundCornersEffect._prepare_truetype_outline, 'cff': RoundCornersEffect._prepare_cff_outline}
+
+    def failing(kind):
+        def prepare_outline(self, glyph_name, outline):
+            # キャッシュのキーはグリフの内容から作るので、ほかに同じ形のグリフがないものを失敗させる
+            # （build_test_fontのg000-g002はg021-g023と同じ形）
+            if glyph_name == "g005":
+                raise RuntimeError("injected failure")
+            return prepare[kind](self, glyph_name, outline)
+        return prepare_outline
+
+    RoundCornersEffect._prepare_truetype_outline = failing('truetype')
+    RoundCornersEffect._prepare_cff_outline = failing('cff')
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for cff in (False, True):
+            for workers in (1, 2):
+                cache_path = os.path.join(tmpdir, f"glyphs-{cff}-{workers}.sqlite")
+                data = _source_bytes(cff)
+                first, first_stats, first_counters = _round(data, cache_path, workers=workers)
+                second, second_stats, second_counters = _round(data, cache_path, workers=workers)
+                assert first_counters['errors'] == second_counters['errors'] == 1
+                assert second == first
+                # 失敗したグリフだけがもう一度処理される
+                assert second_stats['misses'] == 1 and second_stats['hits'] == first_stats['misses'] - 1
+    finally:
+        RoundCornersEffect._prepare_truetype_outline = prepare['truetype']
+        RoundCornersEffect._prepare_cff_outline = prepare['cff']
+        shutil.rmtree(tmpdir)
+
+
+def test_cached_glyphs_keep_counters():
+    """キャッシュから読んだグリフも、union_skipped / glyphs_skipped_quality を1回目と同じように数えること"""
+    # thinは幅10の縦線（clipperエンジンの大きな半径では画が消えるので品質チェックでスキップされる）
+    glyphs = {"thin": [[(100, 100), (100, 600), (110, 600), (110, 100)]],
+              "box": [[(100, 100), (100, 600), (600, 600), (600, 100)]]}
+    cases = [("union_skipped", {'union': 'booleanoperations'})]
+    try:
+        import pyclipper  # noqa: F401
+        cases.append(("glyphs_skipped_quality", {'engine': 'clipper', 'radius': 200}))
+    except ImportError:
+        pass
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for cff in (False, True):
+            data = build_font({name: [points[::-1] for points in contours] if cff else contours
+                               for name, contours in glyphs.items()}, cff)
+            for counter, params in cases:
+                for workers in (1, 2):
+                    cache_path = os.path.join(tmpdir, f"glyphs-{cff}-{counter}-{workers}.sqlite")
+                    _, _, uncached = _round(data, None, workers=workers, **params)
+                    first, _, first_counters = _round(data, cache_path, workers=workers, **params)
+                    second, second_stats, second_counters = _round(data, cache_path, workers=workers, **params)
+                    assert second == first and second_stats['misses'] == 0
+                    assert uncached[counter] > 0
+                    for counters in (first_counters, second_counters):
+                        assert {key: value for key, value in counters.items()
+                                if not key.startswith('cache_')} == dict(uncached)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_lru_eviction():
+    """容量上限を超えると古いエントリから削除されること"""
+    tmpdir = tempfile.mkdtemp()
+    try:
+        with GlyphCache(os.path.join(tmpdir, "c.sqlite"), max_size_mb=3000 / (1024 * 1024)) as cache:
+            for i in range(3):
+                cache.put(f"k{i}", b"x" * 1000)
+            # k0を使ったのでk1が最も古くなる
+            assert cache.get("k0") is not None
+            cache.put("k3", b"x" * 1000)
+            assert cache.evictions >= 1
+            assert cache.get("k1") is None
+            assert cache.get("k0") is not None and cache.get("k3") is not None
+            assert cache.size_bytes <= 3000
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_normalize_params():
+    """数値の型の違いや出力に影響しないパラメータはキーに影響しないこと"""
+    assert normalize_params({'radius': 40, 'workers': 4}) == normalize_params({'radius': 40.0})
+    assert normalize_params({'radius': 40}) != normalize_params({'radius': 41})
+
+
+if __name__ == "__main__":
+    test_truetype_cache_reuses_results()
+    test_cff_cache_reuses_results()
+    test_failed_glyphs_not_cached()
+    test_cached_glyphs_keep_counters()
+    test_lru_eviction()
+    test_normalize_params()
+    print("✅ グリフキャッシュのテストが成功しました")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+配列ベースのグリフ輪郭表現（effects/glyph_outline.py）の検証テスト
+
+確認内容:
+- glyfグリフ・描画コマンドのどちらからも同じGlyphOutlineが得られること
+- 輪郭ごとの取り出し・連結が終点配列と整合すること
+- コンポーネント（CFFのseac）は輪郭に含めずに記録し、そのグリフはエラーにせず元のまま残すこと
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from effects.glyph_outline import GlyphOutline, GlyphOutlinePen
+from font_fixtures import build_font
+
+
+def _draw_two_contours(pen):
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 100))
+    pen.lineTo((100, 100))
+    pen.lineTo((100, 0))
+    pen.closePath()
+    pen.moveTo((20, 20))
+    pen.lineTo((80, 20))
+    pen.qCurveTo((50, 80), (20, 20))
+    pen.closePath()
+
+
+def test_from_glyf_matches_pen():
+    """glyfグリフから作成した輪郭とペンで記録した輪郭が一致すること"""
+    tt_pen = TTGlyphPen(None)
+    _draw_two_contours(tt_pen)
+    glyph = tt_pen.glyph()
+
+    from_glyf = GlyphOutline.from_glyf(glyph)
+    pen = GlyphOutlinePen()
+    _draw_two_contours(pen)
+
+    assert from_glyf.points.dtype == np.float64 and from_glyf.flags.dtype == np.uint8
+    assert from_glyf.ends.tolist() == list(glyph.endPtsOfContours)
+    assert from_glyf.num_contours == pen.outline.num_contours == 2
+    # 先頭の輪郭は座標・フラグとも同じ
+    assert from_glyf.contour(0)[0].tolist() == pen.outline.contour(0)[0].tolist()
+    assert from_glyf.bounds() == (0.0, 0.0, 100.0, 100.0)
+
+
+def test_contours_and_concatenate():
+    """輪郭ビューの取り出しと連結が往復で一致すること"""
+    pen = GlyphOutlinePen()
+    _draw_two_contours(pen)
+    outline = pen.outline
+
+    parts = [GlyphOutline(p, f, [len(p) - 1]) for p, f in outline.contours()]
+    assert [p.num_points for p in parts] == outline.contour_lengths().tolist()
+    assert GlyphOutline.concatenate(parts) == outline
+    assert outline.select([1]) == parts[1]
+    assert outline.starts.tolist() == [0, 4]
+
+
+def test_from_contours_accepts_dicts():
+    """従来の輪郭辞書から作成でき、空の輪郭は除かれること"""
+    outline = GlyphOutline.from_contours([
+        {'coords': [(0, 0), (1, 0), (1, 1)], 'flags': [1, 1, 1]},
+        {'coords': [], 'flags': []},
+    ])
+    assert outline.num_contours == 1
+    assert outline.ends.tolist() == [2]
+    assert GlyphOutline().bounds() is None
+
+
+def _build_seac_font():
+    """A・graveと、seac（endcharの4引数）でそれらを組み合わせたAgraveを持つCFFフォント"""
+    return build_font({
+        "A": [[(50, 0), (300, 700), (550, 0)]],
+        "grave": [[(150, 750), (250, 750), (350, 900), (250, 900)]],
+        # StandardEncodingで65がA、193がgrave
+        "Agrave": T2CharString(program=[600, 0, 0, 65, 193, "endchar"]),
+    }, cff=True, cmap={0x41: "A", 0x60: "grave", 0xC0: "Agrave"}, family="Seac Test", advance=600)
+
+
+def test_pen_records_components():
+    """コンポーネントは輪郭に含めずcomponentsに記録すること"""
+    pen = GlyphOutlinePen()
+    pen.addComponent("A", (1, 0, 0, 1, 0, 0))
+    assert pen.outline.num_contours == 0
+    assert pen.components == [("A", (1, 0, 0, 1, 0, 0))]
+
+
+def _charstring_program(data, glyph_name):
+    charstring = TTFont(io.BytesIO(data))["CFF "].cff.topDictIndex[0].CharStrings[glyph_name]
+    charstring.decompile()
+    return charstring.program
+
+
+@pytest.mark.parametrize("config", [{}, {"workers": 2}, {"pipeline": "glyph"}, {"corner_catalog": "catalog"}])
+def test_seac_glyph_left_unchanged(tmp_path, config):
+    """seacのグリフはエラーにせず元のまま残し、ほかのグリフは処理すること"""
+    from font_processor import FontProcessor
+
+    if "corner_catalog" in config:
+        config = {"corner_catalog": str(tmp_path / "seac.corners.npz")}
+    data = _build_seac_font()
+    processor = FontProcessor(config_dict={
+        "effects": [{"name": "round_corners", "params": {"radius": 30, "quality_level": "medium"}}], **config,
+    }, require_paths=False)
+    output = processor.process_bytes(data)
+    counters = processor.report()["counters"]
+    assert counters["errors"] == 0
+    assert counters["corners_rounded"] > 0
+    assert _charstring_program(output, "Agrave") == _charstring_program(data, "Agrave")
+
+
+if __name__ == "__main__":
+    test_from_glyf_matches_pen()
+    test_contours_and_concatenate()
+    test_from_contours_accepts_dicts()
+    test_pen_records_components()
+    import pathlib
+    import tempfile
+
+    for config in ({}, {"workers": 2}, {"pipeline": "glyph"}, {"corner_catalog": "catalog"}):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_seac_glyph_left_unchanged(pathlib.Path(tmp), config)
+    print("✅ GlyphOutlineのテストが成功しました")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+グリフ単位の融合パイプライン（pipeline: glyph）の検証テスト
+
+確認内容:
+- TrueTypeでは、融合パイプラインの出力がエフェクトごとにフォント全体を処理した場合と同一のバイト列になること
+  （同じエフェクトを2つ続けた場合も含む）
+- CFFでは、三次ベジェの曲線が三次ベジェのまま書き戻され、直線だけのグリフはエフェクトごとの処理と同じ形になること
+- CFFのCharStringのバイト列が、融合パイプラインとエフェクトごとの処理で同一になること
+- apply_outlineに対応しないエフェクトは従来どおりapplyで適用され、前後の対応エフェクトが別々のグループになること
+- 並列処理（workers > 1）でも逐次処理と同じ出力になること
+"""
+
+import io
+import os
+import sys
+import types
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from effects.base_effect import BaseEffect
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font, build_test_font
+from font_processor import FontProcessor
+
+
+def _box(cff):
+    """角が4つの正方形（CFFは反時計回り、TrueTypeは時計回り）"""
+    points = [(100, 100), (100, 600), (600, 600), (600, 100)]
+    return [points[::-1] if cff else points]
+
+
+def _arch(cff):
+    """上側が曲線（CFFは三次ベジェ、TrueTypeは二次スプライン）で下側に角が2つあるアーチ"""
+    if cff:
+        return [([(100, 100), (600, 100), (600, 400), (400, 600), (350, 600), (300, 600), (100, 400)],
+                 [1, 1, 0, 0, 1, 0, 0])]
+    return [([(100, 100), (600, 100), (600, 600), (350, 600), (100, 600)], [1, 1, 0, 1, 0])]
+
+
+def _font_bytes(cff):
+    return build_font({"box": _box(cff), "arch": _arch(cff), "space": []}, cff,
+                      cmap={0x41: "box", 0x42: "arch", 0x20: "space"}, family="Pipeline Test")
+
+
+def _run(tmp_path, data, effects, pipeline, workers=1):
+    """FontProcessorで処理し、(出力バイト列, レポート) を返す"""
+    input_path = tmp_path / "input.font"
+    output_path = tmp_path / f"output_{pipeline}_{workers}.font"
+    input_path.write_bytes(data)
+    processor = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(output_path),
+        "effects": effects,
+        "pipeline": pipeline,
+        "workers": workers,
+    })
+    original_save = processor.save_font
+
+    def save_font(font):
+        # 保存時刻で head.modified が変わらないようにする
+        font.recalcTimestamp = False
+        original_save(font)
+
+    processor.save_font = save_font
+    report = processor.run()
+    return output_path.read_bytes(), report
+
+
+ROUND = {"name": "round_corners", "params": {"radius": 30, "quality_level": "medium", "union": "none"}}
+ROUND_SMALL = {"name": "round_corners", "params": {"radius": 10, "quality_level": "medium", "union": "none"}}
+
+
+@pytest.mark.parametrize("effects", [[ROUND], [ROUND, ROUND_SMALL]])
+def test_truetype_matches_per_effect(tmp_path, effects):
+    """TrueTypeでは融合パイプラインとエフェクトごとの処理の出力が同一であること"""
+    data = _font_bytes(cff=False)
+    per_effect, per_effect_report = _run(tmp_path, data, effects, "effect")
+    fused, fused_report = _run(tmp_path, data, effects, "glyph")
+    assert fused == per_effect
+    assert fused_report["counters"]["corners_rounded"] == per_effect_report["counters"]["corners_rounded"] > 0
+    # 連続する対応エフェクトは1つのグループとして記録される
+    timings = fused_report["timings"]["effects"]
+    assert [entry["name"] for entry in timings] == ["+".join(effect["name"] for effect in effects)]
+    assert timings[0]["stages"]["decode"]["calls"] == 4
+    assert "rounding" in timings[0]["stages"]
+
+
+def test_cff_keeps_cubic_curves(tmp_path):
+    """CFFの三次ベジェは三次ベジェのまま書き戻され、直線だけのグリフはエフェクトごとの処理と同じになること"""
+    data = _font_bytes(cff=True)
+    fused, report = _run(tmp_path, data, [ROUND], "glyph")
+    per_effect, _ = _run(tmp_path, data, [ROUND], "effect")
+    assert report["counters"]["errors"] == 0
+    assert report["counters"]["corners_rounded"] > 0
+    original = TTFont(io.BytesIO(data)).getGlyphSet()
+    result = TTFont(io.BytesIO(fused)).getGlyphSet()
+    reference = TTFont(io.BytesIO(per_effect)).getGlyphSet()
+
+    pen = RecordingPen()
+    result["arch"].draw(pen)
+    curves = [args for operator, args in pen.value if operator == "curveTo"]
+    assert ((600, 400), (400, 600), (350, 600)) in curves
+    assert ((300, 600), (100, 400), (100, 100)) in curves
+    # 角を丸めても、曲線部分の形（面積）はほぼ変わらない
+    before, after = AreaPen(original), AreaPen(result)
+    original["arch"].draw(before)
+    result["arch"].draw(after)
+    assert abs(after.value) == pytest.approx(abs(before.value), rel=0.01)
+
+    fused_box, reference_box = RecordingPen(), RecordingPen()
+    result["box"].draw(fused_box)
+    reference["box"].draw(reference_box)
+    assert fused_box.value == reference_box.value
+    assert any(operator == "curveTo" for operator, _ in fused_box.value)
+    assert result["space"].width == 700
+
+
+def test_cff_charstrings_match_per_effect(tmp_path):
+    """CFFのCharStringは、融合パイプラインとエフェクトごとの処理で同じバイト列にエンコードされること"""
+    buf = io.BytesIO()
+    build_test_font(cff=True, glyph_count=40).save(buf)
+    fused, report = _run(tmp_path, buf.getvalue(), [ROUND], "glyph")
+    per_effect, _ = _run(tmp_path, buf.getvalue(), [ROUND], "effect")
+    assert report["counters"]["corners_rounded"] > 0
+
+    def bytecodes(data):
+        charStrings = TTFont(io.BytesIO(data))["CFF "].cff.topDictIndex[0].CharStrings
+        return {name: charStrings[name].bytecode for name in charStrings.keys()}
+
+    assert bytecodes(fused) == bytecodes(per_effect)
+
+
+class MarkWidthsEffect(BaseEffect):
+    """apply_outlineに対応しないテスト用エフェクト（送り幅を1だけ広げる）"""
+
+    def apply(self, font, **kwargs):
+        hmtx = font["hmtx"]
+        for name in hmtx.metrics:
+            width, lsb = hmtx[name]
+            hmtx[name] = (width + 1, lsb)
+        self.counters["widened"] += len(hmtx.metrics)
+        return font
+
+
+def test_effects_without_hook_use_apply(tmp_path, monkeypatch):
+    """対応しないエフェクトはapplyで適用され、前後の対応エフェクトは別のグループになること"""
+    module = types.ModuleType("effects.mark_widths_effect")
+    module.MarkWidthsEffect = MarkWidthsEffect
+    monkeypatch.setitem(sys.modules, "effects.mark_widths_effect", module)
+    assert RoundCornersEffect.supports_outline()
+    assert not MarkWidthsEffect.supports_outline()
+
+    data = _font_bytes(cff=False)
+    effects = [ROUND, {"name": "mark_widths"}, ROUND_SMALL]
+    per_effect, _ = _run(tmp_path, data, effects, "effect")
+    fused, report = _run(tmp_path, data, effects, "glyph")
+    assert fused == per_effect
+    assert report["counters"]["widened"] == 4
+    assert [entry["name"] for entry in report["timings"]["effects"]] == ["round_corners", "mark_widths", "round_corners"]
+    assert TTFont(io.BytesIO(fused))["hmtx"]["box"][0] == 701
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_parallel_matches_serial(tmp_path, cff):
+    """workers > 1 でも逐次処理と同じ出力・集計になること"""
+    data = _font_bytes(cff)
+    effects = [ROUND, ROUND_SMALL]
+    serial, serial_report = _run(tmp_path, data, effects, "glyph")
+    parallel, parallel_report = _run(tmp_path, data, effects, "glyph", workers=2)
+    assert parallel == serial
+    assert parallel_report["counters"] == serial_report["counters"]
+
+
+def test_pipeline_setting():
+    """不明なpipelineはエラーにすること"""
+    config = {"input_font": "in.ttf", "output_font": "out.ttf"}
+    assert FontProcessor(config_dict=config).pipeline == "effect"
+    assert FontProcessor(config_dict=config, pipeline="glyph").pipeline == "glyph"
+    with pytest.raises(ValueError):
+        FontProcessor(config_dict=dict(config, pipeline="fused"))
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def setitem(self, mapping, key, value):
+            mapping[key] = value
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = pathlib.Path(tmp)
+        test_truetype_matches_per_effect(tmp_path, [ROUND])
+        test_truetype_matches_per_effect(tmp_path, [ROUND, ROUND_SMALL])
+        test_cff_keeps_cubic_curves(tmp_path)
+        test_cff_charstrings_match_per_effect(tmp_path)
+        test_effects_without_hook_use_apply(tmp_path, _MonkeyPatch())
+        for cff in (False, True):
+            test_parallel_matches_serial(tmp_path, cff)
+    test_pipeline_setting()
+    print("✅ グリフ単位の融合パイプラインのテストが成功しました")
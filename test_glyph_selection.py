@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+グリフの選択（glyphs設定、effects/glyph_selection.py）の検証テスト
+
+確認内容:
+- unicodes / text / text_file / names / exclude の指定から、cmapを通して処理するグリフが選ばれること
+- 選ばれたグリフは全グリフを処理した場合と同じ結果になり、選ばれなかったグリフは元のまま残ること
+  （TrueType / CFF、pipeline: effect / glyph、並列ワーカー、コーナーカタログ、パラメータスイープ、Variable Fontのマスター）
+- 選ばれなかったグリフはデコードされないこと
+- 不正な指定はFontProcessorの生成時にValueErrorになること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+import font_processor
+from effects.glyph_outline import GlyphOutline
+from effects.glyph_selection import GlyphSelection, parse_unicode_range
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+from test_variable_masters import build_variable_font
+
+EFFECTS = [{"name": "round_corners", "params": {"radius": 40, "quality_level": "medium"}}]
+GLYPH_COUNT = 12
+
+
+def _font_bytes(cff):
+    buf = io.BytesIO()
+    build_test_font(cff=cff, glyph_count=GLYPH_COUNT).save(buf)
+    return buf.getvalue()
+
+
+def _drawings(data):
+    """グリフ名ごとの描画結果"""
+    font = TTFont(io.BytesIO(data))
+    glyph_set = font.getGlyphSet()
+    drawings = {}
+    for name in font.getGlyphOrder():
+        pen = RecordingPen()
+        glyph_set[name].draw(pen)
+        drawings[name] = pen.value
+    return drawings
+
+
+def _tables(data):
+    """保存時刻（head）以外のテーブルのバイト列"""
+    font = TTFont(io.BytesIO(data))
+    return {tag: font.reader[tag] for tag in font.reader.keys() if tag != "head"}
+
+
+def _process(data, **config):
+    return font_processor.process_bytes(data, dict({"effects": EFFECTS}, **config))
+
+
+def test_parse_ranges():
+    """コードポイントの範囲の書式"""
+    assert parse_unicode_range("U+3041-3096") == (0x3041, 0x3096)
+    assert parse_unicode_range("4e00..4E0F") == (0x4E00, 0x4E0F)
+    assert parse_unicode_range("U+30A1") == (0x30A1, 0x30A1)
+    assert parse_unicode_range(0x41) == (0x41, 0x41)
+    assert parse_unicode_range(["U+41", 0x5A]) == (0x41, 0x5A)
+    selection = GlyphSelection.from_config({"unicodes": ["U+4E00-4E02", "4E03"], "text": "一丁\n"})
+    assert selection.include.ranges == ((0x4E00, 0x4E03),)
+    assert GlyphSelection.from_config(None) is None and GlyphSelection.from_config({}) is None
+
+
+def test_resolve(tmp_path):
+    """unicodes / text / text_file / names / exclude からグリフ名が選ばれること"""
+    font = build_test_font(glyph_count=GLYPH_COUNT)
+    text_file = tmp_path / "chars.txt"
+    text_file.write_text("丂\n七\n", encoding="utf-8")
+    resolve = lambda setting: sorted(GlyphSelection.from_config(setting).resolve(font))
+    assert resolve({"unicodes": ["U+4E00-4E01"]}) == ["g000", "g001"]
+    assert resolve({"text": "丁一", "text_file": str(text_file)}) == ["g000", "g001", "g002", "g003"]
+    assert resolve({"names": ["g00[5-6]", ".notdef"]}) == [".notdef", "g005", "g006"]
+    assert resolve({"names": ["g00"]}) == []
+    assert resolve({"unicodes": ["U+4E00-4E05"], "exclude": {"text": "丁", "names": ["g00[45]"]}}) == ["g000", "g002", "g003"]
+    assert len(resolve({"exclude": {"text": "一"}})) == GLYPH_COUNT
+
+
+@pytest.mark.parametrize("cff,config", [
+    (False, {}),
+    (True, {}),
+    (False, {"pipeline": "glyph"}),
+    (True, {"pipeline": "glyph"}),
+    (False, {"workers": 2}),
+    (True, {"workers": 2}),
+])
+def test_only_selected_glyphs_change(cff, config):
+    """選んだグリフは全グリフの処理と同じ結果に、それ以外は元のままになること"""
+    data = _font_bytes(cff)
+    source = _drawings(data)
+    full = _drawings(_process(data, **config))
+    selected = _drawings(_process(data, glyphs={"unicodes": ["U+4E00-4E05"], "exclude": {"text": "丂"}}, **config))
+    for name in source:
+        if name in ("g000", "g001", "g003", "g004", "g005"):
+            assert selected[name] == full[name] != source[name]
+        else:
+            assert selected[name] == source[name]
+
+
+def test_catalog_and_sweep(tmp_path):
+    """コーナーカタログとパラメータスイープでも選んだグリフだけを処理すること"""
+    data = _font_bytes(cff=False)
+    glyphs = {"text": "一丁"}
+    expected = _drawings(_process(data, glyphs=glyphs))
+    catalog = str(tmp_path / "font.corners.npz")
+    for _ in range(2):
+        assert _drawings(_process(data, glyphs=glyphs, corner_catalog=catalog)) == expected
+
+    input_path = tmp_path / "input.ttf"
+    input_path.write_bytes(data)
+    report = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(tmp_path / "output.ttf"),
+        "effects": [{"name": "round_corners", "params": {"radius": [20, 40], "quality_level": "medium"}}],
+        "glyphs": glyphs,
+    }).run()
+    assert report["counters"]["glyphs_selected"] == 2
+    assert _drawings((tmp_path / "output_r40.ttf").read_bytes()) == expected
+    assert all(entry["counters"]["glyphs_processed"] <= 2 for entry in report["sweep"])
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_variable_masters(cff):
+    """Variable Fontのマスター（gvar / CFF2）でも選んだグリフだけを処理すること"""
+    data = build_variable_font(cff)
+    assert _tables(_process(data, glyphs={"text": "A"})) == _tables(_process(data))
+    assert _tables(_process(data, glyphs={"exclude": {"text": "A"}})) == _tables(data)
+
+
+def test_unselected_glyphs_not_decoded(monkeypatch):
+    """選ばれなかったグリフはデコードされないこと"""
+    decoded = []
+    from_glyf = GlyphOutline.from_glyf
+
+    def counting_from_glyf(glyph):
+        decoded.append(glyph)
+        return from_glyf(glyph)
+
+    monkeypatch.setattr(GlyphOutline, "from_glyf", staticmethod(counting_from_glyf))
+    processor = FontProcessor(config_dict={"effects": EFFECTS, "glyphs": {"text": "一丁"}}, require_paths=False)
+    processor.process_bytes(_font_bytes(cff=False))
+    assert len(decoded) == 2
+    assert processor.report()["counters"]["glyphs_selected"] == 2
+
+
+@pytest.mark.parametrize("glyphs", [
+    ["U+4E00"],
+    {"unicodes": ["U+ZZZZ"]},
+    {"unicodes": ["U+4E10-4E00"]},
+    {"names": ["g00["]},
+    {"ranges": ["U+4E00"]},
+    {"exclude": ["U+4E00"]},
+])
+def test_invalid_selection(glyphs):
+    """不正な指定はエラーになること"""
+    with pytest.raises(ValueError):
+        FontProcessor(config_dict={"effects": EFFECTS, "glyphs": glyphs}, require_paths=False)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, target.__dict__[name]))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    test_parse_ranges()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_resolve(pathlib.Path(tmp))
+    for cff in (False, True):
+        for config in ({}, {"pipeline": "glyph"}, {"workers": 2}):
+            test_only_selected_glyphs_change(cff, config)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_catalog_and_sweep(pathlib.Path(tmp))
+    for cff in (False, True):
+        test_variable_masters(cff)
+    monkeypatch = _MonkeyPatch()
+    try:
+        test_unselected_glyphs_not_decoded(monkeypatch)
+    finally:
+        monkeypatch.undo()
+    test_invalid_selection({"names": ["g00["]})
+    print("✅ グリフの選択のテストが成功しました")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Variable Fontの静的インスタンスのキャッシュ（effects/instance_cache.py）の検証テスト
+
+確認内容:
+- 同じフォント・同じ軸の位置の2回目以降はinstancerを呼ばずにキャッシュから読み込み、出力が初回と同一になること
+- キャッシュを使わない場合とも出力が同一になること
+- 同じインスタンスになる軸の指定（700と700.0、範囲外の値と範囲の端）は同じキーに、異なる位置は別のキーになること
+- 入力フォントの内容が変わると別のキーになること
+- 容量の上限を超えると、最後に使われた時刻が古いものから削除されること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontTools.designspaceLib import AxisDescriptor
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables.TupleVariation import TupleVariation
+from fontTools.varLib import instancer
+
+from effects.instance_cache import InstanceCache, file_digest, normalize_location
+from font_fixtures import font_builder
+from font_processor import FontProcessor
+
+
+def build_variable_font(stem_bold=400):
+    """wght軸（100〜900）を持ち、太さで縦画の幅が変わるVariable Font"""
+    fb = font_builder({"box": [[(100, 100), (100, 600), (200, 600), (200, 100)]]},
+                      cmap={0x41: "box"}, family="Instance Test")
+
+    axis = AxisDescriptor()
+    axis.tag, axis.name, axis.minimum, axis.default, axis.maximum = "wght", "Weight", 100, 400, 900
+    fb.setupFvar([axis], [])
+    # wght=900で縦画の右側の2点を動かす（4点+ファントムポイント4点）
+    delta = stem_bold - 100
+    fb.setupGvar({
+        "box": [TupleVariation({"wght": (0, 1.0, 1.0)}, [(0, 0), (0, 0), (delta, 0), (delta, 0)] + [(0, 0)] * 4)],
+    })
+    buf = io.BytesIO()
+    fb.save(buf)
+    return buf.getvalue()
+
+
+ROUND = {"name": "round_corners", "params": {"radius": 20, "quality_level": "medium", "union": "none"}}
+
+
+def _run(tmp_path, input_path, variation, cache_dir, name="output.ttf"):
+    output_path = tmp_path / name
+    processor = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(output_path),
+        "effects": [ROUND],
+        "variation": variation,
+        "instance_cache": {"path": str(cache_dir)} if cache_dir else None,
+    })
+    original_save = processor.save_font
+
+    def save_font(font):
+        # 保存時刻で head.modified が変わらないようにする
+        font.recalcTimestamp = False
+        original_save(font)
+
+    processor.save_font = save_font
+    report = processor.run()
+    return output_path.read_bytes(), report
+
+
+def test_second_run_skips_instancing(tmp_path, monkeypatch):
+    """2回目はinstancerを呼ばず、出力が初回と同一になること"""
+    input_path = tmp_path / "variable.ttf"
+    input_path.write_bytes(build_variable_font())
+    cache_dir = tmp_path / "instances"
+
+    first, report = _run(tmp_path, input_path, {"wght": 700}, cache_dir, "first.ttf")
+    assert report["counters"]["instance_cache_misses"] == 1
+    assert report["counters"]["corners_rounded"] > 0
+    assert len(InstanceCache(str(cache_dir))) == 1
+
+    def no_instancing(*args, **kwargs):
+        raise AssertionError("instancer should not be called on a cache hit")
+
+    monkeypatch.setattr(instancer, "instantiateVariableFont", no_instancing)
+    second, report = _run(tmp_path, input_path, {"wght": "700.0"}, cache_dir, "second.ttf")
+    assert report["counters"]["instance_cache_hits"] == 1
+    assert report["timings"]["instancing"] == 0.0
+    assert second == first
+    font = TTFont(io.BytesIO(second))
+    assert "fvar" not in font and "gvar" not in font
+
+
+def test_same_output_without_cache(tmp_path):
+    """キャッシュを使っても使わなくても同じ出力になること"""
+    input_path = tmp_path / "variable.ttf"
+    input_path.write_bytes(build_variable_font())
+    cached, _ = _run(tmp_path, input_path, {"wght": 900}, tmp_path / "instances", "cached.ttf")
+    plain, report = _run(tmp_path, input_path, {"wght": 900}, None, "plain.ttf")
+    assert "instance_cache_misses" not in report["counters"]
+    assert cached == plain
+    glyf = TTFont(io.BytesIO(cached))["glyf"]
+    assert max(x for x, _ in glyf["box"].getCoordinates(glyf)[0]) == 500
+
+
+def test_key_normalization(tmp_path):
+    """同じインスタンスになる指定は同じキー、異なる位置やフォントは別のキーになること"""
+    path = tmp_path / "variable.ttf"
+    path.write_bytes(build_variable_font())
+    font = TTFont(str(path))
+    digest = file_digest(str(path))
+
+    def key(variation):
+        return InstanceCache.make_key(digest, normalize_location(font, variation))
+
+    assert key({"wght": 700}) == key({"wght": 700.0})
+    assert key({"wght": 1000}) == key({"wght": 900})
+    assert key({"wght": 700}) != key({"wght": 650})
+    assert normalize_location(font, {"wdth": 100}) is None
+
+    other = tmp_path / "other.ttf"
+    other.write_bytes(build_variable_font(stem_bold=300))
+    assert InstanceCache.make_key(file_digest(str(other)), normalize_location(font, {"wght": 700})) != key({"wght": 700})
+
+
+def test_lru_eviction(tmp_path):
+    """容量の上限を超えると最後に使われた時刻が古いものから削除されること"""
+    font = TTFont(io.BytesIO(build_variable_font()))
+    size = len(InstanceCache(str(tmp_path / "probe")).put("probe", font))
+    cache = InstanceCache(str(tmp_path / "instances"), max_size_mb=(size * 2.5) / (1024 * 1024))
+
+    cache.put("a", font)
+    cache.put("b", font)
+    # aを最近使ったことにする（bのほうが古くなる）
+    stamp = os.stat(cache._file("a")).st_mtime
+    os.utime(cache._file("b"), (stamp - 10, stamp - 10))
+    assert cache.get("a") is not None
+    cache.put("c", font)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["stores"]) == (2, 1, 3)
+    assert stats["size_bytes"] <= cache.max_bytes
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    for test in (test_second_run_skips_instancing, test_same_output_without_cache, test_key_normalization,
+                 test_lru_eviction):
+        with tempfile.TemporaryDirectory() as tmp:
+            if test is test_second_run_skips_instancing:
+                monkeypatch = _MonkeyPatch()
+                try:
+                    test(pathlib.Path(tmp), monkeypatch)
+                finally:
+                    monkeypatch.undo()
+            else:
+                test(pathlib.Path(tmp))
+    print("✅ インスタンスキャッシュのテストが成功しました")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+輪郭の重なりの事前スクリーニング（overlap_screen）の検証テスト
+
+確認内容:
+- 交差する輪郭・自己交差する輪郭を重なりありと判定すること
+- 離れた輪郭・穴（内側に含まれる輪郭）は重なりなしと判定すること
+- 二次スプライン（オフカーブ点のみの輪郭を含む）と三次ベジェの曲線を折れ線にして判定すること
+- 線分の組はボックスが重なるものだけを一定数ずつ作り、点の多い輪郭でも全組み合わせを作らないこと
+- 重なりのないグリフはUnionを省略し、union_skippedに数えること
+- 既定の設定（overlap_screen: auto）ではbooleanOperationsで統合するときだけスクリーニングすること
+- params['overlap_screen'] によるスクリーニングの有無の選択（'false'などの文字列を含む）
+"""
+
+import io
+import math
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from fontTools.ttLib import TTFont
+
+from effects import overlap_screen
+from effects.glyph_outline import GlyphOutline
+from effects.overlap_screen import candidate_pairs, glyph_polylines, has_overlaps
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font
+
+
+def _square(x, y, size, clockwise=True):
+    points = [(x, y), (x, y + size), (x + size, y + size), (x + size, y)]
+    if not clockwise:
+        points.reverse()
+    return points, [1] * 4
+
+
+def test_line_contours():
+    """直線だけの輪郭の交差・接触・包含の判定"""
+    crossing = GlyphOutline.from_contours([_square(0, 0, 100), _square(50, 50, 100)])
+    assert has_overlaps(crossing)
+    # 辺が接しているだけでも統合の対象にする
+    touching = GlyphOutline.from_contours([_square(0, 0, 100), _square(100, 0, 100)])
+    assert has_overlaps(touching)
+    apart = GlyphOutline.from_contours([_square(0, 0, 100), _square(110, 0, 100)])
+    assert not has_overlaps(apart)
+    # 穴（逆回り）は交差しないので重なりなし
+    hole = GlyphOutline.from_contours([_square(0, 0, 300), _square(100, 100, 100, clockwise=False)])
+    assert not has_overlaps(hole)
+    # 8の字に自己交差する輪郭
+    bow_tie = GlyphOutline.from_contours([([(0, 0), (100, 100), (100, 0), (0, 100)], [1] * 4)])
+    assert has_overlaps(bow_tie)
+    # 始点と同じ終点があっても長さ0の線分で誤判定しない
+    closed = GlyphOutline.from_contours([([(0, 0), (0, 100), (100, 100), (100, 0), (0, 0)], [1] * 5)])
+    assert not has_overlaps(closed)
+    assert not has_overlaps(GlyphOutline.from_contours([]))
+
+
+def test_quadratic_contours():
+    """二次スプラインは曲線に沿って判定し、制御点のボックスだけでは重なりにしないこと"""
+    # オフカーブ点だけの輪郭（円に近い形）
+    circle = GlyphOutline.from_contours([([(0, 100), (100, 100), (100, 0), (0, 0)], [0] * 4)])
+    vertices, offsets = glyph_polylines(circle)
+    assert list(offsets) == [0, len(vertices)]
+    assert vertices.min(axis=0).tolist() == [0, 0]
+    assert vertices.max(axis=0).tolist() == [100, 100]
+    assert not has_overlaps(circle)
+
+    # 三角形の内側に、制御点が三角形の外に出る曲線の輪郭（曲線自体は三角形の内側）
+    triangle = ([(0, 0), (200, 400), (400, 0)], [1, 1, 1])
+    inner = ([(60, 80), (340, 80), (200, 480)], [1, 1, 0])
+    assert not has_overlaps(GlyphOutline.from_contours([triangle, inner]))
+    # 曲線が三角形の辺をまたぐ場合は重なりあり
+    bulging = ([(60, 80), (340, 80), (200, 900)], [1, 1, 0])
+    assert has_overlaps(GlyphOutline.from_contours([triangle, bulging]))
+
+
+def test_cubic_contours():
+    """cubic=Trueでは連続する2つのオフカーブ点を三次ベジェとして判定すること"""
+    arch = ([(0, 0), (0, 300), (300, 300), (300, 0)], [1, 0, 0, 1])
+    # 三次ベジェの頂点は y=225 なので、y=240 の横画とは交差しない
+    bar = _square(100, 240, 50)
+    assert not has_overlaps(GlyphOutline.from_contours([arch, bar]), cubic=True)
+    low_bar = _square(100, 200, 50)
+    assert has_overlaps(GlyphOutline.from_contours([arch, low_bar]), cubic=True)
+
+
+def test_candidate_pairs():
+    """ボックスが重なる輪郭の組だけを列挙すること"""
+    boxes = np.array([
+        [0, 0, 100, 100],
+        [50, 50, 150, 150],
+        [200, 0, 300, 100],
+        [90, 200, 120, 300],
+    ], dtype=float)
+    assert sorted(candidate_pairs(boxes)) == [(0, 1)]
+
+
+def test_chunked_pairs():
+    """組をchunk個ずつに分けて作っても、ボックスが重なる組をすべて1度ずつ列挙すること"""
+    rng = np.random.default_rng(0)
+    lows = rng.uniform(0, 100, (60, 2))
+    highs = lows + rng.uniform(0, 20, (60, 2))
+    expected = {(i, j) for i in range(60) for j in range(i + 1, 60)
+                if np.all(lows[i] <= highs[j]) and np.all(lows[j] <= highs[i])}
+    for chunk in (1, 7, overlap_screen.PAIR_CHUNK):
+        pairs = [tuple(sorted(pair)) for i, j in overlap_screen._overlapping_boxes(lows, highs, chunk)
+                 for pair in zip(i.tolist(), j.tolist())]
+        assert len(pairs) == len(set(pairs)) and set(pairs) == expected
+
+
+def test_large_contour(monkeypatch):
+    """二次曲線300個の輪郭でも線分の組は一定数ずつしか作らず、自己交差を見つけること"""
+    points, flags = [], []
+    for k in range(600):
+        angle = math.pi * k / 300
+        radius = 300 if k % 2 == 0 else 900
+        points.append((500 + radius * math.cos(angle), 500 + radius * math.sin(angle)))
+        flags.append(1 - k % 2)
+    chunks = []
+    overlapping_boxes = overlap_screen._overlapping_boxes
+
+    def recording_boxes(lows, highs, chunk=overlap_screen.PAIR_CHUNK):
+        for i, j in overlapping_boxes(lows, highs, chunk):
+            chunks.append(len(i))
+            yield i, j
+
+    monkeypatch.setattr(overlap_screen, "_overlapping_boxes", recording_boxes)
+    star = GlyphOutline.from_contours([(points, flags)])
+    assert len(glyph_polylines(star)[0]) > 5000
+    assert not has_overlaps(star)
+    assert chunks and max(chunks) <= overlap_screen.PAIR_CHUNK
+    # 始点を反対側に動かすと、その前後の曲線が輪郭の反対側を横切る
+    points[0] = (100, 500)
+    assert has_overlaps(GlyphOutline.from_contours([(points, flags)]))
+
+
+def _build_font(cff):
+    """重なった十字のグリフと、重なりのない口の字（穴あき）のグリフを持つフォント"""
+    return build_font({
+        "cross": [[(100, 300), (100, 400), (600, 400), (600, 300)],
+                  [(300, 50), (300, 650), (400, 650), (400, 50)]],
+        "square": [_square(100, 100, 500), _square(200, 200, 300, clockwise=False)],
+    }, cff, cmap={0x5341: "cross", 0x53E3: "square"}, family="Overlap Test")
+
+
+@pytest.mark.parametrize("cff", [False, True])
+@pytest.mark.parametrize("params", [
+    {'union': 'booleanoperations'},
+    {'union': 'booleanoperations', 'overlap_screen': 'auto'},
+    {'overlap_screen': True},
+    {'overlap_screen': 'yes'},
+])
+def test_effect_skips_union_without_overlaps(cff, params):
+    """重なりのあるグリフだけ統合し、ないグリフはUnionを省略して数えること（booleanOperationsでの既定の設定を含む）"""
+    union = params.get('union', 'pathops')
+    pytest.importorskip({'pathops': 'pathops', 'booleanoperations': 'booleanOperations'}[union])
+    font = TTFont(io.BytesIO(_build_font(cff)))
+    effect = RoundCornersEffect({'radius': 20, 'quality_level': 'medium', **params})
+    effect.apply(font)
+    assert effect.union_backend == union
+    assert effect.counters['union_skipped'] == 1
+    assert effect.timings.calls['union'] == 1
+    assert effect.timings.calls['overlap_screen'] == 2
+
+
+@pytest.mark.parametrize("setting", [None, 'auto', False, 'false', 'no', 'off', 'False'])
+def test_effect_unions_all_without_screen(setting):
+    """スクリーニングしない指定と、pathopsでの既定（auto）では全グリフを統合すること"""
+    pytest.importorskip("pathops")
+    font = TTFont(io.BytesIO(_build_font(cff=False)))
+    effect = RoundCornersEffect({'radius': 20, 'quality_level': 'medium', 'overlap_screen': setting})
+    effect.apply(font)
+    assert effect.overlap_screen is False
+    assert effect.counters['union_skipped'] == 0
+    assert effect.timings.calls['union'] == 2
+
+
+def test_overlap_screen_setting():
+    """'auto'はbooleanOperationsのときだけ調べ、文字列は真偽値として解釈し、統合しない設定では調べないこと"""
+    for union in ('pathops', 'booleanoperations'):
+        for setting in (None, 'auto', 'AUTO'):
+            effect = RoundCornersEffect({'union': union, 'overlap_screen': setting})
+            if effect.union_backend == union:
+                assert effect.overlap_screen is (union == 'booleanoperations')
+        effect = RoundCornersEffect({'union': union, 'overlap_screen': 'true'})
+        if effect.union_backend == union:
+            assert effect.overlap_screen is True
+    assert RoundCornersEffect({'overlap_screen': 'false'}).overlap_screen is False
+    assert RoundCornersEffect({'overlap_screen': 'off'}).overlap_screen is False
+    assert RoundCornersEffect({'union': 'none', 'overlap_screen': True}).overlap_screen is False
+    assert RoundCornersEffect({'union': 'none'}).overlap_screen is False
+    with pytest.raises(ValueError):
+        RoundCornersEffect({'overlap_screen': 'sometimes'})
+
+
+if __name__ == "__main__":
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, target.__dict__[name]))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    test_line_contours()
+    test_quadratic_contours()
+    test_cubic_contours()
+    test_candidate_pairs()
+    test_chunked_pairs()
+    monkeypatch = _MonkeyPatch()
+    try:
+        test_large_contour(monkeypatch)
+    finally:
+        monkeypatch.undo()
+    for cff in (False, True):
+        for params in ({'union': 'booleanoperations'}, {'union': 'booleanoperations', 'overlap_screen': 'auto'},
+                       {'overlap_screen': True}, {'overlap_screen': 'yes'}):
+            test_effect_skips_union_without_overlaps(cff, params)
+    for setting in (None, 'auto', False, 'false', 'no', 'off', 'False'):
+        test_effect_unions_all_without_screen(setting)
+    test_overlap_screen_setting()
+    print("✅ 輪郭の重なりの事前スクリーニングのテストが成功しました")
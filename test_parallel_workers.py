@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+並列ワーカー（workers設定）の検証テスト
+
+確認内容:
+- workers > 1 の出力が逐次処理と完全に同一のバイト列になること
+- TrueType / CFF の両方で確認する
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontTools.ttLib import TTFont
+
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_test_font
+
+
+def _round_to_bytes(font, workers):
+    effect = RoundCornersEffect({'radius': 40, 'quality_level': 'medium', 'workers': workers})
+    font = effect.apply(font)
+    # 保存時刻で head.modified が変わらないようにする
+    font.recalcTimestamp = False
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _check_identical(cff):
+    # 生成時刻の差が出ないよう、同じバイト列から2つのフォントを読み込む
+    buf = io.BytesIO()
+    build_test_font(cff=cff).save(buf)
+    serial = _round_to_bytes(TTFont(io.BytesIO(buf.getvalue())), workers=1)
+    parallel = _round_to_bytes(TTFont(io.BytesIO(buf.getvalue())), workers=3)
+    return serial, parallel
+
+
+def test_truetype_parallel_matches_serial():
+    """TrueType: 並列処理の出力が逐次処理と同一であること"""
+    serial, parallel = _check_identical(cff=False)
+    assert serial == parallel
+
+
+def test_cff_parallel_matches_serial():
+    """CFF: 並列処理の出力が逐次処理と同一であること"""
+    serial, parallel = _check_identical(cff=True)
+    assert serial == parallel
+
+
+def test_parallel_output_is_modified():
+    """並列処理でも実際に角丸処理が行われていること"""
+    for cff in (False, True):
+        original = build_test_font(cff=cff)
+        original_glyph = _glyph_commands(original, "g000")
+        parallel = TTFont(io.BytesIO(_round_to_bytes(build_test_font(cff=cff), workers=2)))
+        assert _glyph_commands(parallel, "g000") != original_glyph
+
+
+def _glyph_commands(font, glyph_name):
+    from fontTools.pens.recordingPen import RecordingPen
+    pen = RecordingPen()
+    font.getGlyphSet()[glyph_name].draw(pen)
+    return pen.value
+
+
+if __name__ == "__main__":
+    test_truetype_parallel_matches_serial()
+    test_cff_parallel_matches_serial()
+    test_parallel_output_is_modified()
+    print("✅ 並列処理の出力は逐次処理と同一です")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+パス統合（Union）バックエンドの検証テスト
+
+確認内容:
+- skia-pathopsのPathとGlyphOutlineの相互変換で二次・三次ベジェが保たれること
+- 重なった輪郭がpathopsで1つの輪郭に統合されること
+- 重なった輪郭がbooleanOperationsでも統合され、二次スプライン（TrueType）・三次ベジェ（CFF）の曲線が正しく扱われること
+- params['union'] によるバックエンドの選択（auto / pathops / booleanoperations / none）
+- pathops・booleanOperationsを使った角丸処理でも逐次処理と並列処理の出力が一致すること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from fontTools.pens.areaPen import AreaPen
+from fontTools.ttLib import TTFont
+
+from effects.glyph_outline import GlyphOutline, GlyphOutlinePen
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font
+
+pathops = pytest.importorskip("pathops")
+
+
+def _area(path):
+    pen = AreaPen()
+    path.draw(pen)
+    return abs(pen.value)
+
+
+# 重なった横画と縦画（十字）
+CROSS = [[(100, 300), (100, 400), (600, 400), (600, 300)],
+         [(300, 50), (300, 650), (400, 650), (400, 50)]]
+
+
+def test_skia_round_trip_keeps_curves():
+    """二次スプライン（TrueType）と三次ベジェ（CFF）がPathとの往復で保たれること"""
+    effect = RoundCornersEffect({'union': 'pathops'})
+
+    # TrueType: オフカーブ点が連続する二次スプライン
+    quadratic = GlyphOutline.from_contours([
+        ([(100, 100), (100, 500), (500, 500), (500, 100)], [1, 0, 0, 1]),
+    ])
+    result = effect._skia_path_to_contours(effect._contours_to_skia_path(quadratic))
+    assert result == quadratic
+
+    # CFF: 三次ベジェと直線
+    cubic = GlyphOutline.from_contours([
+        ([(100, 100), (150, 400), (450, 400), (500, 100)], [1, 0, 0, 1]),
+    ])
+    result = effect._skia_path_to_contours(effect._contours_to_skia_path(cubic, cubic=True), cubic=True)
+    assert result == cubic
+
+
+def test_pathops_union_merges_overlaps():
+    """重なった輪郭が面積を保ったまま1つに統合されること"""
+    effect = RoundCornersEffect({'union': 'pathops'})
+    outline = GlyphOutline.from_contours([(points, [1] * 4) for points in CROSS])
+
+    for cubic in (False, True):
+        merged = effect._union_outline("cross", outline, cubic=cubic)
+        assert merged.num_contours == 1
+        assert merged.num_points == 12
+        # 重なりを除いた面積: 500*100 + 100*600 - 100*100
+        assert _area(effect._contours_to_skia_path(merged, cubic=cubic)) == pytest.approx(100000)
+        # 始点と同じ終点は残さない
+        assert not np.array_equal(merged.points[0], merged.points[-1])
+
+
+def _outline_area(outline, cubic):
+    pen = AreaPen()
+    outline.draw(pen, cubic=cubic)
+    return abs(pen.value)
+
+
+@pytest.mark.parametrize("cubic", [False, True])
+def test_boolean_operations_union_merges_overlaps(cubic):
+    """booleanOperationsで重なった輪郭が統合され、曲線が二次・三次として正しく扱われること"""
+    pytest.importorskip("booleanOperations")
+    effect = RoundCornersEffect({'union': 'booleanoperations'})
+    assert effect.union_backend == 'booleanoperations'
+    # 横長の矩形と、上端が2つ続きのオフカーブ点で膨らんだ縦長の形（重なりは200x100の矩形）。
+    # 縦長の形は曲線から始まる（始点がオフカーブ点）
+    outline = GlyphOutline.from_contours([
+        ([(0, 0), (0, 200), (400, 200), (400, 0)], [1, 1, 1, 1]),
+        ([(300, 700), (300, 500), (300, 100), (100, 100), (100, 500), (100, 700)], [0, 1, 1, 1, 1, 0]),
+    ])
+    expected = sum(_outline_area(GlyphOutline.from_contours([contour]), cubic) for contour in outline.contours()) - 20000
+    merged = effect._union_outline("bulge", outline, cubic=cubic)
+    assert effect.counters['union_failed'] == 0
+    assert merged.num_contours == 1
+    assert _outline_area(merged, cubic) == pytest.approx(expected, rel=0.002)
+    assert not np.array_equal(merged.points[0], merged.points[-1])
+
+
+def test_union_backend_selection():
+    """'auto'はpathopsを選び、'none'/falseでは統合しない。不明な名前はエラーになること"""
+    assert RoundCornersEffect({}).union_backend == 'pathops'
+    assert RoundCornersEffect({'union': 'auto'}).union_backend == 'pathops'
+    if RoundCornersEffect({})._boolean_ops_available:
+        assert RoundCornersEffect({'union': 'booleanoperations'}).union_backend == 'booleanoperations'
+        assert RoundCornersEffect({'union': 'boolean_operations'}).union_backend == 'booleanoperations'
+    assert RoundCornersEffect({'union': 'none'}).union_backend == 'none'
+    assert RoundCornersEffect({'union': False}).union_backend == 'none'
+    with pytest.raises(ValueError):
+        RoundCornersEffect({'union': 'skia'})
+
+
+@pytest.mark.parametrize("cff", [False, True])
+@pytest.mark.parametrize("union", ["pathops", "booleanoperations"])
+def test_round_corners_with_union(cff, union):
+    """統合後の輪郭に角丸処理が行われ、逐次・並列の出力が一致すること"""
+    if union == "booleanoperations":
+        pytest.importorskip("booleanOperations")
+    data = build_font({"cross": CROSS}, cff, cmap={0x5341: "cross"}, family="Union Test")
+    outputs = []
+    for workers in (1, 2):
+        font = TTFont(io.BytesIO(data))
+        font.recalcTimestamp = False
+        effect = RoundCornersEffect({'radius': 20, 'quality_level': 'medium', 'union': union, 'workers': workers})
+        font = effect.apply(font)
+        assert effect.counters['glyphs_processed'] == 1
+        assert effect.timings.calls['union'] >= 1
+        buf = io.BytesIO()
+        font.save(buf)
+        outputs.append(buf.getvalue())
+    assert outputs[0] == outputs[1]
+
+    font = TTFont(io.BytesIO(outputs[0]))
+    pen = GlyphOutlinePen()
+    font.getGlyphSet()["cross"].draw(pen)
+    # 十字は統合されて1つの輪郭になる
+    assert pen.outline.num_contours == 1
+
+
+if __name__ == "__main__":
+    test_skia_round_trip_keeps_curves()
+    test_pathops_union_merges_overlaps()
+    for cubic in (False, True):
+        test_boolean_operations_union_merges_overlaps(cubic)
+    test_union_backend_selection()
+    for cff in (False, True):
+        for union in ("pathops", "booleanoperations"):
+            test_round_corners_with_union(cff, union)
+    print("✅ パス統合（Union）バックエンドのテストが成功しました")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+バイト列からバイト列への処理（FontProcessor.process_bytes / font_processor.process_bytes）の検証テスト
+
+確認内容:
+- 出力が、同じ設定でファイルを読み書きするrun()の出力と一致すること（TrueType / CFF）
+- bytes / bytearray / memoryview / mmap のどれを渡しても同じ結果になること
+- 処理中にファイルを開かないこと（input_font / output_font のない設定でも使えること）
+- mmapのVariable Fontをvariation指定でインスタンス化できること
+- パラメータスイープの設定ではValueErrorになること
+"""
+
+import builtins
+import io
+import mmap
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fontTools.ttLib import TTFont
+
+import font_processor
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+from test_variable_masters import build_variable_font
+
+EFFECTS = [{"name": "round_corners", "params": {"radius": 30, "quality_level": "medium"}}]
+
+
+def _font_bytes(cff):
+    buf = io.BytesIO()
+    build_test_font(cff=cff, glyph_count=12).save(buf)
+    return buf.getvalue()
+
+
+def _tables(data):
+    """保存時刻（head）以外のテーブルのバイト列"""
+    font = TTFont(io.BytesIO(data))
+    return {tag: font.reader[tag] for tag in font.reader.keys() if tag != "head"}
+
+
+def _run_with_files(tmp_path, data, **config):
+    input_path, output_path = tmp_path / "input.font", tmp_path / "output.font"
+    input_path.write_bytes(data)
+    FontProcessor(config_dict=dict(config, input_font=str(input_path), output_font=str(output_path))).run()
+    return output_path.read_bytes()
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_matches_file_run(tmp_path, cff):
+    """run()の出力と一致し、入力の型によらず同じ結果になること"""
+    data = _font_bytes(cff)
+    expected = _tables(_run_with_files(tmp_path, data, effects=EFFECTS))
+    processor = FontProcessor(config_dict={"effects": EFFECTS}, require_paths=False)
+    assert _tables(processor.process_bytes(data)) == expected
+    assert processor.report()["counters"]["corners_rounded"] > 0
+    for source in (bytearray(data), memoryview(data)):
+        assert _tables(font_processor.process_bytes(source, {"effects": EFFECTS})) == expected
+
+    path = tmp_path / "mapped.font"
+    path.write_bytes(data)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        assert _tables(font_processor.process_bytes(mapped, {"effects": EFFECTS})) == expected
+
+
+def test_no_file_access(monkeypatch):
+    """処理中にファイルを開かないこと"""
+    data = _font_bytes(cff=True)
+    # インポートや初回だけの読み込みを済ませておく
+    font_processor.process_bytes(data, {"effects": EFFECTS})
+
+    def no_open(*args, **kwargs):
+        raise AssertionError(f"process_bytes must not open files: {args}")
+
+    monkeypatch.setattr(builtins, "open", no_open)
+    monkeypatch.setattr(io, "open", no_open)
+    output = font_processor.process_bytes(data, {"effects": EFFECTS, "workers": 1})
+    assert TTFont(io.BytesIO(output))["CFF "].cff.topDictIndex[0].CharStrings
+
+
+def test_mmap_variable_font_instancing(tmp_path):
+    """mmapのVariable Fontをvariation指定でインスタンス化して処理できること"""
+    data = build_variable_font(cff=False)
+    config = {"effects": [{"name": "round_corners", "params": {"radius": 20}}], "variation": {"wght": 650}}
+    expected = _tables(_run_with_files(tmp_path, data, **config))
+    path = tmp_path / "variable.ttf"
+    path.write_bytes(data)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        output = font_processor.process_bytes(mapped, config)
+    assert "fvar" not in TTFont(io.BytesIO(output))
+    assert _tables(output) == expected
+
+
+def test_sweep_rejected():
+    """パラメータスイープの設定は使えないこと"""
+    with pytest.raises(ValueError):
+        font_processor.process_bytes(b"", {"effects": [{"name": "round_corners", "params": {"radius": [10, 20]}}]})
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    for cff in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_matches_file_run(pathlib.Path(tmp), cff)
+    monkeypatch = _MonkeyPatch()
+    try:
+        test_no_file_access(monkeypatch)
+    finally:
+        monkeypatch.undo()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_mmap_variable_font_instancing(pathlib.Path(tmp))
+    test_sweep_rejected()
+    print("✅ バイト列の処理のテストが成功しました")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+角丸処理のパラメータスイープ（radiusに数値のリストを指定）の検証テスト
+
+確認内容:
+- 半径ごとの出力が、その半径を1つだけ指定して個別に実行した結果とバイト単位で一致すること
+  （TrueType・CFFのどちらでも、並列ワーカーを使う場合も）
+- グリフのデコードはスイープ全体で1度だけ行われること
+- 出力先は output_font の {radius} を置き換えるか、拡張子の前に _r<半径> を付けたものになること
+- レポートに半径ごとの出力先と集計が入ること
+- radiusのリストが不正な場合（数値以外・重複・複数のエフェクトに指定）はValueErrorになること
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from effects.glyph_outline import GlyphOutline
+from effects.run_config import RunConfig
+from font_fixtures import build_font
+from font_processor import FontProcessor
+
+RADII = [0, 10, 25, 60]
+PARAMS = {"quality_level": "medium", "union": "none"}
+
+# 角の多いグリフ（長方形・L字・穴のある枠）
+SHAPES = {
+    "box": [[(100, 0), (100, 700), (500, 700), (500, 0)]],
+    "ell": [[(80, 0), (80, 700), (200, 700), (200, 120), (520, 120), (520, 0)]],
+    "frame": [[(50, 0), (50, 700), (600, 700), (600, 0)], [(150, 100), (500, 100), (500, 600), (150, 600)]],
+}
+
+
+def _font_bytes(cff):
+    glyphs = {"space": []}
+    for name, contours in SHAPES.items():
+        # CFFの外側の輪郭は反時計回り
+        glyphs[name] = [points[::-1] if cff else points for points in contours]
+    return build_font(glyphs, cff, cmap={0x20: "space", 0x41: "box", 0x42: "ell", 0x43: "frame"}, family="Sweep Test")
+
+
+def _processor(input_path, output_path, radius, workers=1):
+    processor = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(output_path),
+        "effects": [{"name": "round_corners", "params": dict(PARAMS, radius=radius)}],
+        "workers": workers,
+    })
+    original_save = processor.save_font
+
+    def save_font(font, path=None):
+        # 保存時刻で head.modified が変わらないようにする
+        font.recalcTimestamp = False
+        original_save(font, path)
+
+    processor.save_font = save_font
+    return processor
+
+
+@pytest.mark.parametrize("cff,workers", [(False, 1), (True, 1), (False, 2), (True, 2)])
+def test_sweep_matches_single_runs(tmp_path, cff, workers):
+    """半径ごとの出力が個別に実行した結果と一致すること"""
+    input_path = tmp_path / "input.font"
+    input_path.write_bytes(_font_bytes(cff))
+    report = _processor(input_path, tmp_path / "sweep.font", RADII, workers).run()
+
+    assert [entry["radius"] for entry in report["sweep"]] == RADII
+    assert report["counters"]["errors"] == 0
+    total = 0
+    outputs = set()
+    for entry in report["sweep"]:
+        radius = entry["radius"]
+        assert entry["output_font"] == str(tmp_path / f"sweep_r{radius}.font")
+        single = tmp_path / f"single_r{radius}.font"
+        single_report = _processor(input_path, single, radius).run()
+        output = open(entry["output_font"], "rb").read()
+        assert output == single.read_bytes()
+        outputs.add(output)
+        assert entry["counters"].get("corners_rounded", 0) == single_report["counters"]["corners_rounded"]
+        total += entry["counters"].get("corners_rounded", 0)
+    assert report["counters"]["corners_rounded"] == total > 0
+    assert report["sweep"][0]["counters"] == {}
+    # 半径ごとに異なる結果になっていること
+    assert len(outputs) == len(RADII)
+
+
+def test_decodes_once(tmp_path, monkeypatch):
+    """グリフのデコードがスイープ全体で1度だけ行われること"""
+    input_path = tmp_path / "input.ttf"
+    input_path.write_bytes(_font_bytes(cff=False))
+    decoded = []
+    from_glyf = GlyphOutline.from_glyf
+
+    def counting_from_glyf(glyph):
+        decoded.append(glyph)
+        return from_glyf(glyph)
+
+    monkeypatch.setattr(GlyphOutline, "from_glyf", staticmethod(counting_from_glyf))
+    _processor(input_path, tmp_path / "sweep.ttf", RADII).run()
+    assert len(decoded) == len(SHAPES)
+
+
+def test_sweep_output_names():
+    """出力先の命名"""
+    config = {"input_font": "in.ttf", "effects": [{"name": "round_corners", "params": {"radius": [10, 12.5]}}]}
+    run_config = RunConfig.from_dict(dict(config, output_font="out/font.ttf"))
+    assert (run_config.sweep, run_config.sweep_effect) == ((10, 12.5), 0)
+    assert run_config.sweep_output(10) == "out/font_r10.ttf"
+    assert run_config.sweep_output(12.5) == "out/font_r12.5.ttf"
+    run_config = RunConfig.from_dict(dict(config, output_font="out/r{radius}/font.otf"))
+    assert run_config.sweep_output(10) == "out/r10/font.otf"
+    assert RunConfig.from_dict(dict(config, effects=[{"name": "round_corners", "params": {"radius": 10}}],
+                                    output_font="out.ttf")).sweep == ()
+
+
+@pytest.mark.parametrize("effects", [
+    [{"name": "round_corners", "params": {"radius": []}}],
+    [{"name": "round_corners", "params": {"radius": [10, "large"]}}],
+    [{"name": "round_corners", "params": {"radius": [10, 10]}}],
+    [{"name": "round_corners", "params": {"radius": [10, 20]}}, {"name": "round_corners", "params": {"radius": [5, 8]}}],
+])
+def test_invalid_sweep(effects):
+    """不正なradiusのリストはエラーになること"""
+    with pytest.raises(ValueError):
+        FontProcessor(config_dict={"input_font": "in.ttf", "output_font": "out.ttf", "effects": effects})
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, target.__dict__[name]))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+
+    for cff, workers in ((False, 1), (True, 1), (False, 2), (True, 2)):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_sweep_matches_single_runs(pathlib.Path(tmp), cff, workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch = _MonkeyPatch()
+        try:
+            test_decodes_once(pathlib.Path(tmp), monkeypatch)
+        finally:
+            monkeypatch.undo()
+    test_sweep_output_names()
+    test_invalid_sweep([{"name": "round_corners", "params": {"radius": [10, 10]}}])
+    print("✅ パラメータスイープのテストが成功しました")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+実行設定（effects/run_config.py の RunConfig）の検証テスト
+
+確認内容:
+- 既定値（workers・pipeline・quality_level）と品質レベルの閾値が生成時に解決されること
+- 引数（CLIの指定）が設定ファイルの値より優先されること
+- 設定が変更できず、ワーカープロセスに渡せる（pickleできる）こと
+- 不正な設定はFontProcessorの生成時にValueErrorになること
+- エフェクトは設定ファイルを読まず、FontProcessorから渡された実行設定の品質レベルを使うこと
+- workers / glyph_cache / corner_catalogは実行設定がエフェクト個別のparamsより優先されること
+"""
+
+import builtins
+import dataclasses
+import os
+import pickle
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from effects.base_effect import BaseEffect
+from effects.round_corners_effect import RoundCornersEffect
+from effects.run_config import QUALITY_PRESETS, EffectConfig, RunConfig
+from font_processor import FontProcessor
+
+CONFIG = {
+    "input_font": "in.ttf",
+    "output_font": "out.ttf",
+    "effects": [{"name": "round_corners", "params": {"radius": 20, "steps": [1, 2]}}],
+}
+
+
+def test_defaults():
+    """既定値と品質レベルの閾値が解決されること"""
+    run_config = RunConfig.from_dict(CONFIG)
+    assert run_config.workers == 1
+    assert run_config.pipeline == "effect"
+    assert run_config.quality_level == "medium"
+    assert run_config.quality is QUALITY_PRESETS["medium"]
+    assert run_config.variation is None
+    assert run_config.effects == (EffectConfig("round_corners", {"radius": 20, "steps": (1, 2)}),)
+
+    run_config = RunConfig.from_dict(dict(CONFIG, quality_level="HIGH", workers=3, variation={"wght": "700"}))
+    assert run_config.quality.min_reduction_ratio == 0.7
+    assert run_config.workers == 3
+    assert run_config.variation == {"wght": 700.0}
+
+
+def test_arguments_override_config():
+    """引数の指定が設定ファイルより優先されること"""
+    config = dict(CONFIG, workers=2, pipeline="effect", glyph_cache=False)
+    run_config = RunConfig.from_dict(config, workers=4, glyph_cache="/tmp/cache.sqlite", pipeline="glyph")
+    assert (run_config.workers, run_config.glyph_cache, run_config.pipeline) == (4, "/tmp/cache.sqlite", "glyph")
+
+
+def test_immutable_and_picklable():
+    """設定は変更できず、pickleで同じ値に戻ること"""
+    run_config = RunConfig.from_dict(dict(CONFIG, glyph_cache={"path": "/tmp/cache.sqlite"}))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        run_config.workers = 8
+    params = run_config.effects[0].params
+    with pytest.raises(TypeError):
+        params["radius"] = 30
+    with pytest.raises(TypeError):
+        run_config.glyph_cache.update(path="/tmp/other.sqlite")
+    # 元の辞書を書き換えても影響しない
+    config = {**CONFIG, "effects": [{"name": "round_corners", "params": {"radius": 20}}]}
+    run_config = RunConfig.from_dict(config)
+    config["effects"][0]["params"]["radius"] = 99
+    assert run_config.effects[0].params["radius"] == 20
+    assert pickle.loads(pickle.dumps(run_config)) == run_config
+    assert dict(params, radius=30)["radius"] == 30
+
+
+@pytest.mark.parametrize("config", [
+    {"output_font": "out.ttf"},
+    dict(CONFIG, quality_level="ultra"),
+    dict(CONFIG, workers="many"),
+    dict(CONFIG, pipeline="fused"),
+    dict(CONFIG, effects=[{"params": {}}]),
+    dict(CONFIG, effects=[{"name": "round_corners", "params": [20]}]),
+    dict(CONFIG, variation={"wght": "bold"}),
+])
+def test_invalid_config(config):
+    """不正な設定はFontProcessorの生成時にエラーになること"""
+    with pytest.raises(ValueError):
+        FontProcessor(config_dict=config)
+
+
+class _RecordingEffect(BaseEffect):
+    received = []
+
+    def apply(self, font, **kwargs):
+        _RecordingEffect.received.append(kwargs)
+        return font
+
+
+class _Registry:
+    def load(self, name):
+        return _RecordingEffect
+
+
+def test_effects_receive_run_config():
+    """各エフェクトにFontProcessorの実行設定が渡されること"""
+    _RecordingEffect.received = []
+    processor = FontProcessor(config_dict=dict(CONFIG, quality_level="low", workers=2), registry=_Registry())
+    processor.apply_effects(font=object())
+    kwargs, = _RecordingEffect.received
+    assert kwargs["run_config"] is processor.run_config
+    assert kwargs["run_config"].quality_level == "low"
+    assert kwargs["workers"] == 2
+    assert kwargs["radius"] == 20
+
+
+def test_run_config_overrides_params():
+    """workers / glyph_cache / corner_catalogは実行設定を優先し、実行設定にないものだけparamsを使うこと"""
+    effect = EffectConfig("round_corners", {"radius": 20, "workers": 8, "glyph_cache": "params.sqlite",
+                                            "corner_catalog": "params.npz"})
+    kwargs = RunConfig.from_dict(CONFIG, workers=2, glyph_cache="run.sqlite").effect_kwargs(effect)
+    assert (kwargs["workers"], kwargs["glyph_cache"], kwargs["corner_catalog"]) == (2, "run.sqlite", "params.npz")
+
+    instance = RoundCornersEffect({"radius": 20, "workers": 8, "corner_catalog": "params.npz"})
+    assert instance._run_setting({"workers": 2}, "workers") == 2
+    assert instance._run_setting({"corner_catalog": None}, "corner_catalog") == "params.npz"
+
+
+def test_effect_does_not_read_config_file(tmp_path, monkeypatch):
+    """エフェクトは作業ディレクトリのconfig.yamlを読まず、実行設定（なければmedium）の品質レベルを使うこと"""
+    (tmp_path / "config.yaml").write_text("quality_level: high\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    def no_open(*args, **kwargs):
+        raise AssertionError(f"effects must not open files: {args}")
+
+    monkeypatch.setattr(builtins, "open", no_open)
+    effect = RoundCornersEffect({"radius": 20})
+    low = RunConfig.from_dict(dict(CONFIG, quality_level="low"))
+    assert effect._resolve_settings(10, {"run_config": low}) == (20, 160.0, 110, 0.5, "low")
+    assert effect._resolve_settings(10, {})[-1] == "medium"
+    # paramsのquality_levelは実行設定より優先
+    effect = RoundCornersEffect({"radius": 20, "quality_level": "high"})
+    assert effect._resolve_settings(10, {"run_config": low})[1:] == (175.0, 160, 0.7, "high")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    class _MonkeyPatch:
+        def __init__(self):
+            self.saved = []
+            self.cwd = os.getcwd()
+
+        def chdir(self, path):
+            os.chdir(path)
+
+        def setattr(self, target, name, value):
+            self.saved.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+        def undo(self):
+            for target, name, value in reversed(self.saved):
+                setattr(target, name, value)
+            os.chdir(self.cwd)
+
+    test_defaults()
+    test_arguments_override_config()
+    test_immutable_and_picklable()
+    for config in ({"output_font": "out.ttf"}, dict(CONFIG, quality_level="ultra"), dict(CONFIG, pipeline="fused")):
+        test_invalid_config(config)
+    test_effects_receive_run_config()
+    test_run_config_overrides_params()
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch = _MonkeyPatch()
+        try:
+            test_effect_does_not_read_config_file(pathlib.Path(tmp), monkeypatch)
+        finally:
+            monkeypatch.undo()
+    print("✅ 実行設定のテストが成功しました")
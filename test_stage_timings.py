@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+段階ごとの所要時間計測（FontProcessor.run のレポート / --metrics-json）の検証テスト
+
+確認内容:
+- load_font / instancing / 各エフェクト / save_font の時間がレポートに含まれること
+- 角丸エフェクトの内訳に decode / auto_join / rounding / encode が含まれること
+- metrics_json を指定すると同じレポートがJSONで書き出されること
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from font_fixtures import build_test_font
+from font_processor import FontProcessor
+from effects.metrics import StageTimer
+
+
+def _run_with_metrics(cff):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        input_path = os.path.join(tmpdir, "input.otf")
+        metrics_path = os.path.join(tmpdir, "metrics.json")
+        build_test_font(cff=cff).save(input_path)
+        processor = FontProcessor.from_config_dict({
+            "input_font": input_path,
+            "output_font": os.path.join(tmpdir, "output.otf"),
+            "quality_level": "medium",
+            "effects": [{"name": "round_corners", "params": {"radius": 40}}],
+        })
+        report = processor.run(metrics_json=metrics_path)
+        with open(metrics_path, encoding="utf-8") as f:
+            written = json.load(f)
+        return report, written
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_report_contains_all_stages():
+    """レポートに全段階の時間が含まれ、JSON出力と一致すること"""
+    for cff in (False, True):
+        report, written = _run_with_metrics(cff)
+        assert written == report
+
+        timings = report["timings"]
+        for key in ("load_font", "instancing", "save_font", "total"):
+            assert timings[key] >= 0
+        assert [e["name"] for e in timings["effects"]] == ["round_corners"]
+
+        effect = timings["effects"][0]
+        for stage in ("decode", "auto_join", "rounding", "encode"):
+            assert stage in effect["stages"], stage
+            assert effect["stages"][stage]["calls"] > 0
+        # 内部段階の合計はエフェクト全体の時間を超えない（逐次処理の場合）
+        assert sum(v["seconds"] for v in effect["stages"].values()) <= effect["seconds"] + 1e-3
+        assert report["counters"]["corners_rounded"] > 0
+
+
+def test_stage_timer_lap_and_merge():
+    """StageTimer のlap/mergeで秒数と回数が加算されること"""
+    timer = StageTimer()
+    t = timer.start()
+    t = timer.lap("decode", t)
+    timer.lap("decode", t)
+    with timer.stage("encode"):
+        pass
+
+    other = StageTimer()
+    other.merge(timer)
+    other.merge(timer.as_dict())
+    assert other.calls == {"decode": 4, "encode": 2}
+    assert other.total() >= 0
+
+
+if __name__ == "__main__":
+    test_report_contains_all_stages()
+    test_stage_timer_lap_and_merge()
+    print("✅ 段階ごとの時間計測のテストが成功しました")
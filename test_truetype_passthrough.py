@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+TrueTypeの未変更グリフのパススルー検証テスト
+
+確認内容:
+- 角丸処理で変更されないグリフは展開されず、元のglyfバイト列のまま保存されること
+- 変更したグリフを参照するコンポジットグリフのバウンディングボックスが更新されること
+- head / maxp / hhea の値が、全グリフを展開して再計算した場合と一致すること
+"""
+
+import io
+import math
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font, draw_glyph
+
+GLYPH_ORDER = [".notdef", "square", "polygon", "square_comp", "polygon_comp", "nested"]
+
+
+def _build_font():
+    """
+    square: 矩形（角丸処理で変更される）
+    polygon: 正24角形（どの角も閾値より緩やかなので変更されない）
+    *_comp / nested: それぞれを参照するコンポジットグリフ
+    """
+    polygon = []
+    for i in range(24):
+        angle = -2 * math.pi * i / 24
+        polygon.append((round(300 + 250 * math.cos(angle)), round(350 + 250 * math.sin(angle))))
+    glyphs = {
+        ".notdef": draw_glyph([]),
+        "square": draw_glyph([[(100, 0), (100, 700), (500, 700), (500, 0)]]),
+        "polygon": draw_glyph([polygon]),
+    }
+
+    for name, components in (("square_comp", [("square", 60)]),
+                             ("polygon_comp", [("polygon", 60)]),
+                             ("nested", [("square_comp", 10), ("polygon", -40)])):
+        pen = TTGlyphPen(glyphs)
+        for base, dx in components:
+            pen.addComponent(base, (1, 0, 0, 1, dx, 0))
+        glyphs[name] = pen.glyph()
+
+    return build_font(glyphs, cmap={0x41: "square", 0x4F: "polygon"}, family="Pass Through")
+
+
+def _raw_glyph_data(data):
+    """保存済みフォントの各グリフのglyfバイト列"""
+    glyf = TTFont(io.BytesIO(data))["glyf"]
+    return {name: getattr(glyf.glyphs[name], "data", b"") for name in GLYPH_ORDER}
+
+
+def _metrics(font):
+    head, maxp, hhea = font["head"], font["maxp"], font["hhea"]
+    return (
+        [getattr(head, k) for k in ("xMin", "yMin", "xMax", "yMax", "flags")],
+        [getattr(maxp, k) for k in ("numGlyphs", "maxPoints", "maxContours", "maxCompositePoints",
+                                   "maxCompositeContours", "maxComponentElements", "maxComponentDepth")],
+        [getattr(hhea, k) for k in ("advanceWidthMax", "minLeftSideBearing", "minRightSideBearing", "xMaxExtent")],
+    )
+
+
+def _round(data, workers=1):
+    font = TTFont(io.BytesIO(data))
+    font.recalcTimestamp = False
+    effect = RoundCornersEffect({'radius': 40, 'quality_level': 'medium', 'workers': workers})
+    font = effect.apply(font)
+    return font, effect
+
+
+def test_unchanged_glyphs_are_not_expanded():
+    """変更されないグリフはテーブル内で展開されず、元のバイト列のまま保存されること"""
+    data = _build_font()
+    original = _raw_glyph_data(data)
+
+    font, effect = _round(data)
+    assert effect.counters['glyphs_processed'] == 1
+    glyphs = font["glyf"].glyphs
+    for name in ("polygon", "polygon_comp"):
+        assert glyphs[name].data == original[name]
+    # 変更されたグリフと、それを（間接的に）参照するコンポジットグリフだけが展開される
+    for name in ("square", "square_comp", "nested"):
+        assert not hasattr(glyphs[name], "data")
+
+    buf = io.BytesIO()
+    font.save(buf)
+    saved = _raw_glyph_data(buf.getvalue())
+    assert saved["polygon"] == original["polygon"]
+    assert saved["polygon_comp"] == original["polygon_comp"]
+    assert saved["square"] != original["square"]
+
+
+def test_metrics_match_full_recalculation():
+    """head / maxp / hhea とコンポジットのバウンディングボックスが全展開での再計算と一致すること"""
+    data = _build_font()
+    for workers in (1, 2):
+        font, _ = _round(data, workers)
+        buf = io.BytesIO()
+        font.save(buf)
+        output = buf.getvalue()
+
+        # 全グリフを展開してfontTools自身に再計算させた結果と比べる
+        reference = TTFont(io.BytesIO(output))
+        reference.recalcTimestamp = False
+        glyf = reference["glyf"]
+        for name in GLYPH_ORDER:
+            glyf[name]
+        buf = io.BytesIO()
+        reference.save(buf)
+        recalculated = TTFont(io.BytesIO(buf.getvalue()))
+
+        saved = TTFont(io.BytesIO(output))
+        assert _metrics(saved) == _metrics(recalculated)
+        for name in GLYPH_ORDER[1:]:
+            saved_glyph, expected = saved["glyf"][name], recalculated["glyf"][name]
+            assert (saved_glyph.xMin, saved_glyph.yMin, saved_glyph.xMax, saved_glyph.yMax) == \
+                (expected.xMin, expected.yMin, expected.xMax, expected.yMax)
+
+
+if __name__ == "__main__":
+    test_unchanged_glyphs_are_not_expanded()
+    test_metrics_match_full_recalculation()
+    print("✅ TrueType未変更グリフのパススルーのテストが成功しました")
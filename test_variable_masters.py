@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Variable Fontのマスター単位の角丸処理（effects/variable_masters.py）の検証テスト
+
+確認内容:
+- variationを指定しない場合、出力がVariable Font（fvar + gvar / CFF2）のまま保たれること
+- TrueType（glyf + gvar）・CFF2のどちらでも、各マスターの位置の輪郭が、そのマスターを静的フォントとして
+  角丸処理した結果と一致すること
+- マスターの間の位置では、丸めた前後のマスターの輪郭が元のフォントと同じ割合で補間されること
+- pipeline: glyph でも、Variable Fontはエフェクトごとの処理（全マスター）にまわされること
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fontTools import varLib
+from fontTools.designspaceLib import AxisDescriptor, DesignSpaceDocument, SourceDescriptor
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from effects.round_corners_effect import RoundCornersEffect
+from font_fixtures import build_font
+from font_processor import FontProcessor
+
+# (wghtの値, 縦画の幅)。デフォルトは400
+MASTERS = ((100, 40), (400, 100), (900, 300))
+PARAMS = {"radius": 20, "quality_level": "medium", "union": "none"}
+
+
+def _box(stem, cff):
+    """角が4つの縦長の長方形（CFFは反時計回り、TrueTypeは時計回り）"""
+    points = [(100, 100), (100, 600), (100 + stem, 600), (100 + stem, 100)]
+    return [points[::-1] if cff else points]
+
+
+def build_master(stem, cff):
+    return TTFont(io.BytesIO(build_font({"box": _box(stem, cff), "space": []}, cff,
+                                        cmap={0x41: "box", 0x20: "space"}, family="Master Test",
+                                        metrics={"box": (700, 100)})))
+
+
+def build_variable_font(cff):
+    """3つのマスター（wght 100 / 400 / 900）からなるVariable Font（cff=TrueならCFF2）"""
+    doc = DesignSpaceDocument()
+    axis = AxisDescriptor()
+    axis.tag, axis.name, axis.minimum, axis.default, axis.maximum = "wght", "Weight", 100, 400, 900
+    doc.addAxis(axis)
+    for weight, stem in MASTERS:
+        source = SourceDescriptor()
+        source.font = build_master(stem, cff)
+        source.location = {"Weight": weight}
+        source.name = f"master{weight}"
+        doc.addSource(source)
+    font, _, _ = varLib.build(doc)
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _run(tmp_path, data, pipeline="effect", name="output.font"):
+    input_path = tmp_path / "input.font"
+    output_path = tmp_path / name
+    input_path.write_bytes(data)
+    processor = FontProcessor(config_dict={
+        "input_font": str(input_path),
+        "output_font": str(output_path),
+        "effects": [{"name": "round_corners", "params": PARAMS}],
+        "pipeline": pipeline,
+    })
+    original_save = processor.save_font
+
+    def save_font(font):
+        # 保存時刻で head.modified が変わらないようにする
+        font.recalcTimestamp = False
+        original_save(font)
+
+    processor.save_font = save_font
+    report = processor.run()
+    return output_path.read_bytes(), report
+
+
+def _points(font, weight=None):
+    """グリフboxを描画した点の座標（整数に丸める）"""
+    location = {"wght": weight} if weight is not None else None
+    pen = RecordingPen()
+    font.getGlyphSet(location=location)["box"].draw(pen)
+    return [(round(x), round(y)) for _, args in pen.value for x, y in args]
+
+
+def _rounded_static(stem, cff):
+    """マスターを静的フォントとして角丸処理した結果"""
+    font = RoundCornersEffect(dict(PARAMS)).apply(build_master(stem, cff))
+    buf = io.BytesIO()
+    font.save(buf)
+    return TTFont(io.BytesIO(buf.getvalue()))
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_masters_match_static_rounding(tmp_path, cff):
+    """各マスターの位置の輪郭が、マスターを静的フォントとして丸めた結果と一致すること"""
+    output, report = _run(tmp_path, build_variable_font(cff))
+    assert report["counters"]["errors"] == 0
+    assert report["counters"]["corners_rounded"] == 4
+    font = TTFont(io.BytesIO(output))
+    assert "fvar" in font
+    assert ("CFF2" if cff else "gvar") in font
+
+    for weight, stem in MASTERS:
+        expected = _points(_rounded_static(stem, cff))
+        actual = _points(font, weight)
+        assert len(actual) == len(expected) > 4
+        # CFF2のblendは相対座標で丸めるので1単位までの差は許容する
+        tolerance = 1 if cff else 0
+        assert all(abs(a - e) <= tolerance for point, ref in zip(actual, expected) for a, e in zip(point, ref))
+
+
+@pytest.mark.parametrize("cff", [False, True])
+def test_intermediate_location_interpolates(tmp_path, cff):
+    """マスターの間では、丸めたマスターの輪郭が補間されること（点の構成が揃っていること）"""
+    output, _ = _run(tmp_path, build_variable_font(cff))
+    font = TTFont(io.BytesIO(output))
+    regular, bold, middle = _points(font, 400), _points(font, 900), _points(font, 650)
+    assert len(middle) == len(regular) == len(bold)
+    for mid, a, b in zip(middle, regular, bold):
+        assert abs(mid[0] - (a[0] + b[0]) / 2) <= 1
+        assert abs(mid[1] - (a[1] + b[1]) / 2) <= 1
+
+
+def test_glyph_pipeline_uses_masters(tmp_path):
+    """pipeline: glyph でもVariable Fontは全マスターを処理すること"""
+    data = build_variable_font(cff=False)
+    per_effect, _ = _run(tmp_path, data, "effect", "effect.font")
+    fused, report = _run(tmp_path, data, "glyph", "glyph.font")
+    assert fused == per_effect
+    assert [entry["name"] for entry in report["timings"]["effects"]] == ["round_corners"]
+
+
+def test_variable_setting():
+    """不明なvariableの指定はエラーにすること"""
+    assert RoundCornersEffect({"radius": 20}).variable == "masters"
+    assert RoundCornersEffect({"radius": 20, "variable": "DEFAULT"}).variable == "default"
+    with pytest.raises(ValueError):
+        RoundCornersEffect({"radius": 20, "variable": "instances"})
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = pathlib.Path(tmp)
+        for cff in (False, True):
+            test_masters_match_static_rounding(tmp_path, cff)
+            test_intermediate_location_interpolates(tmp_path, cff)
+        test_glyph_pipeline_uses_masters(tmp_path)
+    test_variable_setting()
+    print("✅ Variable Fontのマスター単位の角丸処理のテストが成功しました")